@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlmodel import Session, select
+import traceback
+
+from models.user import User
+from utils.auth import token_manager
+from utils.pwd import verify_password
+from utils.response import (
+    success_response,
+    unauthorized_response,
+    internal_error_response,
+)
+from config.database import get_db
+
+router = APIRouter(
+    prefix="/auth",
+    tags=["认证"],
+)
+
+
+class LoginRequest(BaseModel):
+    phone: str = Field(..., description="手机号", example="18800001234")
+    password: str = Field(..., description="密码", example="")
+
+
+@router.post(
+    "/login",
+    summary="员工登录",
+    description="手机号、密码登录，返回访问令牌（请求头 Authorization: Bearer <令牌>，"
+    "WebSocket 使用查询参数 access_token）",
+    responses={
+        200: {
+            "description": "登录成功",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "code": 200,
+                        "message": "登录成功",
+                        "data": {
+                            "access_token": "eyJhbGciOiJIUzI1NiIs...",
+                            "token_type": "bearer",
+                            "expires_in": 43200,
+                        },
+                    }
+                }
+            },
+        },
+        401: {"description": "手机号或密码错误"},
+    },
+)
+async def login(
+    login_data: LoginRequest,
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """
+    员工登录
+
+    令牌携带所属企业、操作员类型和权限，之后的请求不再查询员工信息
+
+    Args:
+        login_data: 手机号和密码
+        db: 数据库会话
+    """
+    try:
+        user = db.exec(
+            select(User).where(
+                User.phone == login_data.phone.strip(),
+                User.is_deleted == False,
+            )
+        ).first()
+        if (
+            user is None
+            or not user.registered
+            or not user.password
+            or not verify_password(login_data.password, user.password, user.salt or "")
+        ):
+            return unauthorized_response("手机号或密码错误")
+
+        token, expires_in = token_manager.issue(
+            subject=user.user_id,
+            company_id=user.company_id,
+            operator_type=getattr(user.operator_type, "value", user.operator_type),
+            permissions=user.get_permissions(),
+        )
+        return success_response(
+            data={
+                "access_token": token,
+                "token_type": "bearer",
+                "expires_in": expires_in,
+            },
+            message="登录成功",
+        )
+
+    except Exception as e:
+        print(f"员工登录错误: {e}")
+        print(f"完整错误信息: {traceback.format_exc()}")
+        return internal_error_response("登录失败")
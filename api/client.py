@@ -1,697 +1,917 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel, Field
-from uuid import uuid4
-from sqlmodel import Session, select, func, or_, and_
-from typing import Optional
-from datetime import datetime
-from fastapi import Query
-from enum import Enum
-import json
-
-from config.database import get_db
-from utils.response import (
-    success_response,
-    not_found_response,
-    param_error_response,
-    internal_error_response,
-)
-from models.fee import (
-    Fee,
-    FeeListRequest,
-    FeeResponse,
-    FeeListResponse,
-    FeePayRequest,
-    FeeRejectRequest,
-    FeeSettlementRequest,
-)
-from models.account import (
-    Account,
-    AccountRecharge,
-    AccountResponse,
-    PaginatedAccountResponse,
-    BalanceWarningUpdateRequest,
-)
-from models.driver import Driver
-from websocket.manager import send_message_to_type
-from models.enums import OrderStatusEnum, RechargeStatusEnum
-from models.order_detail import OrderDetail, OrderDetailResponse
-from models.driver import Driver
-
-router = APIRouter(
-    prefix="/client",
-    tags=["客户管理"],
-)
-
-
-class SettlementStatusEnum(str, Enum):
-    """
-    结算状态枚举
-    """
-
-    PENDING_SETTLEMENT = "待结算"
-    SETTLED = "已结算"
-
-
-@router.get(
-    "/fee/list",
-    summary="分页查询结算列表",
-    description="分页查询结算信息，支持派单渠道、订单状态、运单号、订单号和时间范围筛选",
-)
-async def get_settlement_list(
-    page: int = Query(1, description="当前页码", ge=1),
-    size: int = Query(10, description="每页数量", ge=1),
-    dispatch_channel: Optional[str] = Query(None, description="派单渠道（可选）"),
-    status: Optional[SettlementStatusEnum] = Query(
-        None, description="状态（可选，待结算/已结算）"
-    ),
-    path_id: Optional[str] = Query(None, description="运单号搜索（可选）"),
-    order_id: Optional[str] = Query(None, description="订单号搜索（可选）"),
-    start_time: Optional[str] = Query(None, description="开始时间（格式：YYYY-MM-DD）"),
-    end_time: Optional[str] = Query(None, description="结束时间（格式：YYYY-MM-DD）"),
-    db: Session = Depends(get_db),
-) -> JSONResponse:
-    """
-    分页查询结算列表
-    """
-    try:
-        # 基础查询构建
-        query = select(Fee)
-
-        # **状态筛选逻辑**
-        if status:
-            if status == SettlementStatusEnum.PENDING_SETTLEMENT:
-                # 如果前端传的是 PENDING_SETTLEMENT，实际查询 PENDING_PAYMENT
-                query = query.where(Fee.status == OrderStatusEnum.PENDING_PAYMENT)
-            else:
-                # 其他状态（如 SETTLED）直接查询
-                query = query.where(Fee.status == status)
-        else:
-            # 如果未指定状态，查询待支付和已结算两种状态
-            query = query.where(
-                or_(
-                    Fee.status == OrderStatusEnum.PENDING_PAYMENT,
-                    Fee.status == OrderStatusEnum.SETTLED,
-                )
-            )
-
-        # 派单渠道筛选
-        if dispatch_channel and dispatch_channel.strip():
-            query = query.where(Fee.dispatch_channel == dispatch_channel.strip())
-
-        # 运单号筛选
-        if path_id and path_id.strip():
-            search_term = f"%{path_id.strip()}%"
-            query = query.where(Fee.path_id.like(search_term))
-
-        # 订单号筛选
-        if order_id and order_id.strip():
-            search_term = f"%{order_id.strip()}%"
-            query = query.where(Fee.order_id.like(search_term))
-
-        # 时间范围筛选
-        if start_time and end_time:
-            try:
-                start_date = datetime.strptime(start_time, "%Y-%m-%d")
-                end_date = datetime.strptime(end_time, "%Y-%m-%d")
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                query = query.where(
-                    Fee.order_time >= start_date, Fee.order_time <= end_date
-                )
-            except ValueError:
-                return param_error_response("时间格式不正确，请使用YYYY-MM-DD格式")
-
-        # **计算总数（同样应用状态映射逻辑）**
-        count_query = select(func.count(Fee.fee_id))
-
-        if status:
-            if status == SettlementStatusEnum.PENDING_SETTLEMENT:
-                count_query = count_query.where(
-                    Fee.status == OrderStatusEnum.PENDING_PAYMENT
-                )
-            else:
-                count_query = count_query.where(Fee.status == status)
-        else:
-            count_query = count_query.where(
-                or_(
-                    Fee.status == OrderStatusEnum.PENDING_PAYMENT,
-                    Fee.status == OrderStatusEnum.SETTLED,
-                )
-            )
-
-        # 应用其他筛选条件
-        if dispatch_channel and dispatch_channel.strip():
-            count_query = count_query.where(
-                Fee.dispatch_channel == dispatch_channel.strip()
-            )
-        if path_id and path_id.strip():
-            search_term = f"%{path_id.strip()}%"
-            count_query = count_query.where(Fee.path_id.like(search_term))
-        if order_id and order_id.strip():
-            search_term = f"%{order_id.strip()}%"
-            count_query = count_query.where(Fee.order_id.like(search_term))
-        if start_time and end_time:
-            try:
-                start_date = datetime.strptime(start_time, "%Y-%m-%d")
-                end_date = datetime.strptime(end_time, "%Y-%m-%d")
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                count_query = count_query.where(
-                    Fee.order_time >= start_date, Fee.order_time <= end_date
-                )
-            except ValueError:
-                pass  # 前面已经处理过错误
-
-        total = db.exec(count_query).first()
-
-        # 分页处理
-        offset = (page - 1) * size
-        total_pages = (total + size - 1) // size
-
-        query = query.offset(offset).limit(size)
-        query = query.order_by(Fee.order_time.desc())
-
-        fees = db.exec(query).all()
-
-        # **构建响应数据（将 PENDING_PAYMENT 映射回 PENDING_SETTLEMENT）**
-        fee_items = []
-        for fee in fees:
-            # 如果状态是 PENDING_PAYMENT，返回给前端时改成 PENDING_SETTLEMENT
-            display_status = (
-                SettlementStatusEnum.PENDING_SETTLEMENT
-                if fee.status == OrderStatusEnum.PENDING_PAYMENT
-                else fee.status
-            )
-
-            fee_items.append(
-                FeeResponse(
-                    fee_id=fee.fee_id,
-                    path_id=fee.path_id,
-                    order_id=fee.order_id,
-                    status=display_status,  # 映射后的状态
-                    total_price=fee.total_price,
-                    driver_fee=fee.driver_fee,
-                    highway_fee=fee.highway_fee,
-                    parking_fee=fee.parking_fee,
-                    carry_fee=fee.carry_fee,
-                    wait_fee=fee.wait_fee,
-                    order_time=fee.order_time.isoformat() if fee.order_time else "",
-                    highway_bill_imgs=fee.highway_bill_imgs,
-                    parking_bill_imgs=fee.parking_bill_imgs,
-                    company_id=fee.company_id,
-                    driver_account_id=fee.driver_account_id,
-                    created_at=fee.created_at.isoformat(),
-                    updated_at=fee.updated_at.isoformat(),
-                )
-            )
-
-        response_data = FeeListResponse(
-            items=fee_items,
-            total=total,
-            page=page,
-            size=size,
-            total_pages=total_pages,
-        )
-
-        return success_response(
-            data=jsonable_encoder(response_data),
-            message="获取结算列表成功",
-        )
-
-    except Exception as e:
-        return internal_error_response("获取结算列表失败")
-
-
-@router.patch("/reject", summary="驳回支付")
-async def reject_fee(
-    data: FeeRejectRequest, db: Session = Depends(get_db)
-) -> JSONResponse:
-    """
-    驳回支付
-    - 驳回类型为bill时: 需要填写驳回金额和原因
-    - 驳回类型为receipt时: 只需要填写驳回原因
-    """
-    try:
-        # 查询费用记录
-        fee = db.exec(select(Fee).where(Fee.fee_id == data.fee_id)).first()
-        if not fee:
-            return not_found_response("费用记录不存在")
-
-        print("当前支付状态：", fee.status)
-
-        # 检查状态是否允许驳回
-        if fee.status not in [
-            OrderStatusEnum.PENDING_PAYMENT,
-            OrderStatusEnum.APPEALING,
-        ]:
-            return param_error_response("当前状态不允许驳回")
-
-        # 更新费用记录
-        if data.reject_type == "bill":
-            # 费用驳回
-            fee.bill_reject_reason = data.reject_reason
-            if data.reject_highway_fee is not None:
-                fee.highway_fee = max(0, fee.highway_fee - data.reject_highway_fee)
-            if data.reject_parking_fee is not None:
-                fee.parking_fee = max(0, fee.parking_fee - data.reject_parking_fee)
-
-        else:
-            # 回单驳回
-            fee.receipt_reject_reason = data.reject_reason
-
-        # 更新状态为已结算
-        fee.status = OrderStatusEnum.SETTLED
-        fee.updated_at = datetime.utcnow()
-
-        db.add(fee)
-        db.commit()
-        db.refresh(fee)
-
-        push_message = {
-            "type": "reject_fee",
-            "fee_id": fee.fee_id,
-            "status": fee.status,
-            "reject_reason": data.reject_reason,
-            "reject_highway_fee": data.reject_highway_fee,
-            "reject_parking_fee": data.reject_parking_fee,
-        }
-
-        # 推送消息给司机端
-        await send_message_to_type("driver", push_message)
-
-        return success_response(
-            data={"fee_id": fee.fee_id, "status": fee.status}, message="驳回成功"
-        )
-
-    except Exception as e:
-        return internal_error_response("驳回支付失败")
-
-
-@router.patch("/pay", summary="结算")
-async def pay_fee(
-    data: FeeSettlementRequest, db: Session = Depends(get_db)
-) -> JSONResponse:
-    """
-    结算
-    """
-    try:
-        # 查询费用记录
-        fee = db.exec(select(Fee).where(Fee.fee_id == data.fee_id)).first()
-        if not fee:
-            return not_found_response("费用记录不存在")
-
-        # 更新费用表发起结算操作为True
-        fee.settlement_enable = True
-        fee.updated_at = datetime.utcnow()
-
-        db.add(fee)
-        db.commit()
-        db.refresh(fee)
-
-        # 推送消息给平台端
-        push_message = {
-            "type": "pay_fee",
-            "fee_id": fee.fee_id,
-            "status": fee.status,
-        }
-        await send_message_to_type("platform", push_message)
-
-        return success_response(
-            data={"fee_id": fee.fee_id, "status": fee.status}, message="已发起结算"
-        )
-
-    except Exception as e:
-        return internal_error_response("发起结算失败")
-
-
-@router.patch("/recharge", summary="充值")
-async def recharge_fee(
-    data: AccountRecharge, db: Session = Depends(get_db)
-) -> JSONResponse:
-    """
-    充值
-    """
-    try:
-        # 查询账户记录
-        account = db.exec(
-            select(Account).where(Account.company_account_id == data.company_account_id)
-        ).first()
-        if not account:
-            return not_found_response("账户记录不存在")
-
-        # 更新账户充值状态为审核中
-        account.recharge_status = RechargeStatusEnum.UNDER_REVIEW
-        account.updated_at = datetime.utcnow()
-        account.recharge_time = datetime.utcnow()
-        account.recharge_amount = data.recharge_amount
-        account.recharge_name = data.recharge_name
-        account.recharge_phone = data.recharge_phone
-
-        db.add(account)
-        db.commit()
-        db.refresh(account)
-
-        return success_response(
-            data={
-                "company_account_id": account.company_account_id,
-                "recharge_status": account.recharge_status,
-            },
-            message="充值成功",
-        )
-
-    except Exception as e:
-        return internal_error_response("充值失败")
-
-
-@router.get(
-    "/list",
-    summary="分页查询账户列表",
-    description="分页查询所有账户信息",
-    response_model=PaginatedAccountResponse,
-)
-async def get_account_list(
-    page: int = Query(1, description="当前页码", ge=1),
-    size: int = Query(10, description="每页数量", ge=1, le=100),
-    db: Session = Depends(get_db),
-):
-    """
-    分页查询账户列表
-    """
-    try:
-        # 基础查询
-        query = select(Account)
-
-        # 总数查询
-        count_query = select(func.count(Account.company_account_id))
-
-        # 获取总数
-        total = db.exec(count_query).one()
-
-        # 计算分页参数
-        offset = (page - 1) * size
-        total_pages = (total + size - 1) // size
-
-        # 应用分页和排序
-        query = query.offset(offset).limit(size).order_by(Account.created_at.desc())
-
-        # 执行查询
-        accounts = db.exec(query).all()
-
-        # 转换为响应模型
-        account_items = [
-            AccountResponse(
-                company_account_id=account.company_account_id,
-                company_id=account.company_id,
-                created_at=account.created_at,
-                updated_at=account.updated_at,
-                company_account_updatetime=account.company_account_updatetime,
-                company_account_balance=account.company_account_balance,
-                company_account_balance_warning_val=account.company_account_balance_warning_val,
-                company_account_balance_warning_phone=account.company_account_balance_warning_phone,
-                company_account_balance_warning_enable=account.company_account_balance_warning_enable,
-                recharge_status=account.recharge_status,
-                recharge_time=account.recharge_time,
-                recharge_name=account.recharge_name,
-                recharge_phone=account.recharge_phone,
-                recharge_amount=account.recharge_amount,
-                received_amount=account.received_amount,
-            )
-            for account in accounts
-        ]
-
-        # 构建响应
-        response_data = PaginatedAccountResponse(
-            items=account_items,
-            total=total,
-            page=page,
-            size=size,
-            total_pages=total_pages,
-        )
-
-        return response_data
-
-    except Exception as e:
-        return internal_error_response("获取账户列表失败")
-
-
-@router.patch(
-    "/accounts/{company_account_id}/approve-recharge",
-    summary="审核通过充值申请",
-    description="平台端审核通过充值申请，客户账户余额加上到账金额",
-    response_model=AccountResponse,
-)
-async def approve_recharge(
-    company_account_id: str,
-    db: Session = Depends(get_db),
-):
-    """
-    审核通过充值申请
-    """
-    try:
-        # 查询账户
-        account = db.exec(
-            select(Account).where(Account.company_account_id == company_account_id)
-        ).first()
-
-        if not account:
-            return not_found_response("账户记录不存在")
-
-        if account.recharge_status != RechargeStatusEnum.UNDER_REVIEW:
-            return param_error_response("充值状态不正确")
-
-        # 更新账户余额
-        account.company_account_balance += account.received_amount
-
-        # 更新充值状态和时间
-        account.recharge_status = RechargeStatusEnum.APPROVED
-        account.recharge_time = datetime.utcnow()
-        account.updated_at = datetime.utcnow()
-        account.company_account_updatetime = datetime.utcnow()
-
-        # 提交到数据库
-        db.add(account)
-        db.commit()
-        db.refresh(account)
-
-        # 返回更新后的账户信息
-        return AccountResponse(
-            company_account_id=account.company_account_id,
-            company_id=account.company_id,
-            created_at=account.created_at,
-            updated_at=account.updated_at,
-            company_account_updatetime=account.company_account_updatetime,
-            company_account_balance=account.company_account_balance,
-            company_account_balance_warning_val=account.company_account_balance_warning_val,
-            company_account_balance_warning_phone=account.company_account_balance_warning_phone,
-            company_account_balance_warning_enable=account.company_account_balance_warning_enable,
-            recharge_status=account.recharge_status,
-            recharge_time=account.recharge_time,
-            recharge_name=account.recharge_name,
-            recharge_phone=account.recharge_phone,
-            recharge_amount=account.recharge_amount,
-            received_amount=account.received_amount,
-        )
-    except Exception as e:
-        return internal_error_response("审核通过充值申请失败")
-
-
-@router.patch(
-    "/balance-warning",
-    summary="更新余额预警设置",
-    description="接收平台端余额预警设置，更新余额预警值和预警手机号、启动字段",
-    response_model=AccountResponse,
-)
-async def update_balance_warning(
-    request: BalanceWarningUpdateRequest,
-    db: Session = Depends(get_db),
-):
-    """
-    更新余额预警设置
-    """
-    try:
-        # 查询账户
-        account = db.exec(
-            select(Account).where(
-                Account.company_account_id == request.company_account_id
-            )
-        ).first()
-
-        if not account:
-            return not_found_response("账户记录不存在")
-
-        # 更新预警设置
-        account.company_account_balance_warning_val = (
-            request.company_account_balance_warning_val
-        )
-        account.company_account_balance_warning_phone = (
-            request.company_account_balance_warning_phone
-        )
-        account.company_account_balance_warning_enable = (
-            request.company_account_balance_warning_enable
-        )
-        account.updated_at = datetime.utcnow()
-        account.company_account_updatetime = datetime.utcnow()
-
-        # 提交到数据库
-        db.add(account)
-        db.commit()
-        db.refresh(account)
-
-        # 返回更新后的账户信息
-        return AccountResponse(
-            company_account_id=account.company_account_id,
-            company_id=account.company_id,
-            created_at=account.created_at,
-            updated_at=account.updated_at,
-            company_account_updatetime=account.company_account_updatetime,
-            company_account_balance=account.company_account_balance,
-            company_account_balance_warning_val=account.company_account_balance_warning_val,
-            company_account_balance_warning_phone=account.company_account_balance_warning_phone,
-            company_account_balance_warning_enable=account.company_account_balance_warning_enable,
-            recharge_status=account.recharge_status.value,
-            recharge_time=account.recharge_time,
-            recharge_name=account.recharge_name,
-            recharge_phone=account.recharge_phone,
-            recharge_amount=account.recharge_amount,
-            received_amount=account.received_amount,
-        )
-    except Exception as e:
-        return internal_error_response("更新余额预警设置失败")
-
-
-@router.get(
-    "/fee/detail",
-    summary="获取结算订单详情",
-    description="根据订单号或运单号获取订单详情信息",
-)
-async def get_settlement_detail(
-    order_id: Optional[str] = Query(None, description="订单号"),
-    path_id: Optional[str] = Query(None, description="运单号"),
-    db: Session = Depends(get_db),
-) -> JSONResponse:
-    """
-    获取结算订单详情
-    order_id 和 path_id 至少传入一个
-    """
-    try:
-        # 参数验证
-        if not order_id and not path_id:
-            return param_error_response("订单号和运单号至少传入一个")
-
-        # 查询费用信息（同时考虑order_id和path_id）
-        fee_query = select(Fee)
-        conditions = []
-        if order_id:
-            conditions.append(Fee.order_id == order_id)
-        if path_id:
-            conditions.append(Fee.path_id == path_id)
-
-        fee_query = (
-            fee_query.where(and_(*conditions))
-            if len(conditions) > 1
-            else fee_query.where(conditions[0])
-        )
-
-        fee_list = db.exec(fee_query).all()
-        if not fee_list:
-            return not_found_response("订单不存在")
-
-        # 构建响应数据列表
-        response_data = []
-        for fee in fee_list:
-            # 状态映射：数据库中的"待支付"映射为返回给前端的"待结算"
-            display_status = (
-                SettlementStatusEnum.PENDING_SETTLEMENT
-                if fee.status == OrderStatusEnum.PENDING_PAYMENT
-                else fee.status
-            )
-
-            # 查询订单详情
-            order_detail = db.exec(
-                select(OrderDetail).where(OrderDetail.order_id == fee.order_id)
-            ).first()
-
-            # 查询司机信息
-            driver = None
-            if fee.driver_account_id:
-                driver = db.exec(
-                    select(Driver).where(
-                        Driver.driver_account_id == fee.driver_account_id
-                    )
-                ).first()
-
-            # 单个订单信息封装
-            response_data.append(
-                {
-                    "path_id": fee.path_id,
-                    "order_id": fee.order_id,
-                    "status": display_status,
-                    "order_time": (
-                        fee.order_time.isoformat() if fee.order_time else None
-                    ),
-                    "finish_time": (
-                        order_detail.finish_time.isoformat()
-                        if order_detail and order_detail.finish_time
-                        else None
-                    ),
-                    "driver_name": driver.driver_name if driver else None,
-                    "driver_phone": driver.driver_phone if driver else None,
-                    "car_plate": order_detail.car_plate if order_detail else None,
-                    "loading_addr": order_detail.loading_addr if order_detail else None,
-                    "sender_name": order_detail.sender_name if order_detail else None,
-                    "sender_phone": order_detail.sender_phone if order_detail else None,
-                    "unloading_addr": (
-                        order_detail.unloading_addr if order_detail else None
-                    ),
-                    "receiver_name": (
-                        order_detail.receiver_name if order_detail else None
-                    ),
-                    "receiver_phone": (
-                        order_detail.receiver_phone if order_detail else None
-                    ),
-                    "goods_volume": order_detail.goods_volume if order_detail else None,
-                    "goods_num": order_detail.goods_num if order_detail else None,
-                    "goods_weight": order_detail.goods_weight if order_detail else None,
-                    "demand_car_type": (
-                        order_detail.demand_car_type if order_detail else None
-                    ),
-                    "is_carpool": order_detail.is_carpool if order_detail else None,
-                    "need_carry": order_detail.need_carry if order_detail else None,
-                    "logistics_platform": fee.logistics_platform,
-                    "other_loading_demand": (
-                        order_detail.other_loading_demand if order_detail else None
-                    ),
-                    "total_distance": (
-                        order_detail.total_distance if order_detail else None
-                    ),
-                    "loading_goods_imgs": (
-                        order_detail.loading_goods_imgs if order_detail else None
-                    ),
-                    "loading_car_imgs": (
-                        order_detail.loading_car_imgs if order_detail else None
-                    ),
-                    "unloading_goods_imgs": (
-                        order_detail.unloading_goods_imgs if order_detail else None
-                    ),
-                    "unloading_car_imgs": (
-                        order_detail.unloading_car_imgs if order_detail else None
-                    ),
-                    "receipt_imgs": fee.receipt_imgs,
-                    "parking_bill_imgs": fee.parking_bill_imgs,
-                    "highway_bill_imgs": fee.highway_bill_imgs,
-                    "total_price": fee.total_price,
-                    "highway_fee": fee.highway_fee,
-                    "parking_fee": fee.parking_fee,
-                    "carry_fee": fee.carry_fee,
-                    "wait_fee": fee.wait_fee,
-                }
-            )
-
-        return success_response(data=response_data, message="获取订单详情成功")
-
-    except Exception as e:
-        print(f"获取结算订单详情错误: {e}")
-        import traceback
-
-        print(f"完整错误信息: {traceback.format_exc()}")
-        return internal_error_response("获取订单详情失败")
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from uuid import uuid4
+from sqlmodel import Session, select, func, or_, and_
+from typing import Optional
+from datetime import datetime
+from fastapi import Query
+from enum import Enum
+import json
+
+from config.database import get_db, get_read_db
+from config.settings import settings
+from utils.response import (
+    success_response,
+    not_found_response,
+    param_error_response,
+    forbidden_response,
+    internal_error_response,
+)
+from models.fee import (
+    Fee,
+    FeeListRequest,
+    FeeResponse,
+    FeeListResponse,
+    FeePayRequest,
+    FeeRejectRequest,
+    FeeSettlementRequest,
+    FEE_LIST_FIELDS,
+    FEE_FIELD_COLUMNS,
+)
+from models.account import (
+    Account,
+    AccountRecharge,
+    AccountResponse,
+    PaginatedAccountResponse,
+    BalanceWarningUpdateRequest,
+)
+from models.recharge import (
+    RechargeRecord,
+    RechargeRecordResponse,
+    RechargeHistoryResponse,
+    RechargeClaimRequest,
+    RechargeBatchApproveRequest,
+)
+from models.driver import Driver
+from websocket.outbox import enqueue_push, outbox_dispatcher
+from models.enums import OrderStatusEnum, RechargeStatusEnum
+from models.order_detail import (
+    OrderDetail,
+    OrderDetailBatchRequest,
+    OrderDetailResponse,
+    ORDER_DETAIL_FIELDS,
+)
+from models.driver import Driver
+from utils.projection import (
+    RowMapper,
+    select_columns,
+    parse_fields,
+    isoformat,
+    isoformat_or_empty,
+)
+from utils.order_query import (
+    batch_keys,
+    load_order_details,
+    load_order_details_batch,
+    probe_order_details_version,
+)
+from utils.conditional import (
+    build_etag,
+    is_not_modified,
+    not_modified_response,
+    with_validators,
+)
+from utils.idempotency import idempotent
+from utils.tenant import Tenant, get_tenant
+from utils.auth import (
+    ROLE_CLIENT,
+    ROLE_PLATFORM,
+    Identity,
+    require_identity,
+    require_role,
+)
+from utils.archive import fee_model, table_of
+from utils.balance_warning import balance_warning_evaluator
+from utils.recharge_ledger import (
+    approve_account_recharge,
+    approve_claimed_recharges,
+    claim_recharge_reviews,
+    list_recharge_history,
+)
+
+router = APIRouter(
+    prefix="/client",
+    tags=["客户管理"],
+    dependencies=[Depends(require_role(ROLE_CLIENT, ROLE_PLATFORM))],
+)
+
+
+class SettlementStatusEnum(str, Enum):
+    """
+    结算状态枚举
+    """
+
+    PENDING_SETTLEMENT = "待结算"
+    SETTLED = "已结算"
+
+
+def _display_settlement_status(status: OrderStatusEnum) -> str:
+    """数据库中的待支付状态映射为返回给前端的待结算"""
+    if status == OrderStatusEnum.PENDING_PAYMENT:
+        return SettlementStatusEnum.PENDING_SETTLEMENT.value
+    return status.value
+
+
+# 结算列表行映射器
+settlement_row_mapper = RowMapper(
+    FEE_LIST_FIELDS,
+    converters={
+        "status": _display_settlement_status,
+        "order_time": isoformat_or_empty,
+        "created_at": isoformat,
+        "updated_at": isoformat,
+    },
+)
+
+
+@router.get(
+    "/fee/list",
+    summary="分页查询结算列表",
+    description="分页查询结算信息，支持派单渠道、订单状态、运单号、订单号和时间范围筛选",
+)
+async def get_settlement_list(
+    page: int = Query(1, description="当前页码", ge=1),
+    size: int = Query(10, description="每页数量", ge=1),
+    dispatch_channel: Optional[str] = Query(None, description="派单渠道（可选）"),
+    status: Optional[SettlementStatusEnum] = Query(
+        None, description="状态（可选，待结算/已结算）"
+    ),
+    path_id: Optional[str] = Query(None, description="运单号搜索（可选）"),
+    order_id: Optional[str] = Query(None, description="订单号搜索（可选）"),
+    start_time: Optional[str] = Query(None, description="开始时间（格式：YYYY-MM-DD）"),
+    end_time: Optional[str] = Query(None, description="结束时间（格式：YYYY-MM-DD）"),
+    fields: Optional[str] = Query(
+        None, description="返回字段（逗号分隔，可选，默认全部）"
+    ),
+    include_archived: bool = Query(
+        False, description="是否包含已归档的历史费用（默认只查询近期数据）"
+    ),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
+) -> JSONResponse:
+    """
+    分页查询结算列表（客户端只返回所属公司的费用）
+    """
+    try:
+        # 默认只查询热表，include_archived 时包含归档表
+        FeeSource = fee_model(include_archived)
+        try:
+            selected = parse_fields(fields, FEE_LIST_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
+        # 只投影所选字段对应的列，限定调用方所属公司
+        query = select(
+            *select_columns(table_of(FeeSource), selected, FEE_FIELD_COLUMNS)
+        ).where(*tenant.conditions(FeeSource.company_id))
+
+        # **状态筛选逻辑**
+        if status:
+            if status == SettlementStatusEnum.PENDING_SETTLEMENT:
+                # 如果前端传的是 PENDING_SETTLEMENT，实际查询 PENDING_PAYMENT
+                query = query.where(FeeSource.status == OrderStatusEnum.PENDING_PAYMENT)
+            else:
+                # 其他状态（如 SETTLED）直接查询
+                query = query.where(FeeSource.status == status)
+        else:
+            # 如果未指定状态，查询待支付和已结算两种状态
+            query = query.where(
+                or_(
+                    FeeSource.status == OrderStatusEnum.PENDING_PAYMENT,
+                    FeeSource.status == OrderStatusEnum.SETTLED,
+                )
+            )
+
+        # 派单渠道筛选
+        if dispatch_channel and dispatch_channel.strip():
+            query = query.where(FeeSource.dispatch_channel == dispatch_channel.strip())
+
+        # 运单号筛选
+        if path_id and path_id.strip():
+            search_term = f"%{path_id.strip()}%"
+            query = query.where(FeeSource.path_id.like(search_term))
+
+        # 订单号筛选
+        if order_id and order_id.strip():
+            search_term = f"%{order_id.strip()}%"
+            query = query.where(FeeSource.order_id.like(search_term))
+
+        # 时间范围筛选
+        if start_time and end_time:
+            try:
+                start_date = datetime.strptime(start_time, "%Y-%m-%d")
+                end_date = datetime.strptime(end_time, "%Y-%m-%d")
+                end_date = end_date.replace(hour=23, minute=59, second=59)
+                query = query.where(
+                    FeeSource.order_time >= start_date, FeeSource.order_time <= end_date
+                )
+            except ValueError:
+                return param_error_response("时间格式不正确，请使用YYYY-MM-DD格式")
+
+        # **计算总数（同样应用租户范围和状态映射逻辑）**
+        count_query = select(func.count(FeeSource.fee_id)).where(
+            *tenant.conditions(FeeSource.company_id)
+        )
+
+        if status:
+            if status == SettlementStatusEnum.PENDING_SETTLEMENT:
+                count_query = count_query.where(
+                    FeeSource.status == OrderStatusEnum.PENDING_PAYMENT
+                )
+            else:
+                count_query = count_query.where(FeeSource.status == status)
+        else:
+            count_query = count_query.where(
+                or_(
+                    FeeSource.status == OrderStatusEnum.PENDING_PAYMENT,
+                    FeeSource.status == OrderStatusEnum.SETTLED,
+                )
+            )
+
+        # 应用其他筛选条件
+        if dispatch_channel and dispatch_channel.strip():
+            count_query = count_query.where(
+                FeeSource.dispatch_channel == dispatch_channel.strip()
+            )
+        if path_id and path_id.strip():
+            search_term = f"%{path_id.strip()}%"
+            count_query = count_query.where(FeeSource.path_id.like(search_term))
+        if order_id and order_id.strip():
+            search_term = f"%{order_id.strip()}%"
+            count_query = count_query.where(FeeSource.order_id.like(search_term))
+        if start_time and end_time:
+            try:
+                start_date = datetime.strptime(start_time, "%Y-%m-%d")
+                end_date = datetime.strptime(end_time, "%Y-%m-%d")
+                end_date = end_date.replace(hour=23, minute=59, second=59)
+                count_query = count_query.where(
+                    FeeSource.order_time >= start_date, FeeSource.order_time <= end_date
+                )
+            except ValueError:
+                pass  # 前面已经处理过错误
+
+        total = db.exec(count_query).first()
+
+        # 分页处理
+        offset = (page - 1) * size
+        total_pages = (total + size - 1) // size
+
+        query = query.offset(offset).limit(size)
+        query = query.order_by(FeeSource.order_time.desc())
+
+        # Core 行直接映射为响应字典（PENDING_PAYMENT 映射回 PENDING_SETTLEMENT）
+        rows = db.connection().execute(query).all()
+        fee_items = settlement_row_mapper.project(selected).map_all(rows)
+
+        response_data = {
+            "items": fee_items,
+            "total": total,
+            "page": page,
+            "size": size,
+            "total_pages": total_pages,
+        }
+
+        return success_response(
+            data=response_data,
+            message="获取结算列表成功",
+        )
+
+    except Exception as e:
+        return internal_error_response("获取结算列表失败")
+
+
+@router.patch("/reject", summary="驳回支付")
+async def reject_fee(
+    data: FeeRejectRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """
+    驳回支付
+    - 驳回类型为bill时: 需要填写驳回金额和原因
+    - 驳回类型为receipt时: 只需要填写驳回原因
+    """
+    try:
+        # 查询费用记录
+        fee = db.exec(
+            select(Fee).where(
+                Fee.fee_id == data.fee_id, *tenant.conditions(Fee.company_id)
+            )
+        ).first()
+        if not fee:
+            return not_found_response("费用记录不存在")
+
+        print("当前支付状态：", fee.status)
+
+        # 检查状态是否允许驳回
+        if fee.status not in [
+            OrderStatusEnum.PENDING_PAYMENT,
+            OrderStatusEnum.APPEALING,
+        ]:
+            return param_error_response("当前状态不允许驳回")
+
+        # 更新费用记录
+        if data.reject_type == "bill":
+            # 费用驳回
+            fee.bill_reject_reason = data.reject_reason
+            if data.reject_highway_fee is not None:
+                fee.highway_fee = max(0, fee.highway_fee - data.reject_highway_fee)
+            if data.reject_parking_fee is not None:
+                fee.parking_fee = max(0, fee.parking_fee - data.reject_parking_fee)
+
+        else:
+            # 回单驳回
+            fee.receipt_reject_reason = data.reject_reason
+
+        # 更新状态为已结算
+        fee.status = OrderStatusEnum.SETTLED
+        fee.updated_at = datetime.utcnow()
+
+        db.add(fee)
+
+        push_message = {
+            "type": "reject_fee",
+            "fee_id": fee.fee_id,
+            "status": fee.status,
+            "reject_reason": data.reject_reason,
+            "reject_highway_fee": data.reject_highway_fee,
+            "reject_parking_fee": data.reject_parking_fee,
+        }
+
+        # 推送消息给费用所属司机
+        enqueue_push(
+            db,
+            ("driver",),
+            push_message,
+            company_id=fee.company_id,
+            driver_account_id=fee.driver_account_id,
+        )
+        db.commit()
+        db.refresh(fee)
+        outbox_dispatcher.notify()
+
+        return success_response(
+            data={"fee_id": fee.fee_id, "status": fee.status}, message="驳回成功"
+        )
+
+    except Exception as e:
+        return internal_error_response("驳回支付失败")
+
+
+@router.patch("/pay", summary="结算")
+async def pay_fee(
+    data: FeeSettlementRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """
+    结算
+    """
+    try:
+        # 查询费用记录
+        fee = db.exec(
+            select(Fee).where(
+                Fee.fee_id == data.fee_id, *tenant.conditions(Fee.company_id)
+            )
+        ).first()
+        if not fee:
+            return not_found_response("费用记录不存在")
+
+        # 更新费用表发起结算操作为True
+        fee.settlement_enable = True
+        fee.updated_at = datetime.utcnow()
+
+        db.add(fee)
+
+        # 推送消息给平台端
+        push_message = {
+            "type": "pay_fee",
+            "fee_id": fee.fee_id,
+            "status": fee.status,
+        }
+        enqueue_push(db, ("platform",), push_message, company_id=fee.company_id)
+        db.commit()
+        db.refresh(fee)
+        outbox_dispatcher.notify()
+
+        return success_response(
+            data={"fee_id": fee.fee_id, "status": fee.status}, message="已发起结算"
+        )
+
+    except Exception as e:
+        return internal_error_response("发起结算失败")
+
+
+@router.patch("/recharge", summary="充值")
+@idempotent("client_recharge")
+async def recharge_fee(
+    data: AccountRecharge,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """
+    充值
+
+    新增一条待审核的充值记录，不修改账户记录（审核通过后才入账）
+    """
+    try:
+        # 查询账户记录
+        account = db.exec(
+            select(Account).where(
+                Account.company_account_id == data.company_account_id,
+                *tenant.conditions(Account.company_id),
+            )
+        ).first()
+        if not account:
+            return not_found_response("账户记录不存在")
+
+        record = RechargeRecord(
+            company_account_id=account.company_account_id,
+            company_id=account.company_id,
+            recharge_name=data.recharge_name,
+            recharge_phone=data.recharge_phone,
+            recharge_amount=data.recharge_amount,
+            received_amount=data.recharge_amount,
+        )
+
+        db.add(record)
+        db.commit()
+        db.refresh(record)
+
+        return success_response(
+            data={
+                "recharge_id": record.recharge_id,
+                "company_account_id": record.company_account_id,
+                "recharge_status": record.recharge_status,
+            },
+            message="充值成功",
+        )
+
+    except Exception as e:
+        return internal_error_response("充值失败")
+
+
+@router.get(
+    "/list",
+    summary="分页查询账户列表",
+    description="分页查询所有账户信息",
+    response_model=PaginatedAccountResponse,
+)
+async def get_account_list(
+    page: int = Query(1, description="当前页码", ge=1),
+    size: int = Query(10, description="每页数量", ge=1, le=100),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
+):
+    """
+    分页查询账户列表（客户端只返回所属公司的账户）
+    """
+    try:
+        # 基础查询
+        scope = tenant.conditions(Account.company_id)
+        query = select(Account).where(*scope)
+
+        # 总数查询
+        count_query = select(func.count(Account.company_account_id)).where(*scope)
+
+        # 获取总数
+        total = db.exec(count_query).one()
+
+        # 计算分页参数
+        offset = (page - 1) * size
+        total_pages = (total + size - 1) // size
+
+        # 应用分页和排序
+        query = query.offset(offset).limit(size).order_by(Account.created_at.desc())
+
+        # 执行查询
+        accounts = db.exec(query).all()
+
+        # 转换为响应模型
+        account_items = [
+            AccountResponse(
+                company_account_id=account.company_account_id,
+                company_id=account.company_id,
+                created_at=account.created_at,
+                updated_at=account.updated_at,
+                company_account_updatetime=account.company_account_updatetime,
+                company_account_balance=account.company_account_balance,
+                company_account_balance_warning_val=account.company_account_balance_warning_val,
+                company_account_balance_warning_phone=account.company_account_balance_warning_phone,
+                company_account_balance_warning_enable=account.company_account_balance_warning_enable,
+                recharge_status=account.recharge_status,
+                recharge_time=account.recharge_time,
+                recharge_name=account.recharge_name,
+                recharge_phone=account.recharge_phone,
+                recharge_amount=account.recharge_amount,
+                received_amount=account.received_amount,
+            )
+            for account in accounts
+        ]
+
+        # 构建响应
+        response_data = PaginatedAccountResponse(
+            items=account_items,
+            total=total,
+            page=page,
+            size=size,
+            total_pages=total_pages,
+        )
+
+        return response_data
+
+    except Exception as e:
+        return internal_error_response("获取账户列表失败")
+
+
+@router.patch(
+    "/accounts/{company_account_id}/approve-recharge",
+    summary="审核通过充值申请",
+    description="平台端审核通过充值申请，客户账户余额加上到账金额",
+    response_model=AccountResponse,
+)
+async def approve_recharge(
+    company_account_id: str,
+    recharge_id: Optional[str] = Query(
+        None, description="充值记录ID（可选，默认最早的待审核记录）"
+    ),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+):
+    """
+    审核通过充值申请
+    """
+    try:
+        if not tenant.is_platform:
+            return forbidden_response("只有平台端可以审核充值申请")
+
+        # 查询账户
+        account = db.exec(
+            select(Account).where(Account.company_account_id == company_account_id)
+        ).first()
+
+        if not account:
+            return not_found_response("账户记录不存在")
+
+        # 锁定待审核的充值记录和账户，入账并提交
+        result = approve_account_recharge(db, company_account_id, recharge_id)
+        if result is None:
+            return param_error_response("充值状态不正确")
+        account = result.accounts[0]
+
+        # 余额增加，恢复到预警值以上时重新计时
+        balance_warning_evaluator.check_account(account)
+
+        # 返回更新后的账户信息
+        return AccountResponse(
+            company_account_id=account.company_account_id,
+            company_id=account.company_id,
+            created_at=account.created_at,
+            updated_at=account.updated_at,
+            company_account_updatetime=account.company_account_updatetime,
+            company_account_balance=account.company_account_balance,
+            company_account_balance_warning_val=account.company_account_balance_warning_val,
+            company_account_balance_warning_phone=account.company_account_balance_warning_phone,
+            company_account_balance_warning_enable=account.company_account_balance_warning_enable,
+            recharge_status=account.recharge_status,
+            recharge_time=account.recharge_time,
+            recharge_name=account.recharge_name,
+            recharge_phone=account.recharge_phone,
+            recharge_amount=account.recharge_amount,
+            received_amount=account.received_amount,
+        )
+    except Exception as e:
+        return internal_error_response("审核通过充值申请失败")
+
+
+def _recharge_response(record: RechargeRecord) -> RechargeRecordResponse:
+    """充值记录响应模型"""
+    return RechargeRecordResponse(
+        recharge_id=record.recharge_id,
+        company_account_id=record.company_account_id,
+        company_id=record.company_id,
+        created_at=record.created_at,
+        recharge_name=record.recharge_name,
+        recharge_phone=record.recharge_phone,
+        recharge_amount=record.recharge_amount,
+        received_amount=record.received_amount,
+        recharge_status=record.recharge_status.value,
+        approved_at=record.approved_at,
+        approved_by=record.approved_by,
+        review_claimed_by=record.review_claimed_by,
+        review_lease_until=record.review_lease_until,
+    )
+
+
+@router.get(
+    "/accounts/{company_account_id}/recharges",
+    summary="查询充值历史",
+    description="按申请时间倒序分页查询账户的充值记录，翻页时传入上一页返回的 next_cursor",
+    response_model=RechargeHistoryResponse,
+)
+async def get_recharge_history(
+    company_account_id: str,
+    size: int = Query(10, description="每页数量", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
+):
+    """
+    查询充值历史
+    """
+    try:
+        records, next_cursor = list_recharge_history(
+            db,
+            company_account_id,
+            size=size,
+            cursor=cursor,
+            scope=tenant.conditions(RechargeRecord.company_id),
+        )
+        return RechargeHistoryResponse(
+            items=[_recharge_response(record) for record in records],
+            next_cursor=next_cursor,
+        )
+    except ValueError as e:
+        return param_error_response(str(e))
+    except Exception as e:
+        return internal_error_response("查询充值历史失败")
+
+
+@router.post(
+    "/accounts/recharge-review/claim",
+    summary="领取待审核充值申请",
+    description="平台端审核人按申请时间先后领取待审核的充值记录，领取期间其他审核人不会领到",
+)
+async def claim_recharge_review(
+    request: RechargeClaimRequest,
+    identity: Identity = Depends(require_identity()),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """
+    领取待审核充值申请（审核人为令牌中的员工）
+    """
+    try:
+        if not tenant.is_platform:
+            return forbidden_response("只有平台端可以审核充值申请")
+        limit = min(request.limit, settings.RECHARGE_REVIEW_MAX_CLAIM)
+        records = claim_recharge_reviews(
+            db,
+            reviewer_id=identity.subject,
+            limit=limit,
+            lease_seconds=settings.RECHARGE_REVIEW_LEASE_SECONDS,
+        )
+
+        return success_response(
+            data=jsonable_encoder(
+                {
+                    "items": [_recharge_response(record) for record in records],
+                    "lease_until": records[0].review_lease_until if records else None,
+                }
+            ),
+            message="领取成功",
+        )
+    except Exception as e:
+        db.rollback()
+        return internal_error_response("领取待审核充值申请失败")
+
+
+@router.post(
+    "/accounts/recharge-review/approve",
+    summary="批量审核通过充值申请",
+    description="平台端审核人批量审核通过自己领取的充值记录（同一事务入账），领取已到期或已审核的跳过",
+)
+async def batch_approve_recharge(
+    request: RechargeBatchApproveRequest,
+    identity: Identity = Depends(require_identity()),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
+    """
+    批量审核通过充值申请（审核人为令牌中的员工）
+    """
+    try:
+        if not tenant.is_platform:
+            return forbidden_response("只有平台端可以审核充值申请")
+        if not request.recharge_ids:
+            return param_error_response("充值记录ID列表不能为空")
+        if len(request.recharge_ids) > settings.RECHARGE_REVIEW_MAX_CLAIM:
+            return param_error_response(
+                f"单次最多审核 {settings.RECHARGE_REVIEW_MAX_CLAIM} 条"
+            )
+
+        result = approve_claimed_recharges(
+            db,
+            reviewer_id=identity.subject,
+            recharge_ids=request.recharge_ids,
+        )
+
+        # 余额增加，恢复到预警值以上时重新计时
+        for account in result.accounts:
+            balance_warning_evaluator.check_account(account)
+
+        return success_response(
+            data=jsonable_encoder(
+                {
+                    "approved": [
+                        _recharge_response(record) for record in result.records
+                    ],
+                    "skipped": result.skipped,
+                }
+            ),
+            message="审核完成",
+        )
+    except Exception as e:
+        db.rollback()
+        return internal_error_response("批量审核通过充值申请失败")
+
+
+@router.patch(
+    "/balance-warning",
+    summary="更新余额预警设置",
+    description="接收平台端余额预警设置，更新余额预警值和预警手机号、启动字段",
+    response_model=AccountResponse,
+)
+async def update_balance_warning(
+    request: BalanceWarningUpdateRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+):
+    """
+    更新余额预警设置
+    """
+    try:
+        # 查询账户
+        account = db.exec(
+            select(Account).where(
+                Account.company_account_id == request.company_account_id,
+                *tenant.conditions(Account.company_id),
+            )
+        ).first()
+
+        if not account:
+            return not_found_response("账户记录不存在")
+
+        # 更新预警设置
+        account.company_account_balance_warning_val = (
+            request.company_account_balance_warning_val
+        )
+        account.company_account_balance_warning_phone = (
+            request.company_account_balance_warning_phone
+        )
+        account.company_account_balance_warning_enable = (
+            request.company_account_balance_warning_enable
+        )
+        account.updated_at = datetime.utcnow()
+        account.company_account_updatetime = datetime.utcnow()
+
+        # 提交到数据库
+        db.add(account)
+        db.commit()
+        db.refresh(account)
+
+        # 返回更新后的账户信息
+        return AccountResponse(
+            company_account_id=account.company_account_id,
+            company_id=account.company_id,
+            created_at=account.created_at,
+            updated_at=account.updated_at,
+            company_account_updatetime=account.company_account_updatetime,
+            company_account_balance=account.company_account_balance,
+            company_account_balance_warning_val=account.company_account_balance_warning_val,
+            company_account_balance_warning_phone=account.company_account_balance_warning_phone,
+            company_account_balance_warning_enable=account.company_account_balance_warning_enable,
+            recharge_status=account.recharge_status.value,
+            recharge_time=account.recharge_time,
+            recharge_name=account.recharge_name,
+            recharge_phone=account.recharge_phone,
+            recharge_amount=account.recharge_amount,
+            received_amount=account.received_amount,
+        )
+    except Exception as e:
+        return internal_error_response("更新余额预警设置失败")
+
+
+@router.get(
+    "/fee/detail",
+    summary="获取结算订单详情",
+    description="根据订单号或运单号获取订单详情信息",
+)
+async def get_settlement_detail(
+    request: Request,
+    order_id: Optional[str] = Query(None, description="订单号"),
+    path_id: Optional[str] = Query(None, description="运单号"),
+    fields: Optional[str] = Query(
+        None, description="返回字段（逗号分隔，可选，默认全部）"
+    ),
+    include_archived: bool = Query(
+        False, description="是否包含已归档的历史费用（默认只查询近期数据）"
+    ),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
+) -> JSONResponse:
+    """
+    获取结算订单详情
+    order_id 和 path_id 至少传入一个
+    """
+    try:
+        # 默认只查询热表，include_archived 时包含归档表
+        FeeSource = fee_model(include_archived)
+        # 参数验证
+        if not order_id and not path_id:
+            return param_error_response("订单号和运单号至少传入一个")
+
+        try:
+            selected = parse_fields(fields, ORDER_DETAIL_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
+        # 查询费用信息（同时考虑order_id和path_id，限定调用方所属公司）
+        conditions = tenant.conditions(FeeSource.company_id)
+        if order_id:
+            conditions.append(FeeSource.order_id == order_id)
+        if path_id:
+            conditions.append(FeeSource.path_id == path_id)
+
+        # 条件请求：先只探测各表 updated_at，未变化时直接返回 304
+        version = probe_order_details_version(
+            db, conditions, selected, include_archived
+        )
+        if version is None:
+            return not_found_response("订单不存在")
+        last_modified = max((value for value in version[1:] if value), default=None)
+        etag = build_etag(
+            "client_fee_detail",
+            tenant.company_id,
+            order_id,
+            path_id,
+            selected,
+            include_archived,
+            version,
+        )
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        # 按所选字段投影，未选订单详情或司机字段时跳过对应查询
+        response_data = load_order_details(
+            db, conditions, selected, _display_settlement_status, include_archived
+        )
+        if not response_data:
+            return not_found_response("订单不存在")
+
+        return with_validators(
+            success_response(data=response_data, message="获取订单详情成功"),
+            etag,
+            last_modified,
+        )
+
+    except Exception as e:
+        print(f"获取结算订单详情错误: {e}")
+        import traceback
+
+        print(f"完整错误信息: {traceback.format_exc()}")
+        return internal_error_response("获取订单详情失败")
+
+
+@router.post(
+    "/fee/details",
+    summary="批量获取结算订单详情",
+    description="按订单号/运单号列表批量获取订单详情，结果与请求顺序一致",
+)
+async def get_settlement_details(
+    data: OrderDetailBatchRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
+) -> JSONResponse:
+    """
+    批量获取结算订单详情
+
+    每张表只查询一次（替代逐个调用 /fee/detail），单次最多
+    ORDER_DETAIL_BATCH_MAX 个订单
+    """
+    try:
+        try:
+            keys = batch_keys(data.keys, settings.ORDER_DETAIL_BATCH_MAX)
+            selected = parse_fields(data.fields, ORDER_DETAIL_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
+        details = load_order_details_batch(
+            db,
+            keys,
+            selected,
+            _display_settlement_status,
+            data.include_archived,
+            scope=tenant.conditions(fee_model(data.include_archived).company_id),
+        )
+        response_data = [
+            {"order_id": order_id, "path_id": path_id, "details": items}
+            for (order_id, path_id), items in zip(keys, details)
+        ]
+        return success_response(data=response_data, message="批量获取订单详情成功")
+
+    except Exception as e:
+        print(f"批量获取结算订单详情错误: {e}")
+        return internal_error_response("批量获取订单详情失败")
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
-from sqlmodel import Session
+from sqlmodel import Session, select
 from datetime import datetime
 from fastapi.openapi.docs import get_swagger_ui_html
 
@@ -16,11 +16,19 @@ from utils.response import (
     param_error_response,
     internal_error_response,
 )
+from utils.conditional import (
+    build_etag,
+    is_not_modified,
+    not_modified_response,
+    with_validators,
+)
 from config.database import get_db
+from utils.auth import ROLE_CLIENT, ROLE_PLATFORM, require_role
 
 router = APIRouter(
     prefix="/companies",
     tags=["企业管理"],
+    dependencies=[Depends(require_role(ROLE_CLIENT, ROLE_PLATFORM))],
 )
 
 
@@ -61,15 +69,28 @@ router = APIRouter(
         },
     },
 )
-async def get_company(company_id: str, db: Session = Depends(get_db)) -> JSONResponse:
+async def get_company(
+    company_id: str, request: Request, db: Session = Depends(get_db)
+) -> JSONResponse:
     """
     获取企业详情
 
     Args:
         company_id: 企业UUID
+        request: 请求（用于条件请求校验）
         db: 数据库会话
     """
     try:
+        # 条件请求：先按主键只查 updated_at，未变化时直接返回 304
+        updated_at = db.exec(
+            select(Company.updated_at).where(Company.company_id == company_id)
+        ).first()
+        if updated_at is None:
+            return not_found_response("企业不存在")
+        etag = build_etag("company", company_id, updated_at)
+        if is_not_modified(request, etag, updated_at):
+            return not_modified_response(etag, updated_at)
+
         company = db.get(Company, company_id)
         if not company:
             return not_found_response("企业不存在")
@@ -87,9 +108,10 @@ async def get_company(company_id: str, db: Session = Depends(get_db)) -> JSONRes
             updated_at=company.updated_at.isoformat(),
         )
 
-        return success_response(
+        response = success_response(
             data=company_data.model_dump(), message="获取企业信息成功"
         )
+        return with_validators(response, etag, updated_at)
 
     except Exception as e:
         print(f"获取企业信息错误: {e}")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
@@ -9,7 +9,8 @@ from datetime import datetime
 from fastapi import Query
 
 
-from config.database import get_db
+from config.database import get_db, get_read_db
+from config.settings import settings
 from utils.response import (
     success_response,
     not_found_response,
@@ -22,17 +23,60 @@ from models.fee import (
     FeeResponse,
     FeeListResponse,
     FeePayRequest,
+    FEE_LIST_FIELDS,
+    FEE_FIELD_COLUMNS,
 )
 from models.account import Account
 from models.driver import Driver
-from websocket.manager import send_message_to_type
+from websocket.outbox import enqueue_push, outbox_dispatcher
 from models.enums import OrderStatusEnum
-from models.order_detail import OrderDetail
+from models.order_detail import (
+    OrderDetail,
+    OrderDetailBatchRequest,
+    ORDER_DETAIL_FIELDS,
+)
+from models.earning import (
+    DriverMonthlyEarning,
+    DriverEarningResponse,
+    DriverMonthlyEarningResponse,
+    DriverStatementResponse,
+    DriverEarningDetailResponse,
+)
 from models.driver import Driver
+from utils.projection import (
+    RowMapper,
+    select_columns,
+    parse_fields,
+    isoformat,
+    isoformat_or_empty,
+)
+from utils.order_query import (
+    batch_keys,
+    load_order_details,
+    load_order_details_batch,
+)
+from utils.conditional import (
+    build_etag,
+    is_not_modified,
+    not_modified_response,
+    with_validators,
+)
+from utils.idempotency import idempotent
+from utils.tenant import Tenant, get_tenant
+from utils.auth import ROLE_DRIVER, Identity, get_identity, require_identity
+from utils.archive import fee_model, table_of
+from utils.singleflight import single_flight
+from utils.balance_warning import balance_warning_evaluator
+from utils.driver_earnings import (
+    credit_driver,
+    list_monthly_statements,
+    list_month_earnings,
+)
 
 router = APIRouter(
     prefix="/driver",
     tags=["司机管理"],
+    dependencies=[Depends(get_identity)],
 )
 
 
@@ -67,9 +111,32 @@ class DriverConfirmRequest(BaseModel):
     path_id: str = Field(..., description="运单ID", example="")
 
 
+def _display_driver_status(status: OrderStatusEnum) -> str:
+    """数据库中的已结算状态映射为返回给司机端的已支付"""
+    if status == OrderStatusEnum.SETTLED:
+        return "已支付"
+    return status.value
+
+
+# 司机费用列表行映射器
+driver_fee_row_mapper = RowMapper(
+    FEE_LIST_FIELDS,
+    converters={
+        "status": _display_driver_status,
+        "order_time": isoformat_or_empty,
+        "created_at": isoformat,
+        "updated_at": isoformat,
+    },
+)
+
+
 @router.post("", summary="司机提交费用")
+@idempotent("driver_submit")
 async def submit_driver_fee(
-    data: DriverSubmitRequest, db: Session = Depends(get_db)
+    data: DriverSubmitRequest,
+    identity: Optional[Identity] = Depends(get_identity),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
 ) -> JSONResponse:
     try:
         # 校验字段
@@ -86,10 +153,20 @@ async def submit_driver_fee(
         ):
             return param_error_response("所有费用字段均不能为空")
 
+        # 费用归属调用方所属公司（令牌中的公司，未开启认证时为租户请求头），
+        # 否则新费用不在任何公司的查询、支付范围内；司机令牌以令牌中的司机为准
+        company_id = tenant.company_id or None
+        if identity is not None and identity.role == ROLE_DRIVER:
+            driver_account_id = identity.driver_account_id
+        else:
+            driver_account_id = data.driver_id
+
         new_fee = Fee(
             fee_id=str(uuid4()),
             path_id=data.path_id,
             order_id=data.order_id,
+            company_id=company_id,
+            driver_account_id=driver_account_id,
             highway_fee=data.highway_fee,
             parking_fee=data.parking_fee,
             carry_fee=data.carry_fee,
@@ -100,13 +177,12 @@ async def submit_driver_fee(
         )
 
         db.add(new_fee)
-        db.commit()
-        db.refresh(new_fee)
 
         # 构建推送消息
         push_message = {
             "type": "fee_submitted",
             "data": {
+                "fee_id": new_fee.fee_id,
                 "driver_id": data.driver_id,
                 "order_id": data.order_id,
                 "path_id": data.path_id,
@@ -120,9 +196,16 @@ async def submit_driver_fee(
             },
         }
 
-        # 只推送给平台端和客户端，不推送给司机端
-        await send_message_to_type("platform", push_message)
-        await send_message_to_type("client", push_message)
+        # 只推送给平台端和司机所属公司的客户端，不推送给司机端（与费用同一事务写入发件箱）
+        enqueue_push(
+            db,
+            ("platform", "client"),
+            push_message,
+            company_id=company_id,
+        )
+        db.commit()
+        db.refresh(new_fee)
+        outbox_dispatcher.notify()
 
         response_data = {
             "fee_id": new_fee.fee_id,
@@ -146,15 +229,39 @@ async def submit_driver_fee(
 
 
 @router.get("", response_model=DriverResponse, summary="司机获取费用")
-async def get_fee(
-    order_id: str, path_id: str, db: Session = Depends(get_db)
+@single_flight("driver_fee")
+def get_fee(
+    request: Request,
+    order_id: str,
+    path_id: str,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
 ) -> JSONResponse:
     try:
-        fee = db.query(Fee).filter_by(order_id=order_id, path_id=path_id).first()
+        conditions = [
+            Fee.order_id == order_id,
+            Fee.path_id == path_id,
+            *tenant.conditions(Fee.company_id),
+        ]
+        # 条件请求：先只探测 updated_at，未变化时直接返回 304
+        total, last_modified = db.exec(
+            select(func.count(Fee.fee_id), func.max(Fee.updated_at)).where(
+                *conditions
+            )
+        ).one()
+        if not total:
+            return not_found_response("费用不存在")
+        etag = build_etag(
+            "driver_fee", tenant.company_id, order_id, path_id, total, last_modified
+        )
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        fee = db.exec(select(Fee).where(*conditions)).first()
         if not fee:
             return not_found_response("费用不存在")
 
-        return success_response(
+        response = success_response(
             message="获取费用成功",
             data=DriverResponse(
                 highway_fee=fee.highway_fee,
@@ -169,6 +276,7 @@ async def get_fee(
                 except_wait_fee=fee.wait_fee,
             ),
         )
+        return with_validators(response, etag, last_modified)
 
     except Exception as e:
         print(f"获取费用错误: {e}")
@@ -177,25 +285,33 @@ async def get_fee(
 
 @router.post("/confirm", summary="司机确认费用")
 async def confirm_fee(
-    data: DriverConfirmRequest, db: Session = Depends(get_db)
+    data: DriverConfirmRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
 ) -> JSONResponse:
     if not all([data.driver_id, data.order_id, data.path_id]):
         return param_error_response("所有字段均不能为空")
 
     # 更新费用表，status SETTLED
-    fee = db.query(Fee).filter_by(order_id=data.order_id, path_id=data.path_id).first()
+    fee = db.exec(
+        select(Fee).where(
+            Fee.order_id == data.order_id,
+            Fee.path_id == data.path_id,
+            *tenant.conditions(Fee.company_id),
+        )
+    ).first()
     if not fee:
         return not_found_response("费用不存在")
 
     fee.status = OrderStatusEnum.SETTLED
+    fee.updated_at = datetime.utcnow()
     db.add(fee)
-    db.commit()
-    db.refresh(fee)
 
     # 构建确认消息
     confirm_message = {
         "type": "fee_confirmed",
         "data": {
+            "fee_id": fee.fee_id,
             "driver_id": data.driver_id,
             "order_id": data.order_id,
             "path_id": data.path_id,
@@ -203,9 +319,12 @@ async def confirm_fee(
         },
     }
 
-    # 推送给平台端和客户端
-    await send_message_to_type("platform", confirm_message)
-    await send_message_to_type("client", confirm_message)
+    # 推送给平台端和费用所属公司的客户端
+    enqueue_push(
+        db, ("platform", "client"), confirm_message, company_id=fee.company_id
+    )
+    db.commit()
+    outbox_dispatcher.notify()
 
     return success_response("费用确认成功")
 
@@ -222,25 +341,42 @@ async def get_fee_list(
     keyword: Optional[str] = Query(None, description="订单号搜索关键词（可选）"),
     start_time: Optional[str] = Query(None, description="开始时间（格式：YYYY-MM-DD）"),
     end_time: Optional[str] = Query(None, description="结束时间（格式：YYYY-MM-DD）"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None, description="返回字段（逗号分隔，可选，默认全部）"
+    ),
+    include_archived: bool = Query(
+        False, description="是否包含已归档的历史费用（默认只查询近期数据）"
+    ),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
 ) -> JSONResponse:
     """
-    分页查询费用列表
+    分页查询费用列表（客户端只返回所属公司的费用）
     """
     try:
-        query = select(Fee)
+        # 默认只查询热表，include_archived 时包含归档表
+        FeeSource = fee_model(include_archived)
+        try:
+            selected = parse_fields(fields, FEE_LIST_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
+        # 只投影所选字段对应的列，限定调用方所属公司
+        query = select(
+            *select_columns(table_of(FeeSource), selected, FEE_FIELD_COLUMNS)
+        ).where(*tenant.conditions(FeeSource.company_id))
 
         # 状态筛选（前端传"已支付"时，实际查询"已结算"）
         if status:
             if status == "已支付":
-                query = query.where(Fee.status == "已结算")
+                query = query.where(FeeSource.status == "已结算")
             else:
-                query = query.where(Fee.status == status)
+                query = query.where(FeeSource.status == status)
 
         # 订单号搜索
         if keyword and keyword.strip():
             search_term = f"%{keyword.strip()}%"
-            query = query.where(Fee.order_id.like(search_term))
+            query = query.where(FeeSource.order_id.like(search_term))
 
         # 时间范围筛选：order_time 而非 created_at
         if start_time and end_time:
@@ -249,29 +385,31 @@ async def get_fee_list(
                 end_date = datetime.strptime(end_time, "%Y-%m-%d")
                 end_date = end_date.replace(hour=23, minute=59, second=59)
                 query = query.where(
-                    Fee.order_time >= start_date, Fee.order_time <= end_date
+                    FeeSource.order_time >= start_date, FeeSource.order_time <= end_date
                 )
             except ValueError:
                 return param_error_response("时间格式不正确，请使用YYYY-MM-DD格式")
 
-        # 计算总数（同样应用状态和时间筛选逻辑）
-        count_query = select(func.count(Fee.fee_id))
+        # 计算总数（同样应用租户范围、状态和时间筛选逻辑）
+        count_query = select(func.count(FeeSource.fee_id)).where(
+            *tenant.conditions(FeeSource.company_id)
+        )
 
         if status:
             if status == "已支付":
-                count_query = count_query.where(Fee.status == "已结算")
+                count_query = count_query.where(FeeSource.status == "已结算")
             else:
-                count_query = count_query.where(Fee.status == status)
+                count_query = count_query.where(FeeSource.status == status)
         if keyword and keyword.strip():
             search_term = f"%{keyword.strip()}%"
-            count_query = count_query.where(Fee.order_id.like(search_term))
+            count_query = count_query.where(FeeSource.order_id.like(search_term))
         if start_time and end_time:
             try:
                 start_date = datetime.strptime(start_time, "%Y-%m-%d")
                 end_date = datetime.strptime(end_time, "%Y-%m-%d")
                 end_date = end_date.replace(hour=23, minute=59, second=59)
                 count_query = count_query.where(
-                    Fee.order_time >= start_date, Fee.order_time <= end_date
+                    FeeSource.order_time >= start_date, FeeSource.order_time <= end_date
                 )
             except ValueError:
                 pass  # 前面已经处理过错误
@@ -283,46 +421,22 @@ async def get_fee_list(
         total_pages = (total + size - 1) // size
 
         query = query.offset(offset).limit(size)
-        query = query.order_by(Fee.created_at.desc())
-
-        fees = db.exec(query).all()
-
-        # 构建响应数据（将"已结算"映射为"已支付"返回）
-        fee_items = []
-        for fee in fees:
-            display_status = "已支付" if fee.status == "已结算" else fee.status
-
-            fee_items.append(
-                FeeResponse(
-                    fee_id=fee.fee_id,
-                    path_id=fee.path_id,
-                    order_id=fee.order_id,
-                    status=display_status,
-                    total_price=fee.total_price,
-                    driver_fee=fee.driver_fee,
-                    highway_fee=fee.highway_fee,
-                    parking_fee=fee.parking_fee,
-                    carry_fee=fee.carry_fee,
-                    wait_fee=fee.wait_fee,
-                    order_time=fee.order_time.isoformat() if fee.order_time else "",
-                    highway_bill_imgs=fee.highway_bill_imgs,
-                    parking_bill_imgs=fee.parking_bill_imgs,
-                    company_id=fee.company_id,
-                    created_at=fee.created_at.isoformat(),
-                    updated_at=fee.updated_at.isoformat(),
-                )
-            )
+        query = query.order_by(FeeSource.created_at.desc())
 
-        response_data = FeeListResponse(
-            items=fee_items,
-            total=total,
-            page=page,
-            size=size,
-            total_pages=total_pages,
-        )
+        # Core 行直接映射为响应字典（将"已结算"映射为"已支付"返回）
+        rows = db.connection().execute(query).all()
+        fee_items = driver_fee_row_mapper.project(selected).map_all(rows)
+
+        response_data = {
+            "items": fee_items,
+            "total": total,
+            "page": page,
+            "size": size,
+            "total_pages": total_pages,
+        }
 
         return success_response(
-            data=jsonable_encoder(response_data),
+            data=response_data,
             message="获取费用列表成功",
         )
 
@@ -335,17 +449,41 @@ async def get_fee_list(
 
 
 @router.patch("/pay", summary="司机支付费用")
-async def pay_fee(data: FeePayRequest, db: Session = Depends(get_db)) -> JSONResponse:
+@idempotent("driver_pay")
+async def pay_fee(
+    data: FeePayRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
     try:
-        # 更新费用表
-        fee = db.query(Fee).filter_by(fee_id=data.fee_id).first()
+        # 锁定费用：并发的重复支付在此排队，后到的看到已结算状态后返回
+        fee = db.exec(
+            select(Fee)
+            .where(Fee.fee_id == data.fee_id, *tenant.conditions(Fee.company_id))
+            .with_for_update()
+        ).first()
         if not fee:
             return not_found_response("费用不存在")
-
-        # 获取客户的账户余额
-        account = db.query(Account).filter_by(company_id=fee.company_id).first()
+        if fee.status == OrderStatusEnum.SETTLED:
+            return param_error_response("费用已支付")
+
+        # 锁定客户账户和司机：扣款、司机入账和收入流水在同一事务中提交
+        account = (
+            db.query(Account)
+            .filter_by(company_id=fee.company_id)
+            .with_for_update()
+            .first()
+        )
         if not account:
             return not_found_response("账户不存在")
+        driver = (
+            db.query(Driver)
+            .filter_by(driver_account_id=fee.driver_account_id)
+            .with_for_update()
+            .first()
+        )
+        if not driver:
+            return not_found_response("司机不存在")
 
         # 余额不足
         acc_balance = account.company_account_balance
@@ -362,28 +500,28 @@ async def pay_fee(data: FeePayRequest, db: Session = Depends(get_db)) -> JSONRes
         # 扣除余额
         account.company_account_balance -= balance
         db.add(account)
-        db.commit()
-        db.refresh(account)
 
         # 更新费用表
         fee.status = OrderStatusEnum.SETTLED
         fee.updated_at = datetime.utcnow()
 
-        # 司机增加费用
-        driver = (
-            db.query(Driver).filter_by(driver_account_id=fee.driver_account_id).first()
+        # 司机增加费用，写入收入流水和月度汇总
+        credit_driver(
+            db,
+            driver,
+            fee,
+            total_price=data.total_price,
+            carry_fee=data.carry_fee,
+            wait_fee=data.wait_fee,
+            highway_fee=data.highway_fee,
+            parking_fee=data.parking_fee,
         )
-        if not driver:
-            return not_found_response("司机不存在")
-        driver.driver_account_balance = driver.driver_account_balance + balance
-        db.add(driver)
-        db.commit()
-        db.refresh(driver)
 
         # 推送消息给司机端
         push_message = {
             "type": "fee_paid",
             "data": {
+                "fee_id": fee.fee_id,
                 "driver_account_id": driver.driver_account_id,
                 "order_id": fee.order_id,
                 "path_id": fee.path_id,
@@ -395,7 +533,17 @@ async def pay_fee(data: FeePayRequest, db: Session = Depends(get_db)) -> JSONRes
                 "pay_time": datetime.utcnow().isoformat(),
             },
         }
-        await send_message_to_type("driver", push_message)
+        enqueue_push(
+            db,
+            ("driver",),
+            push_message,
+            company_id=fee.company_id,
+            driver_account_id=driver.driver_account_id,
+        )
+        db.commit()
+        outbox_dispatcher.notify()
+        # 余额减少，检查是否需要余额预警
+        balance_warning_evaluator.check_account(account)
 
         return success_response("费用支付成功")
 
@@ -409,124 +557,49 @@ async def pay_fee(data: FeePayRequest, db: Session = Depends(get_db)) -> JSONRes
     summary="获取支付订单详情",
     description="根据订单号或运单号获取订单详情信息",
 )
-async def get_order_detail(
+@single_flight("driver_detail")
+def get_order_detail(
     order_id: Optional[str] = Query(None, description="订单号"),
     path_id: Optional[str] = Query(None, description="运单号"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None, description="返回字段（逗号分隔，可选，默认全部）"
+    ),
+    include_archived: bool = Query(
+        False, description="是否包含已归档的历史费用（默认只查询近期数据）"
+    ),
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
 ) -> JSONResponse:
     """
     司机获取订单详情
     order_id 和 path_id 至少传入一个
     """
     try:
+        # 默认只查询热表，include_archived 时包含归档表
+        FeeSource = fee_model(include_archived)
         # 参数验证
         if not order_id and not path_id:
             return param_error_response("订单号和运单号至少传入一个")
 
-        # 查询费用信息
-        fee_query = select(Fee)
-        conditions = []
+        try:
+            selected = parse_fields(fields, ORDER_DETAIL_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
+        # 查询费用信息（同时考虑order_id和path_id，限定调用方所属公司）
+        conditions = tenant.conditions(FeeSource.company_id)
         if order_id:
-            conditions.append(Fee.order_id == order_id)
+            conditions.append(FeeSource.order_id == order_id)
         if path_id:
-            conditions.append(Fee.path_id == path_id)
+            conditions.append(FeeSource.path_id == path_id)
 
-        fee_query = (
-            fee_query.where(and_(*conditions))
-            if len(conditions) > 1
-            else fee_query.where(conditions[0])
+        # 按所选字段投影，未选订单详情或司机字段时跳过对应查询
+        response_data = load_order_details(
+            db, conditions, selected, _display_driver_status, include_archived
         )
-
-        fee_list = db.exec(fee_query).all()
-        if not fee_list:
+        if not response_data:
             return not_found_response("订单不存在")
 
-        response_data = []
-        for fee in fee_list:
-            # 状态映射："已结算" → "已支付"
-            display_status = "已支付" if fee.status == "已结算" else fee.status
-
-            # 查询订单详情
-            order_detail = db.exec(
-                select(OrderDetail).where(OrderDetail.order_id == fee.order_id)
-            ).first()
-
-            # 查询司机信息
-            driver = None
-            if fee.driver_account_id:
-                driver = db.exec(
-                    select(Driver).where(
-                        Driver.driver_account_id == fee.driver_account_id
-                    )
-                ).first()
-
-            # 构建响应数据
-            response_data.append(
-                {
-                    "path_id": fee.path_id,
-                    "order_id": fee.order_id,
-                    "status": display_status,
-                    "order_time": (
-                        fee.order_time.isoformat() if fee.order_time else None
-                    ),
-                    "finish_time": (
-                        order_detail.finish_time.isoformat()
-                        if order_detail and order_detail.finish_time
-                        else None
-                    ),
-                    "driver_name": driver.driver_name if driver else None,
-                    "driver_phone": driver.driver_phone if driver else None,
-                    "car_plate": order_detail.car_plate if order_detail else None,
-                    "loading_addr": order_detail.loading_addr if order_detail else None,
-                    "sender_name": order_detail.sender_name if order_detail else None,
-                    "sender_phone": order_detail.sender_phone if order_detail else None,
-                    "unloading_addr": (
-                        order_detail.unloading_addr if order_detail else None
-                    ),
-                    "receiver_name": (
-                        order_detail.receiver_name if order_detail else None
-                    ),
-                    "receiver_phone": (
-                        order_detail.receiver_phone if order_detail else None
-                    ),
-                    "goods_volume": order_detail.goods_volume if order_detail else None,
-                    "goods_num": order_detail.goods_num if order_detail else None,
-                    "goods_weight": order_detail.goods_weight if order_detail else None,
-                    "demand_car_type": (
-                        order_detail.demand_car_type if order_detail else None
-                    ),
-                    "is_carpool": order_detail.is_carpool if order_detail else None,
-                    "need_carry": order_detail.need_carry if order_detail else None,
-                    "logistics_platform": fee.logistics_platform,
-                    "other_loading_demand": (
-                        order_detail.other_loading_demand if order_detail else None
-                    ),
-                    "total_distance": (
-                        order_detail.total_distance if order_detail else None
-                    ),
-                    "loading_goods_imgs": (
-                        order_detail.loading_goods_imgs if order_detail else None
-                    ),
-                    "loading_car_imgs": (
-                        order_detail.loading_car_imgs if order_detail else None
-                    ),
-                    "unloading_goods_imgs": (
-                        order_detail.unloading_goods_imgs if order_detail else None
-                    ),
-                    "unloading_car_imgs": (
-                        order_detail.unloading_car_imgs if order_detail else None
-                    ),
-                    "receipt_imgs": fee.receipt_imgs,
-                    "parking_bill_imgs": fee.parking_bill_imgs,
-                    "highway_bill_imgs": fee.highway_bill_imgs,
-                    "total_price": fee.total_price,
-                    "highway_fee": fee.highway_fee,
-                    "parking_fee": fee.parking_fee,
-                    "carry_fee": fee.carry_fee,
-                    "wait_fee": fee.wait_fee,
-                }
-            )
-
         return success_response(data=response_data, message="获取订单详情成功")
 
     except Exception as e:
@@ -535,3 +608,149 @@ async def get_order_detail(
 
         print(f"完整错误信息: {traceback.format_exc()}")
         return internal_error_response("获取订单详情失败")
+
+
+@router.post(
+    "/details",
+    summary="司机批量获取订单详情",
+    description="按订单号/运单号列表批量获取订单详情，结果与请求顺序一致",
+)
+async def get_order_details(
+    data: OrderDetailBatchRequest,
+    tenant: Tenant = Depends(get_tenant),
+    db: Session = Depends(get_read_db),
+) -> JSONResponse:
+    """
+    司机批量获取订单详情
+
+    每张表只查询一次（替代逐个调用 /detail），单次最多
+    ORDER_DETAIL_BATCH_MAX 个订单
+    """
+    try:
+        try:
+            keys = batch_keys(data.keys, settings.ORDER_DETAIL_BATCH_MAX)
+            selected = parse_fields(data.fields, ORDER_DETAIL_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
+        details = load_order_details_batch(
+            db,
+            keys,
+            selected,
+            _display_driver_status,
+            data.include_archived,
+            scope=tenant.conditions(fee_model(data.include_archived).company_id),
+        )
+        response_data = [
+            {"order_id": order_id, "path_id": path_id, "details": items}
+            for (order_id, path_id), items in zip(keys, details)
+        ]
+        return success_response(data=response_data, message="批量获取订单详情成功")
+
+    except Exception as e:
+        print(f"司机批量获取订单详情错误: {e}")
+        return internal_error_response("批量获取订单详情失败")
+
+
+def _monthly_response(summary: DriverMonthlyEarning) -> DriverMonthlyEarningResponse:
+    """月度汇总响应模型"""
+    return DriverMonthlyEarningResponse(
+        month=summary.month,
+        earning_count=summary.earning_count,
+        total_amount=summary.total_amount,
+        total_price=summary.total_price,
+        carry_fee=summary.carry_fee,
+        wait_fee=summary.wait_fee,
+        highway_fee=summary.highway_fee,
+        parking_fee=summary.parking_fee,
+    )
+
+
+@router.get(
+    "/earnings",
+    summary="司机月账单",
+    description="按月份倒序分页查询司机的月度收入汇总",
+    response_model=DriverStatementResponse,
+)
+def get_earnings(
+    page: int = Query(1, description="当前页码", ge=1),
+    size: int = Query(12, description="每页数量", ge=1, le=60),
+    identity: Identity = Depends(require_identity(ROLE_DRIVER)),
+    db: Session = Depends(get_read_db),
+):
+    """
+    司机月账单（司机令牌中的账户）
+
+    只读取月度汇总（每笔入账时增量更新），不扫描费用表
+    """
+    driver_account_id = identity.driver_account_id
+    try:
+        driver = db.get(Driver, driver_account_id)
+        if not driver:
+            return not_found_response("司机不存在")
+
+        statements, total = list_monthly_statements(
+            db, driver_account_id, page=page, size=size
+        )
+        return DriverStatementResponse(
+            driver_account_id=driver.driver_account_id,
+            driver_account_balance=driver.driver_account_balance,
+            items=[_monthly_response(summary) for summary in statements],
+            total=total,
+            page=page,
+            size=size,
+            total_pages=(total + size - 1) // size,
+        )
+
+    except Exception as e:
+        print(f"获取司机月账单错误: {e}")
+        return internal_error_response("获取司机月账单失败")
+
+
+@router.get(
+    "/earnings/{month}",
+    summary="司机月账单明细",
+    description="查询某月的收入汇总和收入流水（按入账时间倒序，翻页时传入上一页返回的 next_cursor）",
+    response_model=DriverEarningDetailResponse,
+)
+def get_month_earnings(
+    month: str,
+    size: int = Query(20, description="每页数量", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    identity: Identity = Depends(require_identity(ROLE_DRIVER)),
+    db: Session = Depends(get_read_db),
+):
+    """
+    司机月账单明细（司机令牌中的账户）
+    """
+    try:
+        summary, earnings, next_cursor = list_month_earnings(
+            db, identity.driver_account_id, month, size=size, cursor=cursor
+        )
+        return DriverEarningDetailResponse(
+            summary=_monthly_response(summary) if summary else None,
+            items=[
+                DriverEarningResponse(
+                    earning_id=earning.earning_id,
+                    created_at=earning.created_at,
+                    fee_id=earning.fee_id,
+                    order_id=earning.order_id,
+                    path_id=earning.path_id,
+                    amount=earning.amount,
+                    total_price=earning.total_price,
+                    carry_fee=earning.carry_fee,
+                    wait_fee=earning.wait_fee,
+                    highway_fee=earning.highway_fee,
+                    parking_fee=earning.parking_fee,
+                    balance_after=earning.balance_after,
+                )
+                for earning in earnings
+            ],
+            next_cursor=next_cursor,
+        )
+
+    except ValueError as e:
+        return param_error_response(str(e))
+    except Exception as e:
+        print(f"获取司机月账单明细错误: {e}")
+        return internal_error_response("获取司机月账单明细失败")
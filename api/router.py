@@ -1,15 +1,37 @@
 from fastapi import APIRouter
 
+from .auth import router as auth_router
 from .company import router as company_router
 from .user import router as user_router
-from .driver import router as driver_router
-from .client import router as client_router
 
 router = APIRouter()
-finance_router = APIRouter()
 
+router.include_router(auth_router)
 router.include_router(company_router)
 router.include_router(user_router)
 
-finance_router.include_router(driver_router)
-finance_router.include_router(client_router)
\ No newline at end of file
+
+def build_finance_router() -> APIRouter:
+    """
+    构建财务路由（司机、客户费用，票据图片上传）
+
+    财务模块依赖的模型较多，由 /finance 子应用首次访问时才导入
+    """
+    from .driver import router as driver_router
+    from .client import router as client_router
+    from .upload import router as upload_router
+
+    finance_router = APIRouter()
+    finance_router.include_router(driver_router)
+    finance_router.include_router(client_router)
+    finance_router.include_router(upload_router)
+    return finance_router
+
+
+def __getattr__(name: str):
+    # 兼容 from api.router import finance_router，按需构建
+    if name == "finance_router":
+        finance_router = build_finance_router()
+        globals()["finance_router"] = finance_router
+        return finance_router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
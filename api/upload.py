@@ -0,0 +1,170 @@
+import mimetypes
+import os
+import re
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+
+from config.settings import settings
+from utils.auth import get_identity
+from utils.compression import IMMUTABLE_CACHE_CONTROL
+from utils.conditional import is_not_modified
+from utils.image_variants import (
+    DiskLRUCache,
+    VariantRenderer,
+    VariantSpec,
+    variants_supported,
+)
+from utils.response import (
+    success_response,
+    param_error_response,
+    not_found_response,
+    payload_too_large_response,
+    unprocessable_response,
+    internal_error_response,
+)
+from utils.sendfile import SendfileResponse
+from utils.upload import (
+    IMAGE_FIELDS,
+    ContentAddressedStore,
+    ImageUploadParser,
+    UploadError,
+)
+
+router = APIRouter(
+    prefix="/upload",
+    tags=["文件上传"],
+)
+
+image_store = ContentAddressedStore(settings.UPLOAD_DIR)
+variant_renderer = VariantRenderer(
+    DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES),
+    max_workers=settings.IMAGE_VARIANT_WORKERS,
+)
+
+# 上传图片文件名：<SHA-256><扩展名>
+_IMAGE_NAME_PATTERN = re.compile(r"^([0-9a-f]{64})(\.(?:jpg|png|webp))$")
+
+# 请求体由 ImageUploadParser 流式解析，文档中单独声明 multipart 格式
+_IMAGE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        field: {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        }
+                        for field in IMAGE_FIELDS
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "/images",
+    summary="上传票据/回单图片",
+    description="以 multipart/form-data 上传图片（字段名为费用或订单详情的图片字段，"
+    "同一字段可上传多张），返回按字段拼接好的图片路径，直接作为对应字段的值保存",
+    openapi_extra=_IMAGE_UPLOAD_BODY,
+    # 图片按内容寻址、可直接通过静态目录访问，获取接口不校验令牌
+    dependencies=[Depends(get_identity)],
+)
+async def upload_images(request: Request) -> JSONResponse:
+    """
+    上传图片
+
+    请求体边接收边写入磁盘，按内容 SHA-256 存储：相同图片重复上传时
+    不再写入，返回相同路径
+    """
+    parser = ImageUploadParser(
+        image_store,
+        max_files=settings.UPLOAD_MAX_FILES,
+        max_file_bytes=settings.UPLOAD_MAX_FILE_BYTES,
+    )
+    try:
+        files = await parser.parse(request.headers, request.stream())
+    except UploadError as e:
+        if e.too_large:
+            return payload_too_large_response(str(e))
+        return param_error_response(str(e))
+    except Exception as e:
+        print(f"上传图片错误: {e}")
+        return internal_error_response("上传图片失败")
+
+    # 同一字段的多张图片按逗号拼接（与费用、订单详情中的保存格式一致）
+    paths = {}
+    for file in files:
+        paths.setdefault(file.field, []).append(file.path)
+    return success_response(
+        data={
+            "files": [file._asdict() for file in files],
+            "paths": {field: ",".join(items) for field, items in paths.items()},
+        },
+        message="上传成功",
+    )
+
+
+@router.get(
+    "/images/{name}",
+    summary="获取图片（可缩放、重新压缩）",
+    description="name 为上传返回路径中的文件名。指定 w（宽度）、q（质量）或 fmt（格式）时"
+    "返回按需生成的衍生图，否则返回原图；支持 Range 请求，可长期缓存",
+)
+async def get_image(
+    request: Request,
+    name: str,
+    w: Optional[int] = Query(None, description="宽度（像素），只缩小不放大"),
+    q: Optional[int] = Query(None, description="压缩质量", ge=30, le=95),
+    fmt: Optional[Literal["jpeg", "webp"]] = Query(None, description="输出格式"),
+):
+    """
+    获取图片
+
+    上传的图片按内容哈希存储，同一文件名（及参数）始终对应同一内容，
+    响应使用强 ETag 并允许长期缓存
+    """
+    match = _IMAGE_NAME_PATTERN.match(name)
+    if match is None:
+        return not_found_response("图片不存在")
+    digest, extension = match.groups()
+    source = image_store.path_for(digest, extension)
+    try:
+        source_stat = os.stat(source)
+    except OSError:
+        return not_found_response("图片不存在")
+    if w is not None and w not in settings.IMAGE_VARIANT_WIDTHS:
+        widths = "、".join(str(width) for width in settings.IMAGE_VARIANT_WIDTHS)
+        return param_error_response(f"宽度只能是 {widths}")
+
+    path, stat, etag = source, source_stat, f'"{digest}"'
+    media_type = mimetypes.guess_type(name)[0]
+    # 未安装 Pillow 时返回原图
+    if (w, q, fmt) != (None, None, None) and variants_supported():
+        spec = VariantSpec(
+            width=w,
+            quality=q or settings.IMAGE_VARIANT_QUALITY,
+            format=fmt or ("webp" if extension == ".webp" else "jpeg"),
+        )
+        etag = f'"{digest}-{spec.key}"'
+        media_type = spec.media_type
+        if not is_not_modified(request, etag):
+            try:
+                path, stat = await variant_renderer.get(source, digest, spec)
+            except OSError:
+                return unprocessable_response("图片无法处理")
+            except Exception as e:
+                print(f"生成衍生图错误: {e}")
+                return internal_error_response("生成图片失败")
+
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return SendfileResponse(path, stat, media_type=media_type, headers=headers)
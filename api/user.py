@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session, select, func
 from datetime import datetime
+from typing import Optional
 import traceback
 
 from models.user import (
@@ -12,6 +13,8 @@ from models.user import (
     UserListRequest,
     UserListResponse,
     UserUpdate,
+    USER_LIST_FIELDS,
+    parse_permissions,
 )
 from models.company import Company
 from utils.validation import validate_phone
@@ -22,10 +25,30 @@ from utils.response import (
     internal_error_response,
 )
 from config.database import get_db
+from utils.auth import ROLE_CLIENT, ROLE_PLATFORM, require_role
+from utils.projection import RowMapper, select_columns, parse_fields, isoformat
 
 router = APIRouter(
     prefix="/users",
     tags=["员工管理"],
+    dependencies=[Depends(require_role(ROLE_CLIENT, ROLE_PLATFORM))],
+)
+
+
+def _display_operator_type(operator_type) -> str:
+    """操作员类型枚举转字符串"""
+    return getattr(operator_type, "value", operator_type)
+
+
+# 员工列表行映射器
+user_row_mapper = RowMapper(
+    USER_LIST_FIELDS,
+    converters={
+        "permissions": parse_permissions,
+        "operator_type": _display_operator_type,
+        "created_at": isoformat,
+        "updated_at": isoformat,
+    },
 )
 
 
@@ -226,6 +249,9 @@ async def create_user(
 )
 async def get_user_list(
     request_data: UserListRequest,
+    fields: Optional[str] = Query(
+        None, description="返回字段（逗号分隔，可选，默认全部）"
+    ),
     db: Session = Depends(get_db),
 ) -> JSONResponse:
     """
@@ -233,6 +259,7 @@ async def get_user_list(
 
     Args:
         request_data: 请求参数
+        fields: 返回字段
         db: 数据库会话
 
     Returns:
@@ -243,13 +270,18 @@ async def get_user_list(
         if not request_data.company_id.strip():
             return param_error_response("企业ID不能为空")
 
+        try:
+            selected = parse_fields(fields, USER_LIST_FIELDS)
+        except ValueError as e:
+            return param_error_response(str(e))
+
         # 验证企业是否存在
         company = db.get(Company, request_data.company_id)
         if not company:
             return not_found_response("企业不存在")
 
-        # 构建查询条件
-        query = select(User).where(
+        # 构建查询条件（只投影所选字段对应的列）
+        query = select(*select_columns(User.__table__, selected)).where(
             User.company_id == request_data.company_id, User.is_deleted == False
         )
 
@@ -282,38 +314,21 @@ async def get_user_list(
         query = query.offset(offset).limit(request_data.size)
         query = query.order_by(User.created_at.desc())  # 按创建时间倒序
 
-        users = db.exec(query).all()
-
-        # 转换数据
-        user_items = []
-        for user in users:
-
-            user_response = UserResponse(
-                user_id=user.user_id,
-                nick_name=user.nick_name,
-                phone=user.phone,
-                job_number=user.job_number,
-                position=user.position,
-                permissions=user.get_permissions(),
-                registered=user.registered,
-                operator_type=user.operator_type,
-                company_id=user.company_id,
-                created_at=user.created_at.isoformat(),
-                updated_at=user.updated_at.isoformat(),
-            )
-            user_items.append(user_response)
+        # Core 行直接映射为响应字典
+        rows = db.connection().execute(query).all()
+        user_items = user_row_mapper.project(selected).map_all(rows)
 
         # 构造响应数据
-        response_data = UserListResponse(
-            items=user_items,
-            total=total,
-            page=request_data.page,
-            size=request_data.size,
-            total_pages=total_pages,
-        )
+        response_data = {
+            "items": user_items,
+            "total": total,
+            "page": request_data.page,
+            "size": request_data.size,
+            "total_pages": total_pages,
+        }
 
         return success_response(
-            data=jsonable_encoder(response_data),
+            data=response_data,
             message="获取员工列表成功",
         )
 
@@ -1,8 +1,100 @@
 from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from fastapi import Depends, Request
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Generator, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
 
 
 from .settings import settings
+from models.replication import ReplicationHeartbeat
+from utils.auth import caller_key
+
+
+class DecayingAverage:
+    """
+    指数加权平均，长时间没有新样本时按半衰期向 0 衰减
+
+    Args:
+        alpha: 新样本权重
+        half_life: 衰减半衰期（秒）
+    """
+
+    def __init__(self, alpha: float = 0.2, half_life: float = 5.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self._value = 0.0
+        self._updated_at = time.monotonic()
+
+    def value(self, now: Optional[float] = None) -> float:
+        """当前值"""
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self._updated_at, 0.0)
+        return self._value * 0.5 ** (elapsed / self.half_life)
+
+    def add(self, sample: float, now: Optional[float] = None) -> None:
+        """加入新样本"""
+        now = time.monotonic() if now is None else now
+        self._value = self.value(now) * (1 - self.alpha) + sample * self.alpha
+        self._updated_at = now
+
+
+class PoolMetrics:
+    """
+    连接池指标：获取连接的等待时间、连接占用时间、等待中的请求数
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.capacity = 1
+        self.checkout_wait = DecayingAverage()
+        self.hold_time = DecayingAverage()
+
+    def wait_started(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def wait_finished(self, elapsed: float) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_wait.add(elapsed)
+
+    def record_hold(self, elapsed: float) -> None:
+        with self._lock:
+            self.hold_time.add(elapsed)
+
+    def estimated_wait(self) -> float:
+        """
+        估算新请求获取连接需要等待的时间（秒）
+
+        取最近的实际等待时间和按排队数估算的等待时间
+        （等待数 × 平均占用时间 / 连接数）中的较大值
+        """
+        with self._lock:
+            queued = self.waiting * self.hold_time.value() / max(self.capacity, 1)
+            return max(self.checkout_wait.value(), queued)
+
+
+pool_metrics = PoolMetrics()
+
+
+class MonitoredQueuePool(QueuePool):
+    """记录获取连接等待时间的连接池"""
+
+    def _do_get(self):
+        pool_metrics.wait_started()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_metrics.wait_finished(time.perf_counter() - started)
+
 
 # 数据库引擎
 engine = create_engine(
@@ -10,19 +102,217 @@ engine = create_engine(
     pool_pre_ping=True,
     echo=settings.ENVIRONMENT == "development",
     pool_recycle=3600,
+    poolclass=MonitoredQueuePool,
+)
+pool_metrics.capacity = engine.pool.size() + max(engine.pool._max_overflow, 0)
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_at"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    checkout_at = connection_record.info.pop("checkout_at", None)
+    if checkout_at is not None:
+        pool_metrics.record_hold(time.perf_counter() - checkout_at)
+
+
+# 只读副本引擎（连接池指标只统计主库）
+replica_engines = [
+    create_engine(url, pool_pre_ping=True, pool_recycle=3600)
+    for url in settings.replica_urls
+]
+
+# 副本延迟检测使用的后台任务队列
+REPLICA_QUEUE = "replica"
+
+
+class ReadRouter:
+    """
+    读写分离路由：GET 接口的查询分配到复制延迟正常的只读副本
+
+    - 延迟通过心跳表测量：定期在主库写入当前时间，再读取各副本上的值，
+      两者之差即复制延迟。检测失败、延迟超过 max_lag 或超过 3 个检测间隔
+      未测量的副本不分配读请求
+    - 读己之写：客户端写入后 sticky_seconds 内的读请求走主库
+    - 没有可用副本时回退到主库
+
+    Args:
+        primary: 主库引擎
+        replicas: 只读副本引擎
+        max_lag: 允许的最大复制延迟（秒）
+        sticky_seconds: 客户端写入后读主库的时间（秒）
+        check_interval: 延迟检测间隔（秒）
+        max_clients: 记录写入时间的客户端数上限（超过时淘汰最早的）
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: Sequence[Engine] = (),
+        max_lag: float = 3.0,
+        sticky_seconds: float = 5.0,
+        check_interval: float = 1.0,
+        max_clients: int = 10000,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        # 客户端 -> 读主库截止时间，按写入先后排列
+        self._sticky: "OrderedDict[str, float]" = OrderedDict()
+        # 副本序号 -> (复制延迟, 测量时间)
+        self._lag: Dict[int, Tuple[float, float]] = {}
+        self._next = 0
+        self.reads = {"primary": 0, "replica": 0}
+
+    def mark_write(self, key: str, now: Optional[float] = None) -> None:
+        """记录客户端写入，之后 sticky_seconds 内的读请求走主库"""
+        if not self.replicas:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._sticky[key] = now + self.sticky_seconds
+            self._sticky.move_to_end(key)
+            while len(self._sticky) > self.max_clients:
+                self._sticky.popitem(last=False)
+
+    def check_lag(self, now: Optional[float] = None) -> List[float]:
+        """
+        写入主库心跳并测量各副本的复制延迟
+
+        Returns:
+            List[float]: 各副本的复制延迟（秒），检测失败为 inf
+        """
+        now = time.monotonic() if now is None else now
+        beat_at = datetime.utcnow()
+        with Session(self.primary) as session:
+            session.merge(ReplicationHeartbeat(id=1, beat_at=beat_at))
+            session.commit()
+
+        lags = []
+        for index, replica in enumerate(self.replicas):
+            try:
+                with Session(replica) as session:
+                    heartbeat = session.get(ReplicationHeartbeat, 1)
+                lag = (
+                    max((beat_at - heartbeat.beat_at).total_seconds(), 0.0)
+                    if heartbeat
+                    else math.inf
+                )
+            except Exception as e:
+                print(f"只读副本 {index} 延迟检测失败: {e}")
+                lag = math.inf
+            lags.append(lag)
+            with self._lock:
+                self._lag[index] = (lag, now)
+        return lags
+
+    def route(self, key: str, now: Optional[float] = None) -> Optional[Engine]:
+        """
+        为读请求选择副本
+
+        Args:
+            key: 客户端标识
+            now: 当前时间（monotonic）
+
+        Returns:
+            Optional[Engine]: 只读副本引擎，None 表示读主库
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            available = []
+            if self.replicas and self._sticky.get(key, 0.0) <= now:
+                available = [
+                    index
+                    for index, (lag, checked_at) in self._lag.items()
+                    if lag <= self.max_lag
+                    and now - checked_at <= 3 * self.check_interval
+                ]
+            if not available:
+                self.reads["primary"] += 1
+                return None
+            self._next += 1
+            self.reads["replica"] += 1
+            return self.replicas[available[self._next % len(available)]]
+
+    def schedule(self) -> None:
+        """在 replica 队列中定期检测副本延迟（配置了只读副本时，应用启动时调用）"""
+        from utils.tasks import task_runtime
+
+        task_runtime.register_queue(REPLICA_QUEUE, concurrency=1, max_retries=0)
+        task_runtime.every(
+            self.check_interval, REPLICA_QUEUE, self.check_lag, key=self
+        )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "lag": {index: lag for index, (lag, _) in self._lag.items()},
+                "sticky_clients": len(self._sticky),
+                **self.reads,
+            }
+
+
+read_router = ReadRouter(
+    engine,
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.READ_AFTER_WRITE_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS,
 )
 
 
-def get_db() -> Generator[Session, None, None]:
+@event.listens_for(Session, "after_flush")
+def _on_flush(session, flush_context):
+    # 请求中的会话写入数据后，该客户端的读请求暂时走主库
+    key = session.info.get("client_key")
+    if key is not None:
+        read_router.mark_write(key)
+
+
+def get_db(request: Request = None) -> Generator[Session, None, None]:
     """
-    获取数据库会话
+    获取数据库会话（主库）
+
+    Args:
+        request: 当前请求，写入数据后该客户端的读请求暂时走主库
 
     Returns:
         Generator[Session, None, None]: 数据库会话
     """
     with Session(engine) as session:
+        if request is not None:
+            session.info["client_key"] = caller_key(request.scope)
+        yield session
+
+
+def get_read_db(
+    request: Request, db: Session = Depends(get_db)
+) -> Generator[Session, None, None]:
+    """
+    获取只读查询的数据库会话
+
+    有延迟正常的只读副本且该客户端最近没有写入时使用副本，否则使用主库会话
+    （主库会话在首次查询时才获取连接，使用副本时不占用主库连接）
+
+    Returns:
+        Generator[Session, None, None]: 数据库会话
+    """
+    replica = read_router.route(caller_key(request.scope))
+    if replica is None:
+        yield db
+        return
+    with Session(replica) as session:
         yield session
 
+
 def create_db_and_tables():
     """
     创建数据库和表
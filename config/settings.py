@@ -1,8 +1,11 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from pathlib import Path
 
+# 默认的 JWT 共享密钥（仅用于开发环境，其他环境使用时拒绝启动）
+DEFAULT_JWT_SECRET_KEY = "change-me-in-production"
+
 
 class Settings(BaseSettings):
     # 基础配置
@@ -13,10 +16,107 @@ class Settings(BaseSettings):
     # 服务器配置
     HOST: str = "0.0.0.0"
     PORT: int = 8001
+    # 可信反向代理地址（逗号分隔），只采信这些地址转发的 X-Forwarded-For 作为客户端地址
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
 
     # CORS配置
     CORS_ORIGINS: List[str] = ["*"]
 
+    # OpenAPI 文档缓存目录（python -m utils.openapi 生成）
+    OPENAPI_CACHE_DIR: str = "build/openapi"
+
+    # 租户配置：客户端请求头携带所属公司ID，费用、账户查询只返回该公司的数据
+    TENANT_HEADER: str = "X-Company-Id"
+
+    # 认证配置（JWT，令牌携带公司、操作员类型、司机账户和权限，校验不查询数据库）
+    AUTH_REQUIRED: bool = False  # 是否拒绝未携带令牌的请求（客户端接入前保持关闭）
+    JWT_ALGORITHM: str = "HS256"  # HS256 使用共享密钥，RS256 / ES256 使用密钥文件
+    JWT_SECRET_KEY: str = DEFAULT_JWT_SECRET_KEY  # 非开发环境必须修改，否则拒绝启动
+    JWT_PRIVATE_KEY_FILE: Optional[str] = None  # RS / ES 算法的私钥（PEM）
+    JWT_PUBLIC_KEY_FILE: Optional[str] = None  # RS / ES 算法的公钥（PEM）
+    JWT_ISSUER: str = "logistics-backend"
+    JWT_EXPIRE_MINUTES: int = 720  # 令牌有效期（分钟）
+    AUTH_TOKEN_CACHE_SIZE: int = 4096  # 已校验令牌的缓存条数（命中时不再验签）
+
+    # 准入控制配置
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64  # 单进程总并发上限
+    ADMISSION_PAYMENT_RESERVED: int = 8  # 支付类预留并发数
+    ADMISSION_READ_LIMIT: int = 40  # 列表/查询类并发上限
+    ADMISSION_MAX_QUEUE_WAIT: float = 0.5  # 连接池估算排队时间阈值（秒）
+    ADMISSION_CLIENT_RATE: float = 20.0  # 每个客户端每秒请求数
+    ADMISSION_CLIENT_BURST: int = 40  # 每个客户端突发请求数
+
+    # 幂等键配置
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # 进程内缓存条数
+    IDEMPOTENCY_TTL_HOURS: int = 24  # 幂等键有效期
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # 等待其他进程处理同一幂等键的最长时间
+    IDEMPOTENCY_LEASE_SECONDS: float = 300.0  # 处理中记录的租约（处理期间续期，超时视为进程已退出）
+
+    # WebSocket 批量推送配置（连接时 ?batch=1 开启）
+    WS_BATCH_WINDOW_MS: int = 50  # 批量窗口（毫秒）
+    WS_BATCH_MAX_MESSAGES: int = 100  # 单批最大消息数
+
+    # WebSocket 心跳与连接限制配置
+    WS_PING_INTERVAL: float = 20.0  # 心跳间隔（秒）
+    WS_PONG_TIMEOUT: float = 20.0  # 心跳后等待客户端响应的时间（秒），超时即断开
+    WS_SEND_TIMEOUT: float = 5.0  # 单次发送超时（秒），超时视为连接不可用
+    WS_MAX_CONNECTIONS: Dict[str, int] = {
+        "platform": 200,
+        "client": 2000,
+        "driver": 10000,
+    }  # 每种类型的连接数上限
+    WS_MAX_QUEUED_BYTES: int = 256 * 1024  # 单个连接待发送消息的字节数上限
+    WS_MAX_MESSAGE_BYTES: int = 64 * 1024  # 客户端单条消息的字节数上限
+    WS_REPLAY_BUFFER_SIZE: int = 1000  # 每种类型保留的最近推送条数（重连补发）
+    WS_PER_MESSAGE_DEFLATE: bool = True  # 客户端支持时启用 permessage-deflate 压缩
+
+    # 推送发件箱配置
+    WS_OUTBOX_BATCH_SIZE: int = 200  # 单批分发条数
+    WS_OUTBOX_POLL_INTERVAL: float = 1.0  # 轮询间隔（秒），提交后会立即唤醒
+    WS_OUTBOX_RETENTION_HOURS: int = 24  # 已分发记录保留时间
+
+    # 后台任务配置
+    TASK_DEFAULT_CONCURRENCY: int = 4  # default 队列并发数
+    TASK_MAX_QUEUE_SIZE: int = 10000  # 每个队列排队任务数上限
+    TASK_DRAIN_TIMEOUT: float = 10.0  # 关闭时等待任务执行完的最长时间（秒）
+
+    # 余额预警配置
+    BALANCE_WARNING_NOTIFIER: str = (
+        "log"  # 通知方式（log：写入本地文件，短信接入前使用）
+    )
+    BALANCE_WARNING_LOG_PATH: str = "logs/balance_warning.log"
+    BALANCE_WARNING_DEBOUNCE_MINUTES: int = 30  # 同一账户两次预警的最小间隔（按进程计，多进程时每个进程各自防抖）
+
+    # 充值审核队列配置
+    RECHARGE_REVIEW_LEASE_SECONDS: int = 300  # 领取后的锁定时间，超时未审核可被他人领取
+    RECHARGE_REVIEW_MAX_CLAIM: int = 50  # 单次最多领取数量
+
+    # 图片上传配置（按内容哈希存储，相同内容只存一份）
+    UPLOAD_DIR: str = "static/uploads"  # 存储目录（位于静态目录下，可直接访问）
+    UPLOAD_MAX_FILES: int = 20  # 单次请求最多文件数
+    UPLOAD_MAX_FILE_BYTES: int = 10 * 1024 * 1024  # 单个文件大小上限（字节）
+
+    # 图片衍生图配置（缩略图、重新压缩，首次请求时生成，需要安装 Pillow）
+    IMAGE_CACHE_DIR: str = "cache/images"  # 衍生图缓存目录
+    IMAGE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 缓存总大小上限，超出时淘汰最久未访问的
+    IMAGE_VARIANT_WIDTHS: List[int] = [160, 320, 640, 1280]  # 可选宽度（限制取值，避免任意尺寸占满缓存）
+    IMAGE_VARIANT_QUALITY: int = 75  # 默认压缩质量
+    IMAGE_VARIANT_WORKERS: int = 2  # 生成衍生图的进程数
+
+    # 批量获取订单详情配置
+    ORDER_DETAIL_BATCH_MAX: int = 50  # 单次最多查询的订单数
+
+    # 费用归档配置
+    FEE_ARCHIVE_ENABLED: bool = True  # 是否定期归档已结算费用
+    FEE_ARCHIVE_AFTER_DAYS: int = 180  # 结算后保留在热表的天数
+    FEE_ARCHIVE_BATCH_SIZE: int = 500  # 单批归档条数（每批一个事务）
+    FEE_ARCHIVE_MAX_BATCHES: int = 20  # 每次执行最多归档批数，剩余的下次继续
+    FEE_ARCHIVE_INTERVAL_SECONDS: int = 3600  # 执行间隔（秒）
+
+    # 响应压缩配置
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # 小于该字节数的响应不压缩
+
     # 数据库配置
     MYSQL_SERVER: str = "localhost"
     MYSQL_USER: str = "root"
@@ -24,10 +124,28 @@ class Settings(BaseSettings):
     MYSQL_DATABASE: str = "logistics_db"
     MYSQL_PORT: int = 3306
 
+    # 读写分离配置（GET 接口优先读取只读副本）
+    # 只读副本地址（host 或 host:port），为空时全部走主库
+    MYSQL_REPLICAS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 3.0  # 复制延迟超过该值的副本不分配读请求
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 1.0  # 副本延迟检测间隔（秒）
+    READ_AFTER_WRITE_SECONDS: float = 5.0  # 客户端写入后读请求走主库的时间（秒）
+
     @property
     def database_url(self) -> str:
         return f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
 
+    @property
+    def replica_urls(self) -> List[str]:
+        """只读副本连接地址（账号、数据库与主库相同）"""
+        urls = []
+        for replica in self.MYSQL_REPLICAS:
+            host, _, port = replica.partition(":")
+            urls.append(
+                f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{host}:{port or self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
+            )
+        return urls
+
     @property
     def is_development(self) -> bool:
         return self.ENVIRONMENT == "development"
@@ -36,5 +154,25 @@ class Settings(BaseSettings):
     def is_production(self) -> bool:
         return self.ENVIRONMENT == "production"
 
+    def check_security(self) -> None:
+        """
+        启动时检查安全配置：非开发环境使用默认（或空）的 JWT 共享密钥时拒绝启动，
+        否则任何人都可以签发平台端令牌
+
+        Raises:
+            RuntimeError: 配置不安全
+        """
+        if self.is_development:
+            return
+        if self.JWT_ALGORITHM.startswith("HS") and self.JWT_SECRET_KEY in (
+            "",
+            DEFAULT_JWT_SECRET_KEY,
+        ):
+            raise RuntimeError(
+                f"{self.ENVIRONMENT} 环境必须配置 JWT_SECRET_KEY（不能使用默认密钥）"
+            )
+        if not self.AUTH_REQUIRED:
+            print("⚠️ AUTH_REQUIRED 未开启，未携带令牌的请求按租户请求头访问")
+
 
 settings = Settings()
@@ -1,23 +1,48 @@
 from fastapi import FastAPI, Request, status
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware import Middleware
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-import uvicorn
 import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
 
 from config.settings import settings
-from api.router import router, finance_router
+from config.database import read_router
+from api.router import router, build_finance_router
 from websocket.router import ws_router
+from utils.compression import (
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+    precompress_directory,
+)
+from utils.lazy_app import LazyASGIApp
+from utils.admission import AdmissionMiddleware, admission_options
+from utils.auth import AuthenticationError
+from utils.openapi import use_cached_openapi
+from utils.response import forbidden_response, unauthorized_response
+from utils.tasks import task_runtime
 
 
-def create_app() -> FastAPI:
+def create_app(
+    middleware: Optional[List[Middleware]] = None, lifespan: Optional[Callable] = None
+) -> FastAPI:
+    """
+    创建应用
+
+    Args:
+        middleware: 位于 CORS 内层的中间件（其响应也带 CORS 头）
+        lifespan: 应用生命周期（挂载的子应用不会执行，只用于主应用）
+    """
     app = FastAPI(
         title=settings.PROJECT_NAME,
         version=settings.VERSION,
         description="物流系统后端API",
         docs_url="/api/docs",
         redoc_url="/api/redoc",
+        middleware=middleware,
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -37,34 +62,118 @@ def create_app() -> FastAPI:
             content={"code": 400, "message": "参数错误", "details": exc.errors()},
         )
 
+    @app.exception_handler(AuthenticationError)
+    async def authentication_exception_handler(
+        request: Request, exc: AuthenticationError
+    ):
+        if exc.forbidden:
+            return forbidden_response(str(exc))
+        response = unauthorized_response(str(exc))
+        response.headers["WWW-Authenticate"] = "Bearer"
+        return response
+
     return app
 
 
-app = create_app()
-finance_app = create_app()
+def create_finance_app() -> FastAPI:
+    """
+    构建财务子应用
+
+    首次访问 /finance 时才导入司机、客户费用路由，缩短启动时间
+    """
+    finance_app = create_app()
+    finance_app.include_router(build_finance_router(), prefix="/api")
+    use_cached_openapi(finance_app, "finance")
+    return finance_app
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动后台任务，关闭时等待已入队的任务执行完"""
+    # 非开发环境使用默认 JWT 密钥时拒绝启动
+    settings.check_security()
+    task_runtime.start()
+    # 推送发件箱定期分发（每个进程推送给自己的连接，包括其他进程写入的推送）
+    from websocket.outbox import outbox_dispatcher
+
+    outbox_dispatcher.schedule()
+    if settings.FEE_ARCHIVE_ENABLED:
+        # 归档依赖费用模型，启动时才导入
+        from utils.archive import fee_archiver
+
+        fee_archiver.schedule()
+    if read_router.replicas:
+        # 配置了只读副本时定期检测复制延迟，检测前读请求都走主库
+        read_router.schedule()
+    yield
+    await task_runtime.drain(settings.TASK_DRAIN_TIMEOUT)
+    # 图片衍生图进程池（财务子应用加载后才存在）
+    upload_api = sys.modules.get("api.upload")
+    if upload_api is not None:
+        upload_api.variant_renderer.shutdown()
+
+
+# 准入控制（作用于 /api 及挂载的 /finance 子应用）
+app = create_app(
+    middleware=(
+        [Middleware(AdmissionMiddleware, **admission_options())]
+        if settings.ADMISSION_ENABLED
+        else None
+    ),
+    lifespan=lifespan,
+)
+use_cached_openapi(app, "main")
+lazy_finance_app = LazyASGIApp(create_finance_app)
+
+# 响应压缩（作用于 /api 及挂载的 /finance 子应用）
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+)
 
 # 只有当static目录存在时才挂载
 if os.path.exists("static"):
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    # 预压缩静态文件（已是最新的跳过，上传目录不处理）
+    precompress_directory(
+        "static",
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        exclude=(settings.UPLOAD_DIR,),
+    )
+    app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
     print("✅ Static files mounted from local directory")
 else:
     print("⚠️ Static directory not found, using CDN for docs")
 
 # API路由
 app.include_router(router, prefix="/api")
-finance_app.include_router(finance_router, prefix="/api")
 # WebSocket路由
 app.include_router(ws_router, prefix="/api")
 
 # 挂载子应用
-app.mount("/finance", finance_app)
+app.mount("/finance", lazy_finance_app)
+
+
+def __getattr__(name: str):
+    # main.finance_app 按需构建
+    if name == "finance_app":
+        return lazy_finance_app.app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8001,
         reload=True if settings.ENVIRONMENT == "development" else False,
         workers=1 if settings.ENVIRONMENT == "development" else 4,
+        # 反向代理后的真实客户端地址（限流、读己之写按此区分未登录客户端）
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        # 协议层心跳，与应用层 ping 配合回收半开连接
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PONG_TIMEOUT,
+        ws_max_size=settings.WS_MAX_MESSAGE_BYTES,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
     )
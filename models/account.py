@@ -27,6 +27,7 @@ class Account(SQLModel, table=True):
     company_account_balance_warning_enable: bool = Field(
         default=False, description="是否启用余额预警"
     )
+    # 以下充值字段已由充值记录表（recharge_records）取代，只保留历史数据，不再写入
     recharge_status: RechargeStatusEnum = Field(
         default=RechargeStatusEnum.UNDER_REVIEW, description="充值状态"
     )
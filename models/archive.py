@@ -0,0 +1,26 @@
+from sqlalchemy import union_all
+from sqlalchemy.orm import aliased
+from sqlmodel import SQLModel, select
+
+from .fee import Fee
+from .order_detail import OrderDetail
+
+# 归档表：结构与热表一致（已结算且超过保留时间的费用及其订单详情）
+fees_archive = Fee.__table__.to_metadata(SQLModel.metadata, name="fees_archive")
+order_details_archive = OrderDetail.__table__.to_metadata(
+    SQLModel.metadata, name="order_details_archive"
+)
+
+# 热表 + 归档表（UNION ALL），属性与 Fee / OrderDetail 相同，查询归档数据时使用
+AllFee = aliased(
+    Fee,
+    union_all(select(Fee.__table__), select(fees_archive)).subquery("fees_all"),
+    name="fees_all",
+)
+AllOrderDetail = aliased(
+    OrderDetail,
+    union_all(select(OrderDetail.__table__), select(order_details_archive)).subquery(
+        "order_details_all"
+    ),
+    name="order_details_all",
+)
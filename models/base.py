@@ -1,15 +1,23 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import mysql
 from sqlmodel import SQLModel, Field
 import uuid
 
+# 微秒精度时间（MySQL DATETIME 默认精度为秒，同一秒内的两次更新无法区分，
+# 由 updated_at 生成的 ETag 会相同）
+PRECISE_DATETIME = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 
 class BaseModel(SQLModel):
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="创建时间"
     )
     updated_at: datetime = Field(
-        default_factory=datetime.utcnow, description="更新时间"
+        default_factory=datetime.utcnow,
+        sa_type=PRECISE_DATETIME,
+        description="更新时间",
     )
 
 
@@ -0,0 +1,95 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional, List
+from uuid import uuid4
+from datetime import datetime
+
+from .base import PRECISE_DATETIME
+
+
+class DriverEarning(SQLModel, table=True):
+    """司机收入流水（只追加）：与司机余额入账在同一事务中写入"""
+
+    __tablename__ = "driver_earnings"
+
+    earning_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_type=PRECISE_DATETIME,
+        description="入账时间",
+    )
+    driver_account_id: str = Field(description="司机账户ID")
+    fee_id: str = Field(unique=True, description="费用ID（每笔费用只入账一次）")
+    order_id: str = Field(description="订单号")
+    path_id: str = Field(description="运单号")
+    amount: int = Field(description="入账金额（分）")
+    total_price: int = Field(default=0, description="基本路费（分）")
+    carry_fee: int = Field(default=0, description="搬运费（分）")
+    wait_fee: int = Field(default=0, description="等候费（分）")
+    highway_fee: int = Field(default=0, description="高速费（分）")
+    parking_fee: int = Field(default=0, description="停车费（分）")
+    balance_after: int = Field(description="入账后余额（分）")
+
+
+class DriverMonthlyEarning(SQLModel, table=True):
+    """司机月度收入汇总：每笔入账时增量更新，月账单直接读取"""
+
+    __tablename__ = "driver_monthly_earnings"
+
+    driver_account_id: str = Field(primary_key=True, description="司机账户ID")
+    month: str = Field(primary_key=True, max_length=7, description="月份（YYYY-MM）")
+    earning_count: int = Field(default=0, description="入账笔数")
+    total_amount: int = Field(default=0, description="入账总额（分）")
+    total_price: int = Field(default=0, description="基本路费（分）")
+    carry_fee: int = Field(default=0, description="搬运费（分）")
+    wait_fee: int = Field(default=0, description="等候费（分）")
+    highway_fee: int = Field(default=0, description="高速费（分）")
+    parking_fee: int = Field(default=0, description="停车费（分）")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DriverEarningResponse(SQLModel):
+    earning_id: str
+    created_at: datetime
+    fee_id: str
+    order_id: str
+    path_id: str
+    amount: int
+    total_price: int
+    carry_fee: int
+    wait_fee: int
+    highway_fee: int
+    parking_fee: int
+    balance_after: int
+
+
+class DriverMonthlyEarningResponse(SQLModel):
+    month: str
+    earning_count: int
+    total_amount: int
+    total_price: int
+    carry_fee: int
+    wait_fee: int
+    highway_fee: int
+    parking_fee: int
+
+
+class DriverStatementResponse(SQLModel):
+    """月账单列表（按月份倒序分页）"""
+
+    driver_account_id: str
+    driver_account_balance: int
+    items: List[DriverMonthlyEarningResponse]
+    total: int
+    page: int
+    size: int
+    total_pages: int
+
+
+class DriverEarningDetailResponse(SQLModel):
+    """某月账单明细"""
+
+    summary: Optional[DriverMonthlyEarningResponse]
+    items: List[DriverEarningResponse]
+    next_cursor: Optional[str] = Field(
+        default=None, description="下一页游标，为空表示没有更多"
+    )
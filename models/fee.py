@@ -4,7 +4,7 @@ from uuid import uuid4
 from datetime import datetime
 
 from .enums import OrderStatusEnum
-from .base import BaseModel
+from .base import BaseModel, PRECISE_DATETIME
 from pydantic import ValidationInfo, field_validator
 
 
@@ -13,7 +13,9 @@ class Fee(SQLModel, table=True):
 
     fee_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, sa_type=PRECISE_DATETIME
+    )
     path_id: str = Field(description="运单号")
     order_id: str = Field(description="订单号")
     status: OrderStatusEnum = Field(
@@ -76,6 +78,31 @@ class FeeResponse(BaseModel):
     updated_at: str
 
 
+# 列表接口投影字段（与 FeeResponse 一致，不含驳回原因等大字段）
+FEE_LIST_FIELDS = (
+    "fee_id",
+    "path_id",
+    "order_id",
+    "status",
+    "total_price",
+    "driver_fee",
+    "highway_fee",
+    "parking_fee",
+    "carry_fee",
+    "wait_fee",
+    "order_time",
+    "highway_bill_imgs",
+    "parking_bill_imgs",
+    "company_id",
+    "driver_id",
+    "created_at",
+    "updated_at",
+)
+
+# 响应字段名与列名不一致的映射
+FEE_FIELD_COLUMNS = {"driver_id": "driver_account_id"}
+
+
 class FeeListResponse(BaseModel):
     """费用列表响应模型"""
 
@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    """幂等键记录：保存首次请求的响应，重试时直接返回"""
+
+    __tablename__ = "idempotency_keys"
+
+    idempotency_key: str = Field(
+        primary_key=True,
+        max_length=200,
+        description="幂等键（接口范围:调用方摘要:客户端键）",
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    request_hash: str = Field(max_length=64, description="请求摘要（方法+路径+请求体）")
+    status_code: Optional[int] = Field(
+        default=None, description="响应状态码，为空表示处理中"
+    )
+    response_body: Optional[str] = Field(default=None, description="响应体（JSON）")
@@ -1,9 +1,9 @@
 from sqlmodel import SQLModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from uuid import uuid4
 
-from .base import BaseModel
+from .base import BaseModel, PRECISE_DATETIME
 
 
 class OrderDetail(SQLModel, table=True):
@@ -13,7 +13,9 @@ class OrderDetail(SQLModel, table=True):
 
     detail_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, sa_type=PRECISE_DATETIME
+    )
 
     # 关联字段
     order_id: str = Field(description="订单号", index=True)
@@ -114,3 +116,50 @@ class OrderDetailResponse(BaseModel):
     parking_fee: int
     carry_fee: int
     wait_fee: int
+
+
+class OrderDetailKey(SQLModel):
+    """订单详情查询键（订单号和运单号至少传入一个）"""
+
+    order_id: Optional[str] = Field(default=None, description="订单号")
+    path_id: Optional[str] = Field(default=None, description="运单号")
+
+
+class OrderDetailBatchRequest(BaseModel):
+    """批量获取订单详情请求模型"""
+
+    keys: List[OrderDetailKey] = Field(description="订单号/运单号列表")
+    fields: Optional[str] = Field(
+        default=None, description="返回字段（逗号分隔，可选，默认全部）"
+    )
+    include_archived: bool = Field(
+        default=False, description="是否包含已归档的历史费用（默认只查询近期数据）"
+    )
+
+
+# 订单详情接口字段（顺序与 OrderDetailResponse 一致，不含继承的时间戳字段）
+ORDER_DETAIL_FIELDS = tuple(
+    field
+    for field in OrderDetailResponse.model_fields
+    if field not in ("created_at", "updated_at")
+)
+
+# 来自费用表和司机表的字段，其余字段来自订单详情表
+ORDER_DETAIL_FEE_FIELDS = frozenset(
+    {
+        "path_id",
+        "order_id",
+        "status",
+        "order_time",
+        "logistics_platform",
+        "receipt_imgs",
+        "parking_bill_imgs",
+        "highway_bill_imgs",
+        "total_price",
+        "highway_fee",
+        "parking_fee",
+        "carry_fee",
+        "wait_fee",
+    }
+)
+ORDER_DETAIL_DRIVER_FIELDS = frozenset({"driver_name", "driver_phone"})
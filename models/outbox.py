@@ -0,0 +1,23 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class PushOutbox(SQLModel, table=True):
+    """推送发件箱：与业务数据在同一事务中写入，由后台分发任务推送"""
+
+    __tablename__ = "push_outbox"
+
+    id: Optional[int] = Field(default=None, primary_key=True, description="自增ID")
+    client_type: str = Field(max_length=20, description="推送目标连接类型")
+    message: str = Field(description="推送消息（JSON）")
+    company_id: Optional[str] = Field(
+        default=None, description="推送范围：接收的客户公司ID"
+    )
+    driver_account_id: Optional[str] = Field(
+        default=None, description="推送范围：接收的司机账户ID"
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    dispatched_at: Optional[datetime] = Field(
+        default=None, description="首次分发时间，为空表示未分发"
+    )
@@ -0,0 +1,73 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional, List
+from uuid import uuid4
+from datetime import datetime
+
+from .base import BaseModel, PRECISE_DATETIME
+from .enums import RechargeStatusEnum
+
+
+class RechargeRecord(SQLModel, table=True):
+    """
+    充值记录（只追加，按 created_at 月分区）
+
+    每次充值申请新增一行，审核通过时只更新本行的状态和审核字段，
+    账户表只保存余额
+    """
+
+    __tablename__ = "recharge_records"
+
+    recharge_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    # 分区键必须包含在主键中
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        primary_key=True,
+        sa_type=PRECISE_DATETIME,
+        description="申请时间",
+    )
+    company_account_id: str = Field(description="账户ID")
+    company_id: str = Field(description="客户公司ID")
+    recharge_name: str = Field(description="充值人姓名")
+    recharge_phone: str = Field(description="充值人手机号")
+    recharge_amount: int = Field(description="充值金额（分）")
+    received_amount: int = Field(description="到账金额（分）")
+    recharge_status: RechargeStatusEnum = Field(
+        default=RechargeStatusEnum.UNDER_REVIEW, description="充值状态"
+    )
+    approved_at: Optional[datetime] = Field(default=None, description="审核通过时间")
+    approved_by: Optional[str] = Field(default=None, description="审核人")
+    review_claimed_by: Optional[str] = Field(default=None, description="审核领取人")
+    review_lease_until: Optional[datetime] = Field(
+        default=None, description="审核领取到期时间"
+    )
+
+
+class RechargeRecordResponse(SQLModel):
+    recharge_id: str
+    company_account_id: str
+    company_id: str
+    created_at: datetime
+    recharge_name: str
+    recharge_phone: str
+    recharge_amount: int
+    received_amount: int
+    recharge_status: str
+    approved_at: Optional[datetime]
+    approved_by: Optional[str]
+    review_claimed_by: Optional[str]
+    review_lease_until: Optional[datetime]
+
+
+class RechargeHistoryResponse(SQLModel):
+    items: List[RechargeRecordResponse]
+    next_cursor: Optional[str] = Field(
+        default=None, description="下一页游标，为空表示没有更多"
+    )
+
+
+class RechargeClaimRequest(BaseModel):
+    limit: int = Field(default=10, ge=1, description="领取数量")
+
+
+class RechargeBatchApproveRequest(BaseModel):
+    recharge_ids: List[str] = Field(description="已领取的充值记录ID列表")
@@ -0,0 +1,11 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class ReplicationHeartbeat(SQLModel, table=True):
+    """复制心跳：定期在主库写入当前时间，读取只读副本上的值计算复制延迟"""
+
+    __tablename__ = "replication_heartbeat"
+
+    id: int = Field(default=1, primary_key=True, description="固定为 1")
+    beat_at: datetime = Field(description="主库写入时间（UTC）")
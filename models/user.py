@@ -6,6 +6,23 @@ from .base import BaseModel, generate_uuid
 from .enums import OperatorTypeEnum
 
 
+def parse_permissions(permissions: Optional[str]) -> List[str]:
+    """
+    解析权限 JSON 字符串
+
+    Args:
+        permissions: 权限 JSON 字符串
+
+    Returns:
+        List[str]: 权限字符串列表，解析失败时为空列表
+    """
+    try:
+        permission_values = json.loads(permissions)
+        return [str(p) for p in permission_values]
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return []
+
+
 class User(BaseModel, table=True):
     """
     用户模型
@@ -55,11 +72,7 @@ class User(BaseModel, table=True):
         Returns:
             List[str]: 权限字符串列表
         """
-        try:
-            permission_values = json.loads(self.permissions)
-            return [str(p) for p in permission_values]
-        except (json.JSONDecodeError, ValueError):
-            return []
+        return parse_permissions(self.permissions)
 
     def set_permissions(self, permissions: List[str]):
         """
@@ -98,6 +111,10 @@ class UserResponse(BaseModel):
     updated_at: str
 
 
+# 员工列表接口字段（顺序与 UserResponse 一致）
+USER_LIST_FIELDS = tuple(UserResponse.model_fields)
+
+
 class UserListRequest(BaseModel):
     """员工列表请求模型"""
 
@@ -1,14 +1,42 @@
 import pytest
+import pytest_asyncio
 import sys
 import os
+from contextlib import ExitStack
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from main import app
 from config.database import get_db, engine
 from config.settings import settings
+from utils.auth import token_manager
+from utils.tasks import task_runtime
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="运行性能基准测试（结果受机器负载影响，默认跳过，不作为 CI 门禁）",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: 性能基准测试，需要 --benchmark 参数")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="性能基准测试，使用 --benchmark 运行")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
 
 
 @pytest.fixture
@@ -34,6 +62,107 @@ def db_session():
         yield session
 
 
+@pytest.fixture
+def task_client():
+    """
+    测试客户端工厂，测试结束时在客户端的事件循环中停止后台任务运行时
+
+    接口向全局 task_runtime 入队（推送分发、余额预警）时，运行时绑定在客户端的
+    事件循环上，须在事件循环关闭前停止，否则执行协程会泄漏
+
+    Yields:
+        Callable[..., TestClient]: 创建并启动测试客户端（参数同 TestClient）
+    """
+    with ExitStack() as stack:
+
+        def make(app, **options) -> TestClient:
+            client = stack.enter_context(TestClient(app, **options))
+            # 后进先出：先停止运行时，再关闭客户端的事件循环
+            stack.callback(client.portal.call, task_runtime.stop)
+            return client
+
+        yield make
+
+
+@pytest.fixture
+def sqlite_engine():
+    """
+    SQLite 测试引擎工厂，测试结束时释放
+
+    默认为内存数据库（StaticPool，线程池中的请求共用同一连接）；传入 path 时
+    使用文件数据库（后台线程与请求各自使用独立连接）
+
+    Yields:
+        Callable[..., Engine]: 创建引擎并建好传入的表
+    """
+    engines = []
+
+    def make(*tables, path=None) -> Engine:
+        if path is None:
+            engine = create_engine(
+                "sqlite://",
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+        else:
+            engine = create_engine(
+                f"sqlite:///{path}", connect_args={"check_same_thread": False}
+            )
+        engines.append(engine)
+        for table in tables:
+            table.create(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def db_client(task_client):
+    """
+    使用测试引擎的客户端工厂：get_db 依赖替换为该引擎的会话
+
+    Returns:
+        Callable[..., TestClient]: 参数为应用、引擎和 TestClient 的其他参数
+    """
+
+    def make(app, engine, **options) -> TestClient:
+        def get_test_db():
+            with Session(engine) as db:
+                yield db
+
+        app.dependency_overrides[get_db] = get_test_db
+        return task_client(app, **options)
+
+    return make
+
+
+@pytest.fixture
+def platform_headers():
+    """
+    平台端令牌的请求头（不限公司；未携带令牌和租户请求头的请求不返回任何公司的数据）
+
+    Returns:
+        dict: Authorization 请求头
+    """
+    token, _ = token_manager.issue("platform-test", operator_type="PLATFORM")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture
+async def running_task_runtime():
+    """
+    异步测试中使用的全局后台任务运行时，测试结束时在同一事件循环中停止
+
+    Yields:
+        TaskRuntime: 后台任务运行时
+    """
+    task_runtime.start()
+    yield task_runtime
+    await task_runtime.stop()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
     """
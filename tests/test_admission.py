@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+
+from config.database import (
+    DecayingAverage,
+    MonitoredQueuePool,
+    PoolMetrics,
+    pool_metrics,
+)
+from utils.admission import (
+    PAYMENT,
+    READ,
+    WRITE,
+    AdmissionMiddleware,
+    TokenBucket,
+    classify_route,
+)
+from utils.auth import token_manager
+
+
+class FakePoolMetrics(PoolMetrics):
+    """可设置估算排队时间的连接池指标"""
+
+    def __init__(self):
+        super().__init__()
+        self.wait = 0.0
+
+    def estimated_wait(self) -> float:
+        return self.wait
+
+
+def build_app(metrics: PoolMetrics, **options) -> FastAPI:
+    """
+    挂载准入控制的测试应用
+
+    Args:
+        metrics: 连接池指标
+        options: 准入控制参数
+
+    Returns:
+        FastAPI: 测试应用
+    """
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, metrics=metrics, **options)
+
+    @app.get("/api/companies/{company_id}")
+    async def read(company_id: str, delay: float = 0):
+        await asyncio.sleep(delay)
+        return {"company_id": company_id}
+
+    @app.patch("/finance/api/driver/pay")
+    async def pay(delay: float = 0):
+        await asyncio.sleep(delay)
+        return {"paid": True}
+
+    return app
+
+
+def make_client(
+    app: FastAPI, address: str = "10.0.0.1", headers: Optional[dict] = None
+) -> httpx.AsyncClient:
+    """异步测试客户端（指定对端地址）"""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=(address, 50000)),
+        base_url="http://test",
+        headers=headers,
+    )
+
+
+class TestAdmission:
+    """准入控制测试类"""
+
+    def test_classify_route(self):
+        """测试路由类别判断"""
+        assert classify_route("PATCH", "/finance/api/driver/pay") == PAYMENT
+        assert classify_route("PATCH", "/finance/api/client/recharge") == PAYMENT
+        assert (
+            classify_route("PATCH", "/finance/api/client/accounts/a1/approve-recharge")
+            == PAYMENT
+        )
+        assert classify_route("POST", "/api/users/list") == READ
+        assert classify_route("POST", "/finance/api/client/fee/details") == READ
+        assert classify_route("GET", "/finance/api/client/fee/list") == READ
+        assert classify_route("POST", "/finance/api/driver") == WRITE
+
+    def test_token_bucket(self):
+        """测试令牌桶突发和补充"""
+        bucket = TokenBucket(rate=2, burst=2, now=0)
+        assert bucket.acquire(0) == 0
+        assert bucket.acquire(0) == 0
+        assert bucket.acquire(0) == pytest.approx(0.5)
+        assert bucket.acquire(0.5) == 0
+
+    def test_decaying_average(self):
+        """测试没有新样本时平均值按半衰期衰减"""
+        average = DecayingAverage(alpha=0.5, half_life=1.0)
+        average.add(2.0, now=0)
+        assert average.value(now=0) == pytest.approx(1.0)
+        assert average.value(now=1) == pytest.approx(0.5)
+
+    def test_pool_checkout_wait_recorded(self, tmp_path):
+        """测试连接池记录获取连接的等待时间"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=MonitoredQueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        held = engine.connect()
+        before = pool_metrics.checkout_wait.value()
+
+        def release():
+            time.sleep(0.2)
+            held.close()
+
+        releaser = threading.Thread(target=release)
+        releaser.start()
+        with engine.connect():
+            pass
+        releaser.join()
+        engine.dispose()
+
+        assert pool_metrics.waiting == 0
+        assert pool_metrics.checkout_wait.value() > before
+
+    @pytest.mark.asyncio
+    async def test_client_rate_limit(self):
+        """测试单个客户端超过令牌桶限制返回 429，其他客户端不受影响"""
+        app = build_app(FakePoolMetrics(), client_rate=1, client_burst=2)
+        async with make_client(app) as client:
+            statuses = [
+                (await client.get("/api/companies/x")).status_code for _ in range(3)
+            ]
+            limited = await client.get("/api/companies/x")
+        async with make_client(app, "10.0.0.2") as other:
+            other_status = (await other.get("/api/companies/x")).status_code
+
+        assert statuses == [200, 200, 429]
+        assert int(limited.headers["retry-after"]) >= 1
+        assert other_status == 200
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_keyed_on_identity(self):
+        """测试令牌桶按令牌身份区分，修改 X-Client-Id 头无法绕过限流"""
+        app = build_app(FakePoolMetrics(), client_rate=1, client_burst=2)
+        async with make_client(app) as client:
+            statuses = [
+                (
+                    await client.get(
+                        "/api/companies/x", headers={"X-Client-Id": f"spoofed-{i}"}
+                    )
+                ).status_code
+                for i in range(3)
+            ]
+        assert statuses == [200, 200, 429]
+
+        # 同一对端地址（如同一代理）后的不同用户按令牌身份分别计数
+        token, _ = token_manager.issue("u1", company_id="c1")
+        async with make_client(app, headers={"Authorization": f"Bearer {token}"}) as user:
+            user_statuses = [
+                (await user.get("/api/companies/x")).status_code for _ in range(3)
+            ]
+        assert user_statuses == [200, 200, 429]
+
+    @pytest.mark.asyncio
+    async def test_shed_on_pool_wait(self):
+        """测试连接池排队时间超过阈值时拒绝查询，支付类仍放行"""
+        metrics = FakePoolMetrics()
+        app = build_app(metrics, max_queue_wait=0.5)
+        async with make_client(app) as client:
+            metrics.wait = 0.8
+            read = await client.get("/api/companies/x")
+            pay = await client.patch("/finance/api/driver/pay")
+            metrics.wait = 2.5
+            pay_overloaded = await client.patch("/finance/api/driver/pay")
+
+        assert read.status_code == 503
+        assert read.headers["retry-after"] == "1"
+        assert pay.status_code == 200
+        assert pay_overloaded.status_code == 503
+        assert pay_overloaded.headers["retry-after"] == "3"
+
+    @pytest.mark.asyncio
+    async def test_payment_reserved_capacity(self):
+        """测试查询占满共享并发时，支付类使用预留容量"""
+        app = build_app(
+            FakePoolMetrics(),
+            max_concurrency=3,
+            payment_reserved=1,
+            read_limit=2,
+        )
+        async with make_client(app) as client:
+            slow_reads = [
+                asyncio.create_task(client.get("/api/companies/x?delay=0.2"))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0.05)
+            extra_read = await client.get("/api/companies/x")
+            pay = await client.patch("/finance/api/driver/pay")
+            reads = await asyncio.gather(*slow_reads)
+
+        assert [response.status_code for response in reads] == [200, 200]
+        assert extra_read.status_code == 503
+        assert pay.status_code == 200
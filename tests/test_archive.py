@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from api.driver import router as driver_router
+from models.archive import fees_archive, order_details_archive
+from models.driver import Driver
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.order_detail import OrderDetail
+from utils.archive import FeeArchiver
+
+NOW = datetime(2025, 7, 1, 12, 0, 0)
+OLD = NOW - timedelta(days=200)
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    """
+    内存 SQLite 引擎
+
+    - 订单 D1：2 条已结算的旧费用（可归档，订单详情一起归档）
+    - 订单 D2：1 条已结算的旧费用 + 1 条待支付费用（订单详情保留在热表）
+    - 订单 D3：1 条近期结算的费用；订单 D4：1 条待支付的旧费用
+    """
+    engine = sqlite_engine(
+        Fee.__table__,
+        OrderDetail.__table__,
+        Driver.__table__,
+        fees_archive,
+        order_details_archive,
+    )
+
+    fees = [
+        ("f1", "D1", OrderStatusEnum.SETTLED, OLD),
+        ("f2", "D1", OrderStatusEnum.SETTLED, OLD + timedelta(hours=1)),
+        ("f3", "D2", OrderStatusEnum.SETTLED, OLD + timedelta(hours=2)),
+        ("f4", "D2", OrderStatusEnum.PENDING_PAYMENT, OLD),
+        ("f5", "D3", OrderStatusEnum.SETTLED, NOW - timedelta(days=10)),
+        ("f6", "D4", OrderStatusEnum.PENDING_PAYMENT, OLD),
+    ]
+    with Session(engine) as db:
+        for fee_id, order_id, status, updated_at in fees:
+            db.add(
+                Fee(
+                    fee_id=fee_id,
+                    order_id=order_id,
+                    path_id=f"P-{fee_id}",
+                    status=status,
+                    created_at=updated_at,
+                    updated_at=updated_at,
+                )
+            )
+        for order_id in ("D1", "D2", "D3", "D4"):
+            db.add(OrderDetail(order_id=order_id, car_plate=f"京A-{order_id}"))
+        db.commit()
+    return engine
+
+
+def ids(engine, column) -> list:
+    with engine.connect() as connection:
+        return sorted(connection.execute(select(column)).scalars().all())
+
+
+class TestArchive:
+    """费用归档测试类"""
+
+    def test_archive_in_batches(self, engine):
+        """测试按批归档已结算旧费用，订单无热表费用时详情一起归档"""
+        archiver = FeeArchiver(engine, archive_after_days=180, batch_size=2)
+
+        # 每次只执行一批：中断后再次执行从剩余数据继续
+        archiver.max_batches = 1
+        assert archiver.run(now=NOW) == 2
+        assert ids(engine, fees_archive.c.fee_id) == ["f1", "f2"]
+        assert ids(engine, order_details_archive.c.order_id) == ["D1"]
+
+        archiver.max_batches = 20
+        assert archiver.run(now=NOW) == 1
+        assert archiver.run(now=NOW) == 0
+        assert archiver.archived == 3
+
+        assert ids(engine, Fee.fee_id) == ["f4", "f5", "f6"]
+        assert ids(engine, fees_archive.c.fee_id) == ["f1", "f2", "f3"]
+        assert ids(engine, OrderDetail.order_id) == ["D2", "D3", "D4"]
+        assert ids(engine, order_details_archive.c.order_id) == ["D1"]
+
+    def test_archived_rows_unchanged(self, engine):
+        """测试归档表中的数据与归档前一致"""
+        with Session(engine) as db:
+            before = db.get(Fee, "f1").model_dump()
+        FeeArchiver(engine, archive_after_days=180).run(now=NOW)
+
+        with engine.connect() as connection:
+            row = connection.execute(
+                select(fees_archive).where(fees_archive.c.fee_id == "f1")
+            ).one()
+            total = connection.execute(
+                select(func.count()).select_from(fees_archive)
+            ).scalar()
+        archived = dict(row._mapping)
+        assert archived["status"] == OrderStatusEnum.SETTLED
+        assert archived == {**before, "status": archived["status"]}
+        assert total == 3
+
+    def test_include_archived(self, engine, db_client, platform_headers):
+        """测试列表和详情接口默认只查询热表，include_archived 时包含归档数据"""
+        FeeArchiver(engine, archive_after_days=180).run(now=NOW)
+
+        app = FastAPI()
+        app.include_router(driver_router, prefix="/api")
+        client = db_client(app, engine, headers=platform_headers)
+
+        def listed(**params) -> list:
+            response = client.get(
+                "/api/driver/list", params={"fields": "fee_id", "size": 20, **params}
+            )
+            return sorted(item["fee_id"] for item in response.json()["data"]["items"])
+
+        assert listed() == ["f4", "f5", "f6"]
+        assert listed(include_archived="true") == ["f1", "f2", "f3", "f4", "f5", "f6"]
+        assert listed(include_archived="true", status="已支付") == [
+            "f1",
+            "f2",
+            "f3",
+            "f5",
+        ]
+
+        detail = "/api/driver/detail"
+        params = {"order_id": "D1", "fields": "path_id,car_plate"}
+        assert client.get(detail, params=params).status_code == 404
+        response = client.get(detail, params={**params, "include_archived": "true"})
+        items = response.json()["data"]
+        assert sorted(item["path_id"] for item in items) == ["P-f1", "P-f2"]
+        assert {item["car_plate"] for item in items} == {"京A-D1"}
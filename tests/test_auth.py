@@ -0,0 +1,179 @@
+import time
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from starlette.websockets import WebSocketDisconnect
+
+import api.auth as auth_api
+import utils.auth as auth
+from api.client import router as client_router
+from api.driver import router as driver_router
+from config.settings import settings
+import main
+from main import create_app
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.user import User
+from utils.auth import TokenManager, AuthenticationError
+from utils.pwd import hash_password
+from websocket.router import ws_router
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """每个测试使用独立的令牌管理器（缓存互不影响）"""
+    manager = TokenManager(secret_key="test-secret", issuer="test", cache_size=2)
+    monkeypatch.setattr(auth, "token_manager", manager)
+    monkeypatch.setattr(auth_api, "token_manager", manager)
+    return manager
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    return sqlite_engine(User.__table__, Fee.__table__)
+
+
+@pytest.fixture
+def client(engine, manager, db_client):
+    """挂载认证、客户、司机和 WebSocket 路由（注册认证异常处理）"""
+    app = create_app()
+    app.include_router(auth_api.router, prefix="/api")
+    app.include_router(client_router, prefix="/api")
+    app.include_router(driver_router, prefix="/api")
+    app.include_router(ws_router, prefix="/ws")
+    return db_client(app, engine)
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestAuth:
+    """认证测试类"""
+
+    def test_verify_cached_until_expiry(self, manager, monkeypatch):
+        """测试已校验的令牌命中缓存时不再验签，过期后拒绝"""
+        token, expires_in = manager.issue(
+            "u1", company_id="c1", operator_type="CLIENT", permissions=["1", "4"]
+        )
+        assert expires_in == settings.JWT_EXPIRE_MINUTES * 60
+
+        identity = manager.verify(token)
+        assert identity.company_id == "c1"
+        assert identity.role == auth.ROLE_CLIENT
+        assert identity.has_permission("4")
+        assert manager.verify(token) is identity
+        assert manager.counts == {"verified": 1, "cached": 1, "rejected": 0}
+
+        monkeypatch.setattr(time, "time", lambda: identity.expires_at + 1)
+        with pytest.raises(AuthenticationError):
+            manager.verify(token)
+
+    def test_rejects_tampered_and_foreign_tokens(self, manager):
+        """测试签名不符、签发者不符的令牌"""
+        token, _ = manager.issue("u1", company_id="c1")
+        header, payload, signature = token.split(".")
+        with pytest.raises(AuthenticationError):
+            manager.verify(f"{header}.{payload}.{signature[::-1]}")
+
+        other = TokenManager(secret_key="other-secret", issuer="test")
+        with pytest.raises(AuthenticationError):
+            manager.verify(other.issue("u1")[0])
+        other = TokenManager(secret_key="test-secret", issuer="other")
+        with pytest.raises(AuthenticationError):
+            manager.verify(other.issue("u1")[0])
+
+    def test_cache_evicts_least_recent(self, manager):
+        """测试缓存超出条数时淘汰最久未使用的令牌"""
+        tokens = [manager.issue(f"u{i}")[0] for i in range(3)]
+        for token in tokens:
+            manager.verify(token)
+        assert list(manager._cache) == tokens[1:]
+
+    def test_login_and_scoped_requests(self, client, engine, manager):
+        """测试登录后按令牌中的公司过滤，且请求不查询员工表"""
+        password, salt = hash_password("secret")
+        with Session(engine) as db:
+            db.add(
+                User(
+                    nick_name="张三",
+                    phone="18800001234",
+                    job_number="0001",
+                    position="1",
+                    permissions='["4"]',
+                    registered=True,
+                    password=password,
+                    salt=salt,
+                    company_id="c1",
+                )
+            )
+            for company_id in ("c1", "c2"):
+                db.add(
+                    Fee(
+                        fee_id=f"f-{company_id}",
+                        path_id=f"Y-{company_id}",
+                        order_id=f"D-{company_id}",
+                        status=OrderStatusEnum.PENDING_PAYMENT,
+                        company_id=company_id,
+                        order_time=datetime(2025, 7, 1),
+                    )
+                )
+            db.commit()
+
+        response = client.post(
+            "/api/auth/login", json={"phone": "18800001234", "password": "wrong"}
+        )
+        assert response.status_code == 401
+        response = client.post(
+            "/api/auth/login", json={"phone": "18800001234", "password": "secret"}
+        )
+        token = response.json()["data"]["access_token"]
+
+        # 令牌中的公司优先于租户请求头
+        headers = {**bearer(token), settings.TENANT_HEADER: "c2"}
+        for url in ("/api/client/fee/list", "/api/driver/list"):
+            data = client.get(url, headers=headers).json()["data"]
+            assert [item["company_id"] for item in data["items"]] == ["c1"]
+
+        User.__table__.drop(engine)
+        assert client.get("/api/driver/list", headers=bearer(token)).status_code == 200
+
+    def test_rejected_requests(self, client, manager, monkeypatch):
+        """测试令牌无效返回 401，角色不符返回 403，开启 AUTH_REQUIRED 后必须携带令牌"""
+        response = client.get("/api/driver/list", headers=bearer("not-a-token"))
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+        driver_token, _ = manager.issue("d1", company_id="c1", driver_account_id="a1")
+        response = client.get("/api/client/fee/list", headers=bearer(driver_token))
+        assert response.status_code == 403
+
+        monkeypatch.setattr(settings, "AUTH_REQUIRED", True)
+        assert client.get("/api/driver/list").status_code == 401
+
+    def test_default_secret_refused_outside_development(self, monkeypatch):
+        """测试非开发环境使用默认 JWT 密钥时拒绝启动"""
+        settings.check_security()
+        monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+        with pytest.raises(RuntimeError):
+            settings.check_security()
+        with pytest.raises(RuntimeError):
+            with TestClient(main.app):
+                pass
+
+        monkeypatch.setattr(settings, "JWT_SECRET_KEY", "a-real-secret")
+        settings.check_security()
+
+    def test_websocket_handshake(self, client, manager):
+        """测试 WebSocket 握手时校验查询参数中的令牌和角色"""
+        driver_token, _ = manager.issue("d1", company_id="c1", driver_account_id="a1")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(f"/ws/platform?access_token={driver_token}"):
+                pass
+        assert exc_info.value.code == 1008
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws/driver?access_token=bad"):
+                pass
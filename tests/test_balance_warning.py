@@ -0,0 +1,105 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.balance_warning import (
+    BalanceNotifier,
+    BalanceWarningEvaluator,
+    LogNotifier,
+)
+
+# 突发支付：账户数、每个账户的支付次数
+BURST_ACCOUNTS = 200
+BURST_PAYMENTS_PER_ACCOUNT = 50
+
+
+class CountingNotifier(BalanceNotifier):
+    """记录收到的预警"""
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+def make_account(account_id: str, balance: int, threshold: int = 1000, enable=True):
+    """构造账户（只包含预警评估用到的字段）"""
+    return SimpleNamespace(
+        company_account_id=account_id,
+        company_id=f"company-{account_id}",
+        company_account_balance=balance,
+        company_account_balance_warning_val=threshold,
+        company_account_balance_warning_enable=enable,
+        company_account_balance_warning_phone="18800001234",
+    )
+
+
+def evaluate(evaluator, balance: int, now: float, enabled: bool = True):
+    """以固定账户评估一次余额"""
+    return evaluator.evaluate("a1", "c1", balance, 1000, enabled, "188", now=now)
+
+
+class TestBalanceWarning:
+    """余额预警测试类"""
+
+    def test_threshold(self):
+        """测试余额低于预警值且启用时才预警"""
+        evaluator = BalanceWarningEvaluator(CountingNotifier(), debounce_seconds=60)
+        assert evaluate(evaluator, 1000, now=0) is None
+        assert evaluate(evaluator, 999, now=0, enabled=False) is None
+
+        alert = evaluate(evaluator, 999, now=0)
+        assert alert.balance == 999
+        assert alert.threshold == 1000
+
+    def test_debounce_and_rearm(self):
+        """测试防抖时间内不重复预警，余额恢复后再次跌破立即预警"""
+        evaluator = BalanceWarningEvaluator(CountingNotifier(), debounce_seconds=60)
+        assert evaluate(evaluator, 900, now=0) is not None
+        assert evaluate(evaluator, 800, now=30) is None
+        assert evaluate(evaluator, 700, now=61) is not None
+
+        assert evaluate(evaluator, 5000, now=62) is None
+        assert evaluate(evaluator, 500, now=63) is not None
+        assert evaluator.counts == {"evaluated": 5, "alerted": 3, "suppressed": 1}
+
+    @pytest.mark.asyncio
+    async def test_log_notifier(self, running_task_runtime, tmp_path):
+        """测试预警在后台任务中写入本地文件"""
+        path = tmp_path / "logs" / "balance_warning.log"
+        evaluator = BalanceWarningEvaluator(LogNotifier(str(path)), 60)
+        evaluator.check_account(make_account("a1", balance=100))
+        evaluator.check_account(make_account("a1", balance=50))
+        assert await running_task_runtime.drain(timeout=1)
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["company_account_id"] == "a1"
+        assert json.loads(lines[0])["balance"] == 100
+
+    @pytest.mark.asyncio
+    async def test_payment_burst_throughput(self, running_task_runtime):
+        """测试突发支付下的评估吞吐量，每个账户只预警一次"""
+        notifier = CountingNotifier()
+        evaluator = BalanceWarningEvaluator(notifier, debounce_seconds=60)
+        accounts = [
+            make_account(f"a{n}", balance=BURST_PAYMENTS_PER_ACCOUNT * 20)
+            for n in range(BURST_ACCOUNTS)
+        ]
+
+        started = time.perf_counter()
+        for _ in range(BURST_PAYMENTS_PER_ACCOUNT):
+            for account in accounts:
+                account.company_account_balance -= 20
+                evaluator.check_account(account)
+        elapsed = time.perf_counter() - started
+        assert await running_task_runtime.drain(timeout=2)
+
+        payments = BURST_ACCOUNTS * BURST_PAYMENTS_PER_ACCOUNT
+        print(f"\n{payments} 次余额变动评估 {elapsed * 1000:.1f}ms")
+        assert len(notifier.alerts) == BURST_ACCOUNTS
+        assert evaluator.counts["evaluated"] == payments
+        assert elapsed < 1.0
@@ -0,0 +1,137 @@
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlmodel import Session
+
+from api.client import _display_settlement_status
+from api.client import router as client_router
+from api.driver import router as driver_router
+from config.settings import settings
+from models.driver import Driver
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.order_detail import ORDER_DETAIL_FIELDS, OrderDetail
+from utils.order_query import load_order_details_batch
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    """内存 SQLite 引擎：订单 D0-D9，D0 有两条运单，D9 只有费用没有订单详情"""
+    engine = sqlite_engine(Fee.__table__, OrderDetail.__table__, Driver.__table__)
+    with Session(engine) as db:
+        db.add(Driver(driver_account_id="d1", driver_name="小王", driver_phone="1"))
+        for n in range(10):
+            db.add(
+                Fee(
+                    fee_id=f"f{n}",
+                    order_id=f"D{n}",
+                    path_id=f"Y{n}",
+                    status=OrderStatusEnum.PENDING_PAYMENT,
+                    total_price=100 * n,
+                    driver_account_id="d1",
+                )
+            )
+            if n < 9:
+                db.add(OrderDetail(order_id=f"D{n}", car_plate=f"京A{n}"))
+        db.add(
+            Fee(
+                fee_id="f0b",
+                order_id="D0",
+                path_id="Y0b",
+                status=OrderStatusEnum.SETTLED,
+                driver_account_id="d1",
+            )
+        )
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def client(engine, db_client, platform_headers):
+    """挂载客户、司机路由的测试客户端"""
+    app = FastAPI()
+    app.include_router(client_router, prefix="/api")
+    app.include_router(driver_router, prefix="/api")
+    return db_client(app, engine, headers=platform_headers)
+
+
+class TestBatchDetail:
+    """批量获取订单详情测试类"""
+
+    def test_one_query_per_table(self, engine):
+        """测试所有键合并查询（每张表一次），结果与键顺序一致"""
+        keys = [("D3", None), (None, "Y0b"), ("D0", None), ("D1", "Y1"), ("D1", "Y2")]
+        statements = []
+
+        def before_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        with Session(engine) as db:
+            result = load_order_details_batch(
+                db, keys, ORDER_DETAIL_FIELDS, _display_settlement_status
+            )
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+        assert len(statements) == 3
+        assert [[item["path_id"] for item in items] for items in result] == [
+            ["Y3"],
+            ["Y0b"],
+            ["Y0", "Y0b"],
+            ["Y1"],
+            [],
+        ]
+        assert result[0][0]["car_plate"] == "京A3"
+        assert result[0][0]["driver_name"] == "小王"
+        assert result[1][0]["status"] == "已结算"
+
+    def test_client_batch_api(self, client):
+        """测试客户批量详情接口：按输入返回，缺失订单为空列表"""
+        response = client.post(
+            "/api/client/fee/details",
+            json={
+                "keys": [
+                    {"order_id": "D9"},
+                    {"path_id": "Y2"},
+                    {"order_id": "D404"},
+                ],
+                "fields": "path_id,car_plate,total_price",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data == [
+            {
+                "order_id": "D9",
+                "path_id": None,
+                "details": [{"path_id": "Y9", "car_plate": None, "total_price": 900}],
+            },
+            {
+                "order_id": None,
+                "path_id": "Y2",
+                "details": [{"path_id": "Y2", "car_plate": "京A2", "total_price": 200}],
+            },
+            {"order_id": "D404", "path_id": None, "details": []},
+        ]
+
+    def test_driver_batch_api_validation(self, client, monkeypatch):
+        """测试司机批量详情接口的参数校验和数量上限"""
+        monkeypatch.setattr(settings, "ORDER_DETAIL_BATCH_MAX", 3)
+        url = "/api/driver/details"
+
+        response = client.post(url, json={"keys": [{"order_id": "D1"}]})
+        assert response.json()["data"][0]["details"][0]["status"]
+
+        keys = [{"order_id": f"D{n}"} for n in range(4)]
+        response = client.post(url, json={"keys": keys})
+        assert response.status_code == 400
+        assert "3" in response.json()["message"]
+
+        for keys in ([], [{"order_id": "D1"}, {}]):
+            response = client.post(url, json={"keys": keys})
+            assert response.status_code == 400
+
+        response = client.post(
+            url, json={"keys": [{"order_id": "D1"}], "fields": "unknown"}
+        )
+        assert response.status_code == 400
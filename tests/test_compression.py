@@ -0,0 +1,190 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from utils.compression import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+    is_hashed_name,
+    negotiate_encoding,
+    precompress_directory,
+)
+
+LARGE_DATA = [
+    {"order_id": f"D{i:012d}", "status": "待结算", "receipt_imgs": "static/a.jpg"}
+    for i in range(200)
+]
+
+
+@pytest.fixture
+def compression_client():
+    """
+    挂载压缩中间件的测试应用
+
+    Returns:
+        TestClient: 测试客户端
+    """
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return JSONResponse({"code": 200, "data": LARGE_DATA})
+
+    @app.get("/small")
+    async def small():
+        return JSONResponse({"code": 200, "data": None})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for item in LARGE_DATA:
+                yield json.dumps(item, ensure_ascii=False).encode() + b"\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\xff\xd8" * 2048, media_type="image/jpeg")
+
+    @app.get("/encoded")
+    async def encoded():
+        body = gzip.compress(b"x" * 4096)
+        return Response(
+            body, media_type="text/plain", headers={"Content-Encoding": "gzip"}
+        )
+
+    return TestClient(app)
+
+
+class TestCompressionMiddleware:
+    """响应压缩中间件测试类"""
+
+    def test_negotiate_encoding(self):
+        """测试 Accept-Encoding 协商"""
+        assert negotiate_encoding(None) is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("gzip;q=0") is None
+        assert negotiate_encoding("gzip, deflate", ("br", "gzip")) == "gzip"
+        assert negotiate_encoding("br;q=0.5, gzip", ("br", "gzip")) == "br"
+        assert negotiate_encoding("*", ("gzip",)) == "gzip"
+
+    def test_large_json_compressed(self, compression_client):
+        """测试超过阈值的 JSON 被压缩"""
+        response = compression_client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert int(response.headers["content-length"]) < len(
+            json.dumps({"code": 200, "data": LARGE_DATA}, ensure_ascii=False).encode()
+        )
+        assert response.json()["data"] == LARGE_DATA
+
+    def test_small_response_not_compressed(self, compression_client):
+        """测试低于阈值的响应不压缩"""
+        response = compression_client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"code": 200, "data": None}
+
+    def test_no_accept_encoding(self, compression_client):
+        """测试客户端不支持压缩时原样返回"""
+        response = compression_client.get(
+            "/large", headers={"Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in response.headers
+        assert response.json()["data"] == LARGE_DATA
+
+    def test_streaming_compressed(self, compression_client):
+        """测试流式响应逐块压缩"""
+        response = compression_client.get(
+            "/stream", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        lines = response.text.splitlines()
+        assert [json.loads(line) for line in lines] == LARGE_DATA
+
+    def test_skip_incompressible_and_encoded(self, compression_client):
+        """测试图片和已编码响应不重复压缩"""
+        image = compression_client.get("/image", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in image.headers
+        assert len(image.content) == 4096
+
+        encoded = compression_client.get(
+            "/encoded", headers={"Accept-Encoding": "gzip"}
+        )
+        assert encoded.headers["content-encoding"] == "gzip"
+        assert encoded.content == b"x" * 4096
+
+
+class TestPrecompressedStaticFiles:
+    """预压缩静态文件测试类"""
+
+    @pytest.fixture
+    def static_client(self, tmp_path):
+        """
+        预压缩后挂载的静态目录
+
+        Returns:
+            TestClient: 测试客户端
+        """
+        (tmp_path / "app.css").write_text("body { margin: 0; }\n" * 200)
+        (tmp_path / "tiny.css").write_text("a{}")
+        (tmp_path / "photo.jpg").write_bytes(b"\xff\xd8" * 2048)
+        (tmp_path / "app.3f2a9c1b.js").write_text("var a = 1;\n" * 200)
+        precompress_directory(str(tmp_path))
+        app = FastAPI()
+        app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)))
+        return TestClient(app)
+
+    def test_precompress_skips_small_and_binary(self, static_client, tmp_path):
+        """测试只压缩足够大的文本文件，重复执行不重写"""
+        assert (tmp_path / "app.css.gz").exists()
+        assert not (tmp_path / "tiny.css.gz").exists()
+        assert not (tmp_path / "photo.jpg.gz").exists()
+        assert precompress_directory(str(tmp_path)) == 0
+
+    def test_serve_precompressed(self, static_client):
+        """测试返回预压缩文件，文件名不带哈希时每次校验"""
+        response = static_client.get(
+            "/static/app.css", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+        assert response.text == "body { margin: 0; }\n" * 200
+
+        revalidated = static_client.get(
+            "/static/app.css",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": response.headers["etag"],
+            },
+        )
+        assert revalidated.status_code == 304
+
+    def test_serve_original_without_gzip(self, static_client):
+        """测试客户端不支持压缩时返回原文件"""
+        response = static_client.get(
+            "/static/app.css", headers={"Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in response.headers
+        assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+        assert response.text == "body { margin: 0; }\n" * 200
+
+    def test_hashed_names_cached_long_term(self, static_client):
+        """测试只有文件名带内容哈希的文件使用长期缓存"""
+        response = static_client.get(
+            "/static/app.3f2a9c1b.js", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert is_hashed_name("uploads/ab/" + "ab" * 32 + ".jpg")
+        assert not is_hashed_name("swagger-ui-bundle.js")
+        assert not is_hashed_name("test_image.jpg")
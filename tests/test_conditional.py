@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+from starlette.requests import Request
+
+from models.archive import fees_archive
+from models.company import Company
+from models.driver import Driver
+from models.fee import Fee
+from models.order_detail import OrderDetail
+
+from utils.conditional import (
+    build_etag,
+    http_date,
+    is_not_modified,
+    not_modified_response,
+)
+
+
+def make_request(headers: dict) -> Request:
+    """构造带请求头的请求"""
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [
+                (key.lower().encode(), value.encode()) for key, value in headers.items()
+            ],
+        }
+    )
+
+
+class TestConditional:
+    """条件请求测试类"""
+
+    updated_at = datetime(2025, 7, 1, 9, 30, 15, 123456)
+
+    def test_etag_changes_with_version(self):
+        """测试版本变化时 ETag 变化"""
+        etag = build_etag("company", "c1", self.updated_at)
+        assert etag.startswith('W/"')
+        assert etag == build_etag("company", "c1", self.updated_at)
+        assert etag != build_etag("company", "c1", datetime(2025, 7, 1, 9, 30, 16))
+
+    def test_etag_distinguishes_same_second_updates(self):
+        """测试同一秒内的两次更新 ETag 不同，且 updated_at 列在 MySQL 中保留微秒"""
+        later = self.updated_at.replace(microsecond=654321)
+        assert build_etag("fee", "f1", self.updated_at) != build_etag(
+            "fee", "f1", later
+        )
+        for table in (
+            Fee.__table__,
+            fees_archive,
+            OrderDetail.__table__,
+            Driver.__table__,
+            Company.__table__,
+        ):
+            ddl = str(CreateTable(table).compile(dialect=mysql.dialect()))
+            assert "updated_at DATETIME(6)" in ddl, table.name
+
+    def test_if_none_match(self):
+        """测试 If-None-Match 匹配"""
+        etag = build_etag("company", "c1", self.updated_at)
+        assert is_not_modified(make_request({"If-None-Match": etag}), etag)
+        assert is_not_modified(
+            make_request({"If-None-Match": f'W/"other", {etag.removeprefix("W/")}'}),
+            etag,
+        )
+        assert not is_not_modified(make_request({"If-None-Match": 'W/"other"'}), etag)
+        assert not is_not_modified(make_request({}), etag)
+
+    def test_if_modified_since(self):
+        """测试 If-Modified-Since 按秒比较"""
+        etag = build_etag("company", "c1", self.updated_at)
+        same_second = make_request({"If-Modified-Since": http_date(self.updated_at)})
+        earlier = make_request({"If-Modified-Since": "Tue, 01 Jul 2025 09:30:14 GMT"})
+        assert is_not_modified(same_second, etag, self.updated_at)
+        assert not is_not_modified(earlier, etag, self.updated_at)
+
+    def test_if_none_match_takes_precedence(self):
+        """测试 If-None-Match 优先于 If-Modified-Since"""
+        etag = build_etag("company", "c1", self.updated_at)
+        request = make_request(
+            {
+                "If-None-Match": 'W/"other"',
+                "If-Modified-Since": http_date(self.updated_at),
+            }
+        )
+        assert not is_not_modified(request, etag, self.updated_at)
+
+    def test_not_modified_response(self):
+        """测试 304 响应携带校验头且无响应体"""
+        etag = build_etag("company", "c1", self.updated_at)
+        response = not_modified_response(etag, self.updated_at)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+        assert response.headers["last-modified"] == "Tue, 01 Jul 2025 09:30:15 GMT"
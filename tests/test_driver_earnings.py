@@ -0,0 +1,281 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from api.driver import router as driver_router
+from models.account import Account
+from models.driver import Driver
+from models.earning import DriverEarning, DriverMonthlyEarning
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.outbox import PushOutbox
+from utils.auth import AuthenticationError, token_manager
+from utils.driver_earnings import credit_driver, list_month_earnings
+from websocket.outbox import outbox_dispatcher
+
+START = datetime(2025, 6, 30, 23, 0, 0)
+
+
+@pytest.fixture
+def engine(sqlite_engine, tmp_path):
+    """
+    SQLite 引擎：司机 d1（余额 0），客户账户（余额 100000），费用 f0-f9
+
+    使用文件数据库，推送发件箱的后台线程与请求各自使用独立连接
+    """
+    engine = sqlite_engine(
+        Account.__table__,
+        Driver.__table__,
+        Fee.__table__,
+        PushOutbox.__table__,
+        DriverEarning.__table__,
+        DriverMonthlyEarning.__table__,
+        path=tmp_path / "earnings.db",
+    )
+    with Session(engine) as db:
+        db.add(Driver(driver_account_id="d1", driver_name="王师傅", driver_phone="1"))
+        db.add(
+            Account(
+                company_account_id="a1",
+                company_id="c1",
+                company_account_balance=100000,
+            )
+        )
+        for n in range(10):
+            db.add(
+                Fee(
+                    fee_id=f"f{n}",
+                    order_id=f"D{n}",
+                    path_id=f"P{n}",
+                    company_id="c1",
+                    driver_account_id="d1",
+                    status=OrderStatusEnum.PENDING_PAYMENT,
+                )
+            )
+        db.commit()
+    return engine
+
+
+def credit(engine, fee_id: str, now: datetime, total_price: int, highway_fee=0):
+    """锁定司机后入账一笔费用并提交"""
+    with Session(engine) as db:
+        driver = db.exec(
+            select(Driver).where(Driver.driver_account_id == "d1").with_for_update()
+        ).one()
+        fee = db.get(Fee, fee_id)
+        credit_driver(
+            db, driver, fee, now=now, total_price=total_price, highway_fee=highway_fee
+        )
+        db.commit()
+
+
+@pytest.fixture
+def client(engine, monkeypatch, db_client, platform_headers):
+    """挂载司机路由的测试客户端（推送发件箱也使用测试数据库）"""
+    monkeypatch.setattr(outbox_dispatcher, "_engine", engine)
+    app = FastAPI()
+    app.include_router(driver_router, prefix="/api")
+    return db_client(app, engine, headers=platform_headers)
+
+
+class TestDriverEarnings:
+    """司机收入流水测试类"""
+
+    def test_credit_writes_ledger_and_rollup(self, engine):
+        """测试入账时写入流水、余额快照，并按月增量汇总"""
+        credit(engine, "f0", START, total_price=1000, highway_fee=50)
+        credit(engine, "f1", START + timedelta(minutes=30), total_price=2000)
+        credit(engine, "f2", START + timedelta(hours=2), total_price=500)
+
+        with Session(engine) as db:
+            assert db.get(Driver, "d1").driver_account_balance == 3550
+            earnings = db.exec(
+                select(DriverEarning).order_by(DriverEarning.created_at)
+            ).all()
+            assert [earning.balance_after for earning in earnings] == [
+                1050,
+                3050,
+                3550,
+            ]
+
+            june = db.get(DriverMonthlyEarning, ("d1", "2025-06"))
+            july = db.get(DriverMonthlyEarning, ("d1", "2025-07"))
+            assert (june.earning_count, june.total_amount, june.highway_fee) == (
+                2,
+                3050,
+                50,
+            )
+            assert (july.earning_count, july.total_amount) == (1, 500)
+
+    def test_month_detail_pages(self, engine):
+        """测试月账单明细按游标翻页，只包含该月流水"""
+        # f0 在 6 月，f1-f6 在 7 月
+        credit(engine, "f0", START, 100)
+        for n in range(1, 7):
+            moment = START + timedelta(hours=1, minutes=10 * n)
+            credit(engine, f"f{n}", moment, 100 * (n + 1))
+
+        with Session(engine) as db:
+            pages, cursor = [], None
+            while True:
+                summary, earnings, cursor = list_month_earnings(
+                    db, "d1", "2025-07", size=2, cursor=cursor
+                )
+                pages.append([earning.fee_id for earning in earnings])
+                if cursor is None:
+                    break
+
+            assert pages == [["f6", "f5"], ["f4", "f3"], ["f2", "f1"]]
+            assert summary.earning_count == 6
+            assert summary.total_amount == sum(100 * (n + 1) for n in range(1, 7))
+
+            with pytest.raises(ValueError):
+                list_month_earnings(db, "d1", "2025-13", size=2)
+
+    def test_pay_and_statement_api(self, client, engine):
+        """测试支付在同一事务中入账、写流水，月账单接口读取汇总"""
+        for n in range(3):
+            response = client.patch(
+                "/api/driver/pay",
+                json={
+                    "fee_id": f"f{n}",
+                    "company_id": "c1",
+                    "driver_account_id": "d1",
+                    "total_price": 1000,
+                    "carry_fee": 100,
+                    "wait_fee": 0,
+                    "highway_fee": 20,
+                    "parking_fee": 0,
+                },
+            )
+            assert response.status_code == 200
+
+        # 账单按司机令牌中的账户查询，不采信请求参数
+        token, _ = token_manager.issue("d1", company_id="c1", driver_account_id="d1")
+        driver_headers = {"Authorization": f"Bearer {token}"}
+        month = datetime.utcnow().strftime("%Y-%m")
+        response = client.get(
+            "/api/driver/earnings",
+            params={"driver_account_id": "other"},
+            headers=driver_headers,
+        )
+        data = response.json()
+        assert data["driver_account_balance"] == 3360
+        assert data["total"] == 1
+        assert data["items"][0]["month"] == month
+        assert data["items"][0]["earning_count"] == 3
+        assert data["items"][0]["carry_fee"] == 300
+
+        response = client.get(
+            f"/api/driver/earnings/{month}", params={"size": 2}, headers=driver_headers
+        )
+        data = response.json()
+        assert data["summary"]["total_amount"] == 3360
+        assert [item["balance_after"] for item in data["items"]] == [3360, 2240]
+        assert data["next_cursor"]
+
+        with Session(engine) as db:
+            assert db.get(Account, "a1").company_account_balance == 100000 - 3360
+
+        response = client.get("/api/driver/earnings/2025-7x", headers=driver_headers)
+        assert response.status_code == 400
+        # 平台端令牌不是司机身份
+        with pytest.raises(AuthenticationError):
+            client.get("/api/driver/earnings")
+
+    def test_submitted_fee_in_company_scope(self, client, engine):
+        """测试司机提交的费用归属令牌中的公司和司机，同公司可查询、支付"""
+
+        def bearer(subject: str, company_id: str, **claims) -> dict:
+            token, _ = token_manager.issue(subject, company_id=company_id, **claims)
+            return {"Authorization": f"Bearer {token}"}
+
+        def listed(headers: dict) -> list:
+            response = client.get(
+                "/api/driver/list",
+                params={"fields": "fee_id", "size": 20},
+                headers=headers,
+            )
+            return [item["fee_id"] for item in response.json()["data"]["items"]]
+
+        response = client.post(
+            "/api/driver",
+            json={
+                "driver_id": "other",
+                "order_id": "D-new",
+                "path_id": "P-new",
+                "highway_fee": 20,
+                "parking_fee": 10,
+                "carry_fee": 100,
+                "wait_fee": 30,
+            },
+            headers=bearer("d1", "c1", driver_account_id="d1"),
+        )
+        assert response.status_code == 200
+        fee_id = response.json()["data"]["fee_id"]
+        with Session(engine) as db:
+            fee = db.get(Fee, fee_id)
+            assert (fee.company_id, fee.driver_account_id) == ("c1", "d1")
+            pushes = db.exec(select(PushOutbox.company_id)).all()
+            assert pushes and set(pushes) == {"c1"}
+
+        client_headers = bearer("u1", "c1")
+        assert fee_id in listed(client_headers)
+        assert fee_id not in listed(bearer("u2", "c2"))
+
+        payment = {
+            "fee_id": fee_id,
+            "company_id": "c1",
+            "driver_account_id": "d1",
+            "total_price": 1000,
+            "carry_fee": 100,
+            "wait_fee": 30,
+            "highway_fee": 20,
+            "parking_fee": 10,
+        }
+        response = client.patch(
+            "/api/driver/pay", json=payment, headers=bearer("u2", "c2")
+        )
+        assert response.status_code == 404
+        response = client.patch("/api/driver/pay", json=payment, headers=client_headers)
+        assert response.status_code == 200
+        with Session(engine) as db:
+            assert db.get(Account, "a1").company_account_balance == 100000 - 1160
+            assert db.get(Driver, "d1").driver_account_balance == 1160
+
+    def test_settled_fee_paid_once(self, client, engine):
+        """测试已结算的费用再次支付时返回参数错误，且流水按费用唯一"""
+        payment = {
+            "fee_id": "f0",
+            "company_id": "c1",
+            "driver_account_id": "d1",
+            "total_price": 1000,
+            "carry_fee": 0,
+            "wait_fee": 0,
+            "highway_fee": 0,
+            "parking_fee": 0,
+        }
+        assert client.patch("/api/driver/pay", json=payment).status_code == 200
+        response = client.patch("/api/driver/pay", json=payment)
+        assert response.status_code == 400
+        assert response.json()["message"] == "费用已支付"
+
+        with Session(engine) as db:
+            assert db.get(Account, "a1").company_account_balance == 100000 - 1000
+            assert db.get(Driver, "d1").driver_account_balance == 1000
+            fee = db.get(Fee, "f0")
+            db.add(
+                DriverEarning(
+                    driver_account_id="d1",
+                    fee_id="f0",
+                    order_id=fee.order_id,
+                    path_id=fee.path_id,
+                    amount=1000,
+                    balance_after=2000,
+                )
+            )
+            with pytest.raises(IntegrityError):
+                db.commit()
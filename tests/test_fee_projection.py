@@ -0,0 +1,267 @@
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlmodel import Session, create_engine, select
+
+from api.client import settlement_row_mapper, _display_settlement_status
+from models.enums import OrderStatusEnum
+from models.driver import Driver
+from models.fee import Fee, FeeResponse, FEE_LIST_FIELDS, FEE_FIELD_COLUMNS
+from models.order_detail import OrderDetail, ORDER_DETAIL_FIELDS
+from utils.order_query import load_order_details
+from utils.projection import parse_fields, select_columns
+
+PAGE_SIZE = 1000
+
+
+@pytest.fixture(scope="module")
+def fee_engine():
+    """
+    内存 SQLite 费用表，预置一页 1000 条数据
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    engine = create_engine("sqlite://")
+    Fee.__table__.create(engine)
+    base_time = datetime(2025, 7, 1, 9, 0, 0)
+    with Session(engine) as session:
+        for i in range(PAGE_SIZE):
+            session.add(
+                Fee(
+                    path_id=f"Y{i:012d}",
+                    order_id=f"D{i:012d}",
+                    status=(
+                        OrderStatusEnum.PENDING_PAYMENT
+                        if i % 2
+                        else OrderStatusEnum.SETTLED
+                    ),
+                    total_price=i,
+                    highway_fee=i * 2,
+                    order_time=base_time + timedelta(minutes=i),
+                    receipt_imgs="static/test_image.jpg," * 8,
+                    highway_bill_imgs="static/test_image.jpg",
+                    parking_bill_imgs="static/test_image.jpg",
+                    receipt_reject_reason="回单模糊" * 20,
+                    bill_reject_reason="金额不符" * 20,
+                    company_id="998a5805-ff3d-477d-a598-8348db542ccf",
+                    driver_account_id="a1b2c3d4-e5f6-7890-g1h2-i3j4k5l6m7n8",
+                )
+            )
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def orm_page(engine) -> list:
+    """ORM 查询 + FeeResponse 逐字段拷贝（旧实现）"""
+    with Session(engine) as session:
+        fees = session.exec(
+            select(Fee).order_by(Fee.order_time.desc()).limit(PAGE_SIZE)
+        ).all()
+        items = [
+            FeeResponse(
+                fee_id=fee.fee_id,
+                path_id=fee.path_id,
+                order_id=fee.order_id,
+                status=_display_settlement_status(fee.status),
+                total_price=fee.total_price,
+                driver_fee=fee.driver_fee,
+                highway_fee=fee.highway_fee,
+                parking_fee=fee.parking_fee,
+                carry_fee=fee.carry_fee,
+                wait_fee=fee.wait_fee,
+                order_time=fee.order_time.isoformat() if fee.order_time else "",
+                highway_bill_imgs=fee.highway_bill_imgs,
+                parking_bill_imgs=fee.parking_bill_imgs,
+                company_id=fee.company_id,
+                driver_id=fee.driver_account_id,
+                created_at=fee.created_at.isoformat(),
+                updated_at=fee.updated_at.isoformat(),
+            )
+            for fee in fees
+        ]
+        return jsonable_encoder(items)
+
+
+def projected_page(engine) -> list:
+    """列投影 + 预编译行映射（新实现）"""
+    with Session(engine) as session:
+        query = (
+            select(*select_columns(Fee.__table__, FEE_LIST_FIELDS, FEE_FIELD_COLUMNS))
+            .order_by(Fee.order_time.desc())
+            .limit(PAGE_SIZE)
+        )
+        rows = session.connection().execute(query).all()
+        return settlement_row_mapper.map_all(rows)
+
+
+def measure(fn, engine):
+    """
+    测量单次执行的吞吐量和峰值内存
+
+    Returns:
+        tuple: (结果, 每秒行数, 峰值内存字节数)
+    """
+    fn(engine)  # 预热
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(engine)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, len(result) / elapsed, peak
+
+
+class TestFeeProjection:
+    """费用列表列投影测试类"""
+
+    def test_projection_matches_orm(self, fee_engine):
+        """测试投影结果与 ORM 结果一致"""
+        assert projected_page(fee_engine) == orm_page(fee_engine)
+
+    def test_projection_selects_list_columns(self, fee_engine):
+        """测试只查询列表字段（不读取回单图片、驳回原因等大字段）"""
+        query = select(
+            *select_columns(Fee.__table__, FEE_LIST_FIELDS, FEE_FIELD_COLUMNS)
+        )
+        assert list(query.selected_columns.keys()) == list(FEE_LIST_FIELDS)
+        selected = {column.element.name for column in query.selected_columns}
+        assert "driver_account_id" in selected
+        assert not selected & {
+            "receipt_imgs",
+            "receipt_reject_reason",
+            "bill_reject_reason",
+        }
+
+    def test_row_mapper_output(self, fee_engine):
+        """测试行映射结果：字段顺序、结算状态显示值和时间格式"""
+        item = projected_page(fee_engine)[0]
+        assert list(item) == list(FEE_LIST_FIELDS)
+        assert item["order_id"] == f"D{PAGE_SIZE - 1:012d}"
+        assert item["status"] == _display_settlement_status(
+            OrderStatusEnum.PENDING_PAYMENT
+        )
+        assert item["driver_id"] == "a1b2c3d4-e5f6-7890-g1h2-i3j4k5l6m7n8"
+        assert item["order_time"] == "2025-07-02T01:39:00"
+
+    @pytest.mark.benchmark
+    def test_projection_benchmark(self, fee_engine):
+        """测试 1000 行分页的吞吐量和峰值内存"""
+        _, orm_rate, orm_peak = measure(orm_page, fee_engine)
+        _, projected_rate, projected_peak = measure(projected_page, fee_engine)
+
+        print(f"\nORM: {orm_rate:,.0f} 行/秒, 峰值内存 {orm_peak / 1024:,.0f} KiB")
+        print(
+            f"投影: {projected_rate:,.0f} 行/秒, "
+            f"峰值内存 {projected_peak / 1024:,.0f} KiB"
+        )
+
+        assert projected_peak < orm_peak, "投影查询峰值内存应低于 ORM"
+        assert projected_rate > orm_rate, "投影查询吞吐量应高于 ORM"
+
+
+@pytest.fixture
+def detail_engine(sqlite_engine):
+    """
+    内存 SQLite 费用、订单详情、司机表
+
+    Returns:
+        Engine: 数据库引擎
+    """
+    engine = sqlite_engine(Fee.__table__, OrderDetail.__table__, Driver.__table__)
+    with Session(engine) as session:
+        session.add(
+            Driver(driver_account_id="d1", driver_name="小王", driver_phone="1")
+        )
+        session.add(OrderDetail(order_id="D1", car_plate="京A12345"))
+        for path_id in ("Y1", "Y2"):
+            session.add(
+                Fee(
+                    path_id=path_id,
+                    order_id="D1",
+                    status=OrderStatusEnum.PENDING_PAYMENT,
+                    total_price=100,
+                    driver_account_id="d1",
+                )
+            )
+        session.commit()
+    return engine
+
+
+def count_statements(engine, fn) -> int:
+    """统计执行期间发出的 SQL 语句数"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return len(statements)
+
+
+class TestSparseFieldsets:
+    """稀疏字段集测试类"""
+
+    def test_parse_fields(self):
+        """测试 fields 参数解析"""
+        assert parse_fields(None, FEE_LIST_FIELDS) == FEE_LIST_FIELDS
+        assert parse_fields(" , ", FEE_LIST_FIELDS) == FEE_LIST_FIELDS
+        assert parse_fields("status,order_id", FEE_LIST_FIELDS) == (
+            "order_id",
+            "status",
+        )
+        with pytest.raises(ValueError):
+            parse_fields("order_id,receipt_reject_reason", FEE_LIST_FIELDS)
+
+    def test_fee_only_fields_skip_joins(self, detail_engine):
+        """测试只选费用字段时不查询订单详情和司机表"""
+        fields = parse_fields("order_id,status,total_price", ORDER_DETAIL_FIELDS)
+        with Session(detail_engine) as session:
+            result = []
+            statements = count_statements(
+                detail_engine,
+                lambda: result.extend(
+                    load_order_details(
+                        session,
+                        [Fee.order_id == "D1"],
+                        fields,
+                        _display_settlement_status,
+                    )
+                ),
+            )
+
+        assert statements == 1
+        assert result == [
+            {"order_id": "D1", "status": "待结算", "total_price": 100},
+            {"order_id": "D1", "status": "待结算", "total_price": 100},
+        ]
+
+    def test_full_detail_batches_joins(self, detail_engine):
+        """测试完整详情对订单详情和司机表各查询一次"""
+        with Session(detail_engine) as session:
+            result = []
+            statements = count_statements(
+                detail_engine,
+                lambda: result.extend(
+                    load_order_details(
+                        session,
+                        [Fee.order_id == "D1"],
+                        ORDER_DETAIL_FIELDS,
+                        _display_settlement_status,
+                    )
+                ),
+            )
+
+        assert statements == 3
+        assert [item["driver_name"] for item in result] == ["小王", "小王"]
+        assert [item["car_plate"] for item in result] == ["京A12345", "京A12345"]
+        assert list(result[0]) == list(ORDER_DETAIL_FIELDS)
@@ -0,0 +1,280 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from pydantic import BaseModel
+from sqlmodel import Session
+from starlette.requests import Request
+
+from models.idempotency import IdempotencyRecord
+from utils.auth import token_manager
+from utils.idempotency import (
+    REPLAYED_HEADER,
+    idempotency_store,
+    idempotent,
+    request_fingerprint,
+    storage_key,
+)
+from utils.response import internal_error_response, success_response
+
+
+class PayRequest(BaseModel):
+    fee_id: str
+    amount: int
+
+
+@pytest.fixture
+def idempotent_app(sqlite_engine):
+    """
+    带幂等装饰器的测试应用（内存 SQLite）
+
+    Returns:
+        tuple: (应用, 引擎, 业务执行记录)
+    """
+    engine = sqlite_engine(IdempotencyRecord.__table__)
+    executions = []
+
+    def get_test_db():
+        with Session(engine) as session:
+            yield session
+
+    app = FastAPI()
+
+    @app.patch("/pay")
+    @idempotent("test_pay")
+    async def pay(data: PayRequest, db: Session = Depends(get_test_db)):
+        executions.append(data.fee_id)
+        await asyncio.sleep(0.3 if data.fee_id == "slow" else 0.05)
+        if data.fee_id == "error":
+            return internal_error_response("支付费用失败")
+        return success_response(
+            data={"fee_id": data.fee_id, "times": len(executions)},
+            message="费用支付成功",
+        )
+
+    idempotency_store.clear()
+    yield app, engine, executions
+    idempotency_store.clear()
+
+
+def make_client(app) -> httpx.AsyncClient:
+    """异步测试客户端"""
+    return httpx.AsyncClient(app=app, base_url="http://test")
+
+
+def stored_key(idempotency_key: str) -> str:
+    """测试客户端（未携带令牌）请求保存时使用的存储键"""
+    request = Request({"type": "http", "headers": [], "client": ("127.0.0.1", 123)})
+    return storage_key("test_pay", request, idempotency_key)
+
+
+class TestIdempotency:
+    """幂等键测试类"""
+
+    @pytest.mark.asyncio
+    async def test_replay_same_key(self, idempotent_app):
+        """测试相同幂等键只执行一次并返回首次响应"""
+        app, _, executions = idempotent_app
+        headers = {"Idempotency-Key": "k1"}
+        async with make_client(app) as client:
+            first = await client.patch(
+                "/pay", json={"fee_id": "f1", "amount": 100}, headers=headers
+            )
+            second = await client.patch(
+                "/pay", json={"fee_id": "f1", "amount": 100}, headers=headers
+            )
+
+        assert executions == ["f1"]
+        assert first.json() == second.json()
+        assert REPLAYED_HEADER.lower() not in first.headers
+        assert second.headers[REPLAYED_HEADER.lower()] == "true"
+
+    @pytest.mark.asyncio
+    async def test_same_key_different_callers(self, idempotent_app):
+        """测试不同调用方使用相同幂等键和请求体时各自执行，不返回对方的响应"""
+        app, _, executions = idempotent_app
+        responses = []
+        async with make_client(app) as client:
+            for subject in ("staff-a", "staff-b"):
+                token, _ = token_manager.issue(subject, company_id="c1")
+                response = await client.patch(
+                    "/pay",
+                    json={"fee_id": "f1", "amount": 100},
+                    headers={
+                        "Idempotency-Key": "shared",
+                        "Authorization": f"Bearer {token}",
+                    },
+                )
+                responses.append(response)
+
+        assert executions == ["f1", "f1"]
+        assert [r.json()["data"]["times"] for r in responses] == [1, 2]
+        assert all(REPLAYED_HEADER.lower() not in r.headers for r in responses)
+
+    @pytest.mark.asyncio
+    async def test_without_key(self, idempotent_app):
+        """测试不带幂等键时每次都执行"""
+        app, _, executions = idempotent_app
+        async with make_client(app) as client:
+            for _ in range(2):
+                await client.patch("/pay", json={"fee_id": "f1", "amount": 100})
+
+        assert executions == ["f1", "f1"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait(self, idempotent_app):
+        """测试并发的重复请求等待首个请求，不并行执行"""
+        app, _, executions = idempotent_app
+        headers = {"Idempotency-Key": "k2"}
+        async with make_client(app) as client:
+            responses = await asyncio.gather(
+                *(
+                    client.patch(
+                        "/pay", json={"fee_id": "f2", "amount": 100}, headers=headers
+                    )
+                    for _ in range(5)
+                )
+            )
+
+        assert executions == ["f2"]
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.text for response in responses}) == 1
+
+    @pytest.mark.asyncio
+    async def test_key_reused_with_different_body(self, idempotent_app):
+        """测试同一幂等键用于不同请求体时拒绝"""
+        app, _, executions = idempotent_app
+        headers = {"Idempotency-Key": "k3"}
+        async with make_client(app) as client:
+            await client.patch(
+                "/pay", json={"fee_id": "f3", "amount": 100}, headers=headers
+            )
+            response = await client.patch(
+                "/pay", json={"fee_id": "f3", "amount": 999}, headers=headers
+            )
+
+        assert response.status_code == 422
+        assert executions == ["f3"]
+
+    @pytest.mark.asyncio
+    async def test_server_error_not_stored(self, idempotent_app):
+        """测试 5xx 响应不保存，重试时重新执行"""
+        app, engine, executions = idempotent_app
+        headers = {"Idempotency-Key": "k4"}
+        async with make_client(app) as client:
+            for _ in range(2):
+                response = await client.patch(
+                    "/pay", json={"fee_id": "error", "amount": 100}, headers=headers
+                )
+                assert response.status_code == 500
+
+        assert executions == ["error", "error"]
+        with Session(engine) as session:
+            assert session.get(IdempotencyRecord, stored_key("k4")) is None
+
+    @pytest.mark.asyncio
+    async def test_replay_from_database(self, idempotent_app):
+        """测试进程内缓存清空后（如重启）从数据库返回保存的响应"""
+        app, _, executions = idempotent_app
+        headers = {"Idempotency-Key": "k5"}
+        async with make_client(app) as client:
+            first = await client.patch(
+                "/pay", json={"fee_id": "f5", "amount": 100}, headers=headers
+            )
+            idempotency_store.clear()
+            second = await client.patch(
+                "/pay", json={"fee_id": "f5", "amount": 100}, headers=headers
+            )
+
+        assert executions == ["f5"]
+        assert second.json() == first.json()
+        assert second.headers[REPLAYED_HEADER.lower()] == "true"
+
+    @pytest.mark.asyncio
+    async def test_live_claim_not_taken_over(self, idempotent_app, monkeypatch):
+        """测试其他进程处理中（租约未过期）的记录等待超时后返回 409，不重复执行"""
+        app, engine, executions = idempotent_app
+        monkeypatch.setattr(idempotency_store, "wait_timeout", 0.1)
+        body = b'{"fee_id": "f6", "amount": 100}'
+        request = Request(
+            {
+                "type": "http",
+                "method": "PATCH",
+                "path": "/pay",
+                "query_string": b"",
+                "headers": [],
+            }
+        )
+        with Session(engine) as session:
+            # 另一进程 30 秒前抢占且仍在处理（超过等待时间，未超过租约）
+            session.add(
+                IdempotencyRecord(
+                    idempotency_key=stored_key("k6"),
+                    request_hash=request_fingerprint(request, body),
+                    updated_at=datetime.utcnow() - timedelta(seconds=30),
+                )
+            )
+            session.commit()
+
+        async with make_client(app) as client:
+            response = await client.patch(
+                "/pay",
+                content=body,
+                headers={
+                    "Idempotency-Key": "k6",
+                    "Content-Type": "application/json",
+                },
+            )
+
+        assert response.status_code == 409
+        assert executions == []
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_taken_over(self, idempotent_app):
+        """测试超过租约未续期的记录（处理进程已退出）被重新抢占执行"""
+        app, engine, executions = idempotent_app
+        with Session(engine) as session:
+            session.add(
+                IdempotencyRecord(
+                    idempotency_key=stored_key("k7"),
+                    request_hash="crashed-process",
+                    updated_at=datetime.utcnow()
+                    - timedelta(seconds=idempotency_store.lease + 1),
+                )
+            )
+            session.commit()
+
+        async with make_client(app) as client:
+            response = await client.patch(
+                "/pay",
+                json={"fee_id": "f7", "amount": 100},
+                headers={"Idempotency-Key": "k7"},
+            )
+
+        assert response.status_code == 200
+        assert executions == ["f7"]
+
+    @pytest.mark.asyncio
+    async def test_lease_renewed_while_running(self, idempotent_app, monkeypatch):
+        """测试处理时间超过租约时记录持续续期"""
+        app, engine, executions = idempotent_app
+        monkeypatch.setattr(idempotency_store, "lease", 0.15)
+        async with make_client(app) as client:
+            task = asyncio.ensure_future(
+                client.patch(
+                    "/pay",
+                    json={"fee_id": "slow", "amount": 100},
+                    headers={"Idempotency-Key": "k8"},
+                )
+            )
+            await asyncio.sleep(0.25)
+            with Session(engine) as session:
+                record = session.get(IdempotencyRecord, stored_key("k8"))
+                assert record.status_code is None
+                assert datetime.utcnow() - record.updated_at < timedelta(seconds=0.15)
+            response = await task
+
+        assert response.status_code == 200
+        assert executions == ["slow"]
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.upload as upload_api
+from utils.compression import IMMUTABLE_CACHE_CONTROL
+from utils.image_variants import DiskLRUCache, VariantRenderer
+from utils.sendfile import parse_range
+from utils.upload import ContentAddressedStore
+
+
+def make_jpeg(width: int = 800, height: int = 600) -> bytes:
+    """生成测试用 JPEG（需要 Pillow）"""
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def save_upload(store: ContentAddressedStore, data: bytes, extension: str) -> str:
+    """按上传接口的方式保存图片，返回文件名"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = store.path_for(digest, extension)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return os.path.basename(path)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """上传目录和衍生图缓存使用临时目录"""
+    store = ContentAddressedStore(str(tmp_path / "uploads"))
+    renderer = VariantRenderer(
+        DiskLRUCache(str(tmp_path / "cache"), 10 * 1024 * 1024), max_workers=1
+    )
+    monkeypatch.setattr(upload_api, "image_store", store)
+    monkeypatch.setattr(upload_api, "variant_renderer", renderer)
+    yield store
+    renderer.shutdown()
+
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+    app.include_router(upload_api.router, prefix="/api")
+    return TestClient(app)
+
+
+class TestImageVariants:
+    """图片获取测试类"""
+
+    def test_original_with_range_and_cache_headers(self, client, store):
+        """测试原图支持 Range、强 ETag 和长期缓存"""
+        data = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 40
+        name = save_upload(store, data, ".jpg")
+        url = f"/api/upload/images/{name}"
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.content == data
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["accept-ranges"] == "bytes"
+        etag = response.headers["etag"]
+        assert not etag.startswith("W/")
+
+        response = client.get(url, headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206
+        assert response.content == data[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(data)}"
+
+        response = client.get(url, headers={"Range": "bytes=-10"})
+        assert response.content == data[-10:]
+
+        # If-Range 与当前版本不一致时返回完整文件
+        response = client.get(
+            url, headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+        )
+        assert response.status_code == 200
+        assert response.content == data
+
+        response = client.get(url, headers={"Range": f"bytes={len(data)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(data)}"
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_parse_range(self):
+        """测试 Range 解析"""
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-", 100) == (0, 99)
+        assert parse_range("bytes=90-200", 100) == (90, 99)
+        assert parse_range("bytes=-200", 100) == (0, 99)
+        assert parse_range("bytes=0-1,5-6", 100) is None
+        with pytest.raises(ValueError):
+            parse_range("bytes=5-1", 100)
+
+    def test_variant_generated_once_and_cached(self, client, store):
+        """测试衍生图首次请求时生成，之后直接从缓存返回"""
+        Image = pytest.importorskip("PIL.Image")
+        name = save_upload(store, make_jpeg(), ".jpg")
+        url = f"/api/upload/images/{name}?w=320&fmt=webp"
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        with Image.open(io.BytesIO(response.content)) as image:
+            assert image.size == (320, 240)
+
+        cache = upload_api.variant_renderer.cache
+        (path,) = list(cache._load())
+        mtime = os.stat(path).st_mtime_ns
+        os.utime(path, ns=(mtime - 10**9, mtime - 10**9))
+        response_again = client.get(url)
+        assert response_again.content == response.content
+        # 命中时更新修改时间（重启后恢复访问顺序）
+        assert os.stat(path).st_mtime_ns >= mtime
+
+        etag = response.headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    def test_rejected_requests(self, client, store):
+        """测试文件名、宽度不合法或原图不存在"""
+        name = save_upload(store, b"\xff\xd8\xff\xe0jpeg", ".jpg")
+        assert client.get(f"/api/upload/images/{name}?w=333").status_code == 400
+        # 测试应用未注册参数校验异常处理，返回 FastAPI 默认的 422
+        assert client.get(f"/api/upload/images/{name}?fmt=gif").status_code == 422
+        assert client.get("/api/upload/images/..%2Fsecret.jpg").status_code == 404
+        missing = hashlib.sha256(b"missing").hexdigest()
+        assert client.get(f"/api/upload/images/{missing}.jpg").status_code == 404
+
+    def test_disk_lru_eviction(self, tmp_path):
+        """测试超出总大小时淘汰最久未访问的文件，重启后按修改时间恢复顺序"""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=25)
+        paths = [cache.path_for("ab" * 32, f"w{i}.jpg") for i in range(3)]
+        os.makedirs(os.path.dirname(paths[0]))
+        for i, path in enumerate(paths[:2]):
+            with open(path, "wb") as f:
+                f.write(b"x" * 10)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # 重启后扫描目录
+        cache = DiskLRUCache(str(tmp_path), max_bytes=25)
+        assert cache.get(paths[0]) is not None
+        with open(paths[2], "wb") as f:
+            f.write(b"x" * 10)
+        cache.add(paths[2], 10)
+
+        assert not os.path.exists(paths[1])
+        assert os.path.exists(paths[0]) and os.path.exists(paths[2])
+        assert cache.size == 20
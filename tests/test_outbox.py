@@ -0,0 +1,205 @@
+import time
+from contextlib import ExitStack, asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from models.outbox import PushOutbox
+from utils.auth import token_manager
+from utils.tasks import task_runtime
+from websocket.manager import connected_clients, send_message_to_type
+from websocket.outbox import OutboxDispatcher, enqueue_push
+from websocket.router import ws_router
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    """内存 SQLite 引擎（分发任务在线程池中访问，共用同一连接）"""
+    return sqlite_engine(PushOutbox.__table__)
+
+
+@pytest.fixture
+def ws_client(engine, monkeypatch):
+    """
+    挂载 WebSocket 路由和模拟业务接口的测试应用（连接池独立于其他测试）
+
+    Yields:
+        tuple: (测试客户端, 分发任务)
+    """
+    for client_type in list(connected_clients):
+        monkeypatch.setitem(connected_clients, client_type, [])
+    dispatcher = OutboxDispatcher(engine=engine, poll_interval=0.05)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        dispatcher.schedule()
+        yield
+        await task_runtime.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(ws_router, prefix="/api")
+
+    @app.post("/fee/{fee_id}")
+    async def submit(fee_id: str, fail: bool = False, notify: bool = True):
+        with Session(engine) as db:
+            enqueue_push(db, ("platform",), {"type": "fee_submitted", "fee_id": fee_id})
+            if fail:
+                db.rollback()
+                return {"ok": False}
+            db.commit()
+        if notify:
+            dispatcher.notify()
+        return {"ok": True}
+
+    @app.post("/push/{client_type}")
+    async def push(
+        client_type: str,
+        fee_id: str,
+        company_id: Optional[str] = None,
+        driver_account_id: Optional[str] = None,
+    ):
+        with Session(engine) as db:
+            enqueue_push(
+                db,
+                (client_type,),
+                {"type": "fee_paid", "fee_id": fee_id},
+                company_id=company_id,
+                driver_account_id=driver_account_id,
+            )
+            db.commit()
+        dispatcher.notify()
+        return {"ok": True}
+
+    @app.post("/broadcast/{client_type}")
+    async def broadcast(client_type: str):
+        await send_message_to_type(client_type, {"type": "end"})
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        yield client, dispatcher
+
+
+def ws_url(client_type: str, **claims) -> str:
+    """携带令牌的 WebSocket 地址（不传身份时为未携带令牌的连接）"""
+    if not claims:
+        return f"/api/{client_type}"
+    token, _ = token_manager.issue("u", **claims)
+    return f"/api/{client_type}?access_token={token}"
+
+
+def outbox_rows(engine) -> list:
+    """发件箱中的全部记录"""
+    with Session(engine) as session:
+        return session.exec(select(PushOutbox).order_by(PushOutbox.id)).all()
+
+
+class TestOutbox:
+    """推送发件箱测试类"""
+
+    def test_enqueue_in_transaction(self, engine):
+        """测试发件箱随业务事务提交，回滚时不写入"""
+        with Session(engine) as db:
+            enqueue_push(db, ("platform", "client"), {"type": "a", "status": None})
+            db.rollback()
+        assert outbox_rows(engine) == []
+
+        with Session(engine) as db:
+            enqueue_push(db, ("platform", "client"), {"type": "a"})
+            db.commit()
+        rows = outbox_rows(engine)
+        assert [row.client_type for row in rows] == ["platform", "client"]
+        assert all(row.dispatched_at is None for row in rows)
+
+    def test_dispatch_after_commit(self, ws_client, engine):
+        """测试提交后由后台任务推送，回滚的推送不发出"""
+        client, dispatcher = ws_client
+        with client.websocket_connect(
+            ws_url("platform", operator_type="PLATFORM")
+        ) as websocket:
+            client.post("/fee/f1", params={"fail": True})
+            client.post("/fee/f2")
+            message = websocket.receive_json()
+        # 推送后再标记为已分发
+        deadline = time.monotonic() + 1
+        while dispatcher.dispatched == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert message["type"] == "fee_submitted"
+        assert message["fee_id"] == "f2"
+        assert [row.dispatched_at is not None for row in outbox_rows(engine)] == [True]
+        assert dispatcher.dispatched == 1
+
+    def test_polled_without_notify(self, ws_client):
+        """测试其他进程写入（本进程未调用 notify）的推送由启动时注册的轮询送达"""
+        client, dispatcher = ws_client
+        with client.websocket_connect(
+            ws_url("platform", operator_type="PLATFORM")
+        ) as websocket:
+            client.post("/fee/f3", params={"notify": False})
+            message = websocket.receive_json()
+
+        assert message["fee_id"] == "f3"
+
+    def test_scoped_to_identity(self, ws_client):
+        """测试推送只发给所属公司的客户端、本人的司机端，未携带令牌的连接不接收"""
+        client, dispatcher = ws_client
+        pushes = [
+            ("client", "f-c2", {"company_id": "c2"}),
+            ("client", "f-c1", {"company_id": "c1"}),
+            ("driver", "f-d2", {"company_id": "c1", "driver_account_id": "d2"}),
+            ("driver", "f-d1", {"company_id": "c1", "driver_account_id": "d1"}),
+        ]
+        with ExitStack() as stack:
+            connections = {
+                name: stack.enter_context(client.websocket_connect(url))
+                for name, url in {
+                    "c1": ws_url("client", company_id="c1", operator_type="CLIENT"),
+                    "c2": ws_url("client", company_id="c2", operator_type="CLIENT"),
+                    "d1": ws_url("driver", company_id="c1", driver_account_id="d1"),
+                    "anonymous": ws_url("driver"),
+                }.items()
+            }
+            for client_type, fee_id, scope in pushes:
+                client.post(f"/push/{client_type}", params={"fee_id": fee_id, **scope})
+            deadline = time.monotonic() + 1
+            while dispatcher.dispatched < len(pushes) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # 广播作为结束标记：之前收到的都是范围内的推送
+            client.post("/broadcast/client")
+            client.post("/broadcast/driver")
+            received = {}
+            for name, websocket in connections.items():
+                received[name] = []
+                while (message := websocket.receive_json())["type"] != "end":
+                    received[name].append(message["fee_id"])
+
+        assert received == {
+            "c1": ["f-c1"],
+            "c2": ["f-c2"],
+            "d1": ["f-d1"],
+            "anonymous": [],
+        }
+
+    @pytest.mark.asyncio
+    async def test_pending_rows_recovered(self, engine, monkeypatch):
+        """测试进程在推送前退出时，新的分发任务补发未分发的记录"""
+        for client_type in list(connected_clients):
+            monkeypatch.setitem(connected_clients, client_type, [])
+        with Session(engine) as db:
+            db.add(
+                PushOutbox(
+                    client_type="driver", message="{}", dispatched_at=datetime.utcnow()
+                )
+            )
+            enqueue_push(db, ("driver",), {"type": "fee_paid"})
+            enqueue_push(db, ("driver",), {"type": "reject_fee"})
+            db.commit()
+
+        dispatcher = OutboxDispatcher(engine=engine)
+        assert await dispatcher.dispatch_once() == 2
+        assert await dispatcher.dispatch_once() == 0
+        assert all(row.dispatched_at is not None for row in outbox_rows(engine))
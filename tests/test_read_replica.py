@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+import config.database as database
+from api.driver import router as driver_router
+from config.database import ReadRouter, get_db
+from models.driver import Driver
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.order_detail import OrderDetail
+from models.replication import ReplicationHeartbeat
+from utils.auth import token_manager
+
+
+def make_engine(sqlite_engine, path, fee_ids):
+    """SQLite 文件数据库（主库 / 只读副本的替身），写入指定费用"""
+    engine = sqlite_engine(
+        Fee.__table__,
+        OrderDetail.__table__,
+        Driver.__table__,
+        ReplicationHeartbeat.__table__,
+        path=path,
+    )
+    with Session(engine) as db:
+        for fee_id in fee_ids:
+            db.add(
+                Fee(
+                    fee_id=fee_id,
+                    order_id=f"D-{fee_id}",
+                    path_id=f"P-{fee_id}",
+                    status=OrderStatusEnum.PENDING_PAYMENT,
+                )
+            )
+        db.commit()
+    return engine
+
+
+def replicate_heartbeat(primary, replica, delay: float = 0.0):
+    """模拟复制：把主库心跳同步到副本（delay 为副本落后的秒数）"""
+    with Session(primary) as db:
+        beat_at = db.get(ReplicationHeartbeat, 1).beat_at
+    with Session(replica) as db:
+        db.merge(ReplicationHeartbeat(id=1, beat_at=beat_at - timedelta(seconds=delay)))
+        db.commit()
+
+
+def sync_replica(router, primary, replica, now=None):
+    """写入心跳并同步到副本后检测延迟（副本延迟正常）"""
+    router.check_lag(now=now)
+    replicate_heartbeat(primary, replica)
+    router.check_lag(now=now)
+
+
+@pytest.fixture
+def engines(sqlite_engine, tmp_path):
+    """主库有费用 p1，副本有费用 r1（通过返回的数据区分读取的是哪个库）"""
+    primary = make_engine(sqlite_engine, tmp_path / "primary.db", ["p1"])
+    replica = make_engine(sqlite_engine, tmp_path / "replica.db", ["r1"])
+    return primary, replica
+
+
+class TestReadRouter:
+    """读写分离路由测试类"""
+
+    def test_route_by_lag(self, engines):
+        """测试只分配到延迟正常且最近检测过的副本，否则回退到主库"""
+        primary, replica = engines
+        router = ReadRouter(primary, [replica], max_lag=3.0, check_interval=1.0)
+
+        # 未检测延迟前走主库
+        assert router.route("c1", now=100.0) is None
+
+        # 副本上没有心跳：检测失败，走主库
+        assert router.check_lag(now=100.0) == [float("inf")]
+        assert router.route("c1", now=100.0) is None
+
+        router.check_lag(now=100.0)
+        replicate_heartbeat(primary, replica)
+        lag = router.check_lag(now=100.0)[0]
+        assert lag < 3.0
+        assert router.route("c1", now=101.0) is replica
+
+        # 超过 3 个检测间隔没有新的检测结果，视为不可用
+        assert router.route("c1", now=104.0) is None
+
+        replicate_heartbeat(primary, replica, delay=10)
+        assert router.check_lag(now=200.0)[0] > 3.0
+        assert router.route("c1", now=200.0) is None
+        assert router.reads == {"primary": 4, "replica": 1}
+
+    def test_read_your_writes(self, engines):
+        """测试客户端写入后一段时间内读主库，其他客户端不受影响"""
+        primary, replica = engines
+        router = ReadRouter(
+            primary, [replica], sticky_seconds=5.0, check_interval=10.0, max_clients=2
+        )
+        sync_replica(router, primary, replica, now=10.0)
+
+        router.mark_write("c1", now=10.0)
+        assert router.route("c1", now=11.0) is None
+        assert router.route("c2", now=11.0) is replica
+        assert router.route("c1", now=15.5) is replica
+
+        # 超过客户端数上限时淘汰最早的记录
+        router.mark_write("c1", now=11.0)
+        router.mark_write("c2", now=11.0)
+        router.mark_write("c3", now=11.0)
+        assert router.route("c1", now=12.0) is replica
+        assert router.route("c3", now=12.0) is None
+
+    def test_get_read_db(self, engines, monkeypatch):
+        """测试 GET 接口读副本，同一客户端写入后读主库"""
+        primary, replica = engines
+        router = ReadRouter(primary, [replica], sticky_seconds=60.0)
+        sync_replica(router, primary, replica)
+        monkeypatch.setattr(database, "engine", primary)
+        monkeypatch.setattr(database, "read_router", router)
+
+        app = FastAPI()
+        app.include_router(driver_router, prefix="/api")
+
+        @app.post("/api/test/fees")
+        def create_fee(db: Session = Depends(get_db)):
+            db.add(Fee(fee_id="p2", order_id="D-p2", path_id="P-p2"))
+            db.commit()
+            return {"ok": True}
+
+        client = TestClient(app)
+
+        # 按令牌身份区分客户端（平台端令牌，不限公司）
+        tokens = {
+            user_id: token_manager.issue(user_id, operator_type="PLATFORM")[0]
+            for user_id in ("u1", "u2")
+        }
+
+        def auth(user_id: str) -> dict:
+            return {"Authorization": f"Bearer {tokens[user_id]}"}
+
+        def listed(user_id: str, **headers) -> list:
+            response = client.get(
+                "/api/driver/list",
+                params={"fields": "fee_id"},
+                headers={**auth(user_id), **headers},
+            )
+            return sorted(item["fee_id"] for item in response.json()["data"]["items"])
+
+        assert listed("u1") == ["r1"]
+        client.post("/api/test/fees", headers=auth("u1"))
+        assert listed("u1") == ["p1", "p2"]
+        assert listed("u2") == ["r1"]
+        # 请求头无法冒充或摆脱令牌身份
+        assert listed("u1", **{"X-Client-Id": "other"}) == ["p1", "p2"]
+        assert listed("u2", **{"X-Client-Id": "platform:u1"}) == ["r1"]
+
+        with Session(primary) as db:
+            assert db.exec(select(Fee.fee_id).order_by(Fee.fee_id)).all() == [
+                "p1",
+                "p2",
+            ]
@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from sqlmodel import Session, select
+
+from api.client import router as client_router
+from models.account import Account
+from models.enums import RechargeStatusEnum
+from models.recharge import RechargeRecord
+from utils.recharge_ledger import (
+    approve_account_recharge,
+    approve_claimed_recharges,
+    claim_recharge_reviews,
+    list_recharge_history,
+)
+
+START = datetime(2025, 7, 1, 9, 0, 0)
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    """内存 SQLite 引擎：账户 c1/c2（余额 1000），6 条待审核充值记录（r0 最早）"""
+    engine = sqlite_engine(Account.__table__, RechargeRecord.__table__)
+    with Session(engine) as db:
+        for account_id in ("c1", "c2"):
+            db.add(
+                Account(
+                    company_account_id=account_id,
+                    company_id=f"company-{account_id}",
+                    company_account_balance=1000,
+                )
+            )
+        for n in range(6):
+            db.add(
+                RechargeRecord(
+                    recharge_id=f"r{n}",
+                    created_at=START + timedelta(minutes=n),
+                    company_account_id="c1" if n % 2 == 0 else "c2",
+                    company_id="company",
+                    recharge_name="张财务",
+                    recharge_phone="13512345678",
+                    recharge_amount=100 * (n + 1),
+                    received_amount=100 * (n + 1),
+                )
+            )
+        db.commit()
+    return engine
+
+
+def recharge_ids(records) -> list:
+    return [record.recharge_id for record in records]
+
+
+def balance(engine, account_id: str) -> int:
+    with Session(engine) as db:
+        return db.get(Account, account_id).company_account_balance
+
+
+@pytest.fixture
+def client(engine, db_client, platform_headers):
+    """挂载客户路由的测试客户端（使用内存数据库）"""
+    app = FastAPI()
+    app.include_router(client_router, prefix="/api")
+    return db_client(app, engine, headers=platform_headers)
+
+
+class TestRechargeLedger:
+    """充值记录测试类"""
+
+    def test_claim_disjoint_and_lease_expiry(self, engine):
+        """测试审核人领取互不重叠，领取到期后可被他人领取"""
+        with Session(engine) as db:
+            first = claim_recharge_reviews(db, "u1", 4, 300, now=START)
+            second = claim_recharge_reviews(db, "u2", 4, 300, now=START)
+            assert recharge_ids(first) == ["r0", "r1", "r2", "r3"]
+            assert recharge_ids(second) == ["r4", "r5"]
+            assert first[0].review_lease_until == START + timedelta(seconds=300)
+
+            # 未到期时无可领取；u1 的领取到期后由 u2 领取
+            assert claim_recharge_reviews(db, "u3", 4, 300, now=START) == []
+            later = START + timedelta(seconds=301)
+            third = claim_recharge_reviews(db, "u2", 2, 300, now=later)
+            assert recharge_ids(third) == ["r0", "r1"]
+            assert {record.review_claimed_by for record in third} == {"u2"}
+
+    def test_batch_approve_claimed(self, engine):
+        """测试批量审核只入账自己未到期的领取，同一账户合并入账"""
+        with Session(engine) as db:
+            claim_recharge_reviews(db, "u1", 3, 300, now=START)
+            claim_recharge_reviews(db, "u2", 3, 300, now=START)
+
+            result = approve_claimed_recharges(
+                db, "u1", ["r0", "r2", "r2", "r3", "missing"], now=START
+            )
+            assert recharge_ids(result.records) == ["r0", "r2"]
+            assert result.skipped == ["r3", "missing"]
+            assert [account.company_account_balance for account in result.accounts] == [
+                1000 + 100 + 300
+            ]
+
+            # u2 的领取到期后不能再审核
+            expired = START + timedelta(seconds=301)
+            result = approve_claimed_recharges(db, "u2", ["r3"], now=expired)
+            assert result.records == []
+            assert result.skipped == ["r3"]
+
+        with Session(engine) as db:
+            r0 = db.get(RechargeRecord, ("r0", START))
+            assert r0.recharge_status == RechargeStatusEnum.APPROVED
+            assert r0.approved_by == "u1"
+            assert r0.review_claimed_by is None
+        assert balance(engine, "c1") == 1400
+        assert balance(engine, "c2") == 1000
+
+    def test_approve_account_recharge(self, engine):
+        """测试直接审核账户最早的待审核记录，无待审核记录时返回 None"""
+        with Session(engine) as db:
+            for expected in ("r0", "r2", "r4"):
+                result = approve_account_recharge(db, "c1")
+                assert recharge_ids(result.records) == [expected]
+            assert approve_account_recharge(db, "c1") is None
+        assert balance(engine, "c1") == 1000 + 100 + 300 + 500
+
+    def test_history_keyset_pages(self, engine):
+        """测试按游标翻页，新的在前，不重复不遗漏"""
+        with Session(engine) as db:
+            for n in range(6, 25):
+                db.add(
+                    RechargeRecord(
+                        recharge_id=f"r{n:02d}",
+                        # 部分记录申请时间相同，按记录ID区分先后
+                        created_at=START + timedelta(minutes=n // 2),
+                        company_account_id="c1",
+                        company_id="company",
+                        recharge_name="张财务",
+                        recharge_phone="13512345678",
+                        recharge_amount=100,
+                        received_amount=100,
+                    )
+                )
+            db.commit()
+
+            pages, cursor = [], None
+            while True:
+                records, cursor = list_recharge_history(db, "c1", size=4, cursor=cursor)
+                pages.append(recharge_ids(records))
+                if cursor is None:
+                    break
+
+            seen = [recharge_id for page in pages for recharge_id in page]
+            expected = db.exec(
+                select(RechargeRecord)
+                .where(RechargeRecord.company_account_id == "c1")
+                .order_by(
+                    RechargeRecord.created_at.desc(),
+                    RechargeRecord.recharge_id.desc(),
+                )
+            ).all()
+            assert seen == recharge_ids(expected)
+            assert len(seen) == 22
+            assert all(len(page) == 4 for page in pages[:-1])
+
+            with pytest.raises(ValueError):
+                list_recharge_history(db, "c1", size=4, cursor="not-a-cursor")
+
+    def test_api(self, client, engine):
+        """测试充值、领取、批量审核和历史查询接口"""
+        response = client.patch(
+            "/api/client/recharge",
+            json={
+                "company_account_id": "c2",
+                "recharge_name": "李会计",
+                "recharge_phone": "13600001111",
+                "recharge_amount": 5000,
+            },
+        )
+        assert response.status_code == 200
+        recharge_id = response.json()["data"]["recharge_id"]
+        # 提交充值不修改账户
+        assert balance(engine, "c2") == 1000
+
+        # 审核人为令牌中的员工，请求体中的 reviewer_id 不采信
+        response = client.post(
+            "/api/client/accounts/recharge-review/claim",
+            json={"reviewer_id": "u1", "limit": 10},
+        )
+        data = response.json()["data"]
+        claimed = [item["recharge_id"] for item in data["items"]]
+        assert claimed[-1] == recharge_id
+        assert data["lease_until"]
+        assert {item["review_claimed_by"] for item in data["items"]} == {
+            "platform-test"
+        }
+
+        response = client.post(
+            "/api/client/accounts/recharge-review/approve",
+            json={"recharge_ids": [recharge_id, "missing"]},
+        )
+        data = response.json()["data"]
+        assert [item["recharge_status"] for item in data["approved"]] == ["已通过"]
+        assert data["skipped"] == ["missing"]
+        assert balance(engine, "c2") == 6000
+
+        response = client.get("/api/client/accounts/c2/recharges", params={"size": 2})
+        data = response.json()
+        assert [item["recharge_id"] for item in data["items"]] == [recharge_id, "r5"]
+        response = client.get(
+            "/api/client/accounts/c2/recharges",
+            params={"size": 2, "cursor": data["next_cursor"]},
+        )
+        data = response.json()
+        assert [item["recharge_id"] for item in data["items"]] == ["r3", "r1"]
+        assert data["next_cursor"] is None
+
+        response = client.patch("/api/client/accounts/c1/approve-recharge")
+        assert response.json()["company_account_balance"] == 1100
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from utils.conditional import build_etag, is_not_modified, not_modified_response
+from utils.response import success_response
+from utils.singleflight import single_flight, single_flight_stats
+
+
+@pytest.fixture
+def coalescing_app():
+    """
+    带请求合并的测试应用（同步接口模拟数据库查询）
+
+    Returns:
+        tuple: (应用, 执行记录)
+    """
+    executions = []
+    app = FastAPI()
+
+    @app.get("/driver")
+    @single_flight("test_driver_fee")
+    def get_fee(request: Request, order_id: str, path_id: str):
+        executions.append((order_id, path_id))
+        time.sleep(0.1)
+        etag = build_etag("fee", order_id, path_id)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        response = success_response(data={"order_id": order_id, "path_id": path_id})
+        response.headers["ETag"] = etag
+        return response
+
+    single_flight_stats.reset()
+    yield app, executions
+    single_flight_stats.reset()
+
+
+async def fetch_all(app: FastAPI, requests: list) -> list:
+    """并发发起请求"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        return await asyncio.gather(
+            *(client.get(url, headers=headers) for url, headers in requests)
+        )
+
+
+class TestSingleFlight:
+    """请求合并测试类"""
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_coalesced(self, coalescing_app):
+        """测试并发相同请求只执行一次并共享响应"""
+        app, executions = coalescing_app
+        responses = await fetch_all(app, [("/driver?order_id=D1&path_id=Y1", {})] * 10)
+
+        assert executions == [("D1", "Y1")]
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.content for response in responses}) == 1
+        assert single_flight_stats.snapshot()["test_driver_fee"] == {
+            "executed": 1,
+            "coalesced": 9,
+        }
+
+    @pytest.mark.asyncio
+    async def test_parameter_order_normalized(self, coalescing_app):
+        """测试查询参数顺序不同仍视为相同请求"""
+        app, executions = coalescing_app
+        await fetch_all(
+            app,
+            [
+                ("/driver?order_id=D1&path_id=Y1", {}),
+                ("/driver?path_id=Y1&order_id=D1", {}),
+            ],
+        )
+
+        assert executions == [("D1", "Y1")]
+
+    @pytest.mark.asyncio
+    async def test_different_requests_not_coalesced(self, coalescing_app):
+        """测试参数或条件请求头不同时分别执行"""
+        app, executions = coalescing_app
+        etag = build_etag("fee", "D1", "Y1")
+        responses = await fetch_all(
+            app,
+            [
+                ("/driver?order_id=D1&path_id=Y1", {}),
+                ("/driver?order_id=D1&path_id=Y2", {}),
+                ("/driver?order_id=D1&path_id=Y1", {"If-None-Match": etag}),
+            ],
+        )
+
+        assert sorted(executions) == [("D1", "Y1"), ("D1", "Y1"), ("D1", "Y2")]
+        assert [response.status_code for response in responses] == [200, 200, 304]
+
+    @pytest.mark.asyncio
+    async def test_sequential_requests_not_cached(self, coalescing_app):
+        """测试请求结束后不缓存，后续请求重新执行"""
+        app, executions = coalescing_app
+        await fetch_all(app, [("/driver?order_id=D1&path_id=Y1", {})])
+        await fetch_all(app, [("/driver?order_id=D1&path_id=Y1", {})])
+
+        assert executions == [("D1", "Y1"), ("D1", "Y1")]
@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+
+from fastapi import FastAPI
+
+from config.settings import settings
+from utils.openapi import (
+    FINGERPRINT_KEY,
+    schema_path,
+    use_cached_openapi,
+    write_schema,
+)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时间预算（秒），CI 机器较慢时留有余量
+IMPORT_BUDGET = 5.0
+FIRST_REQUEST_BUDGET = 1.0
+FINANCE_FIRST_REQUEST_BUDGET = 2.0
+
+# 启动时不应导入的模块（按需加载）
+LAZY_MODULES = ("api.client", "api.driver", "uvicorn", "jose", "passlib")
+
+MEASURE_SCRIPT = """
+import json, sys, time
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+
+client = TestClient(main.app)
+before_request = time.perf_counter()
+assert client.get("/api/docs").status_code == 200
+first_request = time.perf_counter()
+loaded = [name for name in %r if name in sys.modules]
+assert client.get("/finance/openapi.json").status_code == 200
+finance_request = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - started,
+    "first_request": first_request - before_request,
+    "finance_first_request": finance_request - first_request,
+    "loaded": loaded,
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure_startup() -> dict:
+    """
+    在新进程中测量导入时间和首个请求耗时
+
+    Returns:
+        dict: 各阶段耗时（秒）和提前导入的模块
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestStartup:
+    """启动性能测试类"""
+
+    def test_startup_budget(self):
+        """测试导入时间和首个请求耗时在预算内"""
+        timings = measure_startup()
+        print(
+            f"\n导入: {timings['import']:.3f}s, "
+            f"首个请求: {timings['first_request']:.3f}s, "
+            f"财务首个请求: {timings['finance_first_request']:.3f}s"
+        )
+
+        assert timings["loaded"] == [], "启动时不应导入按需加载的模块"
+        assert timings["import"] < IMPORT_BUDGET
+        assert timings["first_request"] < FIRST_REQUEST_BUDGET
+        assert timings["finance_first_request"] < FINANCE_FIRST_REQUEST_BUDGET
+
+    def test_cached_openapi(self, tmp_path, monkeypatch):
+        """测试非开发环境读取构建时生成的 OpenAPI 文档，路由变化时重新生成"""
+        monkeypatch.setattr(settings, "OPENAPI_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+
+        def build_app(*paths: str) -> FastAPI:
+            app = FastAPI(title="物流", version="1.0.0")
+            for path in paths:
+                app.get(path)(lambda: "pong")
+            use_cached_openapi(app, "demo")
+            return app
+
+        write_schema(build_app("/ping"), "demo")
+        path = schema_path("demo")
+        # 标记缓存文件，区分读取缓存和实时生成
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+        cached["info"]["description"] = "缓存"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+
+        # 路由相同时读取缓存
+        served = build_app("/ping").openapi()
+        assert served["info"].get("description") == "缓存"
+        assert FINGERPRINT_KEY not in served
+
+        # 新增路由（版本号未变）时回退为实时生成
+        changed = build_app("/ping", "/pong").openapi()
+        assert changed["info"].get("description") is None
+        assert "/pong" in changed["paths"]
+
+    def test_route_fingerprint_covers_models(self):
+        """测试指纹包含接口引用的模型模块（模型变化时缓存失效）"""
+        import api.user
+        from utils.openapi import _referenced_modules
+
+        modules = _referenced_modules(["api.user"])
+        assert {"api.user", "models.user", "utils.response"} <= modules
+        assert not any(name.startswith(("fastapi", "sqlmodel")) for name in modules)
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+import pytest
+import pytest_asyncio
+
+from utils.tasks import TaskRuntime
+
+
+@pytest_asyncio.fixture
+async def runtime():
+    """独立的任务运行时（test 队列：并发 2，快速重试），测试结束时停止"""
+    runtime = TaskRuntime()
+    runtime.register_queue("test", concurrency=2, max_retries=2, retry_backoff=0.01)
+    yield runtime
+    await runtime.stop()
+
+
+class TestTaskRuntime:
+    """后台任务运行时测试类"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self, runtime):
+        """测试队列并发数不超过上限"""
+        running = []
+        peak = []
+
+        async def job():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.pop()
+
+        for _ in range(6):
+            runtime.enqueue("test", job)
+        assert await runtime.drain(timeout=2)
+
+        assert max(peak) == 2
+        assert len(peak) == 6
+
+    @pytest.mark.asyncio
+    async def test_retry_with_backoff(self, runtime):
+        """测试失败后退避重试，超过次数后记为失败"""
+        attempts = {"flaky": 0, "broken": 0}
+
+        async def flaky():
+            attempts["flaky"] += 1
+            if attempts["flaky"] < 3:
+                raise RuntimeError("暂时失败")
+
+        async def broken():
+            attempts["broken"] += 1
+            raise RuntimeError("一直失败")
+
+        runtime.enqueue("test", flaky)
+        runtime.enqueue("test", broken)
+        await asyncio.sleep(0.2)
+        counts = runtime.snapshot()["test"]
+
+        assert attempts == {"flaky": 3, "broken": 3}
+        assert counts["processed"] == 1
+        assert counts["failed"] == 1
+        assert counts["retried"] == 4
+
+    @pytest.mark.asyncio
+    async def test_key_deduplicated_while_queued(self, runtime):
+        """测试相同 key 排队期间只保留一个，开始执行后可再次入队"""
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def job(name):
+            calls.append(name)
+            started.set()
+            await release.wait()
+
+        runtime.register_queue("serial", concurrency=1)
+        assert runtime.enqueue("serial", job, "a", key="k")
+        await started.wait()
+        assert runtime.enqueue("serial", job, "b", key="k")
+        assert not runtime.enqueue("serial", job, "c", key="k")
+        release.set()
+        assert await runtime.drain(timeout=1)
+
+        assert calls == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_sync_job_in_threadpool(self, runtime):
+        """测试同步任务在线程池中执行"""
+        threads = []
+        runtime.enqueue("test", lambda: threads.append(threading.get_ident()))
+        assert await runtime.drain(timeout=1)
+
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_drain_on_shutdown(self, runtime):
+        """测试关闭时执行完已入队任务，之后的任务不再接收"""
+        done = []
+
+        async def job(n):
+            await asyncio.sleep(0.01)
+            done.append(n)
+
+        for n in range(5):
+            runtime.enqueue("test", job, n)
+        drain = asyncio.create_task(runtime.drain(timeout=1))
+        await asyncio.sleep(0)
+        rejected = runtime.enqueue("test", job, 99)
+
+        assert await drain
+        assert sorted(done) == [0, 1, 2, 3, 4]
+        assert rejected is False
+        assert runtime.snapshot()["test"]["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, runtime):
+        """测试队列深度和延迟指标"""
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        for _ in range(5):
+            runtime.enqueue("test", job)
+        await asyncio.sleep(0.01)
+        snapshot = runtime.snapshot()["test"]
+        assert snapshot["in_flight"] == 2
+        assert snapshot["depth"] == 3
+
+        release.set()
+        assert await runtime.drain(timeout=1)
+        snapshot = runtime.snapshot()["test"]
+        assert snapshot["processed"] == 5
+        assert snapshot["wait_time"] > 0
+        assert snapshot["run_time"] > 0
@@ -0,0 +1,177 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from api.client import router as client_router
+from api.driver import router as driver_router
+from config.settings import settings
+from models.account import Account
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.order_detail import OrderDetail
+from models.driver import Driver
+from utils.auth import token_manager
+
+SMALL = "small-company"
+LARGE = "large-company"
+
+# 与 README 中的复合索引一致（company_id 在前；SQLite 索引名全库唯一，账户表索引改名）
+TENANT_INDEXES = (
+    "CREATE INDEX idx_company_status_order_time "
+    "ON fees (company_id, status, order_time)",
+    "CREATE INDEX idx_company_created ON fees (company_id, created_at)",
+    "CREATE INDEX idx_account_company_created "
+    "ON company_accounts (company_id, created_at)",
+)
+
+
+def add_fees(engine, company_id: str, count: int, start: int = 0) -> None:
+    """批量插入费用（待支付、已结算各半）"""
+    base_time = datetime(2025, 7, 1)
+    rows = [
+        {
+            "fee_id": f"{company_id}-{n}",
+            "created_at": base_time + timedelta(minutes=n),
+            "updated_at": base_time + timedelta(minutes=n),
+            "path_id": f"Y-{company_id}-{n}",
+            "order_id": f"D-{company_id}-{n}",
+            "status": (
+                OrderStatusEnum.PENDING_PAYMENT if n % 2 else OrderStatusEnum.SETTLED
+            ).name,
+            "company_id": company_id,
+            "order_time": base_time + timedelta(minutes=n),
+            "settlement_enable": False,
+        }
+        for n in range(start, start + count)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Fee.__table__), rows)
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    """内存 SQLite 引擎，建好租户复合索引"""
+    engine = sqlite_engine(
+        Fee.__table__, Account.__table__, OrderDetail.__table__, Driver.__table__
+    )
+    with engine.begin() as connection:
+        for ddl in TENANT_INDEXES:
+            connection.execute(text(ddl))
+    return engine
+
+
+@pytest.fixture
+def client(engine, db_client):
+    """挂载客户、司机路由的测试客户端"""
+    app = FastAPI()
+    app.include_router(client_router, prefix="/api")
+    app.include_router(driver_router, prefix="/api")
+    return db_client(app, engine)
+
+
+def tenant_headers(company_id: str) -> dict:
+    return {settings.TENANT_HEADER: company_id}
+
+
+class TestTenant:
+    """租户范围测试类"""
+
+    def test_fee_queries_scoped_to_company(self, client, engine, platform_headers):
+        """测试客户端只能查询、操作所属公司的费用和账户，平台端不受限制"""
+        add_fees(engine, SMALL, 4)
+        add_fees(engine, LARGE, 6)
+        with Session(engine) as db:
+            db.add(Account(company_account_id="a-small", company_id=SMALL))
+            db.add(Account(company_account_id="a-large", company_id=LARGE))
+            db.commit()
+
+        for url in ("/api/client/fee/list", "/api/driver/list"):
+            data = client.get(url, headers=tenant_headers(SMALL)).json()["data"]
+            assert data["total"] == 4
+            assert {item["company_id"] for item in data["items"]} == {SMALL}
+            # 平台端令牌查询所有公司；既没有令牌也没有租户头时不返回任何数据
+            response = client.get(url, headers=platform_headers)
+            assert response.json()["data"]["total"] == 10
+            assert client.get(url).json()["data"]["total"] == 0
+
+        response = client.get(
+            "/api/client/fee/detail",
+            params={"order_id": f"D-{LARGE}-0"},
+            headers=tenant_headers(SMALL),
+        )
+        assert response.status_code == 404
+        response = client.post(
+            "/api/client/fee/details",
+            json={
+                "keys": [{"order_id": f"D-{LARGE}-0"}, {"order_id": f"D-{SMALL}-0"}]
+            },
+            headers=tenant_headers(SMALL),
+        )
+        assert [len(item["details"]) for item in response.json()["data"]] == [0, 1]
+
+        response = client.patch(
+            "/api/client/pay",
+            json={"fee_id": f"{LARGE}-0"},
+            headers=tenant_headers(SMALL),
+        )
+        assert response.status_code == 404
+
+        data = client.get("/api/client/list", headers=tenant_headers(SMALL)).json()
+        assert [item["company_account_id"] for item in data["items"]] == ["a-small"]
+
+        token, _ = token_manager.issue("u-small", company_id=SMALL)
+        response = client.post(
+            "/api/client/accounts/recharge-review/claim",
+            json={"limit": 10},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 403
+
+    def test_list_uses_company_index(self, engine):
+        """测试结算列表查询走 company_id 开头的复合索引"""
+        with engine.connect() as connection:
+            plan = connection.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT fee_id FROM fees "
+                    "WHERE company_id = :company_id AND status IN "
+                    "('PENDING_PAYMENT', 'SETTLED') ORDER BY order_time DESC LIMIT 10"
+                ),
+                {"company_id": SMALL},
+            ).all()
+        assert "idx_company_status_order_time" in " ".join(row[-1] for row in plan)
+
+    @pytest.mark.benchmark
+    def test_small_tenant_latency_benchmark(self, client, engine):
+        """测试大公司数据增长时，小公司的列表延迟保持不变"""
+        add_fees(engine, SMALL, 20)
+        url = "/api/client/fee/list"
+
+        def median_latency() -> float:
+            samples = []
+            for _ in range(30):
+                started = time.perf_counter()
+                response = client.get(url, headers=tenant_headers(SMALL))
+                samples.append(time.perf_counter() - started)
+                assert response.json()["data"]["total"] == 20
+            return statistics.median(samples)
+
+        latencies = {}
+        loaded = 0
+        for large_size in (1_000, 10_000, 100_000):
+            add_fees(engine, LARGE, large_size - loaded, start=loaded)
+            loaded = large_size
+            client.get(url, headers=tenant_headers(SMALL))  # 预热
+            latencies[large_size] = median_latency()
+
+        print()
+        for large_size, latency in latencies.items():
+            print(f"大公司 {large_size:>7,} 条费用: 小公司列表 {latency * 1000:.2f} ms")
+
+        assert (
+            latencies[100_000] < latencies[1_000] * 3
+        ), "小公司列表延迟应不随大公司增长"
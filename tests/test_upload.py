@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+import api.upload as upload_api
+from utils.upload import ContentAddressedStore, ImageUploadParser
+
+JPEG = b"\xff\xd8\xff\xe0" + b"jpeg-body" * 100
+PNG = b"\x89PNG\r\n\x1a\n" + b"png-body" * 100
+
+
+def stored_files(root) -> list:
+    """存储目录下的所有文件（相对路径）"""
+    return sorted(
+        os.path.relpath(os.path.join(path, name), root)
+        for path, _, names in os.walk(root)
+        for name in names
+    )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """上传目录使用临时目录"""
+    store = ContentAddressedStore(str(tmp_path / "uploads"))
+    monkeypatch.setattr(upload_api, "image_store", store)
+    return store
+
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+    app.include_router(upload_api.router, prefix="/api")
+    return TestClient(app)
+
+
+class TestUpload:
+    """图片上传测试类"""
+
+    def test_upload_and_dedupe(self, client, store):
+        """测试按内容哈希存储，重复上传不再写入并返回相同路径"""
+        digest = hashlib.sha256(JPEG).hexdigest()
+        response = client.post(
+            "/api/upload/images",
+            files=[
+                ("receipt_imgs", ("a.jpg", JPEG, "image/jpeg")),
+                ("receipt_imgs", ("b.png", PNG, "image/png")),
+                ("highway_bill_imgs", ("c.jpg", JPEG, "image/jpeg")),
+            ],
+            data={"note": "忽略的普通字段"},
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        jpeg_path = f"{store.root}/{digest[:2]}/{digest}.jpg"
+        png_path = data["files"][1]["path"]
+        assert png_path.endswith(".png")
+        assert data["paths"] == {
+            "receipt_imgs": f"{jpeg_path},{png_path}",
+            "highway_bill_imgs": jpeg_path,
+        }
+        assert [file["duplicate"] for file in data["files"]] == [False, False, True]
+        assert data["files"][0]["size"] == len(JPEG)
+        with open(jpeg_path, "rb") as f:
+            assert f.read() == JPEG
+
+        response = client.post(
+            "/api/upload/images",
+            files=[("parking_bill_imgs", ("again.jpg", JPEG, "image/jpeg"))],
+        )
+        assert response.json()["data"]["files"][0]["duplicate"] is True
+        assert response.json()["data"]["paths"] == {"parking_bill_imgs": jpeg_path}
+        assert len(stored_files(store.root)) == 2
+
+    def test_streamed_in_small_chunks(self, store):
+        """测试请求体分成很小的块到达时，文件内容和哈希正确"""
+        boundary = "----boundary"
+        body = (
+            (
+                f"--{boundary}\r\n"
+                'Content-Disposition: form-data; name="receipt_imgs"; filename="r.jpg"\r\n'
+                "Content-Type: image/jpeg\r\n\r\n"
+            ).encode()
+            + JPEG
+            + f"\r\n--{boundary}--\r\n".encode()
+        )
+
+        async def stream():
+            for start in range(0, len(body), 7):
+                yield body[start : start + 7]
+
+        parser = ImageUploadParser(store)
+        headers = Headers({"content-type": f"multipart/form-data; boundary={boundary}"})
+        files = asyncio.run(parser.parse(headers, stream()))
+
+        assert files[0].sha256 == hashlib.sha256(JPEG).hexdigest()
+        with open(files[0].path, "rb") as f:
+            assert f.read() == JPEG
+
+    def test_rejected_uploads(self, client, store, monkeypatch):
+        """测试文件过大、过多、字段或格式不合法时拒绝，并删除临时文件"""
+        monkeypatch.setattr(upload_api.settings, "UPLOAD_MAX_FILE_BYTES", 100)
+        monkeypatch.setattr(upload_api.settings, "UPLOAD_MAX_FILES", 1)
+        url = "/api/upload/images"
+
+        response = client.post(
+            url, files=[("receipt_imgs", ("a.jpg", JPEG, "image/jpeg"))]
+        )
+        assert response.status_code == 413
+
+        response = client.post(
+            url, files=[("avatar", ("a.jpg", JPEG[:50], "image/jpeg"))]
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            url, files=[("receipt_imgs", ("a.jpg", b"not an image", "image/jpeg"))]
+        )
+        assert response.status_code == 400
+
+        small = ("a.jpg", JPEG[:50], "image/jpeg")
+        response = client.post(
+            url, files=[("receipt_imgs", small), ("receipt_imgs", small)]
+        )
+        assert response.status_code == 400
+        assert "1" in response.json()["message"]
+
+        response = client.post(url, json={"receipt_imgs": "static/a.jpg"})
+        assert response.status_code == 400
+
+        # 被拒绝的文件不保存，临时文件已删除（超过数量前已完成的文件保留）
+        small_digest = hashlib.sha256(JPEG[:50]).hexdigest()
+        assert stored_files(store.root) == [f"{small_digest[:2]}/{small_digest}.jpg"]
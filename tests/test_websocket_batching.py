@@ -0,0 +1,94 @@
+from typing import List
+
+import pytest
+from fastapi import Body, FastAPI
+from fastapi.testclient import TestClient
+
+from websocket.batching import coalesce_key
+from websocket.manager import send_message_to_type
+from websocket.router import ws_router
+
+
+@pytest.fixture
+def push_client():
+    """
+    挂载 WebSocket 路由和推送触发接口的测试应用
+
+    Yields:
+        TestClient: 测试客户端（共用同一事件循环，批量发送任务才能跨请求执行）
+    """
+    app = FastAPI()
+    app.include_router(ws_router, prefix="/api")
+
+    @app.post("/push")
+    async def push(messages: List[dict] = Body(...)):
+        for message in messages:
+            await send_message_to_type("platform", message)
+        return {"sent": len(messages)}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def fee_message(message_type: str, fee_id: str) -> dict:
+    """构造带 fee_id 的推送消息"""
+    return {"type": message_type, "data": {"fee_id": fee_id}}
+
+
+def without_seq(messages: list) -> list:
+    """去掉推送序号，便于比较消息内容"""
+    return [
+        {key: value for key, value in message.items() if key != "seq"}
+        for message in messages
+    ]
+
+
+class TestWebSocketBatching:
+    """WebSocket 批量推送测试类"""
+
+    def test_coalesce_key(self):
+        """测试合并键识别顶层和 data 中的 fee_id"""
+        assert coalesce_key({"type": "pay_fee", "fee_id": "f1"}) == ("fee", "f1")
+        assert coalesce_key(fee_message("fee_confirmed", "f1")) == ("fee", "f1")
+        assert coalesce_key({"type": "notice"}) != coalesce_key({"type": "notice"})
+
+    def test_batched_client_receives_array(self, push_client):
+        """测试批量模式合并为一个数组帧，同一 fee_id 只保留最新消息"""
+        messages = [
+            fee_message("fee_submitted", "f1"),
+            fee_message("fee_submitted", "f2"),
+            fee_message("fee_confirmed", "f1"),
+            {"type": "notice"},
+        ]
+        with push_client.websocket_connect("/api/platform?batch=1") as websocket:
+            push_client.post("/push", json=messages)
+            frame = websocket.receive_json()
+
+        assert without_seq(frame) == [
+            fee_message("fee_submitted", "f2"),
+            fee_message("fee_confirmed", "f1"),
+            {"type": "notice"},
+        ]
+
+    def test_legacy_client_receives_single_frames(self, push_client):
+        """测试未协商批量模式的连接仍逐条接收"""
+        messages = [
+            fee_message("fee_submitted", "f1"),
+            fee_message("fee_confirmed", "f1"),
+        ]
+        with push_client.websocket_connect("/api/platform") as websocket:
+            push_client.post("/push", json=messages)
+            frames = [websocket.receive_json() for _ in messages]
+
+        assert without_seq(frames) == messages
+
+    def test_batch_size_limit(self, push_client, monkeypatch):
+        """测试消息数达到上限时立即发送"""
+        monkeypatch.setattr("config.settings.settings.WS_BATCH_MAX_MESSAGES", 2)
+        monkeypatch.setattr("config.settings.settings.WS_BATCH_WINDOW_MS", 60000)
+        messages = [fee_message("fee_submitted", f"f{i}") for i in range(4)]
+        with push_client.websocket_connect("/api/platform?batch=1") as websocket:
+            push_client.post("/push", json=messages)
+            frames = [websocket.receive_json(), websocket.receive_json()]
+
+        assert [without_seq(frame) for frame in frames] == [messages[:2], messages[2:]]
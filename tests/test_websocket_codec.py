@@ -0,0 +1,279 @@
+import json
+import time
+import zlib
+from collections import deque
+from typing import List
+
+import pytest
+from fastapi import Body, FastAPI
+from fastapi.testclient import TestClient
+
+from websocket import manager
+from websocket.codec import JSON, MSGPACK, Codec, EncodedMessage, packb, unpackb
+from websocket.manager import connected_clients, send_message_to_type
+from websocket.router import ws_router
+
+# 基准：广播给的连接数
+BROADCAST_RECIPIENTS = 2000
+
+
+@pytest.fixture
+def ws_client(monkeypatch):
+    """
+    挂载 WebSocket 路由和推送触发接口的测试应用（连接池独立于其他测试）
+
+    Yields:
+        TestClient: 测试客户端
+    """
+    for client_type in list(connected_clients):
+        monkeypatch.setitem(connected_clients, client_type, [])
+    app = FastAPI()
+    app.include_router(ws_router, prefix="/api")
+
+    @app.post("/push")
+    async def push(messages: List[dict] = Body(...)):
+        for message in messages:
+            await send_message_to_type("platform", message)
+        return {"sent": len(messages)}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def fee_submitted() -> dict:
+    """与司机提交费用推送结构一致的消息"""
+    return {
+        "type": "fee_submitted",
+        "data": {
+            "fee_id": "3f2c9a4e-7d1b-4c55-9a0e-1f6b2d8c4e71",
+            "driver_id": "D20240001",
+            "order_id": "O202406180001",
+            "path_id": "P202406180001-01",
+            "highway_fee": 12850,
+            "parking_fee": 1500,
+            "carry_fee": 3000,
+            "wait_fee": 0,
+            "highway_bill_imgs": "bills/highway/a1.jpg,bills/highway/a2.jpg",
+            "parking_bill_imgs": "bills/parking/p1.jpg",
+            "submit_time": "2024-06-18T08:30:12.345678",
+            "remark": "装卸等待，司机已确认",
+            "is_pay": False,
+        },
+    }
+
+
+class FakeWebSocket:
+    """只记录发送字节数的连接（基准测试用）"""
+
+    class State:
+        pass
+
+    def __init__(self, codec):
+        self.state = self.State()
+        self.state.codec = codec
+        self.state.batcher = None
+        self.state.bytes_sent = 0
+        self.state.messages_sent = 0
+
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+
+class TestWebSocketCodec:
+    """推送编码测试类"""
+
+    def test_msgpack_encoding(self):
+        """测试 msgpack 编码符合规范且可往返"""
+        assert packb(None) == b"\xc0"
+        assert packb(-1) == b"\xff"
+        assert packb(300) == b"\xcd\x01\x2c"
+        assert packb("费") == b"\xa3" + "费".encode("utf-8")
+        assert packb([1, True]) == b"\x92\x01\xc3"
+        message = {**fee_submitted(), "seq": 70000, "amount": -1.5, "big": 2**40}
+        assert unpackb(packb(message)) == message
+
+    @pytest.mark.parametrize(
+        "value, header",
+        [
+            # 正整数：positive fixint / uint 8 / 16 / 32 / 64 的边界
+            (0, b"\x00"),
+            (0x7F, b"\x7f"),
+            (0x80, b"\xcc\x80"),
+            (0xFF, b"\xcc\xff"),
+            (0x100, b"\xcd\x01\x00"),
+            (0xFFFF, b"\xcd\xff\xff"),
+            (0x10000, b"\xce\x00\x01\x00\x00"),
+            (0xFFFFFFFF, b"\xce\xff\xff\xff\xff"),
+            (0x100000000, b"\xcf\x00\x00\x00\x01\x00\x00\x00\x00"),
+            (2**64 - 1, b"\xcf" + b"\xff" * 8),
+            # 负整数：negative fixint / int 8 / 16 / 32 / 64 的边界
+            (-0x20, b"\xe0"),
+            (-0x21, b"\xd0\xdf"),
+            (-0x80, b"\xd0\x80"),
+            (-0x81, b"\xd1\xff\x7f"),
+            (-0x8000, b"\xd1\x80\x00"),
+            (-0x8001, b"\xd2\xff\xff\x7f\xff"),
+            (-(2**31), b"\xd2\x80\x00\x00\x00"),
+            (-(2**31) - 1, b"\xd3\xff\xff\xff\xff\x7f\xff\xff\xff"),
+            (-(2**63), b"\xd3\x80" + b"\x00" * 7),
+            # 浮点数：float 64
+            (1.5, b"\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00"),
+            (-0.0, b"\xcb\x80" + b"\x00" * 7),
+            (1e300, b"\xcb\x7e\x37\xe4\x3c\x88\x00\x75\x9c"),
+        ],
+    )
+    def test_msgpack_scalar_formats(self, value, header):
+        """测试整数、浮点数按规范选择最短格式且可往返"""
+        assert packb(value) == header
+        assert unpackb(header) == value
+
+    @pytest.mark.parametrize(
+        "length, header",
+        [
+            (0, b"\xa0"),
+            (31, b"\xbf"),
+            (32, b"\xd9\x20"),
+            (0xFF, b"\xd9\xff"),
+            (0x100, b"\xda\x01\x00"),
+            (0xFFFF, b"\xda\xff\xff"),
+            (0x10000, b"\xdb\x00\x01\x00\x00"),
+        ],
+    )
+    def test_msgpack_str_widths(self, length, header):
+        """测试字符串 fixstr / str 8 / 16 / 32 的长度边界（按 UTF-8 字节数）"""
+        value = "a" * length
+        assert packb(value) == header + value.encode("utf-8")
+        assert unpackb(packb(value)) == value
+        # 多字节字符按编码后的字节数计算长度
+        assert packb("费" * 11)[:2] == b"\xd9\x21"
+
+    @pytest.mark.parametrize(
+        "length, header",
+        [
+            (0, b"\xc4\x00"),
+            (0xFF, b"\xc4\xff"),
+            (0x100, b"\xc5\x01\x00"),
+            (0xFFFF, b"\xc5\xff\xff"),
+            (0x10000, b"\xc6\x00\x01\x00\x00"),
+        ],
+    )
+    def test_msgpack_bin_widths(self, length, header):
+        """测试二进制 bin 8 / 16 / 32 的长度边界（无 fix 格式）"""
+        value = bytes(range(256)) * (length // 256) + bytes(length % 256)
+        assert packb(value) == header + value
+        assert unpackb(packb(value)) == value
+
+    def test_msgpack_containers(self):
+        """测试数组、映射的长度边界及嵌套结构"""
+        assert packb(list(range(15)))[:1] == b"\x9f"
+        assert packb(list(range(16)))[:3] == b"\xdc\x00\x10"
+        assert packb(list(range(0x10000)))[:5] == b"\xdd\x00\x01\x00\x00"
+        assert packb({}) == b"\x80"
+        assert packb({str(n): n for n in range(16)})[:3] == b"\xde\x00\x10"
+        assert packb({"a": {"b": [1, {"c": None}]}}) == (
+            b"\x81\xa1a\x81\xa1b\x92\x01\x81\xa1c\xc0"
+        )
+
+        nested = {
+            "fees": [
+                {"fee_id": str(n), "amount": n * 1.25, "tags": ["急", b"\x00\xff"]}
+                for n in range(20)
+            ],
+            "meta": {"count": 20, "total": -(2**40), "empty": {}, "none": None},
+        }
+        assert unpackb(packb(nested)) == nested
+
+    def test_codec_is_abstract(self):
+        """测试编码方式必须实现 encode / join"""
+
+        class Incomplete(Codec):
+            def encode(self, message: dict) -> str:
+                return ""
+
+        with pytest.raises(TypeError):
+            Incomplete("incomplete", binary=False)
+
+    def test_join_matches_array_encoding(self):
+        """测试拼接已编码消息与直接编码数组一致"""
+        messages = [{"n": n} for n in range(20)]
+        payloads = [MSGPACK.encode(message) for message in messages]
+        assert MSGPACK.join(payloads) == packb(messages)
+        assert json.loads(JSON.join([JSON.encode(m) for m in messages])) == messages
+
+    def test_encoded_once_per_codec(self, monkeypatch):
+        """测试同一消息每种编码只编码一次"""
+        calls = []
+        original = MSGPACK.encode
+        monkeypatch.setattr(
+            MSGPACK, "encode", lambda message: calls.append(1) or original(message)
+        )
+        encoded = EncodedMessage(fee_submitted())
+        assert encoded.payload(MSGPACK) is encoded.payload(MSGPACK)
+        assert len(calls) == 1
+
+    def test_msgpack_negotiated(self, ws_client):
+        """测试 ?encoding=msgpack 的连接收到二进制帧，默认连接仍为 JSON"""
+        with ws_client.websocket_connect("/api/platform?encoding=msgpack") as binary:
+            with ws_client.websocket_connect("/api/platform") as text:
+                ws_client.post("/push", json=[fee_submitted()])
+                binary_frame = unpackb(binary.receive_bytes())
+                text_frame = text.receive_json()
+
+        assert binary_frame == text_frame
+        assert binary_frame["type"] == "fee_submitted"
+
+    def test_msgpack_batched(self, ws_client, monkeypatch):
+        """测试 msgpack 批量模式发送数组帧"""
+        monkeypatch.setattr("config.settings.settings.WS_BATCH_MAX_MESSAGES", 2)
+        monkeypatch.setattr("config.settings.settings.WS_BATCH_WINDOW_MS", 60000)
+        with ws_client.websocket_connect(
+            "/api/platform?encoding=msgpack&batch=1"
+        ) as websocket:
+            ws_client.post("/push", json=[{"type": "a"}, {"type": "b"}])
+            frame = unpackb(websocket.receive_bytes())
+
+        assert [message["type"] for message in frame] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_broadcast_benchmark(self, monkeypatch):
+        """基准：广播的编码耗时和线上字节数（逐连接编码 vs 编码一次，JSON vs msgpack）"""
+        for codec in (JSON, MSGPACK):
+            clients = [FakeWebSocket(codec) for _ in range(BROADCAST_RECIPIENTS)]
+            monkeypatch.setitem(connected_clients, "driver", clients)
+            monkeypatch.setitem(manager._replay_buffers, "driver", deque())
+            started = time.perf_counter()
+            await send_message_to_type("driver", fee_submitted())
+            elapsed = time.perf_counter() - started
+            sent = sum(client.state.bytes_sent for client in clients)
+            print(f"\n{codec.name}: 编码一次广播 {elapsed * 1000:.1f}ms, 发送量 {sent}")
+
+        # 原实现：send_json 为每个连接重新序列化
+        started = time.perf_counter()
+        for _ in range(BROADCAST_RECIPIENTS):
+            json.dumps(fee_submitted(), separators=(",", ":"), ensure_ascii=False)
+        per_recipient = time.perf_counter() - started
+
+        started = time.perf_counter()
+        JSON.encode(fee_submitted())
+        once = time.perf_counter() - started
+
+        message = {**fee_submitted(), "seq": 1}
+        json_size = len(JSON.encode(message).encode("utf-8"))
+        msgpack_size = len(MSGPACK.encode(message))
+        deflater = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        deflate_size = len(
+            deflater.compress(JSON.encode(message).encode("utf-8"))
+            + deflater.flush(zlib.Z_SYNC_FLUSH)
+        )
+        print(
+            f"逐连接编码 {per_recipient * 1000:.1f}ms, 编码一次 {once * 1000:.3f}ms; "
+            f"单条 JSON {json_size} 字节, msgpack {msgpack_size} 字节, "
+            f"JSON+deflate {deflate_size} 字节"
+        )
+
+        assert once * 10 < per_recipient
+        assert msgpack_size < json_size
+        assert deflate_size < json_size
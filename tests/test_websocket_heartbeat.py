@@ -0,0 +1,123 @@
+import time
+from typing import List
+
+import pytest
+from fastapi import Body, FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from config.settings import settings
+from websocket.manager import (
+    CLOSE_GOING_AWAY,
+    CLOSE_POLICY_VIOLATION,
+    CLOSE_TRY_AGAIN_LATER,
+    connected_clients,
+    connection_stats,
+    heartbeat_once,
+    send_message_to_type,
+)
+from websocket.router import ws_router
+
+
+@pytest.fixture
+def ws_client(monkeypatch):
+    """
+    挂载 WebSocket 路由、推送和心跳触发接口的测试应用（连接池独立于其他测试）
+
+    Yields:
+        TestClient: 测试客户端
+    """
+    for client_type in list(connected_clients):
+        monkeypatch.setitem(connected_clients, client_type, [])
+    app = FastAPI()
+    app.include_router(ws_router, prefix="/api")
+
+    @app.post("/push")
+    async def push(messages: List[dict] = Body(...)):
+        for message in messages:
+            await send_message_to_type("platform", message)
+        return {"sent": len(messages)}
+
+    @app.post("/heartbeat")
+    async def heartbeat():
+        return {"reaped": await heartbeat_once()}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def expire(websocket_index: int = 0):
+    """将平台端连接的最后活跃时间调到心跳超时之前"""
+    connected_clients["platform"][websocket_index].state.last_seen = (
+        time.monotonic() - 3600
+    )
+
+
+class TestWebSocketHeartbeat:
+    """WebSocket 心跳与连接限制测试类"""
+
+    def test_connection_limit(self, ws_client, monkeypatch):
+        """测试超过连接数上限时以 1013 关闭"""
+        monkeypatch.setitem(settings.WS_MAX_CONNECTIONS, "platform", 1)
+        with ws_client.websocket_connect("/api/platform"):
+            with ws_client.websocket_connect("/api/platform") as rejected:
+                with pytest.raises(WebSocketDisconnect) as exc_info:
+                    rejected.receive_text()
+            assert len(connected_clients["platform"]) == 1
+
+        assert exc_info.value.code == CLOSE_TRY_AGAIN_LATER
+
+    def test_ping_and_reap(self, ws_client):
+        """测试存活连接收到 ping，超时未响应的连接被回收"""
+        with ws_client.websocket_connect("/api/platform?heartbeat=1") as stale:
+            with ws_client.websocket_connect("/api/platform?heartbeat=1") as alive:
+                expire(0)
+                response = ws_client.post("/heartbeat")
+
+                assert response.json() == {"reaped": 1}
+                assert alive.receive_json()["type"] == "ping"
+                with pytest.raises(WebSocketDisconnect) as exc_info:
+                    stale.receive_text()
+                assert exc_info.value.code == CLOSE_GOING_AWAY
+                assert len(connected_clients["platform"]) == 1
+
+    def test_pong_refreshes_last_seen(self, ws_client):
+        """测试客户端回复 pong 后刷新存活时间，不被回收"""
+        with ws_client.websocket_connect("/api/platform?heartbeat=1") as websocket:
+            expire(0)
+            websocket.send_json({"type": "pong"})
+            # 等待服务端接收循环处理 pong
+            deadline = time.monotonic() + 1
+            while (
+                connection_stats()["platform"]["bytes_received"] == 0
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+            response = ws_client.post("/heartbeat")
+
+            assert response.json() == {"reaped": 0}
+            assert websocket.receive_json()["type"] == "ping"
+
+    def test_idle_without_app_heartbeat_kept(self, ws_client):
+        """测试未开启应用层心跳的连接不接收 ping、长时间无消息也不被回收"""
+        with ws_client.websocket_connect("/api/platform") as legacy:
+            expire(0)
+            response = ws_client.post("/heartbeat")
+            ws_client.post("/push", json=[{"type": "notice"}])
+
+            assert response.json() == {"reaped": 0}
+            assert legacy.receive_json()["type"] == "notice"
+            assert len(connected_clients["platform"]) == 1
+
+    def test_queued_bytes_limit(self, ws_client, monkeypatch):
+        """测试批量模式待发送字节数超过上限时以 1008 关闭"""
+        monkeypatch.setattr("config.settings.settings.WS_BATCH_WINDOW_MS", 60000)
+        monkeypatch.setattr("config.settings.settings.WS_MAX_QUEUED_BYTES", 100)
+        messages = [{"type": "notice", "text": "x" * 40} for _ in range(3)]
+        with ws_client.websocket_connect("/api/platform?batch=1") as websocket:
+            ws_client.post("/push", json=messages)
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                websocket.receive_text()
+
+        assert exc_info.value.code == CLOSE_POLICY_VIOLATION
+        assert connected_clients["platform"] == []
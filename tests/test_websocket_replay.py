@@ -0,0 +1,118 @@
+from collections import deque
+from typing import List, Optional
+
+import pytest
+from fastapi import Body, FastAPI
+from fastapi.testclient import TestClient
+
+from utils.auth import token_manager
+from websocket import manager
+from websocket.manager import PushScope, connected_clients, send_message_to_type
+from websocket.router import ws_router
+
+
+@pytest.fixture
+def ws_client(monkeypatch):
+    """
+    挂载 WebSocket 路由和推送触发接口的测试应用（连接池和补发缓冲区独立于其他测试）
+
+    Yields:
+        TestClient: 测试客户端
+    """
+    for client_type in list(connected_clients):
+        monkeypatch.setitem(connected_clients, client_type, [])
+        monkeypatch.setitem(manager._sequences, client_type, 0)
+        monkeypatch.setitem(manager._replay_buffers, client_type, deque(maxlen=3))
+    app = FastAPI()
+    app.include_router(ws_router, prefix="/api")
+
+    @app.post("/push")
+    async def push(
+        messages: List[dict] = Body(...),
+        client_type: str = "platform",
+        company_id: Optional[str] = None,
+    ):
+        scope = PushScope(company_id) if company_id else None
+        for message in messages:
+            await send_message_to_type(client_type, message, scope)
+        return {"sent": len(messages)}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def notices(count: int) -> List[dict]:
+    """构造多条不参与合并的推送消息"""
+    return [{"type": "notice", "n": n} for n in range(count)]
+
+
+class TestWebSocketReplay:
+    """WebSocket 重连补发测试类"""
+
+    def test_messages_sequenced(self, ws_client):
+        """测试推送带有递增序号"""
+        with ws_client.websocket_connect("/api/platform") as websocket:
+            ws_client.post("/push", json=notices(2))
+            frames = [websocket.receive_json() for _ in range(2)]
+
+        assert [frame["seq"] for frame in frames] == [1, 2]
+
+    def test_resume_replays_missed(self, ws_client):
+        """测试携带 last_seq 重连只补发错过的推送"""
+        ws_client.post("/push", json=notices(3))
+        url = f"/api/platform?last_seq=1&epoch={manager.epoch}"
+        with ws_client.websocket_connect(url) as websocket:
+            replayed = [websocket.receive_json() for _ in range(2)]
+            synced = websocket.receive_json()
+            ws_client.post("/push", json=notices(1))
+            live = websocket.receive_json()
+
+        assert [frame["seq"] for frame in replayed] == [2, 3]
+        assert synced == {"type": "synced", "epoch": manager.epoch, "seq": 3}
+        assert live["seq"] == 4
+
+    def test_resume_batched(self, ws_client):
+        """测试批量模式补发合并为一个数组帧"""
+        ws_client.post("/push", json=notices(2))
+        with ws_client.websocket_connect(
+            "/api/platform?batch=1&last_seq=0"
+        ) as websocket:
+            replayed = websocket.receive_json()
+
+        assert [frame["seq"] for frame in replayed] == [1, 2]
+
+    def test_resync_when_buffer_moved_past(self, ws_client):
+        """测试缓冲区已不包含错过的推送时要求重新同步"""
+        ws_client.post("/push", json=notices(5))
+        with ws_client.websocket_connect("/api/platform?last_seq=1") as websocket:
+            frame = websocket.receive_json()
+
+        assert frame == {"type": "resync_required", "epoch": manager.epoch, "seq": 5}
+
+    def test_resume_scoped_to_identity(self, ws_client):
+        """测试重连只补发连接范围内的推送"""
+        for company_id in ("c2", "c1"):
+            ws_client.post(
+                "/push",
+                json=notices(1),
+                params={"client_type": "client", "company_id": company_id},
+            )
+        token, _ = token_manager.issue("u1", company_id="c1", operator_type="CLIENT")
+        url = f"/api/client?last_seq=0&epoch={manager.epoch}&access_token={token}"
+        with ws_client.websocket_connect(url) as websocket:
+            replayed = websocket.receive_json()
+            synced = websocket.receive_json()
+
+        assert replayed["seq"] == 2
+        assert synced == {"type": "synced", "epoch": manager.epoch, "seq": 2}
+
+    def test_resync_on_epoch_change(self, ws_client):
+        """测试服务端重启（epoch 不同）后要求重新同步"""
+        ws_client.post("/push", json=notices(1))
+        with ws_client.websocket_connect(
+            "/api/platform?last_seq=1&epoch=stale"
+        ) as websocket:
+            frame = websocket.receive_json()
+
+        assert frame["type"] == "resync_required"
+        assert len(connected_clients["platform"]) == 1
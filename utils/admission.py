@@ -0,0 +1,227 @@
+"""准入控制（按路由类别限流 + 客户端令牌桶 + 连接池饱和时提前拒绝）"""
+
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Pattern, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config.database import PoolMetrics, pool_metrics
+from config.settings import settings
+from utils.auth import caller_key
+from utils.response import service_unavailable_response, too_many_requests_response
+
+# 路由类别
+PAYMENT = "payment"
+WRITE = "write"
+READ = "read"
+
+# (方法, 路径正则, 类别)，按顺序匹配，未匹配的 GET 为 READ，其余为 WRITE
+ROUTE_CLASSES: Tuple[Tuple[str, Pattern, str], ...] = (
+    ("PATCH", re.compile(r"^/finance/api/driver/pay$"), PAYMENT),
+    ("PATCH", re.compile(r"^/finance/api/client/pay$"), PAYMENT),
+    ("PATCH", re.compile(r"^/finance/api/client/recharge$"), PAYMENT),
+    (
+        "PATCH",
+        re.compile(r"^/finance/api/client/accounts/[^/]+/approve-recharge$"),
+        PAYMENT,
+    ),
+    (
+        "POST",
+        re.compile(r"^/finance/api/client/accounts/recharge-review/approve$"),
+        PAYMENT,
+    ),
+    ("POST", re.compile(r"^/api/users/list$"), READ),
+    ("POST", re.compile(r"^/finance/api/client/fee/details$"), READ),
+    ("POST", re.compile(r"^/finance/api/driver/details$"), READ),
+)
+
+# 不做准入控制的路径（静态资源、文档）
+EXEMPT_PREFIXES = ("/static/", "/api/docs", "/api/redoc", "/openapi.json")
+
+# 客户端令牌桶数量上限（超过后淘汰最久未使用的）
+MAX_CLIENT_BUCKETS = 10000
+
+
+def classify_route(method: str, path: str) -> str:
+    """
+    判断请求所属的路由类别
+
+    Args:
+        method: 请求方法
+        path: 请求路径
+
+    Returns:
+        str: PAYMENT / WRITE / READ
+    """
+    for rule_method, pattern, route_class in ROUTE_CLASSES:
+        if method == rule_method and pattern.match(path):
+            return route_class
+    return READ if method in ("GET", "HEAD") else WRITE
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    Args:
+        rate: 每秒补充的令牌数
+        burst: 桶容量
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def acquire(self, now: float) -> float:
+        """
+        取一个令牌
+
+        Returns:
+            float: 0 表示成功，否则为需要等待的秒数
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionMiddleware:
+    """
+    准入控制中间件
+
+    - 每个客户端（令牌身份，未携带令牌时为对端地址）一个令牌桶，超限返回 429
+    - 按路由类别限制并发数，支付类独占预留容量，列表/查询不能挤占
+    - 按连接池获取等待时间估算排队时间，超过阈值时直接返回 503，
+      不再让请求堆积在连接池上；支付类阈值为普通请求的两倍
+
+    Args:
+        app: ASGI 应用
+        max_concurrency: 总并发上限
+        payment_reserved: 支付类预留并发数
+        read_limit: 列表/查询类并发上限
+        max_queue_wait: 估算排队时间阈值（秒）
+        client_rate: 每个客户端每秒请求数
+        client_burst: 每个客户端突发请求数
+        metrics: 连接池指标
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int = 64,
+        payment_reserved: int = 8,
+        read_limit: int = 40,
+        max_queue_wait: float = 0.5,
+        client_rate: float = 20.0,
+        client_burst: int = 40,
+        metrics: PoolMetrics = pool_metrics,
+    ):
+        self.app = app
+        shared = max(max_concurrency - payment_reserved, 0)
+        self.limits: Dict[str, int] = {
+            PAYMENT: max_concurrency,
+            WRITE: shared,
+            READ: min(read_limit, shared),
+        }
+        self.max_queue_wait = max_queue_wait
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.metrics = metrics
+        self.in_flight: Dict[str, int] = {PAYMENT: 0, WRITE: 0, READ: 0}
+        self.rejected: Dict[str, int] = {"rate_limited": 0, "overloaded": 0}
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @property
+    def total_in_flight(self) -> int:
+        return sum(self.in_flight.values())
+
+    def snapshot(self) -> dict:
+        """当前准入状态（用于监控）"""
+        return {
+            "in_flight": dict(self.in_flight),
+            "limits": dict(self.limits),
+            "rejected": dict(self.rejected),
+            "estimated_wait": self.metrics.estimated_wait(),
+            "pool_waiting": self.metrics.waiting,
+        }
+
+    def _rate_limit(self, key: str, now: float) -> float:
+        """令牌桶限流，返回需要等待的秒数（0 表示放行）"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > MAX_CLIENT_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.acquire(now)
+
+    def _overloaded(self, route_class: str) -> Optional[float]:
+        """
+        判断是否需要拒绝
+
+        Returns:
+            Optional[float]: 需要拒绝时为建议的重试秒数，否则为 None
+        """
+        estimated_wait = self.metrics.estimated_wait()
+        if self.in_flight[route_class] >= self.limits[route_class]:
+            return max(estimated_wait, 1.0)
+        # 非支付类还要给支付类留出预留容量
+        if route_class != PAYMENT and self.total_in_flight >= self.limits[WRITE]:
+            return max(estimated_wait, 1.0)
+        threshold = self.max_queue_wait * (2 if route_class == PAYMENT else 1)
+        if estimated_wait > threshold:
+            return estimated_wait
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self._rate_limit(caller_key(scope), time.monotonic())
+        if retry_after:
+            self.rejected["rate_limited"] += 1
+            response = too_many_requests_response(
+                "请求过于频繁，请稍后重试", math.ceil(retry_after)
+            )
+            await response(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        retry_after = self._overloaded(route_class)
+        if retry_after is not None:
+            self.rejected["overloaded"] += 1
+            response = service_unavailable_response(
+                "服务繁忙，请稍后重试", math.ceil(retry_after)
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight[route_class] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[route_class] -= 1
+
+
+def admission_options() -> dict:
+    """从配置读取准入控制参数"""
+    return {
+        "max_concurrency": settings.ADMISSION_MAX_CONCURRENCY,
+        "payment_reserved": settings.ADMISSION_PAYMENT_RESERVED,
+        "read_limit": settings.ADMISSION_READ_LIMIT,
+        "max_queue_wait": settings.ADMISSION_MAX_QUEUE_WAIT,
+        "client_rate": settings.ADMISSION_CLIENT_RATE,
+        "client_burst": settings.ADMISSION_CLIENT_BURST,
+    }
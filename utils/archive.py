@@ -0,0 +1,166 @@
+"""已结算费用归档（热表 -> 归档表）及按需查询归档数据"""
+
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, inspect, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import FromClause
+from sqlmodel import Session, select
+
+from config.settings import settings
+from models.archive import AllFee, AllOrderDetail, fees_archive, order_details_archive
+from models.enums import OrderStatusEnum
+from models.fee import Fee
+from models.order_detail import OrderDetail
+from utils.tasks import task_runtime
+
+# 归档任务所在的后台任务队列
+ARCHIVE_QUEUE = "archive"
+task_runtime.register_queue(ARCHIVE_QUEUE, concurrency=1, max_retries=3)
+
+
+def fee_model(include_archived: bool = False) -> Any:
+    """
+    费用查询使用的模型
+
+    Args:
+        include_archived: 是否包含归档数据
+
+    Returns:
+        Fee（只查热表）或 AllFee（热表 + 归档表），两者属性相同
+    """
+    return AllFee if include_archived else Fee
+
+
+def order_detail_model(include_archived: bool = False) -> Any:
+    """订单详情查询使用的模型（OrderDetail 或 AllOrderDetail）"""
+    return AllOrderDetail if include_archived else OrderDetail
+
+
+def table_of(model: Any) -> FromClause:
+    """模型对应的表（投影列时使用）"""
+    return inspect(model).selectable
+
+
+class FeeArchiver:
+    """
+    费用归档任务
+
+    每批在一个事务中把已结算且更新时间早于保留期限的费用移到 fees_archive，
+    费用所属订单在热表中已没有其他费用时，订单详情一起移到
+    order_details_archive。每批独立提交，中断后重新执行从剩余数据继续；
+    使用 SKIP LOCKED 领取，多个进程同时归档时互不重复
+
+    Args:
+        engine: 数据库引擎（默认使用应用的引擎）
+        archive_after_days: 结算后保留在热表的天数
+        batch_size: 单批归档条数
+        max_batches: 每次执行最多归档批数（剩余的下次继续）
+        interval: 定期执行间隔（秒）
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        archive_after_days: int = 180,
+        batch_size: int = 500,
+        max_batches: int = 20,
+        interval: float = 3600,
+    ):
+        self._engine = engine
+        self.archive_after_days = archive_after_days
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.interval = interval
+        self.archived = 0
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from config.database import engine
+
+            self._engine = engine
+        return self._engine
+
+    def schedule(self) -> None:
+        """在 archive 队列中定期执行（应用启动时调用）"""
+        task_runtime.every(self.interval, ARCHIVE_QUEUE, self.run, key=self)
+
+    def run(self, now: Optional[datetime] = None) -> int:
+        """
+        归档到没有可归档数据或达到 max_batches 为止
+
+        Returns:
+            int: 本次归档的费用条数
+        """
+        total = 0
+        for _ in range(self.max_batches):
+            archived = self.archive_batch(now)
+            total += archived
+            if archived < self.batch_size:
+                break
+        return total
+
+    def archive_batch(self, now: Optional[datetime] = None) -> int:
+        """
+        归档一批费用
+
+        Args:
+            now: 当前时间（UTC）
+
+        Returns:
+            int: 本批归档的费用条数
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.archive_after_days)
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(Fee.fee_id, Fee.order_id)
+                .where(Fee.status == OrderStatusEnum.SETTLED, Fee.updated_at < cutoff)
+                .order_by(Fee.updated_at, Fee.fee_id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return 0
+            fee_ids = [fee_id for fee_id, _ in rows]
+            order_ids = {order_id for _, order_id in rows}
+
+            fees = Fee.__table__
+            session.exec(
+                insert(fees_archive).from_select(
+                    fees.c.keys(), select(fees).where(fees.c.fee_id.in_(fee_ids))
+                )
+            )
+            session.exec(delete(fees).where(fees.c.fee_id.in_(fee_ids)))
+
+            # 订单在热表中已没有费用时，订单详情一起归档
+            remaining = set(
+                session.exec(
+                    select(Fee.order_id).where(Fee.order_id.in_(order_ids))
+                ).all()
+            )
+            detail_order_ids = order_ids - remaining
+            if detail_order_ids:
+                details = OrderDetail.__table__
+                session.exec(
+                    insert(order_details_archive).from_select(
+                        details.c.keys(),
+                        select(details).where(details.c.order_id.in_(detail_order_ids)),
+                    )
+                )
+                session.exec(
+                    delete(details).where(details.c.order_id.in_(detail_order_ids))
+                )
+            session.commit()
+
+        self.archived += len(fee_ids)
+        return len(fee_ids)
+
+
+fee_archiver = FeeArchiver(
+    archive_after_days=settings.FEE_ARCHIVE_AFTER_DAYS,
+    batch_size=settings.FEE_ARCHIVE_BATCH_SIZE,
+    max_batches=settings.FEE_ARCHIVE_MAX_BATCHES,
+    interval=settings.FEE_ARCHIVE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,318 @@
+"""JWT 认证：令牌携带身份信息（公司、操作员类型、司机账户、权限），校验不查询数据库"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Depends, status
+from starlette.exceptions import WebSocketException
+from starlette.requests import HTTPConnection
+from starlette.types import Scope
+
+from config.settings import settings
+
+# 身份角色（与 WebSocket 连接类型一致）
+ROLE_PLATFORM = "platform"
+ROLE_CLIENT = "client"
+ROLE_DRIVER = "driver"
+
+# WebSocket 无法设置请求头（浏览器），令牌放在该查询参数中
+WS_TOKEN_PARAM = "access_token"
+
+
+class Identity(NamedTuple):
+    """令牌中的身份信息"""
+
+    subject: str
+    company_id: Optional[str]
+    operator_type: Optional[str]
+    driver_account_id: Optional[str]
+    permissions: Tuple[str, ...]
+    expires_at: float
+
+    @property
+    def role(self) -> str:
+        """角色：司机、平台端或客户端"""
+        if self.driver_account_id:
+            return ROLE_DRIVER
+        if self.operator_type == "PLATFORM":
+            return ROLE_PLATFORM
+        return ROLE_CLIENT
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+
+class AuthenticationError(Exception):
+    """
+    认证失败
+
+    Args:
+        message: 错误信息
+        forbidden: 是否为已认证但权限不足（403），否则为未认证（401）
+    """
+
+    def __init__(self, message: str = "认证失败，请登录", forbidden: bool = False):
+        super().__init__(message)
+        self.forbidden = forbidden
+
+
+class TokenManager:
+    """
+    令牌签发与校验
+
+    密钥（HS 算法的共享密钥，RS / ES 算法的 PEM 文件）首次使用时解析一次并缓存；
+    校验通过的令牌按原文缓存在 LRU 中直到过期，重复请求不再验签
+
+    Args:
+        algorithm: 签名算法
+        secret_key: HS 算法的共享密钥
+        private_key_file: RS / ES 算法的私钥文件（只校验时可为空）
+        public_key_file: RS / ES 算法的公钥文件
+        issuer: 签发者
+        expire_minutes: 有效期（分钟）
+        cache_size: 校验结果缓存条数
+    """
+
+    def __init__(
+        self,
+        algorithm: str = "HS256",
+        secret_key: str = "",
+        private_key_file: Optional[str] = None,
+        public_key_file: Optional[str] = None,
+        issuer: str = "",
+        expire_minutes: int = 720,
+        cache_size: int = 4096,
+    ):
+        self.algorithm = algorithm
+        self.secret_key = secret_key
+        self.private_key_file = private_key_file
+        self.public_key_file = public_key_file
+        self.issuer = issuer
+        self.expire_minutes = expire_minutes
+        self.cache_size = cache_size
+        self.counts = {"verified": 0, "cached": 0, "rejected": 0}
+        self._signing_key: Any = None
+        self._verifying_key: Any = None
+        self._cache: "OrderedDict[str, Identity]" = OrderedDict()
+
+    def _construct_key(self, path: Optional[str]) -> Any:
+        # jose 只在认证时导入（不影响启动时间）
+        from jose import jwk
+
+        if self.algorithm.startswith("HS"):
+            return jwk.construct(self.secret_key, self.algorithm)
+        if not path:
+            raise AuthenticationError(f"{self.algorithm} 算法未配置密钥文件")
+        with open(path, "rb") as f:
+            return jwk.construct(f.read(), self.algorithm)
+
+    def signing_key(self) -> Any:
+        if self._signing_key is None:
+            self._signing_key = self._construct_key(self.private_key_file)
+        return self._signing_key
+
+    def verifying_key(self) -> Any:
+        if self._verifying_key is None:
+            self._verifying_key = self._construct_key(self.public_key_file)
+        return self._verifying_key
+
+    def issue(
+        self,
+        subject: str,
+        company_id: Optional[str] = None,
+        operator_type: Optional[str] = None,
+        driver_account_id: Optional[str] = None,
+        permissions: Iterable[str] = (),
+    ) -> Tuple[str, int]:
+        """
+        签发令牌
+
+        Returns:
+            Tuple[str, int]: (令牌, 有效期秒数)
+        """
+        from jose import jws
+
+        now = int(time.time())
+        expires_in = self.expire_minutes * 60
+        claims = {
+            "sub": subject,
+            "iss": self.issuer,
+            "iat": now,
+            "exp": now + expires_in,
+            "company_id": company_id,
+            "operator_type": operator_type,
+            "driver_account_id": driver_account_id,
+            "permissions": [str(permission) for permission in permissions],
+        }
+        token = jws.sign(
+            claims,
+            self.signing_key(),
+            headers={"typ": "JWT"},
+            algorithm=self.algorithm,
+        )
+        return token, expires_in
+
+    def verify(self, token: str) -> Identity:
+        """
+        校验令牌
+
+        Returns:
+            Identity: 令牌中的身份信息
+
+        Raises:
+            AuthenticationError: 令牌无效或已过期
+        """
+        now = time.time()
+        identity = self._cache.get(token)
+        if identity is not None:
+            if identity.expires_at > now:
+                self._cache.move_to_end(token)
+                self.counts["cached"] += 1
+                return identity
+            del self._cache[token]
+            self.counts["rejected"] += 1
+            raise AuthenticationError("登录已过期，请重新登录")
+
+        from jose import ExpiredSignatureError, JWTError, jwt
+
+        try:
+            claims = jwt.decode(
+                token,
+                self.verifying_key(),
+                algorithms=[self.algorithm],
+                issuer=self.issuer or None,
+                options={"verify_aud": False},
+            )
+        except ExpiredSignatureError:
+            self.counts["rejected"] += 1
+            raise AuthenticationError("登录已过期，请重新登录")
+        except JWTError:
+            self.counts["rejected"] += 1
+            raise AuthenticationError("令牌无效，请重新登录")
+
+        identity = Identity(
+            subject=str(claims.get("sub") or ""),
+            company_id=claims.get("company_id"),
+            operator_type=claims.get("operator_type"),
+            driver_account_id=claims.get("driver_account_id"),
+            permissions=tuple(str(p) for p in claims.get("permissions") or ()),
+            expires_at=float(claims["exp"]),
+        )
+        self._cache[token] = identity
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self.counts["verified"] += 1
+        return identity
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+
+token_manager = TokenManager(
+    algorithm=settings.JWT_ALGORITHM,
+    secret_key=settings.JWT_SECRET_KEY,
+    private_key_file=settings.JWT_PRIVATE_KEY_FILE,
+    public_key_file=settings.JWT_PUBLIC_KEY_FILE,
+    issuer=settings.JWT_ISSUER,
+    expire_minutes=settings.JWT_EXPIRE_MINUTES,
+    cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+)
+
+
+def _reject(connection: HTTPConnection, error: AuthenticationError) -> None:
+    """拒绝请求：HTTP 请求由异常处理器返回 401 / 403，WebSocket 以 1008 关闭"""
+    if connection.scope["type"] == "websocket":
+        raise WebSocketException(status.WS_1008_POLICY_VIOLATION, str(error))
+    raise error
+
+
+def _bearer_token(connection: HTTPConnection) -> Optional[str]:
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        return token.strip()
+    if connection.scope["type"] == "websocket":
+        return connection.query_params.get(WS_TOKEN_PARAM) or None
+    return None
+
+
+def caller_key(scope: Scope) -> str:
+    """
+    调用方标识（准入控制的令牌桶、读己之写的主库粘滞按此区分客户端）
+
+    携带有效令牌时为令牌身份（角色 + 员工 / 司机ID），否则为对端地址；不使用
+    客户端可随意修改的请求头。部署在反向代理后时，由 uvicorn 按
+    FORWARDED_ALLOW_IPS（可信代理）解析 X-Forwarded-For 得到真实对端地址
+
+    Args:
+        scope: 请求的 ASGI scope（中间件中尚未执行依赖注入）
+    """
+    token = _bearer_token(HTTPConnection(scope))
+    if token is not None:
+        try:
+            identity = token_manager.verify(token)
+        except AuthenticationError:
+            # 无效令牌的请求随后会被拒绝，按对端地址计数
+            pass
+        else:
+            return f"{identity.role}:{identity.subject}"
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def get_identity(connection: HTTPConnection) -> Optional[Identity]:
+    """
+    当前请求的身份（依赖注入，HTTP 和 WebSocket 路由通用）
+
+    未携带令牌时为 None（AUTH_REQUIRED 开启时拒绝）；携带的令牌无效时拒绝
+    """
+    token = _bearer_token(connection)
+    if token is None:
+        if settings.AUTH_REQUIRED:
+            _reject(connection, AuthenticationError())
+        return None
+    try:
+        return token_manager.verify(token)
+    except AuthenticationError as e:
+        _reject(connection, e)
+
+
+def require_role(*roles: str):
+    """
+    限定角色的依赖（可用于路由或 APIRouter 的 dependencies）
+
+    未携带令牌且 AUTH_REQUIRED 未开启时放行
+
+    Args:
+        roles: 允许的角色（ROLE_PLATFORM / ROLE_CLIENT / ROLE_DRIVER）
+    """
+
+    async def dependency(
+        connection: HTTPConnection, identity: Optional[Identity] = Depends(get_identity)
+    ) -> Optional[Identity]:
+        if identity is not None and identity.role not in roles:
+            _reject(connection, AuthenticationError("权限不足", forbidden=True))
+        return identity
+
+    return dependency
+
+
+def require_identity(*roles: str):
+    """
+    必须携带有效令牌的依赖（不受 AUTH_REQUIRED 影响），用于按令牌身份确定
+    操作对象或操作人的接口（司机账单、充值审核人等），不采信请求参数
+
+    Args:
+        roles: 允许的角色，为空时不限角色
+    """
+
+    async def dependency(
+        connection: HTTPConnection, identity: Optional[Identity] = Depends(get_identity)
+    ) -> Identity:
+        if identity is None:
+            _reject(connection, AuthenticationError())
+        if roles and identity.role not in roles:
+            _reject(connection, AuthenticationError("权限不足", forbidden=True))
+        return identity
+
+    return dependency
@@ -0,0 +1,177 @@
+"""余额预警（余额变动时评估，不轮询账户表）"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, NamedTuple, Optional
+
+from config.settings import settings
+from utils.tasks import task_runtime
+
+# 预警通知所在的后台任务队列
+WARNING_QUEUE = "balance_warning"
+task_runtime.register_queue(WARNING_QUEUE, concurrency=2, max_retries=3)
+
+# 记录预警状态的账户数上限（超过后淘汰最久未变动的）
+MAX_TRACKED_ACCOUNTS = 100000
+
+
+class BalanceAlert(NamedTuple):
+    """余额预警"""
+
+    company_account_id: str
+    company_id: str
+    balance: int
+    threshold: int
+    phone: Optional[str]
+    triggered_at: datetime
+
+    def to_dict(self) -> dict:
+        return {
+            **self._asdict(),
+            "triggered_at": self.triggered_at.isoformat(),
+        }
+
+
+class BalanceNotifier(ABC):
+    """预警通知方式（短信等），子类实现 send"""
+
+    @abstractmethod
+    def send(self, alert: BalanceAlert) -> None:
+        """发送一条预警（在后台任务线程池中执行）"""
+
+
+class LogNotifier(BalanceNotifier):
+    """
+    写入本地文件（短信接入前的替代实现），每条预警一行 JSON
+
+    Args:
+        path: 日志文件路径
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alert: BalanceAlert) -> None:
+        line = json.dumps(alert.to_dict(), ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        with self._lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        print(f"余额预警: {alert.company_account_id} 余额 {alert.balance} 分")
+
+
+# 通知方式注册表（settings.BALANCE_WARNING_NOTIFIER 选择）
+NOTIFIERS: Dict[str, Callable[[], BalanceNotifier]] = {
+    "log": lambda: LogNotifier(settings.BALANCE_WARNING_LOG_PATH),
+}
+
+
+class BalanceWarningEvaluator:
+    """
+    余额预警评估
+
+    每次余额变动只比较一次余额和预警值（O(1)）。余额低于预警值时触发预警，
+    同一账户在防抖时间内不重复预警；余额恢复到预警值以上后重新计时，
+    再次跌破时立即预警。通知在后台任务中发送，不阻塞业务请求
+
+    防抖状态保存在进程内存中，只在单个进程内生效：多进程部署时每个进程各自
+    计时，同一账户在防抖时间内最多收到与进程数相同条预警；进程重启后状态清空
+
+    Args:
+        notifier: 通知方式
+        debounce_seconds: 同一账户两次预警的最小间隔（秒）
+    """
+
+    def __init__(self, notifier: BalanceNotifier, debounce_seconds: float):
+        self.notifier = notifier
+        self.debounce_seconds = debounce_seconds
+        # 账户 -> 上次预警时间（monotonic），余额恢复后移除
+        self._alerted: "OrderedDict[str, float]" = OrderedDict()
+        self.counts: Dict[str, int] = {"evaluated": 0, "alerted": 0, "suppressed": 0}
+
+    def evaluate(
+        self,
+        company_account_id: str,
+        company_id: str,
+        balance: int,
+        threshold: int,
+        enabled: bool,
+        phone: Optional[str],
+        now: Optional[float] = None,
+    ) -> Optional[BalanceAlert]:
+        """
+        评估一次余额变动
+
+        Args:
+            company_account_id: 账户ID
+            company_id: 客户公司ID
+            balance: 变动后的余额（分）
+            threshold: 预警值（分）
+            enabled: 是否启用预警
+            phone: 预警手机号
+            now: 当前时间（monotonic）
+
+        Returns:
+            Optional[BalanceAlert]: 需要发送的预警，不需要时为 None
+        """
+        self.counts["evaluated"] += 1
+        if not enabled or balance >= threshold:
+            # 未启用或余额已恢复：清除状态，下次跌破时立即预警
+            self._alerted.pop(company_account_id, None)
+            return None
+
+        now = time.monotonic() if now is None else now
+        last = self._alerted.get(company_account_id)
+        if last is not None and now - last < self.debounce_seconds:
+            self.counts["suppressed"] += 1
+            return None
+
+        self._alerted[company_account_id] = now
+        self._alerted.move_to_end(company_account_id)
+        if len(self._alerted) > MAX_TRACKED_ACCOUNTS:
+            self._alerted.popitem(last=False)
+        self.counts["alerted"] += 1
+        return BalanceAlert(
+            company_account_id=company_account_id,
+            company_id=company_id,
+            balance=balance,
+            threshold=threshold,
+            phone=phone,
+            triggered_at=datetime.utcnow(),
+        )
+
+    def check_account(self, account) -> Optional[BalanceAlert]:
+        """
+        余额变动提交后调用：评估账户，需要预警时在后台任务中发送通知
+
+        Args:
+            account: 账户（Account）
+
+        Returns:
+            Optional[BalanceAlert]: 触发的预警
+        """
+        alert = self.evaluate(
+            company_account_id=account.company_account_id,
+            company_id=account.company_id,
+            balance=account.company_account_balance,
+            threshold=account.company_account_balance_warning_val,
+            enabled=account.company_account_balance_warning_enable,
+            phone=account.company_account_balance_warning_phone,
+        )
+        if alert is not None:
+            task_runtime.enqueue(WARNING_QUEUE, self.notifier.send, alert)
+        return alert
+
+
+balance_warning_evaluator = BalanceWarningEvaluator(
+    notifier=NOTIFIERS[settings.BALANCE_WARNING_NOTIFIER](),
+    debounce_seconds=settings.BALANCE_WARNING_DEBOUNCE_MINUTES * 60,
+)
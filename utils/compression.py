@@ -0,0 +1,355 @@
+"""响应压缩（gzip / brotli）"""
+
+import mimetypes
+import os
+import re
+import zlib
+from typing import Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只使用 gzip
+    brotli = None
+
+# 可压缩的内容类型前缀
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# 预压缩文件后缀（按优先级）
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# 静态资源长期缓存（只用于文件名带内容哈希的文件）
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 其他静态文件每次使用前按 ETag / Last-Modified 校验，修改后立即生效
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 带内容哈希的文件名：按内容寻址的上传图片（<sha256>.jpg）、构建产物（app.3f2a9c1b.js）
+HASHED_NAME = re.compile(r"(?:^|[.\-_])[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+
+def is_hashed_name(path: str) -> bool:
+    """文件名是否带内容哈希（内容变化时文件名随之变化，可长期缓存）"""
+    return HASHED_NAME.search(os.path.basename(path)) is not None
+
+
+def _supported_encodings() -> tuple:
+    """服务端支持的编码（按优先级）"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """
+    解析 Accept-Encoding
+
+    Args:
+        header: Accept-Encoding 头部值
+
+    Returns:
+        Dict[str, float]: 编码 -> q 值
+    """
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate_encoding(
+    header: Optional[str], supported: Optional[tuple] = None
+) -> Optional[str]:
+    """
+    协商响应编码
+
+    Args:
+        header: Accept-Encoding 头部值
+        supported: 可选编码（按优先级），默认为服务端支持的编码
+
+    Returns:
+        Optional[str]: 选中的编码，不压缩时为 None
+    """
+    if not header:
+        return None
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in supported or _supported_encodings():
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """判断内容类型是否值得压缩（图片等已压缩格式跳过）"""
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+class _Compressor:
+    """增量压缩器，每次写入后立即刷新以支持流式响应"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            # wbits=31：带 gzip 头部
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def write(self, data: bytes) -> bytes:
+        """压缩一段数据并刷新输出"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """压缩最后一段数据并结束压缩流"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+
+    根据 Accept-Encoding 协商 br / gzip；一次性响应体小于阈值时不压缩，
+    流式响应逐块压缩并刷新，不缓冲整个响应体。已设置 Content-Encoding、
+    Range 请求、不可压缩的内容类型和 WebSocket 不处理
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"))
+        if encoding is None or "range" in request_headers:
+            await self.app(scope, receive, send)
+            return
+
+        level = self.brotli_quality if encoding == "br" else self.gzip_level
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    message["status"] < 200
+                    or message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                    or not is_compressible(headers.get("content-type"))
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+
+                # 一次性小响应：压缩收益不抵开销
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, level)
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+
+                if not more_body:
+                    compressed = compressor.finish(body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                # 流式响应：长度未知，改用分块传输
+                del headers["Content-Length"]
+                await send(start_message)
+
+            if more_body:
+                chunk = compressor.write(body)
+                if chunk:
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+            else:
+                await send(
+                    {"type": "http.response.body", "body": compressor.finish(body)}
+                )
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """先写临时文件再替换，避免多进程启动时读到半个文件"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def precompress_directory(
+    directory: str, minimum_size: int = 1024, exclude: Sequence[str] = ()
+) -> int:
+    """
+    预压缩静态目录下的可压缩文件，生成同名 .gz（和 .br）文件
+
+    已有且不旧于源文件的压缩文件跳过，可在每次启动时重复执行
+
+    Args:
+        directory: 静态目录
+        minimum_size: 最小文件大小（字节）
+        exclude: 跳过的子目录（如上传目录，文件多且都是图片）
+
+    Returns:
+        int: 本次生成的压缩文件数
+    """
+    suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+    written = 0
+    excluded = {os.path.normpath(path) for path in exclude}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [
+            name
+            for name in dirs
+            if os.path.normpath(os.path.join(root, name)) not in excluded
+        ]
+        for name in files:
+            if name.endswith(suffixes) or name.endswith(".tmp"):
+                continue
+            path = os.path.join(root, name)
+            content_type, _ = mimetypes.guess_type(name)
+            source_stat = os.stat(path)
+            if not is_compressible(content_type) or source_stat.st_size < minimum_size:
+                continue
+
+            data = None
+            for encoding in _supported_encodings():
+                target = path + PRECOMPRESSED_SUFFIXES[encoding]
+                if (
+                    os.path.exists(target)
+                    and os.stat(target).st_mtime >= source_stat.st_mtime
+                ):
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+                    compressed = compressor.compress(data) + compressor.flush()
+                _write_atomic(target, compressed)
+                written += 1
+    return written
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    静态文件：优先返回预压缩文件
+
+    文件名带内容哈希的长期缓存，其他文件使用 no-cache（每次按 ETag 校验）
+    """
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        variant = None
+        accept_encoding = request_headers.get("accept-encoding")
+        if accept_encoding and "range" not in request_headers:
+            accepted = _accepted_encodings(accept_encoding)
+            wildcard = accepted.get("*", 0.0)
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                if accepted.get(encoding, wildcard) <= 0:
+                    continue
+                try:
+                    variant_stat = os.stat(f"{full_path}{suffix}")
+                except OSError:
+                    continue
+                variant = encoding, f"{full_path}{suffix}", variant_stat
+                break
+
+        if variant is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        else:
+            encoding, variant_path, variant_stat = variant
+            media_type, _ = mimetypes.guess_type(str(full_path))
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,
+                method=scope["method"],
+                media_type=media_type or "text/plain",
+                headers={"Content-Encoding": encoding},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                response = NotModifiedResponse(response.headers)
+
+        if is_compressible(mimetypes.guess_type(str(full_path))[0]):
+            response.headers.add_vary_header("Accept-Encoding")
+        response.headers["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL
+            if is_hashed_name(full_path)
+            else REVALIDATE_CACHE_CONTROL
+        )
+        return response
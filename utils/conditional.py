@@ -0,0 +1,129 @@
+"""条件请求（ETag / Last-Modified）"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def build_etag(*parts: Any) -> str:
+    """
+    根据版本信息生成弱 ETag
+
+    Notes:
+        响应体可能被压缩，使用弱校验器（W/）表示语义等价；
+        updated_at 保留微秒（列类型为 PRECISE_DATETIME），同一秒内的两次更新 ETag 不同
+
+    Args:
+        parts: 参与计算的版本信息（如 ID、updated_at、字段选择）
+
+    Returns:
+        str: ETag 头部值
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """
+    时间转 HTTP 日期格式（数据库时间为 UTC，精度为秒）
+
+    Args:
+        value: UTC 时间
+
+    Returns:
+        str: HTTP 日期字符串
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    判断客户端缓存是否仍然有效
+
+    Notes:
+        同时存在 If-None-Match 和 If-Modified-Since 时以 If-None-Match 为准
+
+    Args:
+        request: 请求
+        etag: 当前 ETag
+        last_modified: 当前最后修改时间
+
+    Returns:
+        bool: 是否可以返回 304
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = etag.removeprefix("W/")
+        candidates = (
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        )
+        return current in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    """
+    生成校验相关响应头
+
+    Args:
+        etag: ETag
+        last_modified: 最后修改时间
+
+    Returns:
+        dict: 响应头
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(
+    etag: str, last_modified: Optional[datetime] = None
+) -> Response:
+    """304 响应"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified),
+    )
+
+
+def with_validators(
+    response: Response, etag: str, last_modified: Optional[datetime] = None
+) -> Response:
+    """
+    为响应附加 ETag / Last-Modified
+
+    Args:
+        response: 响应
+        etag: ETag
+        last_modified: 最后修改时间
+
+    Returns:
+        Response: 原响应
+    """
+    response.headers.update(validator_headers(etag, last_modified))
+    return response
@@ -0,0 +1,175 @@
+"""司机收入流水和月度汇总"""
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlmodel import Session, func, select
+
+from models.driver import Driver
+from models.earning import DriverEarning, DriverMonthlyEarning
+from models.fee import Fee
+from utils.keyset import after_cursor, encode_cursor
+
+# 汇总的费用明细字段
+EARNING_FEE_FIELDS = (
+    "total_price",
+    "carry_fee",
+    "wait_fee",
+    "highway_fee",
+    "parking_fee",
+)
+
+
+def month_key(moment: datetime) -> str:
+    """月度汇总的月份键（UTC，YYYY-MM）"""
+    return moment.strftime("%Y-%m")
+
+
+def credit_driver(
+    db: Session,
+    driver: Driver,
+    fee: Fee,
+    now: Optional[datetime] = None,
+    **fees: int,
+) -> DriverEarning:
+    """
+    司机余额入账，同时写入收入流水并增量更新月度汇总（不提交）
+
+    调用方需先以 FOR UPDATE 锁定司机行：同一司机的入账串行执行，
+    月度汇总行的首次插入不会冲突
+
+    Args:
+        db: 数据库会话
+        driver: 已加锁的司机
+        fee: 费用
+        now: 入账时间（UTC）
+        fees: 各项费用（分），见 EARNING_FEE_FIELDS
+
+    Returns:
+        DriverEarning: 收入流水
+    """
+    now = now or datetime.utcnow()
+    amount = sum(fees.get(field, 0) for field in EARNING_FEE_FIELDS)
+    driver.driver_account_balance += amount
+    driver.updated_at = now
+    db.add(driver)
+
+    earning = DriverEarning(
+        created_at=now,
+        driver_account_id=driver.driver_account_id,
+        fee_id=fee.fee_id,
+        order_id=fee.order_id,
+        path_id=fee.path_id,
+        amount=amount,
+        balance_after=driver.driver_account_balance,
+        **{field: fees.get(field, 0) for field in EARNING_FEE_FIELDS},
+    )
+    db.add(earning)
+
+    month = month_key(now)
+    summary = db.get(DriverMonthlyEarning, (driver.driver_account_id, month))
+    if summary is None:
+        summary = DriverMonthlyEarning(
+            driver_account_id=driver.driver_account_id, month=month
+        )
+    summary.earning_count += 1
+    summary.total_amount += amount
+    for field in EARNING_FEE_FIELDS:
+        setattr(summary, field, getattr(summary, field) + fees.get(field, 0))
+    summary.updated_at = now
+    db.add(summary)
+    return earning
+
+
+def list_monthly_statements(
+    db: Session, driver_account_id: str, page: int, size: int
+) -> Tuple[List[DriverMonthlyEarning], int]:
+    """
+    按月份倒序分页查询月账单（只读月度汇总，行数为司机的月份数）
+
+    Args:
+        db: 数据库会话
+        driver_account_id: 司机账户ID
+        page: 页码
+        size: 每页数量
+
+    Returns:
+        Tuple[List[DriverMonthlyEarning], int]: (本页月账单, 月份总数)
+    """
+    condition = DriverMonthlyEarning.driver_account_id == driver_account_id
+    total = db.exec(select(func.count()).where(condition)).one()
+    statements = db.exec(
+        select(DriverMonthlyEarning)
+        .where(condition)
+        .order_by(DriverMonthlyEarning.month.desc())
+        .offset((page - 1) * size)
+        .limit(size)
+    ).all()
+    return list(statements), total
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    """
+    月份的起止时间 [开始, 下月开始)
+
+    Raises:
+        ValueError: 月份格式错误
+    """
+    try:
+        start = datetime.strptime(month, "%Y-%m")
+    except ValueError as e:
+        raise ValueError("月份格式错误，应为 YYYY-MM") from e
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def list_month_earnings(
+    db: Session,
+    driver_account_id: str,
+    month: str,
+    size: int,
+    cursor: Optional[str] = None,
+) -> Tuple[Optional[DriverMonthlyEarning], List[DriverEarning], Optional[str]]:
+    """
+    某月账单：月度汇总 + 收入流水（按入账时间倒序键集分页）
+
+    流水走 (driver_account_id, created_at, earning_id) 索引
+
+    Args:
+        db: 数据库会话
+        driver_account_id: 司机账户ID
+        month: 月份（YYYY-MM）
+        size: 每页数量
+        cursor: 上一页返回的游标
+
+    Returns:
+        Tuple: (月度汇总, 本页流水, 下一页游标)
+
+    Raises:
+        ValueError: 月份或游标格式错误
+    """
+    start, end = month_range(month)
+    query = select(DriverEarning).where(
+        DriverEarning.driver_account_id == driver_account_id,
+        DriverEarning.created_at >= start,
+        DriverEarning.created_at < end,
+    )
+    if cursor:
+        query = query.where(
+            after_cursor(DriverEarning.created_at, DriverEarning.earning_id, cursor)
+        )
+    earnings = list(
+        db.exec(
+            query.order_by(
+                DriverEarning.created_at.desc(), DriverEarning.earning_id.desc()
+            ).limit(size + 1)
+        ).all()
+    )
+    next_cursor = None
+    if len(earnings) > size:
+        last = earnings[size - 1]
+        next_cursor = encode_cursor(last.created_at, last.earning_id)
+
+    summary = db.get(DriverMonthlyEarning, (driver_account_id, month))
+    return summary, earnings[:size], next_cursor
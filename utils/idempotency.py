@@ -0,0 +1,372 @@
+"""幂等键（Idempotency-Key）"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import Header, Request, Response
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from config.settings import settings
+from models.idempotency import IdempotencyRecord
+from utils.auth import caller_key
+from utils.response import (
+    conflict_response,
+    param_error_response,
+    unprocessable_response,
+)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 128
+
+# 等待其他进程处理时的轮询间隔（秒）
+POLL_INTERVAL = 0.05
+
+
+class StoredResponse(NamedTuple):
+    """已保存的响应"""
+
+    request_hash: str
+    status_code: int
+    body: bytes
+    created_at: datetime
+
+
+def request_fingerprint(request: Request, body: bytes) -> str:
+    """
+    计算请求摘要，同一幂等键只能用于相同的请求
+
+    Args:
+        request: 请求
+        body: 请求体
+
+    Returns:
+        str: SHA-256 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b" ")
+    digest.update(request.url.path.encode())
+    digest.update(b"?")
+    digest.update(request.url.query.encode())
+    digest.update(b"\n")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def storage_key(scope: str, request: Request, idempotency_key: str) -> str:
+    """
+    幂等记录的存储键，按接口范围和调用方隔离
+
+    调用方为令牌身份（未携带令牌时为对端地址）加所属公司请求头，不同调用方
+    使用相同的幂等键和请求体时互不影响，不会拿到其他调用方保存的响应
+
+    Args:
+        scope: 接口范围
+        request: 请求
+        idempotency_key: 客户端提供的幂等键
+
+    Returns:
+        str: 接口范围:调用方摘要:幂等键
+    """
+    tenant = request.headers.get(settings.TENANT_HEADER) or ""
+    caller = hashlib.sha256(f"{caller_key(request.scope)}\n{tenant}".encode())
+    return f"{scope}:{caller.hexdigest()[:16]}:{idempotency_key}"
+
+
+class IdempotencyStore:
+    """
+    幂等结果存储
+
+    进程内 LRU 缓存 + idempotency_keys 表持久化。同一进程内并发的重复请求
+    等待首个请求完成；跨进程时以数据库主键抢占，未抢到的请求轮询等待结果，
+    超过 wait_timeout 仍未完成时返回 409（不接管仍在处理的记录）。
+    处理期间定期续期记录，超过租约未续期的记录视为处理进程已退出，
+    可被重新抢占。5xx 响应和异常不保存，客户端可用同一幂等键重试
+
+    Args:
+        max_entries: 进程内缓存条数
+        ttl: 幂等键有效期
+        wait_timeout: 等待其他进程处理的最长时间（秒）
+        lease: 处理中记录的租约（秒），应远大于 wait_timeout
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: timedelta,
+        wait_timeout: float,
+        lease: float = 300.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.lease = lease
+        self._cache: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def clear(self) -> None:
+        """清空进程内缓存"""
+        self._cache.clear()
+
+    def _expired(self, created_at: datetime) -> bool:
+        return created_at + self.ttl < datetime.utcnow()
+
+    def _cache_get(self, key: str) -> Optional[StoredResponse]:
+        stored = self._cache.get(key)
+        if stored is None:
+            return None
+        if self._expired(stored.created_at):
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return stored
+
+    def _cache_put(self, key: str, stored: StoredResponse) -> None:
+        self._cache[key] = stored
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _replay(stored: StoredResponse, request_hash: str) -> Response:
+        """返回已保存的响应"""
+        if stored.request_hash != request_hash:
+            return unprocessable_response("Idempotency-Key 已用于其他请求")
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    async def execute(
+        self,
+        bind: Engine,
+        key: str,
+        request_hash: str,
+        call: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        """
+        按幂等键执行请求
+
+        Args:
+            bind: 数据库引擎（幂等记录使用独立会话，不影响业务事务）
+            key: 幂等键（含接口范围）
+            request_hash: 请求摘要
+            call: 实际执行业务的函数
+
+        Returns:
+            Response: 业务响应或已保存的响应
+        """
+        while True:
+            stored = self._cache_get(key)
+            if stored is not None:
+                return self._replay(stored, request_hash)
+
+            # 同一进程内已有相同幂等键在处理，等待其完成后重新检查
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                await asyncio.shield(in_flight)
+                continue
+
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                return await self._execute_claimed(bind, key, request_hash, call)
+            finally:
+                del self._in_flight[key]
+                future.set_result(None)
+
+    async def _execute_claimed(
+        self,
+        bind: Engine,
+        key: str,
+        request_hash: str,
+        call: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        """抢占数据库记录后执行；记录已完成时直接返回保存的响应"""
+        deadline = asyncio.get_running_loop().time() + self.wait_timeout
+        while True:
+            with Session(bind) as session:
+                record = session.exec(
+                    select(IdempotencyRecord).where(
+                        IdempotencyRecord.idempotency_key == key
+                    )
+                ).first()
+
+                abandoned = record is not None and (
+                    self._expired(record.created_at)
+                    or (
+                        record.status_code is None
+                        and record.updated_at
+                        < datetime.utcnow() - timedelta(seconds=self.lease)
+                    )
+                )
+                if abandoned:
+                    session.delete(record)
+                    session.commit()
+                    record = None
+
+                if record is None:
+                    session.add(
+                        IdempotencyRecord(
+                            idempotency_key=key, request_hash=request_hash
+                        )
+                    )
+                    try:
+                        session.commit()
+                    except IntegrityError:
+                        # 其他进程同时抢占，重新读取
+                        session.rollback()
+                        continue
+                    break
+
+                if record.status_code is not None:
+                    stored = StoredResponse(
+                        request_hash=record.request_hash,
+                        status_code=record.status_code,
+                        body=(record.response_body or "").encode(),
+                        created_at=record.created_at,
+                    )
+                    self._cache_put(key, stored)
+                    return self._replay(stored, request_hash)
+
+                if record.request_hash != request_hash:
+                    return unprocessable_response("Idempotency-Key 已用于其他请求")
+
+            # 其他进程处理中
+            if asyncio.get_running_loop().time() >= deadline:
+                return conflict_response("请求正在处理中，请稍后重试")
+            await asyncio.sleep(POLL_INTERVAL)
+
+        renewal = asyncio.ensure_future(self._renew_lease(bind, key, request_hash))
+        try:
+            response = await call()
+        except BaseException:
+            self._release(bind, key)
+            raise
+        finally:
+            renewal.cancel()
+
+        body = getattr(response, "body", None)
+        if response.status_code >= 500 or body is None:
+            self._release(bind, key)
+            return response
+
+        with Session(bind) as session:
+            record = session.get(IdempotencyRecord, key)
+            record.status_code = response.status_code
+            record.response_body = bytes(body).decode()
+            record.updated_at = datetime.utcnow()
+            session.add(record)
+            session.commit()
+            stored = StoredResponse(
+                request_hash=request_hash,
+                status_code=response.status_code,
+                body=bytes(body),
+                created_at=record.created_at,
+            )
+        self._cache_put(key, stored)
+        return response
+
+    async def _renew_lease(self, bind: Engine, key: str, request_hash: str) -> None:
+        """处理期间每三分之一租约续期一次，其他进程不会把记录当作已退出而接管"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            with Session(bind) as session:
+                session.exec(
+                    update(IdempotencyRecord)
+                    .where(
+                        IdempotencyRecord.idempotency_key == key,
+                        IdempotencyRecord.request_hash == request_hash,
+                        IdempotencyRecord.status_code.is_(None),
+                    )
+                    .values(updated_at=datetime.utcnow())
+                )
+                session.commit()
+
+    @staticmethod
+    def _release(bind: Engine, key: str) -> None:
+        """删除处理中的记录，允许客户端重试"""
+        with Session(bind) as session:
+            record = session.get(IdempotencyRecord, key)
+            if record is not None:
+                session.delete(record)
+                session.commit()
+
+
+idempotency_store = IdempotencyStore(
+    max_entries=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+    lease=settings.IDEMPOTENCY_LEASE_SECONDS,
+)
+
+
+def idempotent(scope: str):
+    """
+    接口幂等装饰器（放在路由装饰器下方）
+
+    请求带 Idempotency-Key 头时，同一幂等键只执行一次业务逻辑，重复请求返回
+    首次的响应（响应头带 Idempotent-Replayed: true）；不带该头时行为不变。
+    被装饰的接口需要有 db 参数
+
+    Args:
+        scope: 接口范围，不同接口的幂等键互不影响
+    """
+
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        has_request = "request" in signature.parameters
+        parameters = list(signature.parameters.values())
+        if not has_request:
+            parameters.append(
+                inspect.Parameter(
+                    "request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+                )
+            )
+        parameters.append(
+            inspect.Parameter(
+                "idempotency_key",
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=Optional[str],
+                default=Header(
+                    None,
+                    alias=IDEMPOTENCY_HEADER,
+                    description="幂等键，重试时携带相同的值",
+                ),
+            )
+        )
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            idempotency_key = kwargs.pop("idempotency_key", None)
+            request = kwargs["request"] if has_request else kwargs.pop("request")
+            if not idempotency_key:
+                return await endpoint(*args, **kwargs)
+            if len(idempotency_key) > MAX_KEY_LENGTH:
+                return param_error_response(
+                    f"Idempotency-Key 长度不能超过{MAX_KEY_LENGTH}"
+                )
+
+            request_hash = request_fingerprint(request, await request.body())
+            return await idempotency_store.execute(
+                kwargs["db"].get_bind(),
+                storage_key(scope, request, idempotency_key),
+                request_hash,
+                lambda: endpoint(*args, **kwargs),
+            )
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
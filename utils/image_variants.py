@@ -0,0 +1,229 @@
+"""图片衍生图（缩略图、重新压缩）：首次请求时在进程池中生成，缓存在磁盘"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, NamedTuple, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖，未安装时只返回原图
+    Image = None
+
+# 衍生图格式 -> (扩展名, 内容类型)
+VARIANT_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+}
+
+
+def variants_supported() -> bool:
+    """是否可以生成衍生图（已安装 Pillow）"""
+    return Image is not None
+
+
+class VariantSpec(NamedTuple):
+    """衍生图参数：宽度为 None 时保持原尺寸，只重新压缩"""
+
+    width: Optional[int]
+    quality: int
+    format: str
+
+    @property
+    def extension(self) -> str:
+        return VARIANT_FORMATS[self.format][0]
+
+    @property
+    def media_type(self) -> str:
+        return VARIANT_FORMATS[self.format][1]
+
+    @property
+    def key(self) -> str:
+        """参数标识（用于缓存文件名和 ETag）"""
+        return f"w{self.width or 0}-q{self.quality}{self.extension}"
+
+
+def render_variant(source: str, target: str, spec: VariantSpec) -> int:
+    """
+    生成衍生图（在子进程中执行）
+
+    先写入临时文件再改名，缓存目录中不会出现写了一半的文件
+
+    Args:
+        source: 原图路径
+        target: 衍生图路径
+        spec: 衍生图参数
+
+    Returns:
+        int: 衍生图大小（字节）
+    """
+    with Image.open(source) as image:
+        # 按 EXIF 方向旋转（手机照片），结果不再带方向信息
+        image = ImageOps.exif_transpose(image)
+        if spec.width and image.width > spec.width:
+            # 只限制宽度，高度按比例缩放
+            image.thumbnail((spec.width, image.height), Image.LANCZOS)
+        if spec.format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        image.save(tmp_path, spec.format.upper(), quality=spec.quality, optimize=True)
+    os.replace(tmp_path, target)
+    return os.path.getsize(target)
+
+
+class DiskLRUCache:
+    """
+    按总大小限制的磁盘缓存，超出时删除最久未访问的文件
+
+    访问顺序保存在内存，命中时同时更新文件修改时间，重启后按修改时间恢复
+    访问顺序。多进程共用目录时各进程分别淘汰，文件被其他进程删除时按未命中
+    处理
+
+    Args:
+        root: 缓存目录
+        max_bytes: 总大小上限（字节）
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: Optional["OrderedDict[str, int]"] = None
+
+    def path_for(self, digest: str, key: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}-{key}")
+
+    def _load(self) -> "OrderedDict[str, int]":
+        """首次使用时扫描缓存目录"""
+        if self._entries is None:
+            found = []
+            for root, _, files in os.walk(self.root):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, path, stat.st_size))
+            found.sort()
+            self._entries = OrderedDict((path, size) for _, path, size in found)
+            self.size = sum(self._entries.values())
+        return self._entries
+
+    def get(self, path: str) -> Optional[os.stat_result]:
+        """
+        查找缓存文件
+
+        Returns:
+            Optional[os.stat_result]: 文件信息，未命中时为 None
+        """
+        entries = self._load()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            if path in entries:
+                self.size -= entries.pop(path)
+            return None
+        if path in entries:
+            entries.move_to_end(path)
+        else:
+            # 其他进程生成的文件
+            entries[path] = stat.st_size
+            self.size += stat.st_size
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return stat
+
+    def add(self, path: str, size: int) -> None:
+        """记录新生成的文件，超出上限时淘汰最久未访问的文件"""
+        entries = self._load()
+        self.size -= entries.pop(path, 0)
+        entries[path] = size
+        self.size += size
+        while self.size > self.max_bytes and len(entries) > 1:
+            oldest, oldest_size = entries.popitem(last=False)
+            self.size -= oldest_size
+            try:
+                os.remove(oldest)
+            except OSError:
+                pass
+
+
+class VariantRenderer:
+    """
+    衍生图生成器
+
+    缓存未命中时在进程池中生成（缩放和编码是 CPU 密集操作，不占用事件循环和
+    线程池）；同一衍生图的并发请求只生成一次
+
+    Args:
+        cache: 磁盘缓存
+        max_workers: 进程数
+    """
+
+    def __init__(self, cache: DiskLRUCache, max_workers: int = 2):
+        self.cache = cache
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def get(
+        self, source: str, digest: str, spec: VariantSpec
+    ) -> Tuple[str, os.stat_result]:
+        """
+        获取衍生图，不存在时生成
+
+        Args:
+            source: 原图路径
+            digest: 原图 SHA-256
+            spec: 衍生图参数
+
+        Returns:
+            Tuple[str, os.stat_result]: (衍生图路径, 文件信息)
+
+        Raises:
+            OSError: 原图无法识别或读取
+        """
+        path = self.cache.path_for(digest, spec.key)
+        stat = self.cache.get(path)
+        if stat is not None:
+            return path, stat
+
+        in_flight = self._in_flight.get(path)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(self._render(source, path, spec))
+            self._in_flight[path] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(path, None))
+        # 请求被取消时不影响其他等待者
+        await asyncio.shield(in_flight)
+        return path, os.stat(path)
+
+    async def _render(self, source: str, path: str, spec: VariantSpec) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        loop = asyncio.get_running_loop()
+        try:
+            size = await loop.run_in_executor(
+                self._executor(), render_variant, source, path, spec
+            )
+        except BrokenProcessPool:
+            # 子进程异常退出，下次请求时重建进程池
+            self._pool = None
+            raise
+        self.cache.add(path, size)
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,57 @@
+"""键集分页游标（按 (时间, ID) 倒序翻页）"""
+
+import base64
+from datetime import datetime
+from typing import Any, Tuple
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at: datetime, key: str) -> str:
+    """
+    分页游标：上一页最后一条记录的 (时间, ID)
+
+    Args:
+        created_at: 最后一条记录的时间
+        key: 最后一条记录的ID
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = f"{created_at.isoformat()}|{key}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    解析分页游标
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        created_at, key = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return datetime.fromisoformat(created_at), key
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("游标格式错误") from e
+
+
+def after_cursor(time_column, key_column, cursor: str) -> Any:
+    """
+    倒序翻页条件：位于游标之后（更早）的记录
+
+    Args:
+        time_column: 时间列
+        key_column: ID列（时间相同时区分先后）
+        cursor: 上一页返回的游标
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    created_at, key = decode_cursor(cursor)
+    return or_(
+        time_column < created_at,
+        and_(time_column == created_at, key_column < key),
+    )
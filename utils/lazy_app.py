@@ -0,0 +1,39 @@
+"""按需构建的 ASGI 应用"""
+
+import threading
+from typing import Callable, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class LazyASGIApp:
+    """
+    首次收到请求时才构建的 ASGI 应用
+
+    用于挂载依赖较重的子应用，把路由模块的导入推迟到第一次访问
+
+    Args:
+        factory: 构建应用的函数
+    """
+
+    def __init__(self, factory: Callable[[], ASGIApp]):
+        self._factory = factory
+        self._app: Optional[ASGIApp] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """是否已构建"""
+        return self._app is not None
+
+    @property
+    def app(self) -> ASGIApp:
+        """构建（仅一次）并返回应用"""
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self._factory()
+        return self._app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
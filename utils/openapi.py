@@ -0,0 +1,176 @@
+"""OpenAPI 文档缓存"""
+
+import hashlib
+import json
+import os
+import sys
+import types
+from typing import Iterable, Optional, Set
+
+from fastapi import FastAPI
+
+from config.settings import settings
+
+
+# 项目根目录（只有其中的模块参与指纹计算）
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 缓存文件中保存指纹的字段（读取时移除）
+FINGERPRINT_KEY = "x-route-fingerprint"
+
+
+def _project_module(name: Optional[str]) -> Optional[types.ModuleType]:
+    """名称对应的已加载项目模块（第三方库、内置模块为 None）"""
+    module = sys.modules.get(name) if name else None
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if not path.startswith(PROJECT_DIR + os.sep) or "site-packages" in path:
+        return None
+    return module
+
+
+def _referenced_modules(names: Iterable[str]) -> Set[str]:
+    """
+    接口模块及其引用的项目模块（递归）
+
+    模块全局变量中的模块、类、函数所在的项目模块都计入（如接口引用的
+    请求、响应模型），与模块是否在运行时按需加载无关
+    """
+    found: Set[str] = set()
+    pending = [name for name in names if _project_module(name) is not None]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+        for value in vars(sys.modules[name]).values():
+            if isinstance(value, types.ModuleType):
+                referenced = value.__name__
+            else:
+                referenced = getattr(value, "__module__", None)
+            if isinstance(referenced, str) and referenced not in found:
+                if _project_module(referenced) is not None:
+                    pending.append(referenced)
+    return found
+
+
+def route_fingerprint(app: FastAPI) -> str:
+    """
+    路由和模型定义的指纹
+
+    包含路由表（路径、方法、名称）以及接口模块和其引用的项目模块源码，
+    接口或模型代码变化时指纹随之变化，无需修改版本号
+
+    Args:
+        app: FastAPI 应用
+
+    Returns:
+        str: 指纹（SHA-256）
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        repr((app.title, app.version, app.description, app.openapi_version)).encode()
+    )
+    endpoint_modules = set()
+    for route in app.routes:
+        methods = sorted(getattr(route, "methods", None) or ())
+        digest.update(repr((route.path, methods, route.name)).encode())
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is not None:
+            endpoint_modules.add(endpoint.__module__)
+    for name in sorted(_referenced_modules(endpoint_modules)):
+        digest.update(name.encode())
+        with open(sys.modules[name].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def schema_path(name: str) -> str:
+    """OpenAPI 文档缓存文件路径"""
+    return os.path.join(settings.OPENAPI_CACHE_DIR, f"{name}.json")
+
+
+def load_schema(path: str, fingerprint: str) -> Optional[dict]:
+    """
+    读取缓存的 OpenAPI 文档
+
+    Args:
+        path: 缓存文件路径
+        fingerprint: 当前路由指纹，与缓存不一致时视为过期
+
+    Returns:
+        Optional[dict]: OpenAPI 文档，不存在或已过期时为 None
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if schema.pop(FINGERPRINT_KEY, None) != fingerprint:
+        return None
+    return schema
+
+
+def write_schema(app: FastAPI, name: str) -> str:
+    """
+    生成 OpenAPI 文档并写入缓存文件
+
+    Args:
+        app: FastAPI 应用
+        name: 缓存名称
+
+    Returns:
+        str: 缓存文件路径
+    """
+    # 绕过缓存，按当前路由重新生成
+    generate = getattr(app.openapi, "generate", app.openapi)
+    app.openapi_schema = None
+    schema = generate()
+
+    path = schema_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {**schema, FINGERPRINT_KEY: route_fingerprint(app)},
+            f,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def use_cached_openapi(app: FastAPI, name: str) -> None:
+    """
+    让 app.openapi() 优先读取构建时生成的文档
+
+    开发环境始终实时生成，避免改接口后看到旧文档；其他环境读取缓存，
+    缓存不存在或路由指纹不一致（接口、模型代码已变化）时回退为实时生成
+
+    Args:
+        app: FastAPI 应用
+        name: 缓存名称
+    """
+    generate = app.openapi
+
+    def openapi() -> dict:
+        if app.openapi_schema is None:
+            schema = None
+            if not settings.is_development:
+                schema = load_schema(schema_path(name), route_fingerprint(app))
+            app.openapi_schema = schema or generate()
+        return app.openapi_schema
+
+    openapi.generate = generate
+    app.openapi = openapi
+
+
+if __name__ == "__main__":
+    # 构建时生成：python -m utils.openapi
+    import main
+
+    for cache_name, cache_app in (("main", main.app), ("finance", main.finance_app)):
+        print(f"✅ {write_schema(cache_app, cache_name)}")
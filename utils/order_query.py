@@ -0,0 +1,282 @@
+"""订单详情查询"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, tuple_
+from sqlmodel import Session, func, select
+
+from models.driver import Driver
+from models.order_detail import (
+    ORDER_DETAIL_FEE_FIELDS,
+    ORDER_DETAIL_DRIVER_FIELDS,
+    OrderDetailKey,
+)
+from utils.archive import fee_model, order_detail_model, table_of
+from utils.projection import isoformat, select_columns
+
+# 关联键列标签（不返回给前端）
+_ORDER_KEY = "_order_id"
+_PATH_KEY = "_path_id"
+_DRIVER_KEY = "_driver_account_id"
+
+
+def _split_fields(fields: Sequence[str]) -> Tuple[list, list, list]:
+    """按来源表拆分字段：(费用表, 订单详情表, 司机表)"""
+    fee_fields = [field for field in fields if field in ORDER_DETAIL_FEE_FIELDS]
+    driver_fields = [field for field in fields if field in ORDER_DETAIL_DRIVER_FIELDS]
+    detail_fields = [
+        field
+        for field in fields
+        if field not in ORDER_DETAIL_FEE_FIELDS
+        and field not in ORDER_DETAIL_DRIVER_FIELDS
+    ]
+    return fee_fields, detail_fields, driver_fields
+
+
+def probe_order_details_version(
+    db: Session,
+    conditions: Sequence[Any],
+    fields: Sequence[str],
+    include_archived: bool = False,
+) -> Optional[Tuple[int, Optional[datetime], ...]]:
+    """
+    查询订单详情的版本信息，用于条件请求校验
+
+    只读取匹配行数和各来源表的最大 updated_at，不加载详情列
+
+    Args:
+        db: 数据库会话
+        conditions: 费用表筛选条件（基于 fee_model(include_archived)）
+        fields: 返回字段
+        include_archived: 是否包含归档数据
+
+    Returns:
+        Optional[Tuple]: (费用条数, 费用最大更新时间, 订单详情最大更新时间,
+            司机最大更新时间)，无匹配费用时为 None
+    """
+    _, detail_fields, driver_fields = _split_fields(fields)
+    FeeSource = fee_model(include_archived)
+    DetailSource = order_detail_model(include_archived)
+    connection = db.connection()
+
+    total, fee_updated_at = connection.execute(
+        select(func.count(FeeSource.fee_id), func.max(FeeSource.updated_at)).where(
+            *conditions
+        )
+    ).one()
+    if not total:
+        return None
+
+    detail_updated_at = None
+    if detail_fields:
+        detail_updated_at = connection.execute(
+            select(func.max(DetailSource.updated_at)).where(
+                DetailSource.order_id.in_(select(FeeSource.order_id).where(*conditions))
+            )
+        ).scalar()
+
+    driver_updated_at = None
+    if driver_fields:
+        driver_updated_at = connection.execute(
+            select(func.max(Driver.updated_at)).where(
+                Driver.driver_account_id.in_(
+                    select(FeeSource.driver_account_id).where(*conditions)
+                )
+            )
+        ).scalar()
+
+    return total, fee_updated_at, detail_updated_at, driver_updated_at
+
+
+def load_order_details(
+    db: Session,
+    conditions: Sequence[Any],
+    fields: Sequence[str],
+    display_status: Callable[[Any], str],
+    include_archived: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    按字段投影查询订单详情
+
+    只查询 fields 用到的列；不需要订单详情或司机字段时跳过对应表的查询，
+    需要时按关联键批量查询一次
+
+    Args:
+        db: 数据库会话
+        conditions: 费用表筛选条件（基于 fee_model(include_archived)）
+        fields: 返回字段（按 ORDER_DETAIL_FIELDS 顺序）
+        display_status: 状态显示映射
+        include_archived: 是否包含归档数据
+
+    Returns:
+        List[Dict[str, Any]]: 订单详情列表，无匹配费用时为空列表
+    """
+    rows = _load_rows(db, conditions, fields, display_status, include_archived)
+    return [item for _, item in rows]
+
+
+def batch_keys(
+    keys: Sequence[OrderDetailKey], limit: int
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    校验批量查询的键
+
+    Args:
+        keys: 订单详情查询键
+        limit: 单次最多查询的键数
+
+    Returns:
+        List[Tuple[Optional[str], Optional[str]]]: (订单号, 运单号) 列表
+
+    Raises:
+        ValueError: 键为空、超过数量上限或订单号和运单号都为空
+    """
+    if not keys:
+        raise ValueError("订单号/运单号列表不能为空")
+    if len(keys) > limit:
+        raise ValueError(f"单次最多查询 {limit} 个订单")
+    result = []
+    for index, key in enumerate(keys, 1):
+        if not key.order_id and not key.path_id:
+            raise ValueError(f"第 {index} 个订单号和运单号至少传入一个")
+        result.append((key.order_id or None, key.path_id or None))
+    return result
+
+
+def load_order_details_batch(
+    db: Session,
+    keys: Sequence[Tuple[Optional[str], Optional[str]]],
+    fields: Sequence[str],
+    display_status: Callable[[Any], str],
+    include_archived: bool = False,
+    scope: Sequence[Any] = (),
+) -> List[List[Dict[str, Any]]]:
+    """
+    批量查询多个订单的详情
+
+    所有键合并为一次费用表查询，订单详情表、司机表也各查询一次
+
+    Args:
+        db: 数据库会话
+        keys: (订单号, 运单号) 列表（见 batch_keys），未传入的为 None
+        fields: 返回字段（按 ORDER_DETAIL_FIELDS 顺序）
+        display_status: 状态显示映射
+        include_archived: 是否包含归档数据
+        scope: 附加的费用表筛选条件（如租户范围，基于 fee_model(include_archived)）
+
+    Returns:
+        List[List[Dict[str, Any]]]: 与 keys 顺序一致的订单详情列表，
+            无匹配费用的键对应空列表
+    """
+    FeeSource = fee_model(include_archived)
+    order_ids = {order_id for order_id, path_id in keys if not path_id}
+    path_ids = {path_id for order_id, path_id in keys if not order_id}
+    pairs = {(order_id, path_id) for order_id, path_id in keys if order_id and path_id}
+
+    conditions = []
+    if order_ids:
+        conditions.append(FeeSource.order_id.in_(order_ids))
+    if path_ids:
+        conditions.append(FeeSource.path_id.in_(path_ids))
+    if pairs:
+        conditions.append(tuple_(FeeSource.order_id, FeeSource.path_id).in_(pairs))
+    if not conditions:
+        return [[] for _ in keys]
+
+    rows = _load_rows(
+        db, [or_(*conditions), *scope], fields, display_status, include_archived, True
+    )
+
+    # 按键分组，同一费用可能同时匹配多个键
+    grouped: Dict[Tuple[Optional[str], Optional[str]], List[Dict[str, Any]]] = {}
+    for fee, item in rows:
+        order_id, path_id = fee[_ORDER_KEY], fee[_PATH_KEY]
+        for key in ((order_id, None), (None, path_id), (order_id, path_id)):
+            grouped.setdefault(key, []).append(item)
+    return [list(grouped.get(key, [])) for key in keys]
+
+
+def _load_rows(
+    db: Session,
+    conditions: Sequence[Any],
+    fields: Sequence[str],
+    display_status: Callable[[Any], str],
+    include_archived: bool = False,
+    with_keys: bool = False,
+) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    查询订单详情，返回 (费用行, 订单详情) 列表
+
+    with_keys 时费用行包含订单号、运单号关联键（_ORDER_KEY、_PATH_KEY）
+    """
+    fee_fields, detail_fields, driver_fields = _split_fields(fields)
+    FeeSource = fee_model(include_archived)
+    DetailSource = order_detail_model(include_archived)
+
+    # 费用表：投影所需列和关联键
+    columns = select_columns(table_of(FeeSource), fee_fields)
+    if detail_fields or with_keys:
+        columns.append(FeeSource.order_id.label(_ORDER_KEY))
+    if with_keys:
+        columns.append(FeeSource.path_id.label(_PATH_KEY))
+    if driver_fields:
+        columns.append(FeeSource.driver_account_id.label(_DRIVER_KEY))
+
+    connection = db.connection()
+    fee_rows = connection.execute(select(*columns).where(*conditions)).all()
+    if not fee_rows:
+        return []
+
+    # 订单详情表：同一订单号只取第一条
+    details: Dict[str, Any] = {}
+    if detail_fields:
+        order_ids = {row._mapping[_ORDER_KEY] for row in fee_rows}
+        detail_rows = connection.execute(
+            select(
+                DetailSource.order_id.label(_ORDER_KEY),
+                *select_columns(table_of(DetailSource), detail_fields),
+            ).where(DetailSource.order_id.in_(order_ids))
+        ).all()
+        for row in detail_rows:
+            details.setdefault(row._mapping[_ORDER_KEY], row._mapping)
+
+    # 司机表
+    drivers: Dict[str, Any] = {}
+    if driver_fields:
+        driver_ids = {
+            row._mapping[_DRIVER_KEY] for row in fee_rows if row._mapping[_DRIVER_KEY]
+        }
+        if driver_ids:
+            driver_rows = connection.execute(
+                select(
+                    Driver.driver_account_id.label(_DRIVER_KEY),
+                    *select_columns(Driver.__table__, driver_fields),
+                ).where(Driver.driver_account_id.in_(driver_ids))
+            ).all()
+            drivers = {row._mapping[_DRIVER_KEY]: row._mapping for row in driver_rows}
+
+    rows = []
+    for row in fee_rows:
+        fee = row._mapping
+        detail = details.get(fee[_ORDER_KEY]) if detail_fields else None
+        driver = drivers.get(fee[_DRIVER_KEY]) if driver_fields else None
+
+        item = {}
+        for field in fields:
+            if field in ORDER_DETAIL_FEE_FIELDS:
+                item[field] = fee[field]
+            elif field in ORDER_DETAIL_DRIVER_FIELDS:
+                item[field] = driver[field] if driver else None
+            else:
+                item[field] = detail[field] if detail else None
+
+        if "status" in item:
+            item["status"] = display_status(item["status"])
+        if "order_time" in item:
+            item["order_time"] = isoformat(item["order_time"])
+        if "finish_time" in item:
+            item["finish_time"] = isoformat(item["finish_time"])
+        rows.append((fee, item))
+
+    return rows
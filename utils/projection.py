@@ -0,0 +1,147 @@
+"""列投影查询工具"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table
+
+Converter = Callable[[Any], Any]
+
+# 每个映射器缓存的字段组合上限
+MAX_CACHED_PROJECTIONS = 128
+
+
+def isoformat(value: Any) -> Optional[str]:
+    """
+    时间字段转 ISO 字符串
+
+    Args:
+        value: 时间值
+
+    Returns:
+        Optional[str]: ISO 格式字符串，值为空时返回 None
+    """
+    return value.isoformat() if value is not None else None
+
+
+def isoformat_or_empty(value: Any) -> str:
+    """
+    时间字段转 ISO 字符串，值为空时返回空字符串
+
+    Args:
+        value: 时间值
+
+    Returns:
+        str: ISO 格式字符串
+    """
+    return value.isoformat() if value is not None else ""
+
+
+def select_columns(
+    table: Table, fields: Sequence[str], aliases: Optional[Dict[str, str]] = None
+) -> list:
+    """
+    根据响应字段构建投影列
+
+    Args:
+        table: 数据表
+        fields: 响应字段名
+        aliases: 响应字段名到列名的映射（字段名与列名不一致时）
+
+    Returns:
+        list: 以响应字段名为标签的列
+    """
+    aliases = aliases or {}
+    return [table.c[aliases.get(field, field)].label(field) for field in fields]
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Tuple[str, ...]:
+    """
+    解析 fields 查询参数
+
+    Args:
+        fields: 逗号分隔的字段名，为空时返回全部字段
+        allowed: 允许的字段名（决定返回顺序）
+
+    Returns:
+        Tuple[str, ...]: 按 allowed 顺序排列的字段名
+
+    Raises:
+        ValueError: 存在不支持的字段
+    """
+    if not fields or not fields.strip():
+        return tuple(allowed)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if not requested:
+        return tuple(allowed)
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"不支持的字段: {', '.join(sorted(unknown))}")
+    return tuple(field for field in allowed if field in requested)
+
+
+class RowMapper:
+    """
+    行映射器
+
+    创建时预先计算字段顺序和需要转换的列，
+    将 Core 查询返回的行直接映射为响应字典，不经过 ORM 对象和身份映射
+    """
+
+    __slots__ = ("keys", "_converters", "_converted", "_projections")
+
+    def __init__(
+        self, keys: Sequence[str], converters: Optional[Dict[str, Converter]] = None
+    ):
+        """
+        Args:
+            keys: 字段名，顺序与查询列一致
+            converters: 字段转换函数
+        """
+        converters = converters or {}
+        self.keys = tuple(keys)
+        self._converters = converters
+        self._projections: Dict[Tuple[str, ...], "RowMapper"] = {}
+        self._converted = tuple(
+            (index, key, converters[key])
+            for index, key in enumerate(self.keys)
+            if key in converters
+        )
+
+    def __call__(self, row: Sequence[Any]) -> Dict[str, Any]:
+        item = dict(zip(self.keys, row))
+        for index, key, convert in self._converted:
+            item[key] = convert(row[index])
+        return item
+
+    def project(self, keys: Sequence[str]) -> "RowMapper":
+        """
+        获取字段子集的映射器（按字段组合缓存）
+
+        Args:
+            keys: 字段名，顺序与查询列一致
+
+        Returns:
+            RowMapper: 使用相同转换函数的映射器
+        """
+        keys = tuple(keys)
+        if keys == self.keys:
+            return self
+        mapper = self._projections.get(keys)
+        if mapper is None:
+            mapper = RowMapper(keys, self._converters)
+            if len(self._projections) < MAX_CACHED_PROJECTIONS:
+                self._projections[keys] = mapper
+        return mapper
+
+    def map_all(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """
+        批量映射
+
+        Args:
+            rows: 查询结果行
+
+        Returns:
+            List[Dict[str, Any]]: 响应字典列表
+        """
+        return [self(row) for row in rows]
@@ -0,0 +1,260 @@
+"""充值记录（只追加）：审核队列、审核入账、按账户分页查询历史"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlmodel import Session, or_, select
+
+from models.account import Account
+from models.enums import RechargeStatusEnum
+from models.recharge import RechargeRecord
+from utils.keyset import after_cursor, encode_cursor
+
+
+class ApprovalResult(NamedTuple):
+    """审核入账结果"""
+
+    records: List[RechargeRecord]  # 审核通过的充值记录
+    accounts: List[Account]  # 余额有变动的账户
+    skipped: List[str]  # 跳过的充值记录ID
+
+
+def claim_recharge_reviews(
+    db: Session,
+    reviewer_id: str,
+    limit: int,
+    lease_seconds: int,
+    now: Optional[datetime] = None,
+) -> List[RechargeRecord]:
+    """
+    领取待审核的充值记录（按申请时间先后）
+
+    使用 SELECT ... FOR UPDATE SKIP LOCKED 跳过其他审核人正在领取的行，
+    领取后写入领取人和到期时间；到期未审核的记录可被其他审核人重新领取，
+    审核人重复领取时续期自己未到期的记录。查询走
+    (recharge_status, created_at) 索引
+
+    Args:
+        db: 数据库会话
+        reviewer_id: 审核人ID
+        limit: 领取数量
+        lease_seconds: 领取锁定时间（秒）
+        now: 当前时间（UTC）
+
+    Returns:
+        List[RechargeRecord]: 领取到的充值记录
+    """
+    now = now or datetime.utcnow()
+    records = db.exec(
+        select(RechargeRecord)
+        .where(
+            RechargeRecord.recharge_status == RechargeStatusEnum.UNDER_REVIEW,
+            or_(
+                RechargeRecord.review_lease_until.is_(None),
+                RechargeRecord.review_lease_until < now,
+                RechargeRecord.review_claimed_by == reviewer_id,
+            ),
+        )
+        .order_by(RechargeRecord.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    lease_until = now + timedelta(seconds=lease_seconds)
+    for record in records:
+        record.review_claimed_by = reviewer_id
+        record.review_lease_until = lease_until
+        db.add(record)
+    db.commit()
+    return _reload_records(db, records)
+
+
+def approve_claimed_recharges(
+    db: Session,
+    reviewer_id: str,
+    recharge_ids: Sequence[str],
+    now: Optional[datetime] = None,
+) -> ApprovalResult:
+    """
+    批量审核通过自己领取的充值记录（同一事务入账）
+
+    领取已到期、已被他人领取或已审核的记录跳过
+
+    Args:
+        db: 数据库会话
+        reviewer_id: 审核人ID
+        recharge_ids: 充值记录ID列表
+        now: 当前时间（UTC）
+
+    Returns:
+        ApprovalResult: 审核入账结果
+    """
+    now = now or datetime.utcnow()
+    recharge_ids = list(dict.fromkeys(recharge_ids))
+    records = db.exec(
+        select(RechargeRecord)
+        .where(
+            RechargeRecord.recharge_id.in_(recharge_ids),
+            RechargeRecord.recharge_status == RechargeStatusEnum.UNDER_REVIEW,
+            RechargeRecord.review_claimed_by == reviewer_id,
+            RechargeRecord.review_lease_until >= now,
+        )
+        .order_by(RechargeRecord.recharge_id)
+        .with_for_update()
+    ).all()
+
+    result = _approve(db, records, reviewer_id, now)
+    approved = {record.recharge_id for record in result.records}
+    skipped = [
+        recharge_id for recharge_id in recharge_ids if recharge_id not in approved
+    ]
+    return result._replace(skipped=skipped)
+
+
+def approve_account_recharge(
+    db: Session,
+    company_account_id: str,
+    recharge_id: Optional[str] = None,
+    reviewer_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Optional[ApprovalResult]:
+    """
+    审核通过账户的一条充值记录（不检查领取，平台直接审核）
+
+    Args:
+        db: 数据库会话
+        company_account_id: 账户ID
+        recharge_id: 充值记录ID，为空时审核最早的待审核记录
+        reviewer_id: 审核人ID
+        now: 当前时间（UTC）
+
+    Returns:
+        Optional[ApprovalResult]: 审核入账结果，没有待审核记录时为 None
+    """
+    query = select(RechargeRecord).where(
+        RechargeRecord.company_account_id == company_account_id,
+        RechargeRecord.recharge_status == RechargeStatusEnum.UNDER_REVIEW,
+    )
+    if recharge_id is not None:
+        query = query.where(RechargeRecord.recharge_id == recharge_id)
+    record = db.exec(
+        query.order_by(RechargeRecord.created_at).limit(1).with_for_update()
+    ).first()
+    if record is None:
+        return None
+    return _approve(db, [record], reviewer_id, now or datetime.utcnow())
+
+
+def _approve(
+    db: Session,
+    records: Sequence[RechargeRecord],
+    reviewer_id: Optional[str],
+    now: datetime,
+) -> ApprovalResult:
+    """
+    已加锁的待审核记录入账并提交
+
+    按账户ID顺序锁定账户行（多名审核人并发时不会死锁），同一账户的多条记录
+    合并为一次余额更新
+    """
+    if not records:
+        return ApprovalResult([], [], [])
+
+    credits: Dict[str, int] = {}
+    for record in records:
+        credits[record.company_account_id] = (
+            credits.get(record.company_account_id, 0) + record.received_amount
+        )
+    accounts = db.exec(
+        select(Account)
+        .where(Account.company_account_id.in_(credits))
+        .order_by(Account.company_account_id)
+        .with_for_update()
+    ).all()
+    missing = set(credits) - {account.company_account_id for account in accounts}
+    if missing:
+        db.rollback()
+        raise LookupError(f"账户记录不存在: {', '.join(sorted(missing))}")
+
+    for account in accounts:
+        account.company_account_balance += credits[account.company_account_id]
+        account.updated_at = now
+        account.company_account_updatetime = now
+        db.add(account)
+    for record in records:
+        record.recharge_status = RechargeStatusEnum.APPROVED
+        record.approved_at = now
+        record.approved_by = reviewer_id
+        record.review_claimed_by = None
+        record.review_lease_until = None
+        db.add(record)
+    db.commit()
+
+    accounts = db.exec(
+        select(Account).where(Account.company_account_id.in_(credits))
+    ).all()
+    return ApprovalResult(_reload_records(db, records), list(accounts), [])
+
+
+def _reload_records(
+    db: Session, records: Sequence[RechargeRecord]
+) -> List[RechargeRecord]:
+    """提交后一次查询刷新充值记录（避免逐行懒加载）"""
+    if not records:
+        return []
+    recharge_ids = [record.recharge_id for record in records]
+    return list(
+        db.exec(
+            select(RechargeRecord)
+            .where(RechargeRecord.recharge_id.in_(recharge_ids))
+            .order_by(RechargeRecord.created_at, RechargeRecord.recharge_id)
+        ).all()
+    )
+
+
+def list_recharge_history(
+    db: Session,
+    company_account_id: str,
+    size: int,
+    cursor: Optional[str] = None,
+    scope: Sequence[Any] = (),
+) -> Tuple[List[RechargeRecord], Optional[str]]:
+    """
+    按 (账户ID, 申请时间) 键集分页查询充值历史（新的在前）
+
+    走 (company_account_id, created_at, recharge_id) 索引，翻页只比较
+    上一页最后一条的位置，不使用 OFFSET，深翻页不变慢；游标带有申请时间，
+    查询只访问相关的月分区
+
+    Args:
+        db: 数据库会话
+        company_account_id: 账户ID
+        size: 每页数量
+        cursor: 上一页返回的游标，为空时查询第一页
+        scope: 附加的筛选条件（如租户范围）
+
+    Returns:
+        Tuple[List[RechargeRecord], Optional[str]]: (本页记录, 下一页游标)
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    query = select(RechargeRecord).where(
+        RechargeRecord.company_account_id == company_account_id, *scope
+    )
+    if cursor:
+        query = query.where(
+            after_cursor(RechargeRecord.created_at, RechargeRecord.recharge_id, cursor)
+        )
+    records = list(
+        db.exec(
+            query.order_by(
+                RechargeRecord.created_at.desc(), RechargeRecord.recharge_id.desc()
+            ).limit(size + 1)
+        ).all()
+    )
+    next_cursor = None
+    if len(records) > size:
+        last = records[size - 1]
+        next_cursor = encode_cursor(last.created_at, last.recharge_id)
+    return records[:size], next_cursor
@@ -32,9 +32,14 @@ class ResponseCode:
     UNAUTHORIZED = 401
     FORBIDDEN = 403
     NOT_FOUND = 404
+    CONFLICT = 409
+    PAYLOAD_TOO_LARGE = 413
+    UNPROCESSABLE_ENTITY = 422
+    TOO_MANY_REQUESTS = 429
 
     # 服务器错误
     INTERNAL_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
 
 
 def success_response(
@@ -107,6 +112,46 @@ def not_found_response(message: str = "资源不存在") -> JSONResponse:
     )
 
 
+def conflict_response(message: str = "请求冲突") -> JSONResponse:
+    """请求冲突响应"""
+    return error_response(
+        message=message,
+        code=ResponseCode.CONFLICT,
+        http_status=status.HTTP_409_CONFLICT,
+    )
+
+
+def payload_too_large_response(message: str = "上传内容过大") -> JSONResponse:
+    """请求体过大响应"""
+    return error_response(
+        message=message,
+        code=ResponseCode.PAYLOAD_TOO_LARGE,
+        http_status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    )
+
+
+def unprocessable_response(message: str = "请求无法处理") -> JSONResponse:
+    """请求无法处理响应"""
+    return error_response(
+        message=message,
+        code=ResponseCode.UNPROCESSABLE_ENTITY,
+        http_status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
+
+
+def too_many_requests_response(
+    message: str = "请求过于频繁", retry_after: int = 1
+) -> JSONResponse:
+    """请求过多响应"""
+    response = error_response(
+        message=message,
+        code=ResponseCode.TOO_MANY_REQUESTS,
+        http_status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
 def internal_error_response(message: str = "服务器内部错误") -> JSONResponse:
     """服务器错误响应"""
     return error_response(
@@ -114,3 +159,16 @@ def internal_error_response(message: str = "服务器内部错误") -> JSONRespo
         code=ResponseCode.INTERNAL_ERROR,
         http_status=status.HTTP_500_INTERNAL_SERVER_ERROR,
     )
+
+
+def service_unavailable_response(
+    message: str = "服务繁忙", retry_after: int = 1
+) -> JSONResponse:
+    """服务不可用响应"""
+    response = error_response(
+        message=message,
+        code=ResponseCode.SERVICE_UNAVAILABLE,
+        http_status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response.headers["Retry-After"] = str(retry_after)
+    return response
@@ -0,0 +1,159 @@
+"""文件响应：支持 Range 请求，服务器支持时使用 sendfile 零拷贝发送"""
+
+import os
+import re
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# ASGI 零拷贝扩展（服务器实现时通过 sendfile 发送文件）
+ZEROCOPY_EXTENSION = "http.response.zerocopy"
+
+# 不支持零拷贝时的分块大小（字节）
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单个字节范围
+
+    Notes:
+        多个范围（multipart/byteranges）不支持，按未指定 Range 处理
+
+    Args:
+        header: Range 头部值
+        size: 文件大小
+
+    Returns:
+        Optional[Tuple[int, int]]: (起始位置, 结束位置)，含结束位置；
+        未指定或格式不支持时为 None
+
+    Raises:
+        ValueError: 范围无法满足（应返回 416）
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N：最后 N 个字节
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+    first = int(start)
+    last = int(end) if end else size - 1
+    if first >= size or last < first:
+        raise ValueError("unsatisfiable range")
+    return first, min(last, size - 1)
+
+
+class SendfileResponse(Response):
+    """
+    文件响应
+
+    支持单个字节范围的 Range / If-Range 请求（206 / 416），服务器声明
+    http.response.zerocopy 扩展时交给服务器用 sendfile 发送，否则在线程中
+    分块读取发送，不把整个文件读入内存
+
+    Args:
+        path: 文件路径
+        stat_result: 文件信息
+        media_type: 内容类型
+        headers: 附加响应头（ETag、Cache-Control 等）
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        media_type: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.path = path
+        self.size = stat_result.st_size
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+
+    def _resolve_range(self, scope: Scope) -> Optional[Tuple[int, int]]:
+        """按请求头确定发送范围，不满足时抛出 ValueError"""
+        request_headers = Headers(scope=scope)
+        if_range = request_headers.get("if-range")
+        if if_range is not None and if_range != self.headers.get("etag"):
+            # 客户端持有的版本已变化，返回完整文件
+            return None
+        return parse_range(request_headers.get("range"), self.size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            byte_range = self._resolve_range(scope)
+        except ValueError:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{self.size}"
+            self.headers["content-length"] = "0"
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if byte_range is None:
+            offset, count = 0, self.size
+        else:
+            self.status_code = 206
+            offset, last = byte_range
+            count = last - offset + 1
+            self.headers["content-range"] = f"bytes {offset}-{last}/{self.size}"
+        self.headers["content-length"] = str(count)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": ZEROCOPY_EXTENSION,
+                        "file": file,
+                        "offset": offset,
+                        "count": count,
+                    }
+                )
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(offset)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        await send({"type": "http.response.body", "body": b""})
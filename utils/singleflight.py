@@ -0,0 +1,148 @@
+"""并发相同读请求合并（single-flight）"""
+
+import asyncio
+import functools
+import inspect
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+# 参与合并键的条件请求头（结果可能是 304）
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+
+class SharedResponse(NamedTuple):
+    """合并请求共享的响应（序列化后的字节）"""
+
+    status_code: int
+    body: bytes
+    raw_headers: Tuple[Tuple[bytes, bytes], ...]
+
+    def to_response(self) -> Response:
+        """为每个请求生成独立的响应对象（中间件会修改响应头）"""
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers = list(self.raw_headers)
+        return response
+
+
+class SingleFlightStats:
+    """合并统计：executed 为实际执行次数，coalesced 为被合并的请求数"""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def incr(self, scope: str, name: str) -> None:
+        counts = self._counts.setdefault(scope, {"executed": 0, "coalesced": 0})
+        counts[name] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {scope: dict(counts) for scope, counts in self._counts.items()}
+
+    def reset(self) -> None:
+        self._counts.clear()
+
+
+single_flight_stats = SingleFlightStats()
+
+# 进行中的请求：合并键 -> 结果
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+
+def _flight_key(scope: str, request: Request, params: Dict[str, Any]) -> Hashable:
+    """合并键：接口范围 + 接口参数 + 条件请求头"""
+    return (
+        scope,
+        tuple(sorted((name, repr(value)) for name, value in params.items())),
+        tuple(request.headers.get(header) for header in CONDITIONAL_HEADERS),
+    )
+
+
+def single_flight(scope: str):
+    """
+    读接口请求合并装饰器（放在路由装饰器下方）
+
+    参数相同的并发请求只执行一次接口函数，其余请求等待并共享同一份序列化
+    后的响应字节；执行结束即移除，不做缓存。同步接口函数在线程池中执行，
+    等待期间不阻塞事件循环
+
+    Args:
+        scope: 接口范围
+    """
+
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        has_request = "request" in signature.parameters
+        is_coroutine = inspect.iscoroutinefunction(endpoint)
+        # 不参与合并键的参数（会话、请求对象）
+        excluded = {
+            name
+            for name, parameter in signature.parameters.items()
+            if parameter.annotation in (Session, Request)
+        }
+        parameters = list(signature.parameters.values())
+        if not has_request:
+            parameters.append(
+                inspect.Parameter(
+                    "request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+                )
+            )
+
+        async def call(kwargs: Dict[str, Any]) -> Response:
+            if is_coroutine:
+                return await endpoint(**kwargs)
+            return await run_in_threadpool(endpoint, **kwargs)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            request = kwargs["request"] if has_request else kwargs.pop("request")
+            params = {
+                name: value for name, value in kwargs.items() if name not in excluded
+            }
+            key = _flight_key(scope, request, params)
+
+            in_flight = _in_flight.get(key)
+            if in_flight is not None:
+                shared: Optional[SharedResponse] = await asyncio.shield(in_flight)
+                if shared is not None:
+                    single_flight_stats.incr(scope, "coalesced")
+                    return shared.to_response()
+                # 首个请求的响应无法共享（如流式响应），自行执行
+                single_flight_stats.incr(scope, "executed")
+                return await call(kwargs)
+
+            future = asyncio.get_running_loop().create_future()
+            _in_flight[key] = future
+            single_flight_stats.incr(scope, "executed")
+            try:
+                response = await call(kwargs)
+            except asyncio.CancelledError:
+                # 首个请求被取消（客户端断开），等待者各自执行
+                future.set_result(None)
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                # 没有等待者时避免 "exception was never retrieved"
+                future.exception()
+                raise
+            finally:
+                _in_flight.pop(key, None)
+
+            body = getattr(response, "body", None)
+            if body is None or response.background is not None:
+                future.set_result(None)
+                return response
+
+            shared = SharedResponse(
+                status_code=response.status_code,
+                body=bytes(body),
+                raw_headers=tuple(response.raw_headers),
+            )
+            future.set_result(shared)
+            return shared.to_response()
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
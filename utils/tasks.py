@@ -0,0 +1,322 @@
+"""进程内后台任务（事务提交后的副作用：推送分发、预警检查等）"""
+
+import asyncio
+import inspect
+import random
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from config.database import DecayingAverage
+from config.settings import settings
+
+
+class Job:
+    """队列中的一个任务"""
+
+    __slots__ = ("func", "args", "kwargs", "key", "attempts", "enqueued_at")
+
+    def __init__(self, func: Callable, args, kwargs, key: Optional[Hashable]):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def name(self) -> str:
+        return getattr(self.func, "__qualname__", repr(self.func))
+
+
+class TaskQueue:
+    """
+    命名队列
+
+    Args:
+        name: 队列名称
+        concurrency: 并发执行数
+        max_size: 排队任务数上限，超过时丢弃新任务
+        max_retries: 失败重试次数
+        retry_backoff: 首次重试等待时间（秒），之后每次翻倍
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 1,
+        max_size: int = 10000,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.queue: Optional[asyncio.Queue] = None
+        self.in_flight = 0
+        self.waiting_retry = 0
+        self.counts: Dict[str, int] = {
+            "processed": 0,
+            "failed": 0,
+            "retried": 0,
+            "dropped": 0,
+        }
+        # 排队等待时间和执行时间（秒）
+        self.wait_time = DecayingAverage(alpha=0.2, half_life=30.0)
+        self.run_time = DecayingAverage(alpha=0.2, half_life=30.0)
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def retry_delay(self, attempts: int) -> float:
+        """第 attempts 次重试前的等待时间（带抖动，避免同时重试）"""
+        delay = self.retry_backoff * (2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def snapshot(self) -> dict:
+        return {
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "waiting_retry": self.waiting_retry,
+            "concurrency": self.concurrency,
+            **self.counts,
+            "wait_time": self.wait_time.value(),
+            "run_time": self.run_time.value(),
+        }
+
+
+class TaskRuntime:
+    """
+    后台任务运行时
+
+    - 命名队列，每个队列独立限制并发数
+    - 失败按指数退避重试，超过次数后记录并丢弃
+    - 相同 key 的任务排队期间只保留一个（开始执行后可再次入队）
+    - 周期任务按间隔入队
+    - 关闭时停止接收新任务，等待已入队任务执行完（drain）
+
+    在应用 lifespan 中启动；未启动时首次入队会在当前事件循环中自动启动
+    """
+
+    def __init__(self):
+        self.queues: Dict[str, TaskQueue] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self._periodic: Dict[Hashable, asyncio.Task] = {}
+        self._retry_handles: Set[asyncio.TimerHandle] = set()
+        self._pending_keys: Set[Hashable] = set()
+        self._draining = False
+
+    def register_queue(self, name: str, **options) -> TaskQueue:
+        """
+        注册队列（重复注册时返回已有队列）
+
+        Args:
+            name: 队列名称
+            options: TaskQueue 参数
+        """
+        queue = self.queues.get(name)
+        if queue is None:
+            queue = TaskQueue(name, **options)
+            self.queues[name] = queue
+            if self._loop is not None:
+                self._start_queue(queue)
+        return queue
+
+    def start(self) -> None:
+        """在当前事件循环中启动所有队列的执行协程"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # 绑定到新的事件循环（测试中每个客户端一个事件循环），丢弃旧状态
+        self._reset()
+        self._loop = loop
+        self._draining = False
+        for queue in self.queues.values():
+            self._start_queue(queue)
+
+    def _start_queue(self, queue: TaskQueue) -> None:
+        queue.queue = asyncio.Queue()
+        queue.in_flight = 0
+        queue.waiting_retry = 0
+        for _ in range(queue.concurrency):
+            self._workers.append(self._loop.create_task(self._worker(queue)))
+
+    def _reset(self) -> None:
+        for task in [*self._workers, *self._periodic.values()]:
+            task.cancel()
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._workers.clear()
+        self._periodic.clear()
+        self._retry_handles.clear()
+        self._pending_keys.clear()
+        self._loop = None
+
+    def enqueue(
+        self,
+        queue_name: str,
+        func: Callable,
+        *args,
+        key: Optional[Hashable] = None,
+        **kwargs,
+    ) -> bool:
+        """
+        任务入队（同步函数在线程池中执行）
+
+        Args:
+            queue_name: 队列名称
+            func: 任务函数
+            args: 位置参数
+            key: 去重键，相同 key 的任务排队期间只保留一个
+            kwargs: 关键字参数
+
+        Returns:
+            bool: 是否入队（关闭中、队列已满或重复时为 False）
+        """
+        self.start()
+        queue = self.queues[queue_name]
+        if self._draining:
+            queue.counts["dropped"] += 1
+            return False
+        return self._put(queue, Job(func, args, kwargs, key))
+
+    def _put(self, queue: TaskQueue, job: Job) -> bool:
+        if job.key is not None:
+            if (queue.name, job.key) in self._pending_keys:
+                return False
+            self._pending_keys.add((queue.name, job.key))
+        if queue.depth >= queue.max_size:
+            queue.counts["dropped"] += 1
+            self._pending_keys.discard((queue.name, job.key))
+            print(f"后台任务队列 {queue.name} 已满，丢弃任务 {job.name}")
+            return False
+        queue.queue.put_nowait(job)
+        return True
+
+    def every(
+        self, interval: float, queue_name: str, func: Callable, key: Hashable
+    ) -> None:
+        """
+        注册周期任务（相同 key 只注册一次），每隔 interval 秒以 key 入队
+
+        Args:
+            interval: 间隔（秒）
+            queue_name: 队列名称
+            func: 任务函数
+            key: 周期任务标识，同时作为入队去重键
+        """
+        self.start()
+        if key in self._periodic and not self._periodic[key].done():
+            return
+
+        async def tick():
+            while True:
+                await asyncio.sleep(interval)
+                if not self._draining:
+                    self.enqueue(queue_name, func, key=key)
+
+        self._periodic[key] = self._loop.create_task(tick())
+
+    async def _worker(self, queue: TaskQueue):
+        while True:
+            job: Job = await queue.queue.get()
+            self._pending_keys.discard((queue.name, job.key))
+            started = time.monotonic()
+            queue.wait_time.add(started - job.enqueued_at)
+            queue.in_flight += 1
+            try:
+                await self._call(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._on_failure(queue, job, e)
+            else:
+                queue.counts["processed"] += 1
+            finally:
+                queue.in_flight -= 1
+                queue.run_time.add(time.monotonic() - started)
+                queue.queue.task_done()
+
+    @staticmethod
+    async def _call(job: Job) -> Any:
+        if inspect.iscoroutinefunction(job.func):
+            return await job.func(*job.args, **job.kwargs)
+        return await run_in_threadpool(job.func, *job.args, **job.kwargs)
+
+    def _on_failure(self, queue: TaskQueue, job: Job, error: Exception) -> None:
+        job.attempts += 1
+        if job.attempts > queue.max_retries or self._draining:
+            queue.counts["failed"] += 1
+            print(f"后台任务 {queue.name}/{job.name} 失败: {error}")
+            return
+
+        queue.counts["retried"] += 1
+        queue.waiting_retry += 1
+
+        def retry():
+            self._retry_handles.discard(handle)
+            queue.waiting_retry -= 1
+            job.enqueued_at = time.monotonic()
+            self._put(queue, job)
+
+        handle = self._loop.call_later(queue.retry_delay(job.attempts), retry)
+        self._retry_handles.add(handle)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        关闭：停止接收新任务和周期任务，等待已入队任务执行完
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 是否在超时前执行完
+        """
+        if self._loop is None:
+            return True
+        self._draining = True
+        for task in self._periodic.values():
+            task.cancel()
+
+        deadline = time.monotonic() + timeout
+        drained = False
+        while time.monotonic() < deadline:
+            if all(
+                queue.depth == 0 and queue.in_flight == 0 and queue.waiting_retry == 0
+                for queue in self.queues.values()
+            ):
+                drained = True
+                break
+            await asyncio.sleep(0.01)
+        if not drained:
+            print(f"后台任务未在 {timeout} 秒内执行完: {self.snapshot()}")
+        await self.stop()
+        return drained
+
+    async def stop(self) -> None:
+        """
+        立即停止：取消执行协程、周期任务和待重试任务（不等待排队中的任务），
+        并等待取消完成，之后可在新的事件循环中重新启动
+        """
+        tasks = [*self._workers, *self._periodic.values()]
+        loop = self._loop
+        self._reset()
+        if tasks and loop is asyncio.get_running_loop():
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """各队列的深度、执行中数量、计数和延迟（用于监控）"""
+        return {name: queue.snapshot() for name, queue in self.queues.items()}
+
+
+task_runtime = TaskRuntime()
+task_runtime.register_queue(
+    "default",
+    concurrency=settings.TASK_DEFAULT_CONCURRENCY,
+    max_size=settings.TASK_MAX_QUEUE_SIZE,
+)
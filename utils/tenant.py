@@ -0,0 +1,54 @@
+"""租户（客户公司）范围：费用、账户查询按调用方所属公司过滤"""
+
+from typing import Any, List, NamedTuple, Optional
+
+from fastapi import Depends, Request
+
+from config.settings import settings
+from utils.auth import ROLE_PLATFORM, Identity, get_identity
+
+
+class Tenant(NamedTuple):
+    """
+    调用方所属租户
+
+    company_id 为 None 时表示平台端，可查看所有公司的数据
+    """
+
+    company_id: Optional[str]
+
+    @property
+    def is_platform(self) -> bool:
+        return self.company_id is None
+
+    def conditions(self, column: Any) -> List[Any]:
+        """
+        租户范围筛选条件
+
+        Args:
+            column: 公司ID列（如 Fee.company_id）
+
+        Returns:
+            List[Any]: 筛选条件，平台端为空列表
+        """
+        if self.company_id is None:
+            return []
+        return [column == self.company_id]
+
+
+def get_tenant(
+    request: Request, identity: Optional[Identity] = Depends(get_identity)
+) -> Tenant:
+    """
+    从请求中获取调用方租户（依赖注入）
+
+    携带令牌时以令牌中的公司为准（平台端不限公司），忽略 TENANT_HEADER；
+    未携带令牌时读取 TENANT_HEADER（所属公司ID）。平台端范围只来自平台端令牌：
+    既没有令牌也没有请求头时不返回任何公司的数据
+    """
+    if identity is not None:
+        if identity.role == ROLE_PLATFORM:
+            return Tenant(None)
+        # 客户端、司机令牌缺少公司时不返回任何公司的数据
+        return Tenant(identity.company_id or "")
+    return Tenant((request.headers.get(settings.TENANT_HEADER) or "").strip())
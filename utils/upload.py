@@ -0,0 +1,280 @@
+"""图片上传：流式解析 multipart 请求体，按内容哈希存储（相同内容只存一份）"""
+
+import hashlib
+import os
+import uuid
+from typing import AsyncIterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+# 可上传的图片字段（费用、订单详情中以逗号分隔保存的图片路径）
+IMAGE_FIELDS = (
+    "highway_bill_imgs",
+    "parking_bill_imgs",
+    "receipt_imgs",
+    "loading_goods_imgs",
+    "loading_car_imgs",
+    "unloading_goods_imgs",
+    "unloading_car_imgs",
+)
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """
+    按文件头判断图片类型（不信任客户端的文件名和 Content-Type）
+
+    Returns:
+        Optional[str]: 扩展名，不是 JPEG / PNG / WebP 时为 None
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+class UploadError(ValueError):
+    """
+    上传内容不合法
+
+    Args:
+        message: 错误信息
+        too_large: 是否因超过大小限制
+    """
+
+    def __init__(self, message: str, too_large: bool = False):
+        super().__init__(message)
+        self.too_large = too_large
+
+
+class StoredFile(NamedTuple):
+    """已保存的上传文件"""
+
+    field: str
+    filename: str
+    path: str
+    sha256: str
+    size: int
+    duplicate: bool
+
+
+class PendingFile:
+    """
+    正在写入的上传文件：分块写入临时文件，同时计算 SHA-256
+
+    Args:
+        store: 所属存储
+        max_bytes: 文件大小上限（字节）
+    """
+
+    # 判断图片类型需要的文件头长度
+    HEAD_SIZE = 12
+
+    def __init__(self, store: "ContentAddressedStore", max_bytes: int):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.temp_path = os.path.join(store.temp_dir, uuid.uuid4().hex)
+        self._file = open(self.temp_path, "wb")
+        self._hash = hashlib.sha256()
+        self._head = b""
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadError(
+                f"单个文件大小超过限制（{self.max_bytes} 字节）", too_large=True
+            )
+        if len(self._head) < self.HEAD_SIZE:
+            self._head += data[: self.HEAD_SIZE - len(self._head)]
+        self._hash.update(data)
+        self._file.write(data)
+
+    def commit(self) -> Tuple[str, str, bool]:
+        """
+        完成写入，按内容哈希改名到最终路径
+
+        Returns:
+            Tuple[str, str, bool]: (存储路径, SHA-256, 是否已存在相同内容)
+
+        Raises:
+            UploadError: 不是支持的图片格式
+        """
+        self._file.close()
+        extension = sniff_extension(self._head)
+        if extension is None:
+            self.abort()
+            raise UploadError("只支持上传 JPEG、PNG、WebP 图片")
+
+        digest = self._hash.hexdigest()
+        path = self.store.path_for(digest, extension)
+        if os.path.exists(path):
+            # 相同内容已上传过，直接复用
+            os.remove(self.temp_path)
+            return path, digest, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.temp_path, path)
+        return path, digest, False
+
+    def abort(self) -> None:
+        """放弃写入，删除临时文件"""
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class ContentAddressedStore:
+    """
+    按内容 SHA-256 存储文件：<root>/<哈希前 2 位>/<哈希><扩展名>
+
+    先写入 <root>/.tmp 下的临时文件，完成后原子改名（临时目录与存储目录在同一
+    文件系统）；目标文件已存在时说明内容相同，删除临时文件即可。文件写入后
+    不再修改，同一路径始终对应同一内容
+
+    Args:
+        root: 存储目录
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.temp_dir = os.path.join(root, ".tmp")
+
+    def path_for(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + extension)
+
+    def open(self, max_bytes: int) -> PendingFile:
+        os.makedirs(self.temp_dir, exist_ok=True)
+        return PendingFile(self, max_bytes)
+
+
+class ImageUploadParser:
+    """
+    流式解析图片上传请求
+
+    请求体按到达的分块交给 python-multipart 解析，文件内容直接写入磁盘，
+    不在内存或临时文件中缓冲整个文件（解析和写盘在线程池中执行，不阻塞事件循环）。
+    普通表单字段忽略
+
+    Args:
+        store: 文件存储
+        max_files: 单次请求最多文件数
+        max_file_bytes: 单个文件大小上限（字节）
+        allowed_fields: 允许的文件字段名
+    """
+
+    def __init__(
+        self,
+        store: ContentAddressedStore,
+        max_files: int = 20,
+        max_file_bytes: int = 10 * 1024 * 1024,
+        allowed_fields: Sequence[str] = IMAGE_FIELDS,
+    ):
+        self.store = store
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.allowed_fields = allowed_fields
+        self.files: List[StoredFile] = []
+        self._headers: List[Tuple[bytes, bytes]] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._field = ""
+        self._filename = ""
+        self._pending: Optional[PendingFile] = None
+        self._opened = 0
+
+    def on_part_begin(self) -> None:
+        self._headers = []
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers.append((self._header_field.lower(), self._header_value))
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        disposition = dict(self._headers).get(b"content-disposition", b"")
+        _, options = parse_options_header(disposition)
+        if b"filename" not in options:
+            return
+        self._field = options.get(b"name", b"").decode("utf-8", "replace")
+        self._filename = options[b"filename"].decode("utf-8", "replace")
+        if self._field not in self.allowed_fields:
+            raise UploadError(f"不支持的图片字段: {self._field}")
+        self._opened += 1
+        if self._opened > self.max_files:
+            raise UploadError(f"单次最多上传 {self.max_files} 个文件")
+        self._pending = self.store.open(self.max_file_bytes)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._pending is not None:
+            self._pending.write(data[start:end])
+
+    def on_part_end(self) -> None:
+        if self._pending is None:
+            return
+        pending, self._pending = self._pending, None
+        path, digest, duplicate = pending.commit()
+        self.files.append(
+            StoredFile(
+                field=self._field,
+                filename=self._filename,
+                path=path.replace(os.sep, "/"),
+                sha256=digest,
+                size=pending.size,
+                duplicate=duplicate,
+            )
+        )
+
+    async def parse(
+        self, headers: Headers, stream: AsyncIterator[bytes]
+    ) -> List[StoredFile]:
+        """
+        解析请求体并保存文件
+
+        Args:
+            headers: 请求头
+            stream: 请求体分块
+
+        Returns:
+            List[StoredFile]: 已保存的文件（按上传顺序）
+
+        Raises:
+            UploadError: 请求格式、文件字段、数量、大小或图片格式不合法
+        """
+        content_type, params = parse_options_header(headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError("请使用 multipart/form-data 上传文件")
+
+        parser = MultipartParser(
+            params[b"boundary"],
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+            },
+        )
+        try:
+            async for chunk in stream:
+                await run_in_threadpool(parser.write, chunk)
+            parser.finalize()
+        finally:
+            # 出错或请求体不完整时删除未写完的文件
+            if self._pending is not None:
+                self._pending.abort()
+                self._pending = None
+        if not self.files:
+            raise UploadError("没有上传文件")
+        return self.files
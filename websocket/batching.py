@@ -0,0 +1,130 @@
+"""推送消息批量发送"""
+
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, List, Optional
+
+from fastapi import WebSocket
+
+from websocket.codec import JSON, Payload
+
+# 无 fee_id 的消息使用递增序号作为键，不参与合并
+_sequence = itertools.count()
+
+
+def coalesce_key(message: dict) -> Hashable:
+    """
+    消息合并键：同一 fee_id 的后续消息覆盖之前未发送的消息
+
+    Args:
+        message: 推送消息
+
+    Returns:
+        Hashable: 合并键
+    """
+    fee_id = message.get("fee_id")
+    if fee_id is None and isinstance(message.get("data"), dict):
+        fee_id = message["data"].get("fee_id")
+    if fee_id is None:
+        return ("seq", next(_sequence))
+    return ("fee", fee_id)
+
+
+class MessageBatcher:
+    """
+    单个连接的批量发送器
+
+    在时间窗口内收集消息，窗口结束或消息数达到上限时以一个数组帧发送；
+    同一 fee_id 只保留最新一条（位置移到最后）
+
+    Args:
+        websocket: WebSocket 连接
+        send: 发送帧的函数
+        window: 时间窗口（秒）
+        max_messages: 单批最大消息数
+        on_error: 发送失败时的回调
+        join: 将已编码的消息拼接为数组帧（与连接的编码方式一致）
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        send: Callable[[Payload], Awaitable[None]],
+        window: float,
+        max_messages: int,
+        on_error: Optional[Callable[[WebSocket, Exception], Awaitable[None]]] = None,
+        join: Callable[[List[Payload]], Payload] = JSON.join,
+    ):
+        self.websocket = websocket
+        self.send = send
+        self.window = window
+        self.max_messages = max_messages
+        self.on_error = on_error
+        self.join = join
+        self._pending: "OrderedDict[Hashable, Payload]" = OrderedDict()
+        self._queued_bytes = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self.sent_frames = 0
+        self.coalesced = 0
+
+    @property
+    def queued_bytes(self) -> int:
+        """待发送消息占用的字节数（近似）"""
+        return self._queued_bytes
+
+    async def add(self, message: dict, payload: Payload) -> None:
+        """
+        加入待发送队列
+
+        Args:
+            message: 推送消息（用于计算合并键）
+            payload: 已编码的消息
+        """
+        key = coalesce_key(message)
+        previous = self._pending.pop(key, None)
+        if previous is not None:
+            self._queued_bytes -= len(previous)
+            self.coalesced += 1
+        self._pending[key] = payload
+        self._queued_bytes += len(payload)
+
+        if len(self._pending) >= self.max_messages:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """立即发送队列中的消息"""
+        if (
+            self._flush_task is not None
+            and self._flush_task is not asyncio.current_task()
+        ):
+            self._flush_task.cancel()
+        self._flush_task = None
+        if not self._pending:
+            return
+
+        # 消息已编码，直接拼接为数组帧
+        frame = self.join(list(self._pending.values()))
+        self._pending.clear()
+        self._queued_bytes = 0
+        try:
+            await self.send(frame)
+            self.sent_frames += 1
+        except Exception as e:
+            if self.on_error is not None:
+                await self.on_error(self.websocket, e)
+
+    def close(self) -> None:
+        """连接断开时丢弃未发送的消息"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._pending.clear()
+        self._queued_bytes = 0
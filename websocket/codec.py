@@ -0,0 +1,286 @@
+"""推送消息编码（JSON 文本帧 / msgpack 二进制帧）"""
+
+import json
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Tuple, Union
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except ImportError:  # 未安装时使用内置的精简实现（仅支持推送消息用到的类型）
+    msgpack = None
+
+Payload = Union[str, bytes]
+
+
+def _pack(obj: Any, out: bytearray) -> None:
+    """按 msgpack 规范编码单个值"""
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -0x20 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif obj >= 0:
+            for limit, tag, fmt in (
+                (0x100, 0xCC, ">B"),
+                (0x10000, 0xCD, ">H"),
+                (0x100000000, 0xCE, ">I"),
+                (0x10000000000000000, 0xCF, ">Q"),
+            ):
+                if obj < limit:
+                    out.append(tag)
+                    out += struct.pack(fmt, obj)
+                    return
+            raise OverflowError("整数超出 msgpack 范围")
+        else:
+            for limit, tag, fmt in (
+                (-0x80, 0xD0, ">b"),
+                (-0x8000, 0xD1, ">h"),
+                (-0x80000000, 0xD2, ">i"),
+                (-0x8000000000000000, 0xD3, ">q"),
+            ):
+                if obj >= limit:
+                    out.append(tag)
+                    out += struct.pack(fmt, obj)
+                    return
+            raise OverflowError("整数超出 msgpack 范围")
+    elif isinstance(obj, float):
+        out.append(0xCB)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        _pack_header(len(data), out, 0xA0, 32, (0xD9, 0xDA, 0xDB))
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        _pack_header(len(obj), out, None, 0, (0xC4, 0xC5, 0xC6))
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(len(obj), out, 0x90, 16, (None, 0xDC, 0xDD))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        _pack_header(len(obj), out, 0x80, 16, (None, 0xDE, 0xDF))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f"无法编码的类型: {type(obj).__name__}")
+
+
+def _pack_header(length: int, out: bytearray, fix: Any, fix_limit: int, tags):
+    """写入长度头：fix 格式或 8/16/32 位长度"""
+    if fix is not None and length < fix_limit:
+        out.append(fix | length)
+        return
+    for tag, limit, fmt in zip(tags, (0x100, 0x10000, 0x100000000), (">B", ">H", ">I")):
+        if tag is not None and length < limit:
+            out.append(tag)
+            out += struct.pack(fmt, length)
+            return
+    raise OverflowError("长度超出 msgpack 范围")
+
+
+def packb(obj: Any) -> bytes:
+    """
+    msgpack 编码
+
+    Args:
+        obj: 待编码的值（None/bool/int/float/str/bytes/list/dict）
+
+    Returns:
+        bytes: 编码结果
+    """
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def _unpack(data: bytes, offset: int) -> Tuple[Any, int]:
+    """解码单个值，返回 (值, 下一个偏移)"""
+    tag = data[offset]
+    offset += 1
+    if tag < 0x80:
+        return tag, offset
+    if tag >= 0xE0:
+        return tag - 0x100, offset
+    if 0xA0 <= tag <= 0xBF:
+        return _read_str(data, offset, tag & 0x1F)
+    if 0x90 <= tag <= 0x9F:
+        return _read_array(data, offset, tag & 0x0F)
+    if 0x80 <= tag <= 0x8F:
+        return _read_map(data, offset, tag & 0x0F)
+    if tag in _CONSTANTS:
+        return _CONSTANTS[tag], offset
+    if tag in _NUMBERS:
+        fmt = _NUMBERS[tag]
+        size = struct.calcsize(fmt)
+        return struct.unpack_from(fmt, data, offset)[0], offset + size
+    if tag in _SIZED:
+        kind, fmt = _SIZED[tag]
+        length = struct.unpack_from(fmt, data, offset)[0]
+        offset += struct.calcsize(fmt)
+        if kind == "str":
+            return _read_str(data, offset, length)
+        if kind == "bin":
+            return bytes(data[offset : offset + length]), offset + length
+        if kind == "array":
+            return _read_array(data, offset, length)
+        return _read_map(data, offset, length)
+    raise ValueError(f"不支持的 msgpack 类型: 0x{tag:02x}")
+
+
+def _read_str(data: bytes, offset: int, length: int) -> Tuple[str, int]:
+    return data[offset : offset + length].decode("utf-8"), offset + length
+
+
+def _read_array(data: bytes, offset: int, length: int) -> Tuple[list, int]:
+    items = []
+    for _ in range(length):
+        item, offset = _unpack(data, offset)
+        items.append(item)
+    return items, offset
+
+
+def _read_map(data: bytes, offset: int, length: int) -> Tuple[dict, int]:
+    result = {}
+    for _ in range(length):
+        key, offset = _unpack(data, offset)
+        result[key], offset = _unpack(data, offset)
+    return result, offset
+
+
+_CONSTANTS = {0xC0: None, 0xC2: False, 0xC3: True}
+_NUMBERS = {
+    0xCA: ">f",
+    0xCB: ">d",
+    0xCC: ">B",
+    0xCD: ">H",
+    0xCE: ">I",
+    0xCF: ">Q",
+    0xD0: ">b",
+    0xD1: ">h",
+    0xD2: ">i",
+    0xD3: ">q",
+}
+_SIZED = {
+    0xC4: ("bin", ">B"),
+    0xC5: ("bin", ">H"),
+    0xC6: ("bin", ">I"),
+    0xD9: ("str", ">B"),
+    0xDA: ("str", ">H"),
+    0xDB: ("str", ">I"),
+    0xDC: ("array", ">H"),
+    0xDD: ("array", ">I"),
+    0xDE: ("map", ">H"),
+    0xDF: ("map", ">I"),
+}
+
+
+def unpackb(data: bytes) -> Any:
+    """
+    msgpack 解码（供测试和 Python 客户端使用）
+
+    Args:
+        data: 编码结果
+
+    Returns:
+        Any: 解码后的值
+    """
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    value, _ = _unpack(data, 0)
+    return value
+
+
+class Codec(ABC):
+    """
+    连接的编码方式
+
+    Args:
+        name: 编码名称（连接时 ?encoding= 指定）
+        binary: 是否为二进制帧
+    """
+
+    def __init__(self, name: str, binary: bool):
+        self.name = name
+        self.binary = binary
+
+    @abstractmethod
+    def encode(self, message: dict) -> Payload:
+        """编码单条消息"""
+
+    @abstractmethod
+    def join(self, payloads: List[Payload]) -> Payload:
+        """将多条已编码的消息拼接为一个数组（批量模式、补发）"""
+
+
+class JsonCodec(Codec):
+    """JSON 文本帧（默认）"""
+
+    def __init__(self):
+        super().__init__("json", binary=False)
+
+    def encode(self, message: dict) -> str:
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+    def join(self, payloads: List[str]) -> str:
+        return "[" + ",".join(payloads) + "]"
+
+
+class MsgpackCodec(Codec):
+    """msgpack 二进制帧"""
+
+    def __init__(self):
+        super().__init__("msgpack", binary=True)
+
+    def encode(self, message: dict) -> bytes:
+        return packb(message)
+
+    def join(self, payloads: List[bytes]) -> bytes:
+        # msgpack 数组 = 长度头 + 各元素编码直接拼接
+        header = bytearray()
+        _pack_header(len(payloads), header, 0x90, 16, (None, 0xDC, 0xDD))
+        return bytes(header) + b"".join(payloads)
+
+
+JSON = JsonCodec()
+MSGPACK = MsgpackCodec()
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (JSON, MSGPACK)}
+
+
+def negotiate_codec(websocket: WebSocket) -> Codec:
+    """连接时通过 ?encoding=msgpack 协商编码，未指定或不支持时使用 JSON"""
+    return CODECS.get(websocket.query_params.get("encoding", "").lower(), JSON)
+
+
+class EncodedMessage:
+    """
+    一条推送消息及其各编码结果（每种编码只编码一次，所有连接共用）
+
+    Args:
+        message: 推送消息
+    """
+
+    __slots__ = ("message", "_payloads")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._payloads: Dict[str, Payload] = {}
+
+    def payload(self, codec: Codec) -> Payload:
+        """取指定编码的结果，首次使用时编码"""
+        payload = self._payloads.get(codec.name)
+        if payload is None:
+            payload = codec.encode(self.message)
+            self._payloads[codec.name] = payload
+        return payload
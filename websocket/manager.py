@@ -1,8 +1,23 @@
 """管理连接池 + 推送逻辑"""
 
-from typing import List, Dict
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Deque, List, Dict, NamedTuple, Optional, Tuple
 from fastapi import WebSocket
 
+from config.settings import settings
+from utils.auth import ROLE_DRIVER, ROLE_PLATFORM, Identity
+from websocket.batching import MessageBatcher
+from websocket.codec import EncodedMessage, Payload, negotiate_codec
+
+# 关闭码
+CLOSE_GOING_AWAY = 1001  # 心跳超时，服务端主动断开
+CLOSE_POLICY_VIOLATION = 1008  # 待发送消息超过上限（客户端消费过慢）
+CLOSE_MESSAGE_TOO_BIG = 1009  # 客户端消息过大
+CLOSE_TRY_AGAIN_LATER = 1013  # 连接数已满
+
 # 存储所有活跃的 WebSocket 连接
 connected_clients: Dict[str, List[WebSocket]] = {
     "platform": [],  # 平台端连接
@@ -11,43 +26,399 @@ connected_clients: Dict[str, List[WebSocket]] = {
 }
 
 
-async def connect(websocket: WebSocket, client_type: str):
-    """新客户端连接时加入对应类型的连接池"""
+class PushScope(NamedTuple):
+    """
+    推送范围（按连接握手时的令牌身份过滤接收者）
+
+    平台端令牌接收全部推送，客户端令牌只接收所属公司的推送，司机令牌只接收
+    本人的推送；未携带令牌的连接不接收（范围为 None 的广播除外）
+    """
+
+    company_id: Optional[str] = None
+    driver_account_id: Optional[str] = None
+
+    def allows(self, identity: Optional[Identity]) -> bool:
+        if identity is None:
+            return False
+        if identity.role == ROLE_PLATFORM:
+            return True
+        if identity.role == ROLE_DRIVER:
+            return (
+                self.driver_account_id is not None
+                and identity.driver_account_id == self.driver_account_id
+            )
+        return self.company_id is not None and identity.company_id == self.company_id
+
+
+def _receives(client: WebSocket, scope: Optional[PushScope]) -> bool:
+    """连接是否接收该推送（scope 为 None 时为广播）"""
+    return scope is None or scope.allows(getattr(client.state, "identity", None))
+
+
+# 推送序号：每种类型（主题）单独递增；epoch 标识本进程，进程重启后序号不可续接
+epoch = uuid.uuid4().hex[:12]
+_sequences: Dict[str, int] = {client_type: 0 for client_type in connected_clients}
+
+# 每个主题最近的推送（序号, 消息及其编码结果, 推送范围），用于断线重连补发
+_replay_buffers: Dict[str, Deque[Tuple[int, EncodedMessage, Optional[PushScope]]]] = {
+    client_type: deque(maxlen=settings.WS_REPLAY_BUFFER_SIZE)
+    for client_type in connected_clients
+}
+
+# 累计计数（拒绝、回收、发送失败、重连补发、要求重新同步）
+_counters: Dict[str, int] = {
+    "rejected": 0,
+    "reaped": 0,
+    "send_failed": 0,
+    "resumed": 0,
+    "resync": 0,
+}
+
+# 心跳任务（有连接时启动，连接全部断开后退出）
+_heartbeat_task: Optional[asyncio.Task] = None
+
+
+def _batch_requested(websocket: WebSocket) -> bool:
+    """连接时通过 ?batch=1 协商批量模式，旧客户端仍逐条接收"""
+    return websocket.query_params.get("batch", "").lower() in ("1", "true")
+
+
+def _heartbeat_requested(websocket: WebSocket) -> bool:
+    """
+    连接时通过 ?heartbeat=1 开启应用层心跳（接收 ping 并回复 pong）
+
+    未开启的连接不接收 ping、不按存活时间回收，由协议层 ping/pong
+    （uvicorn ws_ping_interval）回收半开连接
+    """
+    return websocket.query_params.get("heartbeat", "").lower() in ("1", "true")
+
+
+async def connect(
+    websocket: WebSocket, client_type: str, identity: Optional[Identity] = None
+) -> bool:
+    """
+    新客户端连接时加入对应类型的连接池
+
+    Args:
+        websocket: WebSocket 连接
+        client_type: 连接类型
+        identity: 握手时校验的令牌身份（未携带令牌时为 None）
+
+    Returns:
+        bool: 是否接入成功，连接数已满时以 1013 关闭
+    """
     await websocket.accept()
-    if client_type in connected_clients:
-        connected_clients[client_type].append(websocket)
+    clients = connected_clients.get(client_type)
+    if clients is not None and len(clients) >= settings.WS_MAX_CONNECTIONS.get(
+        client_type, 0
+    ):
+        _counters["rejected"] += 1
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return False
+
+    now = time.monotonic()
+    state = websocket.state
+    state.identity = identity
+    state.connected_at = now
+    state.last_seen = now
+    state.app_heartbeat = _heartbeat_requested(websocket)
+    state.bytes_sent = 0
+    state.bytes_received = 0
+    state.messages_sent = 0
+    state.codec = negotiate_codec(websocket)
+    state.batcher = None
+    if _batch_requested(websocket):
+        state.batcher = MessageBatcher(
+            websocket,
+            send=lambda payload: _send_payload(websocket, payload),
+            join=state.codec.join,
+            window=settings.WS_BATCH_WINDOW_MS / 1000,
+            max_messages=settings.WS_BATCH_MAX_MESSAGES,
+            on_error=_on_send_error,
+        )
+    if clients is not None:
+        last_seq = _requested_last_seq(websocket)
+        if last_seq is None:
+            clients.append(websocket)
+        else:
+            await _resume(websocket, client_type, last_seq)
+        _ensure_heartbeat()
+    return True
 
 
 def disconnect(websocket: WebSocket):
     """客户端断开连接时从所有类型中移除"""
+    batcher = getattr(websocket.state, "batcher", None)
+    if batcher is not None:
+        batcher.close()
     for client_list in connected_clients.values():
         if websocket in client_list:
             client_list.remove(websocket)
 
 
-async def send_message_to_type(client_type: str, message: dict):
-    """向特定类型的所有客户端发送消息"""
-    if client_type not in connected_clients:
+async def _close(client: WebSocket, code: int):
+    """移除并关闭连接（连接可能已失效，忽略关闭失败）"""
+    disconnect(client)
+    try:
+        await client.close(code=code)
+    except Exception:
+        pass
+
+
+async def _on_send_error(client: WebSocket, error: Exception):
+    """发送失败（含超时）时关闭并移除连接"""
+    _counters["send_failed"] += 1
+    await _close(client, CLOSE_GOING_AWAY)
+
+
+async def _send_payload(client: WebSocket, payload: Payload):
+    """带超时的发送（二进制编码发送 bytes 帧），半开连接不会一直占用推送"""
+    if isinstance(payload, bytes):
+        send = client.send_bytes(payload)
+    else:
+        send = client.send_text(payload)
+    await asyncio.wait_for(send, settings.WS_SEND_TIMEOUT)
+    client.state.bytes_sent += len(payload)
+    client.state.messages_sent += 1
+
+
+async def _deliver(client: WebSocket, encoded: EncodedMessage):
+    """发送给单个连接：批量模式加入队列，否则立即发送"""
+    payload = encoded.payload(client.state.codec)
+    batcher = getattr(client.state, "batcher", None)
+    if batcher is not None:
+        await batcher.add(encoded.message, payload)
+        if batcher.queued_bytes > settings.WS_MAX_QUEUED_BYTES:
+            await _close(client, CLOSE_POLICY_VIOLATION)
         return
+    try:
+        await _send_payload(client, payload)
+    except Exception as e:
+        await _on_send_error(client, e)
 
-    for client in connected_clients[client_type]:
-        try:
-            await client.send_json(message)
-        except Exception as e:
-            print(f"Error sending message to {client_type} client: {e}")
-            await client.close()
-            disconnect(client)
 
+def _requested_last_seq(websocket: WebSocket) -> Optional[int]:
+    """重连时通过 ?last_seq=N 请求补发，未携带时为 None（不补发）"""
+    value = websocket.query_params.get("last_seq")
+    if value is None:
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return 0
 
-async def send_message_to_all_except_sender(sender_type: str, message: dict):
-    """向除发送者类型外的所有客户端发送消息"""
-    for client_type, clients in connected_clients.items():
+
+async def _send_frames(websocket: WebSocket, payloads: List[Payload]):
+    """补发消息：批量模式合并为一个数组帧，否则逐条发送"""
+    if not payloads:
+        return
+    if websocket.state.batcher is not None:
+        await _send_payload(websocket, websocket.state.codec.join(payloads))
+        return
+    for payload in payloads:
+        await _send_payload(websocket, payload)
+
+
+async def _resume(websocket: WebSocket, client_type: str, last_seq: int):
+    """
+    重连补发：只发送 last_seq 之后的推送，缓冲区已不包含时要求客户端重新同步
+
+    补发期间可能有新推送，循环补发直到追上最新序号再加入连接池（两者之间
+    没有 await，不会漏发）；最后发送 synced 或 resync_required（带 epoch 和
+    当前序号），客户端保存后用于下次重连。只补发该连接范围内的推送
+
+    Args:
+        websocket: WebSocket 连接
+        client_type: 连接类型（主题）
+        last_seq: 客户端已收到的最大序号
+    """
+    buffer = _replay_buffers[client_type]
+    requested_epoch = websocket.query_params.get("epoch")
+    oldest = buffer[0][0] if buffer else _sequences[client_type] + 1
+    resync = (
+        (requested_epoch is not None and requested_epoch != epoch)
+        or last_seq > _sequences[client_type]
+        or last_seq < oldest - 1
+    )
+
+    try:
+        while not resync:
+            if last_seq >= _sequences[client_type]:
+                break
+            payloads = [
+                encoded.payload(websocket.state.codec)
+                for seq, encoded, scope in buffer
+                if seq > last_seq and _receives(websocket, scope)
+            ]
+            last_seq = _sequences[client_type]
+            if payloads:
+                await _send_frames(websocket, payloads)
+    except Exception as e:
+        await _on_send_error(websocket, e)
+        return
+
+    _counters["resync" if resync else "resumed"] += 1
+    connected_clients[client_type].append(websocket)
+    control = {
+        "type": "resync_required" if resync else "synced",
+        "epoch": epoch,
+        "seq": _sequences[client_type],
+    }
+    await _deliver(websocket, EncodedMessage(control))
+
+
+async def publish(client_type: str, message: dict, scope: Optional[PushScope] = None):
+    """
+    向特定类型（主题）推送：分配序号、写入补发缓冲区并发送给范围内的连接
+
+    序号按主题分配，范围外的推送也占用序号，连接收到的序号可能不连续
+
+    Args:
+        client_type: 连接类型
+        message: 推送消息（不修改，发送的副本带 seq 字段）
+        scope: 推送范围，为 None 时广播给该类型的所有连接
+    """
+    _sequences[client_type] += 1
+    seq = _sequences[client_type]
+    # 每个主题每种编码只编码一次，所有连接共用
+    encoded = EncodedMessage({**message, "seq": seq})
+    _replay_buffers[client_type].append((seq, encoded, scope))
+
+    # 发送失败会从列表中移除连接，遍历副本
+    for client in list(connected_clients[client_type]):
+        if _receives(client, scope):
+            await _deliver(client, encoded)
+
+
+async def send_message_to_type(
+    client_type: str, message: dict, scope: Optional[PushScope] = None
+):
+    """向特定类型范围内的客户端发送消息"""
+    if client_type not in connected_clients:
+        return
+    await publish(client_type, message, scope)
+
+
+async def send_message_to_all_except_sender(
+    sender_type: str, message: dict, scope: Optional[PushScope] = None
+):
+    """向除发送者类型外范围内的客户端发送消息"""
+    for client_type in connected_clients:
         if client_type == sender_type:
             continue
+        await publish(client_type, message, scope)
+
+
+def _ensure_heartbeat():
+    """启动心跳任务（已在当前事件循环运行时不重复启动）"""
+    global _heartbeat_task
+    loop = asyncio.get_running_loop()
+    if (
+        _heartbeat_task is not None
+        and not _heartbeat_task.done()
+        and _heartbeat_task.get_loop() is loop
+    ):
+        return
+    _heartbeat_task = loop.create_task(_heartbeat())
+
+
+async def heartbeat_once(now: Optional[float] = None) -> int:
+    """
+    一轮心跳：回收超时未响应的连接，向其余连接发送 ping
+
+    只处理开启了应用层心跳的连接，客户端收到 ping 后回复 {"type": "pong"}
+    （任意消息均视为存活）
+
+    Args:
+        now: 当前时间（monotonic）
+
+    Returns:
+        int: 本轮回收的连接数
+    """
+    now = time.monotonic() if now is None else now
+    deadline = settings.WS_PING_INTERVAL + settings.WS_PONG_TIMEOUT
+    ping = EncodedMessage({"type": "ping", "ts": int(time.time() * 1000)})
+
+    reaped = 0
+    alive = []
+    for clients in connected_clients.values():
+        for client in list(clients):
+            if not client.state.app_heartbeat:
+                continue
+            if now - client.state.last_seen > deadline:
+                await _close(client, CLOSE_GOING_AWAY)
+                reaped += 1
+            else:
+                alive.append(client)
+    _counters["reaped"] += reaped
+    # 并发发送，单个慢连接不拖慢整轮心跳
+    await asyncio.gather(*(_deliver(client, ping) for client in alive))
+    return reaped
+
+
+async def _heartbeat():
+    while any(connected_clients.values()):
+        await asyncio.sleep(settings.WS_PING_INTERVAL)
+        # 已被其他事件循环中的心跳任务取代时退出，避免重复心跳
+        if _heartbeat_task is not asyncio.current_task():
+            return
+        await heartbeat_once()
+
+
+async def handle_connection(
+    websocket: WebSocket, client_type: str, identity: Optional[Identity] = None
+):
+    """
+    连接的接收循环：收到任意消息即刷新存活时间，pong 及其他消息不做处理
+
+    Args:
+        websocket: WebSocket 连接
+        client_type: 连接类型
+        identity: 握手时校验的令牌身份
+    """
+    if not await connect(websocket, client_type, identity):
+        return
+    try:
+        while True:
+            # 二进制编码的客户端可能以 bytes 帧回复
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("text") or message.get("bytes") or ""
+            websocket.state.last_seen = time.monotonic()
+            websocket.state.bytes_received += len(data)
+            if len(data) > settings.WS_MAX_MESSAGE_BYTES:
+                await _close(websocket, CLOSE_MESSAGE_TOO_BIG)
+                return
+    except Exception:
+        # 客户端断开（WebSocketDisconnect）或连接已被关闭
+        pass
+    finally:
+        disconnect(websocket)
+
+
+def connection_stats() -> dict:
+    """
+    连接统计（用于监控）
+
+    Returns:
+        dict: 每种类型的连接数、收发字节数、待发送字节数，以及累计计数
+    """
+    stats = {}
+    for client_type, clients in connected_clients.items():
+        queued = 0
         for client in clients:
-            try:
-                await client.send_json(message)
-            except Exception as e:
-                print(f"Error sending message to {client_type} client: {e}")
-                await client.close()
-                disconnect(client)
+            batcher = getattr(client.state, "batcher", None)
+            if batcher is not None:
+                queued += batcher.queued_bytes
+        stats[client_type] = {
+            "connections": len(clients),
+            "limit": settings.WS_MAX_CONNECTIONS.get(client_type, 0),
+            "bytes_sent": sum(client.state.bytes_sent for client in clients),
+            "bytes_received": sum(client.state.bytes_received for client in clients),
+            "queued_bytes": queued,
+            "seq": _sequences[client_type],
+            "buffered": len(_replay_buffers[client_type]),
+        }
+    stats.update(_counters)
+    return stats
@@ -0,0 +1,180 @@
+"""推送发件箱（与业务数据同事务写入）+ 后台分发"""
+
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from config.settings import settings
+from models.outbox import PushOutbox
+from utils.tasks import task_runtime
+from websocket.manager import PushScope, send_message_to_type
+
+# 分发任务所在的后台任务队列（单并发，保证推送顺序）
+OUTBOX_QUEUE = "push"
+task_runtime.register_queue(OUTBOX_QUEUE, concurrency=1, max_retries=5)
+
+
+def enqueue_push(
+    db: Session,
+    client_types: Sequence[str],
+    message: dict,
+    company_id: Optional[str] = None,
+    driver_account_id: Optional[str] = None,
+) -> None:
+    """
+    写入推送发件箱（不提交，随业务数据一起提交；回滚时推送也不会发出）
+
+    推送只发给范围内的连接：平台端全部接收，客户端只接收 company_id 公司的，
+    司机端只接收 driver_account_id 本人的（为空时该类连接都不接收）
+
+    Args:
+        db: 业务使用的数据库会话
+        client_types: 推送目标连接类型
+        message: 推送消息
+        company_id: 推送范围：接收的客户公司ID
+        driver_account_id: 推送范围：接收的司机账户ID
+    """
+    payload = json.dumps(jsonable_encoder(message), ensure_ascii=False)
+    for client_type in client_types:
+        db.add(
+            PushOutbox(
+                client_type=client_type,
+                message=payload,
+                company_id=company_id,
+                driver_account_id=driver_account_id,
+            )
+        )
+
+
+class OutboxDispatcher:
+    """
+    发件箱分发任务
+
+    按 id 顺序批量读取发件箱推送给本进程的 WebSocket 连接。每个进程维护
+    自己的游标（多进程部署时每个进程都推送给自己的连接），未分发过的记录
+    （dispatched_at 为空）总会被读取，进程在提交后、推送前退出时由其他进程
+    或重启后的进程补发。分发在后台任务的 push 队列中串行执行：每个进程启动时
+    调用 schedule() 按轮询间隔定期入队（其他进程写入的推送也能送达本进程的
+    连接），业务接口提交后调用 notify() 立即入队
+
+    Args:
+        engine: 数据库引擎（默认使用应用的引擎）
+        batch_size: 单批读取条数
+        poll_interval: 轮询间隔（秒）
+        retention_hours: 已分发记录保留时间
+    """
+
+    # 每分发多少批清理一次过期记录
+    CLEANUP_EVERY = 100
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        batch_size: int = 200,
+        poll_interval: float = 1.0,
+        retention_hours: int = 24,
+    ):
+        self._engine = engine
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self._cursor: Optional[int] = None
+        self._batches = 0
+        self.dispatched = 0
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from config.database import engine
+
+            self._engine = engine
+        return self._engine
+
+    def schedule(self) -> None:
+        """在 push 队列中定期分发（应用启动时调用，每个进程一次）"""
+        task_runtime.every(self.poll_interval, OUTBOX_QUEUE, self.drain, key=self)
+
+    def notify(self) -> None:
+        """业务事务提交后调用：立即唤醒分发（排队中的分发任务只保留一个）"""
+        task_runtime.enqueue(OUTBOX_QUEUE, self.drain, key=self)
+
+    async def drain(self) -> None:
+        """分发所有待分发记录（失败时由任务队列退避重试）"""
+        while await self.dispatch_once() >= self.batch_size:
+            pass
+
+    async def dispatch_once(self) -> int:
+        """
+        分发一批记录
+
+        Returns:
+            int: 本批分发的条数
+        """
+        rows = await run_in_threadpool(self._fetch)
+        for row in rows:
+            await send_message_to_type(
+                row.client_type,
+                json.loads(row.message),
+                PushScope(row.company_id, row.driver_account_id),
+            )
+        if rows:
+            self._cursor = max(self._cursor, rows[-1].id)
+            await run_in_threadpool(self._mark, [row.id for row in rows])
+            self.dispatched += len(rows)
+        return len(rows)
+
+    def _fetch(self) -> List[PushOutbox]:
+        with Session(self.engine, expire_on_commit=False) as session:
+            if self._cursor is None:
+                # 启动时从最早的未分发记录开始，没有则从最新记录之后开始
+                pending = session.exec(
+                    select(func.min(PushOutbox.id)).where(
+                        PushOutbox.dispatched_at.is_(None)
+                    )
+                ).one()
+                latest = session.exec(select(func.max(PushOutbox.id))).one()
+                self._cursor = pending - 1 if pending is not None else latest or 0
+            return list(
+                session.exec(
+                    select(PushOutbox)
+                    .where(
+                        or_(
+                            PushOutbox.id > self._cursor,
+                            PushOutbox.dispatched_at.is_(None),
+                        )
+                    )
+                    .order_by(PushOutbox.id)
+                    .limit(self.batch_size)
+                ).all()
+            )
+
+    def _mark(self, ids: List[int]) -> None:
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            session.exec(
+                update(PushOutbox)
+                .where(PushOutbox.id.in_(ids), PushOutbox.dispatched_at.is_(None))
+                .values(dispatched_at=now)
+            )
+            self._batches += 1
+            if self._batches % self.CLEANUP_EVERY == 0:
+                session.exec(
+                    delete(PushOutbox).where(
+                        PushOutbox.dispatched_at
+                        < now - timedelta(hours=self.retention_hours)
+                    )
+                )
+            session.commit()
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.WS_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.WS_OUTBOX_POLL_INTERVAL,
+    retention_hours=settings.WS_OUTBOX_RETENTION_HOURS,
+)
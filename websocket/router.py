@@ -1,42 +1,42 @@
 """WebSocket 路由"""
 
-from fastapi import APIRouter, WebSocket
-from websocket.manager import connect, disconnect
+from typing import Optional
+
+from fastapi import APIRouter, Depends, WebSocket
+from utils.auth import (
+    ROLE_CLIENT,
+    ROLE_DRIVER,
+    ROLE_PLATFORM,
+    Identity,
+    require_role,
+)
+from websocket.manager import handle_connection
 
 ws_router = APIRouter()
 
 
 @ws_router.websocket("/platform")
-async def platform_websocket(websocket: WebSocket):
-    """平台端连接"""
-    await connect(websocket, "platform")
-    try:
-        while True:
-            data = await websocket.receive_text()
-            print(f"Received from platform: {data}")
-    except Exception:
-        disconnect(websocket)
+async def platform_websocket(
+    websocket: WebSocket,
+    identity: Optional[Identity] = Depends(require_role(ROLE_PLATFORM)),
+):
+    """平台端连接（令牌放在查询参数 access_token 中，握手时校验）"""
+    await handle_connection(websocket, "platform", identity)
 
 
 @ws_router.websocket("/client")
-async def client_websocket(websocket: WebSocket):
+async def client_websocket(
+    websocket: WebSocket,
+    identity: Optional[Identity] = Depends(require_role(ROLE_CLIENT)),
+):
     """客户端连接"""
-    await connect(websocket, "client")
-    try:
-        while True:
-            data = await websocket.receive_text()
-            print(f"Received from client: {data}")
-    except Exception:
-        disconnect(websocket)
+    await handle_connection(websocket, "client", identity)
 
 
 @ws_router.websocket("/driver")
-async def driver_websocket(websocket: WebSocket):
+async def driver_websocket(
+    websocket: WebSocket,
+    identity: Optional[Identity] = Depends(require_role(ROLE_DRIVER)),
+):
     """司机端连接"""
-    await connect(websocket, "driver")
-    try:
-        while True:
-            data = await websocket.receive_text()
-            print(f"Received from driver: {data}")
-    except Exception:
-        disconnect(websocket)
+    await handle_connection(websocket, "driver", identity)